@@ -0,0 +1,47 @@
+"""
+Connection benchmark: db_manager calls per second with connect-per-call
+(the old get_db_connection) versus the pooled ConnectionManager.
+
+Run from the project root:
+    python -m benchmarks.bench_connections
+"""
+import os
+import sqlite3
+import tempfile
+import time
+
+from src import db_manager
+from db.database_setup import setup_database
+
+ITERATIONS = 5000
+
+def legacy_get_setting(key, default=None):
+    """get_setting as it was before the connection manager."""
+    conn = sqlite3.connect(db_manager.DATABASE_PATH)
+    conn.row_factory = sqlite3.Row
+    row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+    conn.close()
+    return row['value'] if row else default
+
+def timed(label, fn):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn("company_state")
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {ITERATIONS / elapsed:12,.0f} calls/sec")
+    return elapsed
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager.DATABASE_PATH = os.path.join(tmp, "bench.db")
+        setup_database(db_path=db_manager.DATABASE_PATH)
+
+        before = timed("connect per call", legacy_get_setting)
+        connects = db_manager._connections.connects
+        after = timed("pooled connection", db_manager.get_setting)
+        print(f"{'speed-up':<28} {before / after:12.1f}x")
+        print(f"{'connections opened (pooled)':<28} {db_manager._connections.connects - connects:12d}")
+        db_manager.close_all_connections()
+
+if __name__ == '__main__':
+    main()
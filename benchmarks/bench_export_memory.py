@@ -0,0 +1,60 @@
+"""
+Export memory benchmark: 1,000,000 customers. Compares peak Python memory
+of the old export (fetchall, then dict(row) per row) with the Record list
+returned by get_customers_for_export and with the streaming
+iter_customers_for_export written straight to CSV.
+
+Run from the project root:
+    python -m benchmarks.bench_export_memory
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+
+from src import db_manager
+from src import csv_generator
+from db.database_setup import setup_database
+
+ROWS = 1_000_000
+
+def populate():
+    conn = db_manager.get_db_connection()
+    with conn:
+        conn.executemany("INSERT INTO customers (name, gstin, address, phone, email, state) VALUES (?, ?, ?, ?, ?, ?)",
+                         ((f"Customer {n}", f"29ABCDE{n:07d}Z", f"{n} Main Road", f"98{n:08d}", f"c{n}@example.com", "Karnataka")
+                          for n in range(ROWS)))
+    conn.close()
+
+def legacy():
+    conn = db_manager.get_db_connection()
+    rows = conn.execute("SELECT id, name, gstin, address, phone, email, state FROM customers ORDER BY id").fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+def measured(label, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"{label:<36} {peak / 2**20:9.1f} MB peak {elapsed:8.2f} s")
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager.DATABASE_PATH = os.path.join(tmp, "bench.db")
+        setup_database(db_path=db_manager.DATABASE_PATH)
+        populate()
+        print(f"{ROWS:,} customers")
+
+        csv_path = os.path.join(tmp, "customers.csv")
+        measured("old: list of dicts", legacy)
+        measured("get_customers_for_export (Records)", db_manager.get_customers_for_export)
+        measured("old: list of dicts to CSV", lambda: csv_generator.export_to_csv(legacy(), csv_path))
+        measured("iter_customers_for_export to CSV", lambda: csv_generator.export_to_csv(db_manager.iter_customers_for_export(), csv_path))
+        db_manager.close_all_connections()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+GL posting benchmark: vouchers per second posted one create_gl_transaction
+commit at a time versus a single post_gl_batch call, on a synthetic ledger.
+
+Run from the project root:
+    python -m benchmarks.bench_gl_batch
+"""
+import os
+import random
+import tempfile
+import time
+
+from src import db_manager
+from db.database_setup import setup_database
+
+VOUCHERS = 5000
+
+def synthetic_ledger(account_ids, count, seed=7):
+    """Balanced three-line vouchers spread over a year."""
+    rng = random.Random(seed)
+    vouchers = []
+    for n in range(count):
+        debit_account, credit_account, tax_account = rng.sample(account_ids, 3)
+        amount = round(rng.uniform(10, 5000), 2)
+        tax = round(amount * 0.18, 2)
+        vouchers.append({
+            "description": f"Synthetic voucher {n}",
+            "date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "entries": [(debit_account, amount + tax, None), (credit_account, None, amount), (tax_account, None, tax)],
+            "source_doc_type": "BENCH", "source_doc_id": n,
+        })
+    return vouchers
+
+def one_at_a_time(vouchers):
+    for v in vouchers:
+        conn = db_manager.get_db_connection()
+        with conn:
+            db_manager.create_gl_transaction(conn, v["description"], v["date"], v["entries"], v["source_doc_type"], v["source_doc_id"])
+        conn.close()
+
+def timed(label, fn, vouchers):
+    start = time.perf_counter()
+    fn(vouchers)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(vouchers) / elapsed:12,.0f} vouchers/sec")
+    return elapsed
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager.DATABASE_PATH = os.path.join(tmp, "bench.db")
+        setup_database(db_path=db_manager.DATABASE_PATH)
+        account_ids = [a['id'] for a in db_manager.get_all_accounts()]
+        vouchers = synthetic_ledger(account_ids, VOUCHERS)
+
+        before = timed("commit per voucher", one_at_a_time, vouchers)
+        after = timed("post_gl_batch", db_manager.post_gl_batch, vouchers)
+        print(f"{'speed-up':<28} {before / after:12.1f}x")
+        assert db_manager.check_account_daily_balances() == []
+        db_manager.close_all_connections()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Sale posting benchmark: one 500-line invoice carrying 2,000 serials, posted
+with the old per-line create_sale_invoice_transaction loop and with the
+current set-based version.
+
+Run from the project root:
+    python -m benchmarks.bench_sale_posting
+"""
+import datetime
+import os
+import tempfile
+import time
+
+from dateutil.relativedelta import relativedelta
+
+from src import db_manager
+from db.database_setup import setup_database
+
+ITEMS = 100
+LINES = 500
+SERIALS_PER_LINE = 4
+
+def legacy_post_sale(invoice_data, items_data):
+    """The per-line posting loop as it was before the set-based rewrite."""
+    conn = db_manager.get_db_connection()
+    with conn:
+        cursor = conn.cursor()
+        accounts = {name: id for id, name in cursor.execute("SELECT id, name FROM accounts WHERE name IN ('Accounts Receivable', 'Sales Revenue', 'GST Payable', 'Cost of Goods Sold', 'Inventory')").fetchall()}
+        cursor.execute("""
+            INSERT INTO sales_invoices (customer_id, invoice_number, invoice_date, total_amount, taxable_amount, cgst_amount, sgst_amount, igst_amount, total_gst_amount, notes, status, amount_paid)
+            VALUES (:customer_id, :invoice_number, :invoice_date, :total_amount, :taxable_amount, :cgst_amount, :sgst_amount, :igst_amount, :total_gst_amount, :notes, 'UNPAID', 0.0)
+        """, invoice_data)
+        sale_invoice_id = cursor.lastrowid
+        total_cogs = 0
+        for item in items_data:
+            item_cost = cursor.execute("SELECT purchase_price FROM items WHERE id = ?", (item['item_id'],)).fetchone()['purchase_price'] or 0
+            total_cogs += item_cost * item['quantity']
+            cursor.execute("""
+                INSERT INTO sales_invoice_items (sales_invoice_id, item_id, quantity, selling_price, taxable_value, cgst_rate, sgst_rate, igst_rate, cgst_amount, sgst_amount, igst_amount, total_gst_amount)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (sale_invoice_id, item['item_id'], item['quantity'], item['selling_price'], 0, 0, 0, 0, 0, 0, 0, 0))
+            if item.get('serial_ids'):
+                warranty_months = cursor.execute("SELECT default_warranty_months FROM items WHERE id = ?", (item['item_id'],)).fetchone()['default_warranty_months']
+                warranty_end_date = None
+                if warranty_months:
+                    invoice_date = datetime.datetime.fromisoformat(invoice_data['invoice_date']).date()
+                    warranty_end_date = (invoice_date + relativedelta(months=+warranty_months)).isoformat()
+                for sn_id in item['serial_ids']:
+                    cursor.execute("UPDATE item_serial_numbers SET status = 'SOLD', sale_invoice_id = ?, warranty_end_date = ? WHERE id = ?", (sale_invoice_id, warranty_end_date, sn_id))
+        db_manager.create_gl_transaction(conn, "Sale", invoice_data['invoice_date'],
+                                         [(accounts['Accounts Receivable'], invoice_data['total_amount'], None), (accounts['Sales Revenue'], None, invoice_data['taxable_amount'])], 'SALE', sale_invoice_id)
+        db_manager.create_gl_transaction(conn, "COGS", invoice_data['invoice_date'],
+                                         [(accounts['Cost of Goods Sold'], total_cogs, None), (accounts['Inventory'], None, total_cogs)], 'SALE_COGS', sale_invoice_id)
+    conn.close()
+    return sale_invoice_id
+
+def stock_up():
+    """Creates ITEMS serialized items with enough serials for two full invoices."""
+    db_manager.add_godown("Main", "HQ")
+    db_manager.add_supplier("Supplier", "", "", "", "", "State")
+    db_manager.add_customer("Customer", "", "", "", "", "State", "", "", 0.0)
+    per_item = 2 * LINES * SERIALS_PER_LINE // ITEMS
+    lines = []
+    for n in range(ITEMS):
+        db_manager.add_item(f"Item {n}", 100, 150, 12, 0, "Bench", None, None, None, is_serialized=True)
+        lines.append({"item_id": n + 1, "quantity": per_item, "purchase_price": 100,
+                      "serial_numbers": [f"SN-{n}-{k}" for k in range(per_item)], "godown_id": 1})
+    total = ITEMS * per_item * 100
+    db_manager.create_purchase_invoice_transaction(
+        {"supplier_id": 1, "invoice_number": "P-1", "invoice_date": "2024-01-01", "total_amount": total, "taxable_amount": total,
+         "total_gst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "igst_amount": 0, "notes": ""}, lines)
+
+def build_invoice(number):
+    available = {}
+    for n in range(ITEMS):
+        available[n + 1] = [s['id'] for s in db_manager.get_available_serial_numbers_for_item(n + 1)]
+    items = []
+    for line in range(LINES):
+        item_id = line % ITEMS + 1
+        serials, available[item_id] = available[item_id][:SERIALS_PER_LINE], available[item_id][SERIALS_PER_LINE:]
+        items.append({"item_id": item_id, "quantity": SERIALS_PER_LINE, "selling_price": 150, "serial_ids": serials})
+    total = LINES * SERIALS_PER_LINE * 150
+    invoice = {"customer_id": 1, "invoice_number": number, "invoice_date": "2024-02-01", "total_amount": total, "taxable_amount": total,
+               "total_gst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "igst_amount": 0, "notes": ""}
+    return invoice, items
+
+def timed(label, fn, invoice, items):
+    start = time.perf_counter()
+    assert fn(invoice, items) is not None
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:10.1f} ms")
+    return elapsed
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager.DATABASE_PATH = os.path.join(tmp, "bench.db")
+        setup_database(db_path=db_manager.DATABASE_PATH)
+        stock_up()
+        print(f"{LINES} lines, {LINES * SERIALS_PER_LINE} serials per invoice")
+
+        before = timed("per-line (old)", legacy_post_sale, *build_invoice("INV-0001"))
+        after = timed("set-based", db_manager.create_sale_invoice_transaction, *build_invoice("INV-0002"))
+        print(f"{'speed-up':<28} {before / after:10.1f}x")
+        db_manager.close_all_connections()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Search-as-you-type benchmark: 500,000 searchable strings (serial numbers,
+party and item names), typed one keystroke at a time. Compares the
+in-memory prefix index behind search_suggestions with running
+universal_search on every keystroke.
+
+Run from the project root:
+    python -m benchmarks.bench_search_suggestions
+"""
+import os
+import tempfile
+import time
+
+from src import db_manager
+from db.database_setup import setup_database
+
+SERIALS = 490_000
+PARTIES = 5_000
+ITEMS = 5_000
+TYPED = "SN-0012345"
+
+def populate():
+    db_manager.add_godown("Main", "HQ")
+    conn = db_manager.get_db_connection()
+    with conn:
+        conn.executemany("INSERT INTO customers (name, state) VALUES (?, 'State')", ((f"Customer {n} Traders",) for n in range(PARTIES)))
+        conn.executemany("INSERT INTO items (name, is_serialized) VALUES (?, 1)", ((f"Item {n}",) for n in range(ITEMS)))
+        conn.executemany("INSERT INTO item_serial_numbers (item_id, serial_number, status, godown_id) VALUES (?, ?, 'IN_STOCK', 1)",
+                         ((n % ITEMS + 1, f"SN-{n:07d}") for n in range(SERIALS)))
+    conn.close()
+
+def type_out(label, search):
+    timings = []
+    for length in range(1, len(TYPED) + 1):
+        start = time.perf_counter()
+        search(TYPED[:length])
+        timings.append(time.perf_counter() - start)
+    print(f"{label:<32} worst {max(timings) * 1000:8.2f} ms   mean {sum(timings) / len(timings) * 1000:8.2f} ms per keystroke")
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager.DATABASE_PATH = os.path.join(tmp, "bench.db")
+        setup_database(db_path=db_manager.DATABASE_PATH)
+        start = time.perf_counter()
+        populate()
+        print(f"{SERIALS + PARTIES + ITEMS:,} searchable strings loaded in {time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        db_manager.search_suggestions("x")
+        print(f"{'prefix index build':<32} {(time.perf_counter() - start) * 1000:8.1f} ms (once per change)")
+
+        type_out("universal_search per keystroke", lambda term: db_manager.universal_search(term, limit=db_manager.SUGGESTION_LIMIT))
+        type_out("search_suggestions", db_manager.search_suggestions)
+        db_manager.close_all_connections()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""
+Startup benchmark: launches the application with --startup-timing several
+times and reports the median time to first paint. Needs a display.
+
+Run from the project root:
+    python -m benchmarks.bench_startup
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+RUNS = 5
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "main.py")
+
+def launch():
+    """One cold launch; returns {phase: milliseconds} as printed by main.py."""
+    result = subprocess.run([sys.executable, MAIN, "--startup-timing"], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"Launch failed:\n{result.stderr}")
+    return {name: float(ms) for name, ms in re.findall(r"^(imports|window built|first paint): (\d+) ms$", result.stdout, re.MULTILINE)}
+
+def main():
+    runs = [launch() for _ in range(RUNS)]
+    for phase in ("imports", "window built", "first paint"):
+        times = [run[phase] for run in runs]
+        print(f"{phase:<16} median {statistics.median(times):7.0f} ms   (min {min(times):.0f}, max {max(times):.0f})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+All Transactions benchmark: 200,000 invoices and payments. Compares the
+old whole-list query (filters applied outside the union, every row
+returned) with get_transactions_page, which pushes filters, the cursor and
+the limit into each branch.
+
+Run from the project root:
+    python -m benchmarks.bench_transaction_list
+"""
+import datetime
+import os
+import tempfile
+import time
+
+from src import db_manager
+from db.database_setup import setup_database
+
+PER_TABLE = 50_000
+PARTIES = 500
+
+LEGACY_QUERY = """
+SELECT * FROM (
+    SELECT si.id, si.invoice_date as date, 'Sales Invoice' as type, c.name as party_name, si.invoice_number as doc_number, si.total_amount, 'Customer' as party_type, si.customer_id as party_id FROM sales_invoices si JOIN customers c ON si.customer_id = c.id
+    UNION ALL
+    SELECT pi.id, pi.invoice_date as date, 'Purchase Invoice' as type, s.name as party_name, pi.invoice_number as doc_number, pi.total_amount, 'Supplier' as party_type, pi.supplier_id as party_id FROM purchase_invoices pi JOIN suppliers s ON pi.supplier_id = s.id
+    UNION ALL
+    SELECT cp.id, cp.payment_date as date, 'Payment Received' as type, c.name as party_name, 'Payment #' || cp.id as doc_number, cp.amount as total_amount, 'Customer' as party_type, cp.customer_id as party_id FROM customer_payments cp JOIN customers c ON cp.customer_id = c.id
+    UNION ALL
+    SELECT sp.id, sp.payment_date as date, 'Payment Made' as type, s.name as party_name, 'Payment #' || sp.id as doc_number, sp.amount as total_amount, 'Supplier' as party_type, sp.supplier_id as party_id FROM supplier_payments sp JOIN suppliers s ON sp.supplier_id = s.id
+) {where} ORDER BY date DESC
+"""
+
+def populate():
+    start = datetime.date(2020, 1, 1)
+    dates = [(start + datetime.timedelta(days=n % 1500)).isoformat() for n in range(PER_TABLE)]
+    conn = db_manager.get_db_connection()
+    with conn:
+        conn.executemany("INSERT INTO customers (name, state) VALUES (?, 'State')", ((f"Customer {n}",) for n in range(PARTIES)))
+        conn.executemany("INSERT INTO suppliers (name, state) VALUES (?, 'State')", ((f"Supplier {n}",) for n in range(PARTIES)))
+        conn.executemany("INSERT INTO sales_invoices (customer_id, invoice_number, invoice_date, total_amount) VALUES (?, ?, ?, ?)",
+                         ((n % PARTIES + 1, f"INV-{n}", dates[n], n % 997) for n in range(PER_TABLE)))
+        conn.executemany("INSERT INTO purchase_invoices (supplier_id, invoice_number, invoice_date, total_amount) VALUES (?, ?, ?, ?)",
+                         ((n % PARTIES + 1, f"P-{n}", dates[n], n % 991) for n in range(PER_TABLE)))
+        conn.executemany("INSERT INTO customer_payments (customer_id, payment_date, amount) VALUES (?, ?, ?)",
+                         ((n % PARTIES + 1, dates[n], n % 983) for n in range(PER_TABLE)))
+        conn.executemany("INSERT INTO supplier_payments (supplier_id, payment_date, amount) VALUES (?, ?, ?)",
+                         ((n % PARTIES + 1, dates[n], n % 977) for n in range(PER_TABLE)))
+    conn.close()
+
+def legacy(where="", params=()):
+    conn = db_manager.get_db_connection()
+    rows = conn.execute(LEGACY_QUERY.format(where=where), params).fetchall()
+    conn.close()
+    return rows
+
+def timed(label, fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<44} {best * 1000:9.2f} ms")
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager.DATABASE_PATH = os.path.join(tmp, "bench.db")
+        setup_database(db_path=db_manager.DATABASE_PATH)
+        populate()
+        print(f"{4 * PER_TABLE:,} transactions")
+
+        party = {'party_type': 'Customer', 'party_id': 7, 'start_date': '2022-01-01'}
+        timed("old: whole list", legacy)
+        timed("old: one customer since 2022", lambda: legacy("WHERE party_type = 'Customer' AND party_id = 7 AND date >= '2022-01-01'"))
+        timed("first page", lambda: db_manager.get_transactions_page({}))
+        _, cursor = db_manager.get_transactions_page({}, limit=1000)
+        timed("page after 1,000 rows (cursor)", lambda: db_manager.get_transactions_page({}, cursor))
+        timed("page after 20,000 rows (cursor + skip)", lambda: db_manager.get_transactions_page({}, cursor, skip=19_000))
+        timed("first page, one customer since 2022", lambda: db_manager.get_transactions_page(party))
+        timed("count, unfiltered", lambda: db_manager.get_transactions_count({}))
+        timed("count, one customer since 2022", lambda: db_manager.get_transactions_count(party))
+        db_manager.close_all_connections()
+
+if __name__ == '__main__':
+    main()
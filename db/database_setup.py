@@ -1,3 +1,4 @@
+import re
 import sqlite3
 
 def create_connection(db_file):
@@ -5,19 +6,498 @@ def create_connection(db_file):
     conn = None
     try:
         conn = sqlite3.connect(db_file)
-        print(f"Connected to {db_file}, SQLite version: {sqlite3.sqlite_version}")
         return conn
     except sqlite3.Error as e:
         print(e)
     return conn
 
-def create_table(conn, create_table_sql):
-    """ create a table from the create_table_sql statement """
+def get_schema_version(conn):
+    """Returns the schema version stored in the database header (PRAGMA user_version)."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def _table_columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+def _add_missing_columns(conn, table, columns):
+    """Adds each (name, definition) column that an older database is missing."""
+    existing = _table_columns(conn, table)
+    for name, definition in columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition};")
+
+DEFAULT_ACCOUNTS = [
+    ('Cash', 'Asset', True), ('Accounts Receivable', 'Asset', True), ('Inventory', 'Asset', True),
+    ('Accounts Payable', 'Liability', True), ('GST Payable', 'Liability', True),
+    ('Owner\'s Equity', 'Equity', True), ('Sales Revenue', 'Revenue', True),
+    ('Cost of Goods Sold', 'Expense', True)
+]
+
+# --- Migrations ---
+# Each step takes an open connection and runs inside the single transaction
+# opened by migrate(). Steps are only ever appended; never edit a released one.
+
+def _migrate_001_baseline(conn):
+    """Baseline schema, including every column earlier releases bolted on with ALTER TABLE."""
+    # --- Base & Entity Tables ---
+    conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);")
+    conn.execute("CREATE TABLE IF NOT EXISTS gst_slabs (id INTEGER PRIMARY KEY, rate REAL NOT NULL UNIQUE, description TEXT);")
+    conn.execute("CREATE TABLE IF NOT EXISTS hsn_codes (id INTEGER PRIMARY KEY, hsn_code TEXT NOT NULL UNIQUE, description TEXT, gst_slab_id INTEGER, FOREIGN KEY(gst_slab_id) REFERENCES gst_slabs(id));")
+    conn.execute("CREATE TABLE IF NOT EXISTS units (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);")
+    conn.execute("CREATE TABLE IF NOT EXISTS compound_units (id INTEGER PRIMARY KEY, base_unit_id INTEGER NOT NULL, secondary_unit_id INTEGER NOT NULL, conversion_factor REAL NOT NULL, FOREIGN KEY(base_unit_id) REFERENCES units(id), FOREIGN KEY(secondary_unit_id) REFERENCES units(id));")
+    conn.execute("CREATE TABLE IF NOT EXISTS godowns (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, location TEXT);")
+    conn.execute("CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, hsn_code_id INTEGER, gst_slab_id INTEGER, purchase_price REAL, selling_price REAL, default_warranty_months INTEGER, minimum_stock_level INTEGER, is_assembled_item BOOLEAN DEFAULT FALSE, is_serialized BOOLEAN DEFAULT FALSE, unit_id INTEGER, category TEXT, FOREIGN KEY(unit_id) REFERENCES units(id), FOREIGN KEY(gst_slab_id) REFERENCES gst_slabs(id), FOREIGN KEY(hsn_code_id) REFERENCES hsn_codes(id));")
+    conn.execute("CREATE TABLE IF NOT EXISTS suppliers (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, gstin TEXT, address TEXT, phone TEXT, email TEXT, state TEXT);")
+    conn.execute("CREATE TABLE IF NOT EXISTS customers (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, gstin TEXT, address TEXT, phone TEXT, email TEXT, state TEXT, billing_address TEXT, shipping_address TEXT, credit_limit REAL);")
+
+    # --- Core Accounting Tables ---
+    conn.execute("CREATE TABLE IF NOT EXISTS accounts (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, type TEXT NOT NULL, is_predefined BOOLEAN DEFAULT FALSE);")
+    conn.execute("CREATE TABLE IF NOT EXISTS gl_transactions (id INTEGER PRIMARY KEY, date TEXT NOT NULL, description TEXT NOT NULL, source_doc_type TEXT, source_doc_id INTEGER, is_reconciled BOOLEAN DEFAULT FALSE, reconciliation_date TEXT);")
+    conn.execute("CREATE TABLE IF NOT EXISTS gl_entries (id INTEGER PRIMARY KEY, transaction_id INTEGER NOT NULL, account_id INTEGER NOT NULL, debit REAL, credit REAL, FOREIGN KEY(transaction_id) REFERENCES gl_transactions(id), FOREIGN KEY(account_id) REFERENCES accounts(id));")
+
+    # --- Transaction Tables ---
+    conn.execute("CREATE TABLE IF NOT EXISTS purchase_invoices (id INTEGER PRIMARY KEY, supplier_id INTEGER NOT NULL, invoice_number TEXT NOT NULL, invoice_date TEXT NOT NULL, total_amount REAL NOT NULL, taxable_amount REAL, cgst_amount REAL, sgst_amount REAL, igst_amount REAL, total_gst_amount REAL, notes TEXT, status TEXT DEFAULT 'UNPAID', amount_paid REAL DEFAULT 0.0, FOREIGN KEY (supplier_id) REFERENCES suppliers (id), UNIQUE (supplier_id, invoice_number));")
+    conn.execute("CREATE TABLE IF NOT EXISTS sales_invoices (id INTEGER PRIMARY KEY, customer_id INTEGER NOT NULL, invoice_number TEXT NOT NULL UNIQUE, invoice_date TEXT NOT NULL, total_amount REAL NOT NULL, taxable_amount REAL, cgst_amount REAL, sgst_amount REAL, igst_amount REAL, total_gst_amount REAL, notes TEXT, status TEXT DEFAULT 'UNPAID', amount_paid REAL DEFAULT 0.0, FOREIGN KEY (customer_id) REFERENCES customers (id));")
+    conn.execute("CREATE TABLE IF NOT EXISTS purchase_invoice_items (id INTEGER PRIMARY KEY, purchase_invoice_id INTEGER NOT NULL, item_id INTEGER NOT NULL, quantity INTEGER NOT NULL, purchase_price REAL NOT NULL, taxable_value REAL, cgst_rate REAL, sgst_rate REAL, igst_rate REAL, cgst_amount REAL, sgst_amount REAL, igst_amount REAL, total_gst_amount REAL, FOREIGN KEY (purchase_invoice_id) REFERENCES purchase_invoices (id), FOREIGN KEY (item_id) REFERENCES items (id));")
+    conn.execute("CREATE TABLE IF NOT EXISTS sales_invoice_items (id INTEGER PRIMARY KEY, sales_invoice_id INTEGER NOT NULL, item_id INTEGER NOT NULL, quantity INTEGER NOT NULL, selling_price REAL NOT NULL, taxable_value REAL, cgst_rate REAL, sgst_rate REAL, igst_rate REAL, cgst_amount REAL, sgst_amount REAL, igst_amount REAL, total_gst_amount REAL, FOREIGN KEY (sales_invoice_id) REFERENCES sales_invoices (id), FOREIGN KEY (item_id) REFERENCES items (id));")
+
+    # --- Payment & Linking Tables ---
+    conn.execute("CREATE TABLE IF NOT EXISTS customer_payments (id INTEGER PRIMARY KEY, customer_id INTEGER NOT NULL, payment_date TEXT NOT NULL, amount REAL NOT NULL, notes TEXT, FOREIGN KEY(customer_id) REFERENCES customers(id));")
+    conn.execute("CREATE TABLE IF NOT EXISTS supplier_payments (id INTEGER PRIMARY KEY, supplier_id INTEGER NOT NULL, payment_date TEXT NOT NULL, amount REAL NOT NULL, notes TEXT, FOREIGN KEY(supplier_id) REFERENCES suppliers(id));")
+    conn.execute("CREATE TABLE IF NOT EXISTS customer_payment_allocations (payment_id INTEGER NOT NULL, sales_invoice_id INTEGER NOT NULL, amount REAL NOT NULL, PRIMARY KEY (payment_id, sales_invoice_id), FOREIGN KEY(payment_id) REFERENCES customer_payments(id), FOREIGN KEY(sales_invoice_id) REFERENCES sales_invoices(id));")
+    conn.execute("CREATE TABLE IF NOT EXISTS supplier_payment_allocations (payment_id INTEGER NOT NULL, purchase_invoice_id INTEGER NOT NULL, amount REAL NOT NULL, PRIMARY KEY (payment_id, purchase_invoice_id), FOREIGN KEY(payment_id) REFERENCES supplier_payments(id), FOREIGN KEY(purchase_invoice_id) REFERENCES purchase_invoices(id));")
+
+    # --- Inventory & Other Linking Tables ---
+    conn.execute("CREATE TABLE IF NOT EXISTS item_serial_numbers (id INTEGER PRIMARY KEY, item_id INTEGER NOT NULL, serial_number TEXT NOT NULL UNIQUE, status TEXT NOT NULL, godown_id INTEGER NOT NULL, purchase_invoice_id INTEGER, sale_invoice_id INTEGER, warranty_end_date TEXT, FOREIGN KEY (item_id) REFERENCES items (id), FOREIGN KEY (godown_id) REFERENCES godowns (id), FOREIGN KEY (purchase_invoice_id) REFERENCES purchase_invoices (id), FOREIGN KEY (sale_invoice_id) REFERENCES sales_invoices (id));")
+    conn.execute("CREATE TABLE IF NOT EXISTS assemblies (id INTEGER PRIMARY KEY, assembled_item_id INTEGER NOT NULL, new_serial_number_id INTEGER NOT NULL, total_cost REAL NOT NULL, assembly_date TEXT NOT NULL, FOREIGN KEY (assembled_item_id) REFERENCES items (id), FOREIGN KEY (new_serial_number_id) REFERENCES item_serial_numbers (id));")
+    conn.execute("CREATE TABLE IF NOT EXISTS assembly_components (id INTEGER PRIMARY KEY, assembly_id INTEGER NOT NULL, component_item_id INTEGER NOT NULL, used_serial_number_id INTEGER NOT NULL, FOREIGN KEY (assembly_id) REFERENCES assemblies (id), FOREIGN KEY (component_item_id) REFERENCES items (id), FOREIGN KEY (used_serial_number_id) REFERENCES item_serial_numbers (id));")
+    conn.execute("CREATE TABLE IF NOT EXISTS item_batches (id INTEGER PRIMARY KEY, item_id INTEGER NOT NULL, batch_number TEXT NOT NULL, expiry_date TEXT, quantity INTEGER NOT NULL, godown_id INTEGER NOT NULL, FOREIGN KEY (item_id) REFERENCES items (id), FOREIGN KEY (godown_id) REFERENCES godowns (id));")
+
+    # --- Service Tables ---
+    conn.execute("CREATE TABLE IF NOT EXISTS amcs (id INTEGER PRIMARY KEY, customer_id INTEGER NOT NULL, start_date TEXT NOT NULL, end_date TEXT NOT NULL, value REAL NOT NULL, FOREIGN KEY(customer_id) REFERENCES customers(id));")
+    conn.execute("CREATE TABLE IF NOT EXISTS amc_service_calls (id INTEGER PRIMARY KEY, amc_id INTEGER NOT NULL, service_date TEXT NOT NULL, details TEXT, solution TEXT, FOREIGN KEY(amc_id) REFERENCES amcs(id));")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS job_sheets (
+        id INTEGER PRIMARY KEY, customer_id INTEGER NOT NULL, received_date TEXT NOT NULL, product_name TEXT, product_serial TEXT,
+        reported_problem TEXT, status TEXT, estimated_cost REAL, estimated_timeline TEXT, assigned_to TEXT,
+        FOREIGN KEY(customer_id) REFERENCES customers(id)
+    );""")
+    conn.execute("CREATE TABLE IF NOT EXISTS job_sheet_accessories (id INTEGER PRIMARY KEY, job_sheet_id INTEGER NOT NULL, name TEXT NOT NULL, FOREIGN KEY(job_sheet_id) REFERENCES job_sheets(id));")
+
+    # --- Pre-Sales Tables ---
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS quotations (
+        id INTEGER PRIMARY KEY, customer_id INTEGER NOT NULL, quote_date TEXT NOT NULL, expiry_date TEXT,
+        total_amount REAL NOT NULL, status TEXT DEFAULT 'DRAFT',
+        FOREIGN KEY(customer_id) REFERENCES customers(id)
+    );""")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS quotation_items (
+        id INTEGER PRIMARY KEY, quotation_id INTEGER NOT NULL, item_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL, selling_price REAL NOT NULL,
+        FOREIGN KEY(quotation_id) REFERENCES quotations(id), FOREIGN KEY(item_id) REFERENCES items(id)
+    );""")
+
+    # Databases created before versioning may still lack columns that were added later.
+    _add_missing_columns(conn, "gl_transactions", [("is_reconciled", "BOOLEAN DEFAULT FALSE"), ("reconciliation_date", "TEXT")])
+    _add_missing_columns(conn, "items", [("category", "TEXT"), ("unit_id", "INTEGER"), ("hsn_code_id", "INTEGER")])
+    _add_missing_columns(conn, "customers", [("billing_address", "TEXT"), ("shipping_address", "TEXT"), ("credit_limit", "REAL")])
+
+    # --- Reference data ---
+    default_units = [('Pcs',), ('Nos',), ('Box',), ('Dozen',), ('Meter',), ('Kg',), ('Gram',), ('Liter',)]
+    conn.executemany("INSERT OR IGNORE INTO units (name) VALUES (?)", default_units)
+    default_slabs = [
+        (0, 'Exempt'),
+        (5, 'GST 5%'),
+        (12, 'GST 12%'),
+        (18, 'GST 18%'),
+        (28, 'GST 28%')
+    ]
+    conn.executemany("INSERT OR IGNORE INTO gst_slabs (rate, description) VALUES (?, ?)", default_slabs)
+    conn.execute("INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)", ('company_state', ''))
+    conn.executemany("INSERT OR IGNORE INTO accounts (name, type, is_predefined) VALUES (?, ?, ?)", DEFAULT_ACCOUNTS)
+
+def _migrate_002_query_indexes(conn):
+    """Secondary indexes for the filters, joins and sorts db_manager runs on large tables."""
+    indexes = [
+        # General ledger: report joins go gl_transactions(date) -> gl_entries(transaction_id) -> accounts,
+        # account-centric lookups (cash book, reconciliation) go in through account_id.
+        "CREATE INDEX IF NOT EXISTS ix_gl_transactions_date ON gl_transactions (date)",
+        "CREATE INDEX IF NOT EXISTS ix_gl_transactions_source ON gl_transactions (source_doc_type, source_doc_id)",
+        "CREATE INDEX IF NOT EXISTS ix_gl_entries_transaction ON gl_entries (transaction_id, account_id)",
+        "CREATE INDEX IF NOT EXISTS ix_gl_entries_account ON gl_entries (account_id, transaction_id)",
+
+        # Invoices: party ledgers and statements filter by party then date; period reports by date.
+        # The partial indexes hold only open invoices, which is what the payment screens list.
+        "CREATE INDEX IF NOT EXISTS ix_sales_invoices_customer_date ON sales_invoices (customer_id, invoice_date)",
+        "CREATE INDEX IF NOT EXISTS ix_sales_invoices_date ON sales_invoices (invoice_date)",
+        "CREATE INDEX IF NOT EXISTS ix_sales_invoices_open ON sales_invoices (customer_id, invoice_date) WHERE status != 'PAID'",
+        "CREATE INDEX IF NOT EXISTS ix_purchase_invoices_supplier_date ON purchase_invoices (supplier_id, invoice_date)",
+        "CREATE INDEX IF NOT EXISTS ix_purchase_invoices_date ON purchase_invoices (invoice_date)",
+        "CREATE INDEX IF NOT EXISTS ix_purchase_invoices_open ON purchase_invoices (supplier_id, invoice_date) WHERE status != 'PAID'",
+        "CREATE INDEX IF NOT EXISTS ix_sales_invoice_items_invoice ON sales_invoice_items (sales_invoice_id)",
+        "CREATE INDEX IF NOT EXISTS ix_purchase_invoice_items_invoice ON purchase_invoice_items (purchase_invoice_id)",
+
+        # Payments and allocations
+        "CREATE INDEX IF NOT EXISTS ix_customer_payments_customer_date ON customer_payments (customer_id, payment_date)",
+        "CREATE INDEX IF NOT EXISTS ix_customer_payments_date ON customer_payments (payment_date)",
+        "CREATE INDEX IF NOT EXISTS ix_supplier_payments_supplier_date ON supplier_payments (supplier_id, payment_date)",
+        "CREATE INDEX IF NOT EXISTS ix_supplier_payments_date ON supplier_payments (payment_date)",
+        "CREATE INDEX IF NOT EXISTS ix_customer_payment_allocations_invoice ON customer_payment_allocations (sales_invoice_id)",
+        "CREATE INDEX IF NOT EXISTS ix_supplier_payment_allocations_invoice ON supplier_payment_allocations (purchase_invoice_id)",
+
+        # Serial numbers: stock per item, stock/warranty by status, and back-links to invoices.
+        "CREATE INDEX IF NOT EXISTS ix_item_serial_numbers_item_status ON item_serial_numbers (item_id, status)",
+        "CREATE INDEX IF NOT EXISTS ix_item_serial_numbers_status_warranty ON item_serial_numbers (status, warranty_end_date)",
+        "CREATE INDEX IF NOT EXISTS ix_item_serial_numbers_sale ON item_serial_numbers (sale_invoice_id)",
+        "CREATE INDEX IF NOT EXISTS ix_item_serial_numbers_purchase ON item_serial_numbers (purchase_invoice_id)",
+        "CREATE INDEX IF NOT EXISTS ix_assembly_components_assembly ON assembly_components (assembly_id)",
+        "CREATE INDEX IF NOT EXISTS ix_assembly_components_serial ON assembly_components (used_serial_number_id)",
+
+        # Masters and service
+        "CREATE INDEX IF NOT EXISTS ix_items_hsn_code ON items (hsn_code_id)",
+        "CREATE INDEX IF NOT EXISTS ix_compound_units_secondary ON compound_units (secondary_unit_id)",
+        "CREATE INDEX IF NOT EXISTS ix_amcs_end_date ON amcs (end_date)",
+        "CREATE INDEX IF NOT EXISTS ix_amc_service_calls_amc ON amc_service_calls (amc_id, service_date)",
+        "CREATE INDEX IF NOT EXISTS ix_job_sheets_received ON job_sheets (received_date)",
+        "CREATE INDEX IF NOT EXISTS ix_job_sheet_accessories_sheet ON job_sheet_accessories (job_sheet_id)",
+        "CREATE INDEX IF NOT EXISTS ix_quotations_date ON quotations (quote_date)",
+        "CREATE INDEX IF NOT EXISTS ix_quotation_items_quotation ON quotation_items (quotation_id)",
+    ]
+    for statement in indexes:
+        conn.execute(statement)
+
+def _migrate_003_account_daily_balances(conn):
+    """Per-account, per-day debit/credit totals, kept in step with gl_entries by create_gl_transaction."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS account_daily_balances (
+        account_id INTEGER NOT NULL, date TEXT NOT NULL,
+        debit REAL NOT NULL DEFAULT 0, credit REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (account_id, date),
+        FOREIGN KEY(account_id) REFERENCES accounts(id)
+    ) WITHOUT ROWID;""")
+    conn.execute("""
+    INSERT INTO account_daily_balances (account_id, date, debit, credit)
+    SELECT ge.account_id, gt.date, IFNULL(SUM(ge.debit), 0), IFNULL(SUM(ge.credit), 0)
+    FROM gl_entries ge JOIN gl_transactions gt ON ge.transaction_id = gt.id
+    GROUP BY ge.account_id, gt.date;""")
+
+def _migrate_004_period_close(conn):
+    """Closed fiscal periods and the cumulative balances frozen at each period end."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS period_closes (
+        id INTEGER PRIMARY KEY, period_end TEXT NOT NULL UNIQUE,
+        closed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );""")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS account_closing_balances (
+        period_close_id INTEGER NOT NULL, account_id INTEGER NOT NULL,
+        debit REAL NOT NULL DEFAULT 0, credit REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (period_close_id, account_id),
+        FOREIGN KEY(period_close_id) REFERENCES period_closes(id),
+        FOREIGN KEY(account_id) REFERENCES accounts(id)
+    ) WITHOUT ROWID;""")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS party_closing_balances (
+        period_close_id INTEGER NOT NULL, party_type TEXT NOT NULL, party_id INTEGER NOT NULL,
+        balance REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (period_close_id, party_type, party_id),
+        FOREIGN KEY(period_close_id) REFERENCES period_closes(id)
+    ) WITHOUT ROWID;""")
+    # Reads after a snapshot only cover the days since the close.
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_account_daily_balances_date ON account_daily_balances (date)")
+
+def _migrate_005_document_sequences(conn):
+    """Document number counters, and number columns for documents that were only known by id."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS document_sequences (
+        doc_type TEXT NOT NULL, prefix TEXT NOT NULL, fiscal_year TEXT NOT NULL DEFAULT '',
+        next_number INTEGER NOT NULL,
+        PRIMARY KEY (doc_type, prefix, fiscal_year)
+    ) WITHOUT ROWID;""")
+    for table, column in (("quotations", "quote_number"), ("job_sheets", "job_number"),
+                          ("customer_payments", "payment_number"), ("supplier_payments", "payment_number")):
+        _add_missing_columns(conn, table, [(column, "TEXT")])
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{table}_{column} ON {table} ({column})")
+
+# Entities covered by search_index. Each row's rowid is id * 8 + kind, so a
+# trigger can find the entry for a source row without scanning the index.
+# Expressions are written against "r", which the triggers replace with new/old.
+SEARCH_SOURCES = [
+    # (kind, table, title, extra, columns that feed the index)
+    (1, "customers", "r.name", "IFNULL(r.phone, '') || ' ' || IFNULL(r.email, '') || ' ' || IFNULL(r.gstin, '')", "name, phone, email, gstin"),
+    (2, "suppliers", "r.name", "IFNULL(r.phone, '') || ' ' || IFNULL(r.email, '') || ' ' || IFNULL(r.gstin, '')", "name, phone, email, gstin"),
+    (3, "items", "r.name", "IFNULL((SELECT hsn_code FROM hsn_codes WHERE id = r.hsn_code_id), '')", "name, hsn_code_id"),
+    (4, "item_serial_numbers", "r.serial_number", "''", "serial_number"),
+    (5, "sales_invoices", "r.invoice_number", "''", "invoice_number"),
+    (6, "purchase_invoices", "r.invoice_number", "''", "invoice_number"),
+    (7, "job_sheets", "IFNULL(r.product_name, '')", "IFNULL(r.product_serial, '') || ' ' || IFNULL(r.job_number, '')", "product_name, product_serial, job_number"),
+]
+SEARCH_KIND_MULTIPLIER = 8
+
+def _migrate_006_search_index(conn):
+    """Trigram full-text index over the entities universal_search looks at, maintained by triggers."""
+    conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(title, extra, tokenize='trigram')")
+    m = SEARCH_KIND_MULTIPLIER
+    for kind, table, title, extra, columns in SEARCH_SOURCES:
+        # Very old databases may predate some of these columns (items.hsn_code_id is added by the baseline).
+        _add_missing_columns(conn, table, [(column, "TEXT") for column in columns.split(", ")])
+        insert_new = (f"INSERT INTO search_index (rowid, title, extra) "
+                      f"VALUES (new.id * {m} + {kind}, {title.replace('r.', 'new.')}, {extra.replace('r.', 'new.')});")
+        delete_old = f"DELETE FROM search_index WHERE rowid = old.id * {m} + {kind};"
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS tr_{table}_search_insert AFTER INSERT ON {table} BEGIN {insert_new} END;")
+        # Only the indexed columns: status changes on serials and invoices must not touch the index.
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS tr_{table}_search_update AFTER UPDATE OF {columns} ON {table} "
+                     f"BEGIN {delete_old} {insert_new} END;")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS tr_{table}_search_delete AFTER DELETE ON {table} BEGIN {delete_old} END;")
+        conn.execute(f"INSERT INTO search_index (rowid, title, extra) SELECT r.id * {m} + {kind}, {title}, {extra} FROM {table} r")
+    # Items carry their HSN code, so renaming a code re-indexes the items that use it.
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS tr_hsn_codes_search_update AFTER UPDATE OF hsn_code ON hsn_codes BEGIN
+        DELETE FROM search_index WHERE rowid IN (SELECT id * {m} + 3 FROM items WHERE hsn_code_id = new.id);
+        INSERT INTO search_index (rowid, title, extra) SELECT id * {m} + 3, name, new.hsn_code FROM items WHERE hsn_code_id = new.id;
+    END;""")
+
+def _create_version_triggers(conn, name, table, columns=None):
+    """Bumps data_versions[name] whenever rows of table change (or, for updates, only the given columns)."""
+    bump = f"UPDATE data_versions SET version = version + 1 WHERE name = '{name}';"
+    update_of = f"UPDATE OF {columns}" if columns else "UPDATE"
+    conn.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES (?, 0)", (name,))
+    for event, trigger_event in (("insert", "INSERT"), ("update", update_of), ("delete", "DELETE")):
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS tr_{table}_{name}_version_{event} AFTER {trigger_event} ON {table} BEGIN {bump} END;")
+
+def _migrate_007_data_versions(conn):
+    """Change counters that in-memory caches compare against instead of re-reading their tables."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS data_versions (
+        name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;""")
+    for kind, table, title, extra, columns in SEARCH_SOURCES:
+        _create_version_triggers(conn, "search", table, columns)
+    _create_version_triggers(conn, "search", "hsn_codes", "hsn_code")
+
+# Tables behind each group of cached reports (see _cached_report in db_manager).
+# A column list limits the update trigger to the columns the reports read.
+REPORT_VERSION_SOURCES = [
+    # (data_versions name, table, columns)
+    ("report_gst", "sales_invoices", None),
+    ("report_gst", "sales_invoice_items", None),
+    ("report_gst", "purchase_invoices", None),
+    ("report_gst", "customers", "gstin, state"),
+    # account_daily_balances takes one upsert per posted line, so db_manager bumps
+    # report_ledger once per batch instead of a trigger firing on every row.
+    ("report_ledger", "accounts", None),
+    ("report_ledger", "period_closes", None),
+    ("report_ledger", "account_closing_balances", None),
+    ("report_stock", "items", "name, category, minimum_stock_level, is_serialized"),
+    ("report_stock", "item_serial_numbers", "item_id, status"),
+    ("report_warranty", "item_serial_numbers", "item_id, serial_number, status, sale_invoice_id, warranty_end_date"),
+    ("report_warranty", "items", "name"),
+    ("report_warranty", "sales_invoices", "customer_id, invoice_number"),
+    ("report_warranty", "customers", "name"),
+]
+
+def _migrate_008_report_versions(conn):
+    """Change counters for the report result cache."""
+    for name, table, columns in REPORT_VERSION_SOURCES:
+        _create_version_triggers(conn, name, table, columns)
+
+# Money columns stored as integer paise from version 9 on. Rates stay REAL.
+MONEY_COLUMNS = {
+    "items": ["purchase_price", "selling_price"],
+    "customers": ["credit_limit"],
+    "gl_entries": ["debit", "credit"],
+    "purchase_invoices": ["total_amount", "taxable_amount", "cgst_amount", "sgst_amount", "igst_amount", "total_gst_amount", "amount_paid"],
+    "sales_invoices": ["total_amount", "taxable_amount", "cgst_amount", "sgst_amount", "igst_amount", "total_gst_amount", "amount_paid"],
+    "purchase_invoice_items": ["purchase_price", "taxable_value", "cgst_amount", "sgst_amount", "igst_amount", "total_gst_amount"],
+    "sales_invoice_items": ["selling_price", "taxable_value", "cgst_amount", "sgst_amount", "igst_amount", "total_gst_amount"],
+    "customer_payments": ["amount"],
+    "supplier_payments": ["amount"],
+    "customer_payment_allocations": ["amount"],
+    "supplier_payment_allocations": ["amount"],
+    "assemblies": ["total_cost"],
+    "amcs": ["value"],
+    "job_sheets": ["estimated_cost"],
+    "quotations": ["total_amount"],
+    "quotation_items": ["selling_price"],
+    "account_daily_balances": ["debit", "credit"],
+    "account_closing_balances": ["debit", "credit"],
+    "party_closing_balances": ["balance"],
+}
+
+def _rebuild_with_paise(conn, table, money_columns):
+    """Recreates table with its money columns declared INTEGER and holding paise."""
+    table_sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()[0]
+    # Indexes and triggers go with the old table; they are recreated from their saved SQL.
+    dependents = [row[0] for row in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL", (table,))]
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    new_sql = re.sub(rf"\b{table}\b", f"{table}_paise", table_sql, count=1)
+    for column in money_columns:
+        new_sql = re.sub(rf"\b{column}\s+REAL\b", f"{column} INTEGER", new_sql)
+        new_sql = re.sub(rf"(\b{column} INTEGER[^,]*DEFAULT )0\.0\b", r"\g<1>0", new_sql)
+    conn.execute(new_sql)
+    select = ", ".join(f"CAST(ROUND({c} * 100) AS INTEGER)" if c in money_columns else c for c in columns)
+    conn.execute(f"INSERT INTO {table}_paise ({', '.join(columns)}) SELECT {select} FROM {table}")
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_paise RENAME TO {table}")
+    for sql in dependents:
+        conn.execute(sql)
+
+def _migrate_009_money_in_paise(conn):
+    """Stores amounts as integer paise so sums and balance checks are exact."""
+    # Keep the rename from rewriting triggers on other tables that name the rebuilt one.
+    conn.execute("PRAGMA legacy_alter_table = ON")
     try:
-        c = conn.cursor()
-        c.execute(create_table_sql)
-    except sqlite3.Error as e:
-        print(e)
+        for table, money_columns in MONEY_COLUMNS.items():
+            _rebuild_with_paise(conn, table, money_columns)
+    finally:
+        conn.execute("PRAGMA legacy_alter_table = OFF")
+
+def _migrate_010_stock_ledger(conn):
+    """Stock movement ledger and per-(item, godown) balances, backfilled from existing invoices."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS stock_movements (
+        id INTEGER PRIMARY KEY, item_id INTEGER NOT NULL, godown_id INTEGER NOT NULL, date TEXT NOT NULL,
+        quantity REAL NOT NULL, source_doc_type TEXT NOT NULL, source_doc_id INTEGER,
+        FOREIGN KEY(item_id) REFERENCES items(id), FOREIGN KEY(godown_id) REFERENCES godowns(id)
+    );""")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_stock_movements_item ON stock_movements (item_id, godown_id, date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_stock_movements_source ON stock_movements (source_doc_type, source_doc_id)")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS stock_balances (
+        item_id INTEGER NOT NULL, godown_id INTEGER NOT NULL, quantity REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (item_id, godown_id),
+        FOREIGN KEY(item_id) REFERENCES items(id), FOREIGN KEY(godown_id) REFERENCES godowns(id)
+    ) WITHOUT ROWID;""")
+    # Invoice lines carry no godown; serialized lines take it from their serials, the rest from godown 1.
+    conn.execute("""
+    INSERT INTO stock_movements (item_id, godown_id, date, quantity, source_doc_type, source_doc_id)
+    SELECT pii.item_id, IFNULL((SELECT MIN(sn.godown_id) FROM item_serial_numbers sn
+                                WHERE sn.purchase_invoice_id = pi.id AND sn.item_id = pii.item_id), 1),
+           pi.invoice_date, SUM(pii.quantity), 'PURCHASE', pi.id
+    FROM purchase_invoice_items pii JOIN purchase_invoices pi ON pii.purchase_invoice_id = pi.id
+    GROUP BY pi.id, pii.item_id""")
+    conn.execute("""
+    INSERT INTO stock_movements (item_id, godown_id, date, quantity, source_doc_type, source_doc_id)
+    SELECT sii.item_id, IFNULL((SELECT MIN(sn.godown_id) FROM item_serial_numbers sn
+                                WHERE sn.sale_invoice_id = si.id AND sn.item_id = sii.item_id), 1),
+           si.invoice_date, -SUM(sii.quantity), 'SALE', si.id
+    FROM sales_invoice_items sii JOIN sales_invoices si ON sii.sales_invoice_id = si.id
+    GROUP BY si.id, sii.item_id""")
+    conn.execute("""
+    INSERT INTO stock_balances (item_id, godown_id, quantity)
+    SELECT item_id, godown_id, SUM(quantity) FROM stock_movements GROUP BY item_id, godown_id""")
+    # Stock reports now read stock_balances, which db_manager bumps report_stock for on every write.
+    for event in ("insert", "update", "delete"):
+        conn.execute(f"DROP TRIGGER IF EXISTS tr_item_serial_numbers_report_stock_version_{event}")
+    conn.execute("DROP TRIGGER IF EXISTS tr_items_report_stock_version_update")
+    _create_version_triggers(conn, "report_stock", "items", "name, category, minimum_stock_level, is_serialized, purchase_price")
+
+def _migrate_011_cost_layers(conn):
+    """Movement and balance values in paise, and FIFO cost layers for the stock still on hand."""
+    conn.execute("ALTER TABLE stock_movements ADD COLUMN value INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE stock_balances ADD COLUMN value INTEGER NOT NULL DEFAULT 0")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_stock_movements_date ON stock_movements (date, item_id)")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS cost_layers (
+        id INTEGER PRIMARY KEY, movement_id INTEGER NOT NULL UNIQUE, item_id INTEGER NOT NULL, godown_id INTEGER NOT NULL,
+        date TEXT NOT NULL, quantity REAL NOT NULL, value INTEGER NOT NULL, remaining REAL NOT NULL, remaining_value INTEGER NOT NULL,
+        FOREIGN KEY(movement_id) REFERENCES stock_movements(id),
+        FOREIGN KEY(item_id) REFERENCES items(id), FOREIGN KEY(godown_id) REFERENCES godowns(id)
+    );""")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_cost_layers_item ON cost_layers (item_id, godown_id, date, id)")
+    # Issues only ever look at layers with stock left, oldest first.
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_cost_layers_open ON cost_layers (item_id, godown_id, date, id) WHERE remaining > 0")
+
+    # Receipts are valued at what was paid; past issues at the purchase price their COGS was booked at.
+    conn.execute("""
+    UPDATE stock_movements SET value = IFNULL((
+        SELECT SUM(CASE WHEN pii.taxable_value > 0 THEN pii.taxable_value ELSE CAST(ROUND(pii.purchase_price * pii.quantity) AS INTEGER) END)
+        FROM purchase_invoice_items pii WHERE pii.purchase_invoice_id = stock_movements.source_doc_id AND pii.item_id = stock_movements.item_id), 0)
+    WHERE source_doc_type = 'PURCHASE'""")
+    conn.execute("""
+    UPDATE stock_movements SET value = CAST(ROUND(quantity * IFNULL((SELECT purchase_price FROM items WHERE id = stock_movements.item_id), 0)) AS INTEGER)
+    WHERE source_doc_type != 'PURCHASE'""")
+    conn.execute("""
+    UPDATE stock_balances SET value = IFNULL((SELECT SUM(value) FROM stock_movements m
+                                              WHERE m.item_id = stock_balances.item_id AND m.godown_id = stock_balances.godown_id), 0)""")
+
+    # Under FIFO the stock on hand is whatever the newest receipts still cover.
+    conn.execute("""
+    INSERT INTO cost_layers (movement_id, item_id, godown_id, date, quantity, value, remaining, remaining_value)
+    SELECT id, item_id, godown_id, date, quantity, value, remaining,
+           CASE WHEN remaining = quantity THEN value ELSE CAST(ROUND(value * remaining / quantity) AS INTEGER) END
+    FROM (
+        SELECT m.id, m.item_id, m.godown_id, m.date, m.quantity, m.value,
+               MAX(0, MIN(m.quantity, IFNULL(b.quantity, 0) - (SUM(m.quantity) OVER newer - m.quantity))) as remaining
+        FROM stock_movements m LEFT JOIN stock_balances b ON b.item_id = m.item_id AND b.godown_id = m.godown_id
+        WHERE m.quantity > 0
+        WINDOW newer AS (PARTITION BY m.item_id, m.godown_id ORDER BY m.date DESC, m.id DESC)
+    ) ORDER BY id""")
+
+def _migrate_012_bill_of_materials(conn):
+    """Stored bills of materials for building assembled items in batches."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS bill_of_materials (
+        assembled_item_id INTEGER NOT NULL, component_item_id INTEGER NOT NULL, quantity REAL NOT NULL,
+        PRIMARY KEY (assembled_item_id, component_item_id),
+        FOREIGN KEY(assembled_item_id) REFERENCES items(id), FOREIGN KEY(component_item_id) REFERENCES items(id)
+    ) WITHOUT ROWID;""")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_assemblies_serial ON assemblies (new_serial_number_id)")
+
+def _migrate_013_job_sheet_serials(conn):
+    """Links job sheets to the serial they were opened for, so service history is a keyed lookup."""
+    _add_missing_columns(conn, "job_sheets", [("serial_number_id", "INTEGER REFERENCES item_serial_numbers(id)")])
+    conn.execute("""
+    UPDATE job_sheets SET serial_number_id = (SELECT id FROM item_serial_numbers WHERE serial_number = job_sheets.product_serial)
+    WHERE serial_number_id IS NULL AND product_serial IS NOT NULL""")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_job_sheets_serial ON job_sheets (serial_number_id)")
+
+# Ordered (version, step) pairs. The database is at version N once steps 1..N have run.
+MIGRATIONS = [
+    (1, _migrate_001_baseline),
+    (2, _migrate_002_query_indexes),
+    (3, _migrate_003_account_daily_balances),
+    (4, _migrate_004_period_close),
+    (5, _migrate_005_document_sequences),
+    (6, _migrate_006_search_index),
+    (7, _migrate_007_data_versions),
+    (8, _migrate_008_report_versions),
+    (9, _migrate_009_money_in_paise),
+    (10, _migrate_010_stock_ledger),
+    (11, _migrate_011_cost_layers),
+    (12, _migrate_012_bill_of_materials),
+    (13, _migrate_013_job_sheet_serials),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def migrate(conn):
+    """
+    Brings the database up to SCHEMA_VERSION by running every pending step in
+    one transaction. When the schema is already current this is a single
+    PRAGMA read. Returns the resulting schema version.
+    """
+    if get_schema_version(conn) >= SCHEMA_VERSION:
+        return SCHEMA_VERSION
+
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # We manage BEGIN/COMMIT ourselves so DDL stays inside the transaction
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock in case another process migrated first.
+            version = get_schema_version(conn)
+            for step_version, step in MIGRATIONS:
+                if step_version > version:
+                    step(conn)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.isolation_level = isolation_level
+    return SCHEMA_VERSION
 
 def setup_database(db_path="db/accounting.db"):
     """
@@ -27,133 +507,16 @@ def setup_database(db_path="db/accounting.db"):
     conn = create_connection(db_path)
 
     if conn is not None:
-        conn.execute("PRAGMA foreign_keys = ON")
-
-        # --- Base & Entity Tables ---
-        create_table(conn, "CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS gst_slabs (id INTEGER PRIMARY KEY, rate REAL NOT NULL UNIQUE, description TEXT);")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS hsn_codes (id INTEGER PRIMARY KEY, hsn_code TEXT NOT NULL UNIQUE, description TEXT, gst_slab_id INTEGER, FOREIGN KEY(gst_slab_id) REFERENCES gst_slabs(id));")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS units (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS compound_units (id INTEGER PRIMARY KEY, base_unit_id INTEGER NOT NULL, secondary_unit_id INTEGER NOT NULL, conversion_factor REAL NOT NULL, FOREIGN KEY(base_unit_id) REFERENCES units(id), FOREIGN KEY(secondary_unit_id) REFERENCES units(id));")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS godowns (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, location TEXT);")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, hsn_code_id INTEGER, gst_slab_id INTEGER, purchase_price REAL, selling_price REAL, default_warranty_months INTEGER, minimum_stock_level INTEGER, is_assembled_item BOOLEAN DEFAULT FALSE, is_serialized BOOLEAN DEFAULT FALSE, unit_id INTEGER, FOREIGN KEY(unit_id) REFERENCES units(id), FOREIGN KEY(gst_slab_id) REFERENCES gst_slabs(id), FOREIGN KEY(hsn_code_id) REFERENCES hsn_codes(id));")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS suppliers (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, gstin TEXT, address TEXT, phone TEXT, email TEXT, state TEXT);")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS customers (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, gstin TEXT, address TEXT, phone TEXT, email TEXT, state TEXT, billing_address TEXT, shipping_address TEXT, credit_limit REAL);")
-
-        # --- Core Accounting Tables ---
-        create_table(conn, "CREATE TABLE IF NOT EXISTS accounts (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, type TEXT NOT NULL, is_predefined BOOLEAN DEFAULT FALSE);")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS gl_transactions (id INTEGER PRIMARY KEY, date TEXT NOT NULL, description TEXT NOT NULL, source_doc_type TEXT, source_doc_id INTEGER);")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS gl_entries (id INTEGER PRIMARY KEY, transaction_id INTEGER NOT NULL, account_id INTEGER NOT NULL, debit REAL, credit REAL, FOREIGN KEY(transaction_id) REFERENCES gl_transactions(id), FOREIGN KEY(account_id) REFERENCES accounts(id));")
-
-        # --- Transaction Tables (Dropping and recreating to add new columns) ---
-        conn.execute("DROP TABLE IF EXISTS purchase_invoices;")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS purchase_invoices (id INTEGER PRIMARY KEY, supplier_id INTEGER NOT NULL, invoice_number TEXT NOT NULL, invoice_date TEXT NOT NULL, total_amount REAL NOT NULL, taxable_amount REAL, cgst_amount REAL, sgst_amount REAL, igst_amount REAL, total_gst_amount REAL, notes TEXT, status TEXT DEFAULT 'UNPAID', amount_paid REAL DEFAULT 0.0, FOREIGN KEY (supplier_id) REFERENCES suppliers (id), UNIQUE (supplier_id, invoice_number));")
-        conn.execute("DROP TABLE IF EXISTS sales_invoices;")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS sales_invoices (id INTEGER PRIMARY KEY, customer_id INTEGER NOT NULL, invoice_number TEXT NOT NULL UNIQUE, invoice_date TEXT NOT NULL, total_amount REAL NOT NULL, taxable_amount REAL, cgst_amount REAL, sgst_amount REAL, igst_amount REAL, total_gst_amount REAL, notes TEXT, status TEXT DEFAULT 'UNPAID', amount_paid REAL DEFAULT 0.0, FOREIGN KEY (customer_id) REFERENCES customers (id));")
-
-        conn.execute("DROP TABLE IF EXISTS purchase_invoice_items;")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS purchase_invoice_items (id INTEGER PRIMARY KEY, purchase_invoice_id INTEGER NOT NULL, item_id INTEGER NOT NULL, quantity INTEGER NOT NULL, purchase_price REAL NOT NULL, taxable_value REAL, cgst_rate REAL, sgst_rate REAL, igst_rate REAL, cgst_amount REAL, sgst_amount REAL, igst_amount REAL, total_gst_amount REAL, FOREIGN KEY (purchase_invoice_id) REFERENCES purchase_invoices (id), FOREIGN KEY (item_id) REFERENCES items (id));")
-        conn.execute("DROP TABLE IF EXISTS sales_invoice_items;")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS sales_invoice_items (id INTEGER PRIMARY KEY, sales_invoice_id INTEGER NOT NULL, item_id INTEGER NOT NULL, quantity INTEGER NOT NULL, selling_price REAL NOT NULL, taxable_value REAL, cgst_rate REAL, sgst_rate REAL, igst_rate REAL, cgst_amount REAL, sgst_amount REAL, igst_amount REAL, total_gst_amount REAL, FOREIGN KEY (sales_invoice_id) REFERENCES sales_invoices (id), FOREIGN KEY (item_id) REFERENCES items (id));")
-
-        # --- Payment & Linking Tables ---
-        create_table(conn, "CREATE TABLE IF NOT EXISTS customer_payments (id INTEGER PRIMARY KEY, customer_id INTEGER NOT NULL, payment_date TEXT NOT NULL, amount REAL NOT NULL, notes TEXT, FOREIGN KEY(customer_id) REFERENCES customers(id));")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS supplier_payments (id INTEGER PRIMARY KEY, supplier_id INTEGER NOT NULL, payment_date TEXT NOT NULL, amount REAL NOT NULL, notes TEXT, FOREIGN KEY(supplier_id) REFERENCES suppliers(id));")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS customer_payment_allocations (payment_id INTEGER NOT NULL, sales_invoice_id INTEGER NOT NULL, amount REAL NOT NULL, PRIMARY KEY (payment_id, sales_invoice_id), FOREIGN KEY(payment_id) REFERENCES customer_payments(id), FOREIGN KEY(sales_invoice_id) REFERENCES sales_invoices(id));")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS supplier_payment_allocations (payment_id INTEGER NOT NULL, purchase_invoice_id INTEGER NOT NULL, amount REAL NOT NULL, PRIMARY KEY (payment_id, purchase_invoice_id), FOREIGN KEY(payment_id) REFERENCES supplier_payments(id), FOREIGN KEY(purchase_invoice_id) REFERENCES purchase_invoices(id));")
-
-        # --- Inventory & Other Linking Tables ---
-        conn.execute("DROP TABLE IF EXISTS item_serial_numbers;")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS item_serial_numbers (id INTEGER PRIMARY KEY, item_id INTEGER NOT NULL, serial_number TEXT NOT NULL UNIQUE, status TEXT NOT NULL, godown_id INTEGER NOT NULL, purchase_invoice_id INTEGER, sale_invoice_id INTEGER, warranty_end_date TEXT, FOREIGN KEY (item_id) REFERENCES items (id), FOREIGN KEY (godown_id) REFERENCES godowns (id), FOREIGN KEY (purchase_invoice_id) REFERENCES purchase_invoices (id), FOREIGN KEY (sale_invoice_id) REFERENCES sales_invoices (id));")
-        conn.execute("DROP TABLE IF EXISTS assemblies;")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS assemblies (id INTEGER PRIMARY KEY, assembled_item_id INTEGER NOT NULL, new_serial_number_id INTEGER NOT NULL, total_cost REAL NOT NULL, assembly_date TEXT NOT NULL, FOREIGN KEY (assembled_item_id) REFERENCES items (id), FOREIGN KEY (new_serial_number_id) REFERENCES item_serial_numbers (id));")
-        conn.execute("DROP TABLE IF EXISTS assembly_components;")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS assembly_components (id INTEGER PRIMARY KEY, assembly_id INTEGER NOT NULL, component_item_id INTEGER NOT NULL, used_serial_number_id INTEGER NOT NULL, FOREIGN KEY (assembly_id) REFERENCES assemblies (id), FOREIGN KEY (component_item_id) REFERENCES items (id), FOREIGN KEY (used_serial_number_id) REFERENCES item_serial_numbers (id));")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS item_batches (id INTEGER PRIMARY KEY, item_id INTEGER NOT NULL, batch_number TEXT NOT NULL, expiry_date TEXT, quantity INTEGER NOT NULL, godown_id INTEGER NOT NULL, FOREIGN KEY (item_id) REFERENCES items (id), FOREIGN KEY (godown_id) REFERENCES godowns (id));")
-
-        # --- Service Tables ---
-        create_table(conn, "CREATE TABLE IF NOT EXISTS amcs (id INTEGER PRIMARY KEY, customer_id INTEGER NOT NULL, start_date TEXT NOT NULL, end_date TEXT NOT NULL, value REAL NOT NULL, FOREIGN KEY(customer_id) REFERENCES customers(id));")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS amc_service_calls (id INTEGER PRIMARY KEY, amc_id INTEGER NOT NULL, service_date TEXT NOT NULL, details TEXT, solution TEXT, FOREIGN KEY(amc_id) REFERENCES amcs(id));")
-        create_table(conn, """
-        CREATE TABLE IF NOT EXISTS job_sheets (
-            id INTEGER PRIMARY KEY, customer_id INTEGER NOT NULL, received_date TEXT NOT NULL, product_name TEXT, product_serial TEXT,
-            reported_problem TEXT, status TEXT, estimated_cost REAL, estimated_timeline TEXT, assigned_to TEXT,
-            FOREIGN KEY(customer_id) REFERENCES customers(id)
-        );""")
-        create_table(conn, "CREATE TABLE IF NOT EXISTS job_sheet_accessories (id INTEGER PRIMARY KEY, job_sheet_id INTEGER NOT NULL, name TEXT NOT NULL, FOREIGN KEY(job_sheet_id) REFERENCES job_sheets(id));")
-
-        # --- Pre-Sales Tables ---
-        create_table(conn, """
-        CREATE TABLE IF NOT EXISTS quotations (
-            id INTEGER PRIMARY KEY, customer_id INTEGER NOT NULL, quote_date TEXT NOT NULL, expiry_date TEXT,
-            total_amount REAL NOT NULL, status TEXT DEFAULT 'DRAFT',
-            FOREIGN KEY(customer_id) REFERENCES customers(id)
-        );""")
-        create_table(conn, """
-        CREATE TABLE IF NOT EXISTS quotation_items (
-            id INTEGER PRIMARY KEY, quotation_id INTEGER NOT NULL, item_id INTEGER NOT NULL,
-            quantity INTEGER NOT NULL, selling_price REAL NOT NULL,
-            FOREIGN KEY(quotation_id) REFERENCES quotations(id), FOREIGN KEY(item_id) REFERENCES items(id)
-        );""")
-
-        # --- Schema Migrations / Alterations ---
-        try:
-            conn.execute("ALTER TABLE gl_transactions ADD COLUMN is_reconciled BOOLEAN DEFAULT FALSE;")
-        except sqlite3.OperationalError:
-            pass # Column already exists
-        try:
-            conn.execute("ALTER TABLE gl_transactions ADD COLUMN reconciliation_date TEXT;")
-        except sqlite3.OperationalError:
-            pass # Column already exists
-        try:
-            conn.execute("ALTER TABLE items ADD COLUMN category TEXT;")
-        except sqlite3.OperationalError:
-            pass # Column already exists
-        try:
-            conn.execute("ALTER TABLE items ADD COLUMN unit_id INTEGER;")
-        except sqlite3.OperationalError:
-            pass # Column already exists
         try:
-            conn.execute("ALTER TABLE items ADD COLUMN hsn_code_id INTEGER;")
-        except sqlite3.OperationalError:
-            pass # Column already exists
-        try:
-            conn.execute("ALTER TABLE customers ADD COLUMN billing_address TEXT;")
-            conn.execute("ALTER TABLE customers ADD COLUMN shipping_address TEXT;")
-            conn.execute("ALTER TABLE customers ADD COLUMN credit_limit REAL;")
-        except sqlite3.OperationalError:
-            pass # Columns already exist
-
-        # Pre-populate units
-        try:
-            cursor = conn.cursor()
-            default_units = [('Pcs',), ('Nos',), ('Box',), ('Dozen',), ('Meter',), ('Kg',), ('Gram',), ('Liter',)]
-            cursor.executemany("INSERT OR IGNORE INTO units (name) VALUES (?)", default_units)
-            conn.commit()
+            from_version = get_schema_version(conn)
+            if from_version < SCHEMA_VERSION:
+                migrate(conn)
+                print(f"Database {db_path} migrated from schema version {from_version} to {SCHEMA_VERSION}.")
         except sqlite3.Error as e:
-            print(f"Could not pre-populate units: {e}")
-
-        # Pre-populate gst_slabs and default settings
-        try:
-            cursor = conn.cursor()
-            default_slabs = [
-                (0, 'Exempt'),
-                (5, 'GST 5%'),
-                (12, 'GST 12%'),
-                (18, 'GST 18%'),
-                (28, 'GST 28%')
-            ]
-            cursor.executemany("INSERT OR IGNORE INTO gst_slabs (rate, description) VALUES (?, ?)", default_slabs)
-
-            # Set default company state
-            cursor.execute("INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)", ('company_state', ''))
-
-            conn.commit()
-        except sqlite3.Error as e:
-            print(f"Could not pre-populate GST slabs or settings: {e}")
-
-        print("Database tables created successfully.")
-        conn.close()
+            print(f"Database migration failed: {e}")
+            raise
+        finally:
+            conn.close()
     else:
         print("Error! cannot create the database connection.")
 
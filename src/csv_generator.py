@@ -62,17 +62,22 @@ def generate_items_template(filename):
 
 def export_to_csv(data, filename):
     """
-    Exports a list of dictionaries to a CSV file.
-    The keys of the first dictionary are used as headers.
+    Exports dictionaries (or db_manager Records) to a CSV file. `data` may be
+    a list or an iterator such as db_manager.iter_customers_for_export(),
+    which is written out row by row. The keys of the first row are used as headers.
     """
-    if not data:
+    rows = iter(data)
+    first = next(rows, None)
+    if first is None:
         return False, "No data to export."
 
     try:
+        fieldnames = list(first.keys())
         with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=data[0].keys())
-            writer.writeheader()
-            writer.writerows(data)
+            writer = csv.writer(csvfile)
+            writer.writerow(fieldnames)
+            writer.writerow([first.get(name, '') for name in fieldnames])
+            writer.writerows([row.get(name, '') for name in fieldnames] for row in rows)
         return True, None
     except (IOError, csv.Error) as e:
         print(f"Error exporting to CSV: {e}")
@@ -25,6 +25,7 @@ def validate_purchases_csv(file_path):
     invoices = defaultdict(lambda: {'items': [], 'errors': []})
     all_suppliers = {s['name']: s['id'] for s in db_manager.get_all_suppliers()}
     all_items = {i['name']: i for i in db_manager.get_all_items()}
+    serial_lines = []  # (invoice index, item index, serials) for every serialized line
 
     try:
         with open(file_path, mode='r', encoding='utf-8') as infile:
@@ -67,14 +68,20 @@ def validate_purchases_csv(file_path):
                     try:
                         qty = float(item_row.get('quantity', '0'))
                         price = float(item_row.get('purchase_price', '0'))
-
-                        if item_info['is_serialized']:
-                            serials = [s.strip() for s in item_row.get('serial_numbers', '').split(',') if s.strip()]
-                            if len(serials) != int(qty):
-                                item_errors.append("Number of serials must match quantity.")
-                            item_row['serial_numbers'] = serials
                     except (ValueError, TypeError):
                         item_errors.append("Qty and Price must be valid numbers.")
+                    else:
+                        if item_info['is_serialized']:
+                            try:
+                                serials = db_manager.expand_serial_numbers(item_row.get('serial_numbers', ''))
+                            except ValueError as e:
+                                item_errors.append(str(e))
+                                serials = []
+                            else:
+                                if len(serials) != int(qty):
+                                    item_errors.append("Number of serials must match quantity.")
+                            item_row['serial_numbers'] = serials
+                            serial_lines.append((len(validated_invoices), len(validated_items), serials))
 
                 if item_errors:
                     is_valid = False
@@ -86,6 +93,16 @@ def validate_purchases_csv(file_path):
                 'errors': ", ".join(header_errors)
             })
 
+        # Serials must be new across the whole file, not just within one line.
+        repeated, existing = map(set, db_manager.find_serial_conflicts([sn for _, _, serials in serial_lines for sn in serials]))
+        for invoice_index, item_index, serials in serial_lines:
+            clashing = list(dict.fromkeys(sn for sn in serials if sn in repeated or sn in existing))
+            if clashing:
+                item = validated_invoices[invoice_index]['data']['items'][item_index]
+                message = db_manager.describe_serial_conflicts([sn for sn in clashing if sn in repeated], [sn for sn in clashing if sn in existing])
+                item['errors'] = ", ".join(filter(None, [item['errors'], message]))
+                validated_invoices[invoice_index]['is_valid'] = False
+
     except Exception as e:
         return None, f"An unexpected error occurred: {e}"
     return validated_invoices, None
@@ -1,15 +1,330 @@
 import sqlite3
 import datetime
-from dateutil.relativedelta import relativedelta
+import decimal
+import atexit
+import bisect
+import functools
+import json
+import keyword
+import operator
+import os
+import sys
+import threading
+import queue
+import re
+from collections import OrderedDict
+from db.database_setup import DEFAULT_ACCOUNTS, SEARCH_KIND_MULTIPLIER
 
 DATABASE_PATH = 'db/accounting.db'
 
 # --- Connection ---
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE_PATH)
+# PRAGMAs applied once when a connection is opened. WAL lets readers run
+# alongside a writer; NORMAL sync is durable under WAL except on power loss.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",      # 16 MB page cache per connection
+    "PRAGMA mmap_size = 268435456",    # 256 MB memory-mapped I/O
+)
+# Existing databases (and the import paths that default godown_id to 1) predate
+# FK enforcement, so it stays opt-in.
+ENFORCE_FOREIGN_KEYS = False
+# Leases for worker threads, one per UI task worker (task_runner.MAX_WORKERS
+# follows it). The main thread and the posting writer have connections of
+# their own, so a save never waits behind reports and exports.
+WORKER_POOL_SIZE = 4
+BUSY_TIMEOUT_SECONDS = 5.0
+
+class _Connection(sqlite3.Connection):
+    """sqlite3.Connection that remembers its database file and pool membership."""
+    path = None
+    pooled = False
+
+def _open_connection(path, check_same_thread=True):
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SECONDS, factory=_Connection,
+                           check_same_thread=check_same_thread)
+    conn.path = path
     conn.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    conn.execute(f"PRAGMA foreign_keys = {'ON' if ENFORCE_FOREIGN_KEYS else 'OFF'}")
     return conn
 
+class ConnectionManager:
+    """
+    Hands out long-lived connections to DATABASE_PATH.
+
+    The main (Tk) thread keeps a single connection open for the life of the
+    process, and so does a thread that called dedicate_thread() until it calls
+    release_thread(). Any other thread leases a connection from a bounded pool
+    for as long as it holds at least one handle, so nested db_manager calls on
+    the same thread share one connection (and one transaction).
+    """
+
+    def __init__(self, pool_size=WORKER_POOL_SIZE):
+        self.pool_size = pool_size
+        self.connects = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._idle = []
+        self._open = set()
+        self._main_conn = None
+
+    def acquire(self):
+        """Returns a handle to the calling thread's connection."""
+        local = self._local
+        conn = getattr(local, 'conn', None)
+        if conn is None or conn.path != DATABASE_PATH or conn not in self._open:
+            # No lease yet, close_all() ran, or DATABASE_PATH was switched while an
+            # orphaned handle (e.g. one kept alive by a traceback) held the old one.
+            local.conn = conn = self._checkout()
+            local.refs = 0
+        local.refs += 1
+        return _ConnectionHandle(self, conn)
+
+    def dedicate_thread(self):
+        """Gives the calling thread a connection of its own, outside the pool."""
+        self._local.dedicated = True
+
+    def release_thread(self):
+        """Closes the calling thread's own connection; later calls lease from the pool again."""
+        conn = getattr(self._local, 'own_conn', None)
+        self._local.dedicated = False
+        self._local.own_conn = None
+        if conn is not None:
+            self._discard(conn)
+
+    def release(self, conn):
+        local = self._local
+        if conn is getattr(local, 'conn', None):
+            local.refs -= 1
+            if local.refs > 0:
+                return
+            local.conn = None
+        try:
+            if conn.in_transaction:
+                conn.rollback()  # Never leave a half-done write holding the lock
+        except sqlite3.ProgrammingError:
+            pass  # Closed underneath us by close_all()
+        if conn.pooled:
+            with self._lock:
+                if conn in self._open:
+                    self._idle.append(conn)
+            self._slots.release()
+
+    def _checkout(self):
+        path = DATABASE_PATH
+        if threading.current_thread() is threading.main_thread():
+            if self._main_conn is None or self._main_conn.path != path:
+                if self._main_conn is not None:
+                    self._discard(self._main_conn)
+                self._main_conn = self._connect(path, check_same_thread=True)
+            return self._main_conn
+        if getattr(self._local, 'dedicated', False):
+            conn = getattr(self._local, 'own_conn', None)
+            if conn is None or conn.path != path or conn not in self._open:
+                if conn is not None:
+                    self._discard(conn)
+                self._local.own_conn = conn = self._connect(path, check_same_thread=True)
+            return conn
+
+        self._slots.acquire()
+        try:
+            with self._lock:
+                while self._idle:
+                    conn = self._idle.pop()
+                    if conn.path == path:
+                        return conn
+                    self._open.discard(conn)
+                    conn.close()
+            conn = self._connect(path, check_same_thread=False)
+            conn.pooled = True
+            return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _connect(self, path, check_same_thread):
+        conn = _open_connection(path, check_same_thread=check_same_thread)
+        with self._lock:
+            self._open.add(conn)
+            self.connects += 1
+        return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self._open.discard(conn)
+        conn.close()
+
+    def close_all(self):
+        """Closes every connection this manager has opened."""
+        with self._lock:
+            conns, self._open = self._open, set()
+            self._idle = []
+        self._main_conn = None
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+class _ConnectionHandle:
+    """
+    Behaves like the underlying sqlite3 connection, except that close() hands
+    the connection back to the manager instead of closing it.
+    """
+
+    def __init__(self, manager, conn):
+        self._manager = manager
+        self._conn = conn
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._manager.release(self._conn)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+_connections = ConnectionManager()
+
+def get_db_connection():
+    return _connections.acquire()
+
+# --- Records ---
+# Bulk fetches return Records rather than dict(row) copies: one tuple per row,
+# with the column names held once per query by a generated subclass. A Record
+# answers record['name'], record.name, record[0], record.get() and keys(), so
+# it stands in for the dicts the screens, the CSV writer and dict() expect.
+STREAM_BATCH_SIZE = 1000
+
+class Record(tuple):
+    __slots__ = ()
+    _fields = ()
+    _index = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self):
+        return self._index.keys()
+
+    def _asdict(self):
+        return dict(zip(self._fields, self))
+
+    def __repr__(self):
+        return f"Record({', '.join(f'{name}={value!r}' for name, value in zip(self._fields, self))})"
+
+_record_classes = {}
+
+def record_class(fields):
+    """The Record subclass for a tuple of column names, created once per distinct column list."""
+    cls = _record_classes.get(fields)
+    if cls is None:
+        namespace = {'__slots__': (), '_fields': fields, '_index': {name: i for i, name in enumerate(fields)}}
+        for i, name in enumerate(fields):
+            if name.isidentifier() and not keyword.iskeyword(name) and not hasattr(Record, name):
+                namespace[name] = property(operator.itemgetter(i))
+        cls = _record_classes[fields] = type('Record', (Record,), namespace)
+    return cls
+
+def _iter_records(query, params=()):
+    """
+    Streams the rows of query as Records, STREAM_BATCH_SIZE at a time. The
+    connection is held until the rows run out or the generator is closed.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.row_factory = None  # Plain tuples; the Record class carries the names
+    try:
+        cursor.execute(query, params)
+        record = record_class(tuple(column[0] for column in cursor.description))
+        while True:
+            rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+            if not rows:
+                break
+            yield from map(record, rows)
+    finally:
+        cursor.close()
+        conn.close()
+
+def _fetch_records(query, params=()):
+    """All rows of query as a list of Records."""
+    return list(_iter_records(query, params))
+
+def close_all_connections():
+    """Closes all pooled connections. Called at shutdown and before a restore."""
+    _connections.close_all()
+
+atexit.register(close_all_connections)
+
+# --- Money ---
+# Amounts are stored as integer paise, so sums, balance checks and PAID
+# comparisons are exact. Callers still pass and receive rupees: writes go
+# through to_paise() and reads divide by 100.0 in the SQL that returns them.
+PAISE_PER_RUPEE = 100
+INVOICE_MONEY_FIELDS = ('total_amount', 'taxable_amount', 'cgst_amount', 'sgst_amount', 'igst_amount', 'total_gst_amount')
+LINE_MONEY_FIELDS = ('taxable_value', 'cgst_amount', 'sgst_amount', 'igst_amount', 'total_gst_amount')
+
+def to_paise(amount):
+    """Rupees (number or numeric string) as integer paise, rounding half away from zero. None stays None."""
+    if amount is None or amount == '':
+        return None
+    if isinstance(amount, int):
+        return amount * PAISE_PER_RUPEE
+    # str() first so 1.005 rounds as written rather than as its binary approximation.
+    return int((decimal.Decimal(str(amount)) * PAISE_PER_RUPEE).to_integral_value(decimal.ROUND_HALF_UP))
+
+def to_rupees(paise):
+    """Integer paise as rupees. None stays None."""
+    return None if paise is None else paise / PAISE_PER_RUPEE
+
+def _round_paise(value):
+    return int(decimal.Decimal(value).to_integral_value(decimal.ROUND_HALF_UP))
+
+def calculate_gst(taxable_value, rate, interstate=False):
+    """
+    GST on a taxable value in rupees at rate percent. Returns a dict of
+    cgst_amount, sgst_amount, igst_amount and total_gst_amount in rupees.
+    Each half of an intra-state levy is rounded to the paisa on its own, so
+    CGST and SGST are always equal and add up exactly to the total.
+    """
+    taxable = decimal.Decimal(to_paise(taxable_value) or 0)
+    rate = decimal.Decimal(str(rate or 0))
+    if interstate:
+        cgst = sgst = 0
+        igst = _round_paise(taxable * rate / 100)
+    else:
+        cgst = sgst = _round_paise(taxable * rate / 200)
+        igst = 0
+    return {'cgst_amount': to_rupees(cgst), 'sgst_amount': to_rupees(sgst), 'igst_amount': to_rupees(igst),
+            'total_gst_amount': to_rupees(cgst + sgst + igst)}
+
+def _with_paise(data, fields):
+    """A copy of the dict data with the given rupee fields converted to paise."""
+    return dict(data, **{field: to_paise(data.get(field)) for field in fields})
+
 # --- Settings ---
 def get_setting(key, default=None):
     """Gets a setting value from the database."""
@@ -39,16 +354,10 @@ def get_all_settings():
     return {row['key']: row['value'] for row in rows}
 
 
-# --- Data Management ---
-import shutil
-
 # --- GST Management ---
 def get_all_gst_slabs():
     """Gets all GST slabs from the database."""
-    conn = get_db_connection()
-    slabs = conn.execute("SELECT id, rate, description FROM gst_slabs ORDER BY rate").fetchall()
-    conn.close()
-    return [dict(row) for row in slabs]
+    return _fetch_records("SELECT id, rate, description FROM gst_slabs ORDER BY rate")
 
 def add_gst_slab(rate, description):
     """Adds a new GST slab."""
@@ -56,6 +365,7 @@ def add_gst_slab(rate, description):
     try:
         conn.execute("INSERT INTO gst_slabs (rate, description) VALUES (?, ?)", (rate, description))
         conn.commit()
+        _touch_reference('gst_slabs')
         return True
     except sqlite3.Error as e:
         print(f"Database error on adding GST slab: {e}")
@@ -72,6 +382,7 @@ def delete_gst_slab(slab_id):
         # For now, we'll just delete it. A more robust implementation would prevent this.
         conn.execute("DELETE FROM gst_slabs WHERE id = ?", (slab_id,))
         conn.commit()
+        _touch_reference('gst_slabs')
         return True
     except sqlite3.Error as e:
         print(f"Database error on deleting GST slab: {e}")
@@ -82,7 +393,6 @@ def delete_gst_slab(slab_id):
 # --- HSN Management ---
 def get_all_hsn_codes_with_details():
     """Gets all HSN codes with their associated GST slab rate for display."""
-    conn = get_db_connection()
     query = """
     SELECT
         h.id,
@@ -94,9 +404,7 @@ def get_all_hsn_codes_with_details():
     LEFT JOIN gst_slabs g ON h.gst_slab_id = g.id
     ORDER BY h.hsn_code
     """
-    codes = conn.execute(query).fetchall()
-    conn.close()
-    return [dict(row) for row in codes]
+    return _fetch_records(query)
 
 def add_hsn_code(code, description, gst_slab_id):
     """Adds a new HSN code."""
@@ -105,6 +413,7 @@ def add_hsn_code(code, description, gst_slab_id):
         conn.execute("INSERT INTO hsn_codes (hsn_code, description, gst_slab_id) VALUES (?, ?, ?)",
                      (code, description, gst_slab_id))
         conn.commit()
+        _touch_reference('hsn_codes')
     except sqlite3.Error as e:
         raise e # Re-raise to be handled by UI
     finally:
@@ -117,6 +426,7 @@ def update_hsn_code(hsn_id, code, description, gst_slab_id):
         conn.execute("UPDATE hsn_codes SET hsn_code = ?, description = ?, gst_slab_id = ? WHERE id = ?",
                      (code, description, gst_slab_id, hsn_id))
         conn.commit()
+        _touch_reference('hsn_codes')
     except sqlite3.Error as e:
         raise e
     finally:
@@ -133,6 +443,7 @@ def delete_hsn_code(hsn_id):
     try:
         conn.execute("DELETE FROM hsn_codes WHERE id = ?", (hsn_id,))
         conn.commit()
+        _touch_reference('hsn_codes')
     except sqlite3.Error as e:
         raise e
     finally:
@@ -146,6 +457,7 @@ def add_unit(name):
     try:
         conn.execute("INSERT INTO units (name) VALUES (?)", (name,))
         conn.commit()
+        _touch_reference('units')
         return True
     except sqlite3.IntegrityError: # For UNIQUE constraint
         return False
@@ -230,18 +542,38 @@ def get_units_for_item(item_id):
 
 
 def backup_database(backup_file_path):
-    """Copies the current database file to the specified backup path."""
+    """Copies the current database to the specified backup path."""
+    # The online backup API includes pages still sitting in the WAL file,
+    # which a plain file copy of DATABASE_PATH would miss.
+    conn = get_db_connection()
     try:
-        shutil.copyfile(DATABASE_PATH, backup_file_path)
+        dest = sqlite3.connect(backup_file_path)
+        try:
+            conn.backup(dest)
+        finally:
+            dest.close()
         return True
-    except (IOError, shutil.Error) as e:
+    except sqlite3.Error as e:
         print(f"Error backing up database: {e}")
         return False
+    finally:
+        conn.close()
 
 def restore_database(backup_file_path):
     """Restores the database from a backup file."""
+    import shutil
     try:
+        # Close our connections first so the WAL is checkpointed and removed,
+        # then drop any leftover -wal/-shm so they can't be replayed onto the restored file.
+        close_all_connections()
         shutil.copyfile(backup_file_path, DATABASE_PATH)
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(DATABASE_PATH + suffix):
+                os.remove(DATABASE_PATH + suffix)
+        # The restored file may carry the same version counters as the one it replaced.
+        _search_prefixes.invalidate()
+        _reference_cache.invalidate()
+        _report_cache.invalidate()
         return True
     except (IOError, shutil.Error) as e:
         print(f"Error restoring database: {e}")
@@ -250,18 +582,11 @@ def restore_database(backup_file_path):
 
 # --- GL & Accounts ---
 def initialize_chart_of_accounts():
+    """Seeds the predefined accounts. New databases get them from the baseline migration."""
     conn = get_db_connection()
-    cursor = conn.cursor()
-    accounts = [
-        ('Cash', 'Asset', True), ('Accounts Receivable', 'Asset', True), ('Inventory', 'Asset', True),
-        ('Accounts Payable', 'Liability', True), ('GST Payable', 'Liability', True),
-        ('Owner\'s Equity', 'Equity', True), ('Sales Revenue', 'Revenue', True),
-        ('Cost of Goods Sold', 'Expense', True)
-    ]
     try:
-        cursor.executemany("INSERT INTO accounts (name, type, is_predefined) VALUES (?, ?, ?)", accounts)
-        conn.commit()
-    except sqlite3.IntegrityError: pass
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO accounts (name, type, is_predefined) VALUES (?, ?, ?)", DEFAULT_ACCOUNTS)
     finally: conn.close()
 
 def get_all_accounts():
@@ -296,8 +621,9 @@ def add_item(name, purchase_price, selling_price, warranty, min_stock, category,
             INSERT INTO items (name, purchase_price, selling_price, default_warranty_months,
                                minimum_stock_level, category, unit_id, hsn_code_id, gst_slab_id, is_serialized)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (name, purchase_price, selling_price, warranty, min_stock, category, unit_id, hsn_code_id, gst_slab_id, is_serialized))
+        """, (name, to_paise(purchase_price), to_paise(selling_price), warranty, min_stock, category, unit_id, hsn_code_id, gst_slab_id, is_serialized))
         conn.commit()
+        _touch_reference('items')
         return True
     except sqlite3.Error as e:
         print(f"DB Error on add_item: {e}")
@@ -312,8 +638,9 @@ def update_item(item_id, name, purchase_price, selling_price, warranty, min_stoc
             UPDATE items SET name=?, purchase_price=?, selling_price=?, default_warranty_months=?,
                             minimum_stock_level=?, category=?, unit_id=?, hsn_code_id=?, gst_slab_id=?, is_serialized=?
             WHERE id=?
-        """, (name, purchase_price, selling_price, warranty, min_stock, category, unit_id, hsn_code_id, gst_slab_id, is_serialized, item_id))
+        """, (name, to_paise(purchase_price), to_paise(selling_price), warranty, min_stock, category, unit_id, hsn_code_id, gst_slab_id, is_serialized, item_id))
         conn.commit()
+        _touch_reference('items')
         return True
     except sqlite3.Error as e:
         print(f"DB Error on update_item: {e}")
@@ -322,11 +649,14 @@ def update_item(item_id, name, purchase_price, selling_price, warranty, min_stoc
         conn.close()
 
 def get_all_items():
-    conn = get_db_connection()
+    return list(iter_all_items())
+
+def iter_all_items():
+    """Streams the get_all_items rows."""
     query = """
     SELECT
         i.id, i.name, i.category, u.name as unit_name,
-        i.purchase_price, i.selling_price, i.default_warranty_months,
+        i.purchase_price / 100.0 as purchase_price, i.selling_price / 100.0 as selling_price, i.default_warranty_months,
         i.minimum_stock_level, i.is_serialized, i.is_assembled_item,
         h.hsn_code, g.rate as gst_rate,
         i.hsn_code_id, i.gst_slab_id, i.unit_id
@@ -336,15 +666,14 @@ def get_all_items():
     LEFT JOIN gst_slabs g ON i.gst_slab_id = g.id
     ORDER BY i.name
     """
-    items = conn.execute(query).fetchall()
-    conn.close()
-    return [dict(row) for row in items]
+    return _iter_records(query)
 
 def add_supplier(name, gstin, address, phone, email, state):
     conn = get_db_connection()
     try:
         conn.execute("INSERT INTO suppliers (name, gstin, address, phone, email, state) VALUES (?, ?, ?, ?, ?, ?)", (name, gstin, address, phone, email, state))
         conn.commit()
+        _touch_reference('suppliers')
         return True
     except sqlite3.Error:
         return False
@@ -362,6 +691,7 @@ def update_supplier(supplier_id, name, gstin, address, phone, email, state):
     try:
         conn.execute("UPDATE suppliers SET name = ?, gstin = ?, address = ?, phone = ?, email = ?, state = ? WHERE id = ?", (name, gstin, address, phone, email, state, supplier_id))
         conn.commit()
+        _touch_reference('suppliers')
         return True
     except sqlite3.Error:
         return False
@@ -372,8 +702,9 @@ def add_customer(name, gstin, address, phone, email, state, billing_address, shi
     conn = get_db_connection()
     try:
         conn.execute("INSERT INTO customers (name, gstin, address, phone, email, state, billing_address, shipping_address, credit_limit) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                     (name, gstin, address, phone, email, state, billing_address, shipping_address, credit_limit))
+                     (name, gstin, address, phone, email, state, billing_address, shipping_address, to_paise(credit_limit)))
         conn.commit()
+        _touch_reference('customers')
         return True
     except sqlite3.Error:
         return False
@@ -382,7 +713,11 @@ def add_customer(name, gstin, address, phone, email, state, billing_address, shi
 
 def get_all_customers():
     conn = get_db_connection()
-    customers = conn.execute("SELECT * FROM customers ORDER BY name").fetchall()
+    customers = conn.execute("""
+        SELECT id, name, gstin, address, phone, email, state, billing_address, shipping_address,
+               credit_limit / 100.0 as credit_limit
+        FROM customers ORDER BY name
+    """).fetchall()
     conn.close()
     return customers
 
@@ -390,23 +725,105 @@ def update_customer(customer_id, name, gstin, address, phone, email, state, bill
     conn = get_db_connection()
     try:
         conn.execute("UPDATE customers SET name=?, gstin=?, address=?, phone=?, email=?, state=?, billing_address=?, shipping_address=?, credit_limit=? WHERE id=?",
-                     (name, gstin, address, phone, email, state, billing_address, shipping_address, credit_limit, customer_id))
+                     (name, gstin, address, phone, email, state, billing_address, shipping_address, to_paise(credit_limit), customer_id))
         conn.commit()
+        _touch_reference('customers')
         return True
     except sqlite3.Error:
         return False
     finally:
         conn.close()
 
+# --- Reference Data Cache ---
+# Customers, suppliers, items, units and GST slabs change rarely but are read
+# by nearly every screen, so they are kept in memory. Every write function for
+# one of these tables calls _touch_reference(), which bumps the in-process
+# version of that entity; the cache reloads an entity on its next read after
+# the version moves. Writes made outside db_manager are not seen until then.
+REFERENCE_LOADERS = {
+    'customers': (get_all_customers, 'name'),
+    'suppliers': (get_all_suppliers, 'name'),
+    'items': (get_all_items, 'name'),
+    'units': (get_all_units, 'name'),
+    'gst_slabs': (get_all_gst_slabs, 'rate'),
+}
+# Item rows carry their unit name, HSN code and GST rate.
+REFERENCE_DEPENDENTS = {
+    'units': ('units', 'items'),
+    'hsn_codes': ('items',),
+    'gst_slabs': ('gst_slabs', 'items'),
+}
+_reference_versions = dict.fromkeys(REFERENCE_LOADERS, 0)
+_reference_versions_lock = threading.Lock()
+
+def _touch_reference(*tables):
+    """Marks the cached rows built from tables as out of date."""
+    with _reference_versions_lock:
+        for table in tables:
+            for entity in REFERENCE_DEPENDENTS.get(table, (table,)):
+                _reference_versions[entity] += 1
+
+class ReferenceCache:
+    """
+    Rows of each reference entity in display order, with indexes by id and by
+    name (rate for GST slabs). The rows are shared between callers and must
+    not be modified.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # entity -> (database path, version, rows, by id, by name)
+        self.loads = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _entry(self, entity):
+        loader, name_column = REFERENCE_LOADERS[entity]
+        state = (DATABASE_PATH, _reference_versions[entity])
+        with self._lock:
+            entry = self._entries.get(entity)
+            if entry is None or entry[:2] != state:
+                # The version is read before loading, so a write that lands
+                # during the load leaves the entry stale rather than wrong.
+                rows = tuple(loader())
+                entry = state + (rows, {row['id']: row for row in rows}, {row[name_column]: row for row in rows})
+                self._entries[entity] = entry
+                self.loads += 1
+            return entry
+
+    def rows(self, entity):
+        return self._entry(entity)[2]
+
+    def by_id(self, entity, row_id):
+        return self._entry(entity)[3].get(row_id)
+
+    def by_name(self, entity, name):
+        return self._entry(entity)[4].get(name)
+
+_reference_cache = ReferenceCache()
+
+def get_reference_rows(entity):
+    """All cached rows of a reference entity ('customers', 'items', ...), in display order."""
+    return _reference_cache.rows(entity)
+
+def get_reference_row(entity, row_id):
+    """The cached row of a reference entity with the given id, or None."""
+    return _reference_cache.by_id(entity, row_id)
+
+def find_reference_row(entity, name):
+    """The cached row of a reference entity with the given name (rate for GST slabs), or None."""
+    return _reference_cache.by_name(entity, name)
+
 # --- Party Ledger Functions ---
 def get_transactions_for_customer(customer_id):
     """Fetches a chronological list of invoices and payments for a customer."""
     conn = get_db_connection()
     query = """
-    SELECT date, type, document_number, debit, credit FROM (
+    SELECT date, type, document_number, debit / 100.0 as debit, credit / 100.0 as credit FROM (
         SELECT invoice_date as date, 'Sales Invoice' as type, invoice_number as document_number, total_amount as debit, 0 as credit FROM sales_invoices WHERE customer_id = ?
         UNION ALL
-        SELECT payment_date as date, 'Payment Received' as type, 'Payment ID ' || id as document_number, 0 as debit, amount as credit FROM customer_payments WHERE customer_id = ?
+        SELECT payment_date as date, 'Payment Received' as type, IFNULL(payment_number, 'Payment ID ' || id) as document_number, 0 as debit, amount as credit FROM customer_payments WHERE customer_id = ?
     ) ORDER BY date
     """
     transactions = conn.execute(query, (customer_id, customer_id)).fetchall()
@@ -417,10 +834,10 @@ def get_transactions_for_supplier(supplier_id):
     """Fetches a chronological list of invoices and payments for a supplier."""
     conn = get_db_connection()
     query = """
-    SELECT date, type, document_number, debit, credit FROM (
+    SELECT date, type, document_number, debit / 100.0 as debit, credit / 100.0 as credit FROM (
         SELECT invoice_date as date, 'Purchase Invoice' as type, invoice_number as document_number, total_amount as debit, 0 as credit FROM purchase_invoices WHERE supplier_id = ?
         UNION ALL
-        SELECT payment_date as date, 'Payment Made' as type, 'Payment ID ' || id as document_number, 0 as debit, amount as credit FROM supplier_payments WHERE supplier_id = ?
+        SELECT payment_date as date, 'Payment Made' as type, IFNULL(payment_number, 'Payment ID ' || id) as document_number, 0 as debit, amount as credit FROM supplier_payments WHERE supplier_id = ?
     ) ORDER BY date
     """
     transactions = conn.execute(query, (supplier_id, supplier_id)).fetchall()
@@ -428,46 +845,54 @@ def get_transactions_for_supplier(supplier_id):
     return transactions
 
 def get_account_statement_data(party_id, party_type, start_date, end_date):
-    """Fetches data for a party's account statement, including opening balance."""
+    """
+    Fetches data for a party's account statement, including opening balance.
+    The opening balance starts from the latest period close before start_date.
+    """
     conn = get_db_connection()
     opening_balance = 0.0
+    close_id, closed_through = _latest_period_close(conn, start_date, inclusive=False)
 
     if party_type == 'Customer':
         ob_query = """
-        SELECT SUM(debit) - SUM(credit) FROM (
-            SELECT total_amount as debit, 0 as credit FROM sales_invoices WHERE customer_id = ? AND invoice_date < ?
+        SELECT (SUM(debit) - SUM(credit)) / 100.0 FROM (
+            SELECT balance as debit, 0 as credit FROM party_closing_balances WHERE period_close_id = ? AND party_type = 'Customer' AND party_id = ?
+            UNION ALL
+            SELECT total_amount as debit, 0 as credit FROM sales_invoices WHERE customer_id = ? AND invoice_date > ? AND invoice_date < ?
             UNION ALL
-            SELECT 0 as debit, amount as credit FROM customer_payments WHERE customer_id = ? AND payment_date < ?
+            SELECT 0 as debit, amount as credit FROM customer_payments WHERE customer_id = ? AND payment_date > ? AND payment_date < ?
         )
         """
-        ob_result = conn.execute(ob_query, (party_id, start_date, party_id, start_date)).fetchone()
+        ob_result = conn.execute(ob_query, (close_id, party_id, party_id, closed_through, start_date, party_id, closed_through, start_date)).fetchone()
         opening_balance = ob_result[0] if ob_result and ob_result[0] is not None else 0.0
 
         trans_query = """
-        SELECT date, type, document_number, debit, credit FROM (
+        SELECT date, type, document_number, debit / 100.0 as debit, credit / 100.0 as credit FROM (
             SELECT invoice_date as date, 'Sales Invoice' as type, invoice_number as document_number, total_amount as debit, 0 as credit FROM sales_invoices WHERE customer_id = ? AND invoice_date BETWEEN ? AND ?
             UNION ALL
-            SELECT payment_date as date, 'Payment Received' as type, 'Payment ID ' || id as document_number, 0 as debit, amount as credit FROM customer_payments WHERE customer_id = ? AND payment_date BETWEEN ? AND ?
+            SELECT payment_date as date, 'Payment Received' as type, IFNULL(payment_number, 'Payment ID ' || id) as document_number, 0 as debit, amount as credit FROM customer_payments WHERE customer_id = ? AND payment_date BETWEEN ? AND ?
         ) ORDER BY date
         """
         transactions = conn.execute(trans_query, (party_id, start_date, end_date, party_id, start_date, end_date)).fetchall()
 
     else: # Supplier
         ob_query = """
-        SELECT SUM(credit) - SUM(debit) FROM (
-            SELECT total_amount as credit, 0 as debit FROM purchase_invoices WHERE supplier_id = ? AND invoice_date < ?
+        SELECT (SUM(credit) - SUM(debit)) / 100.0 FROM (
+            SELECT balance as credit, 0 as debit FROM party_closing_balances WHERE period_close_id = ? AND party_type = 'Supplier' AND party_id = ?
             UNION ALL
-            SELECT 0 as credit, amount as debit FROM supplier_payments WHERE supplier_id = ? AND payment_date < ?
+            SELECT total_amount as credit, 0 as debit FROM purchase_invoices WHERE supplier_id = ? AND invoice_date > ? AND invoice_date < ?
+            UNION ALL
+            SELECT 0 as credit, amount as debit FROM supplier_payments WHERE supplier_id = ? AND payment_date > ? AND payment_date < ?
         )
         """
-        ob_result = conn.execute(ob_query, (party_id, start_date, party_id, start_date)).fetchone()
+        ob_result = conn.execute(ob_query, (close_id, party_id, party_id, closed_through, start_date, party_id, closed_through, start_date)).fetchone()
         opening_balance = ob_result[0] if ob_result and ob_result[0] is not None else 0.0
 
         trans_query = """
-        SELECT date, type, document_number, debit, credit FROM (
+        SELECT date, type, document_number, debit / 100.0 as debit, credit / 100.0 as credit FROM (
             SELECT invoice_date as date, 'Purchase Invoice' as type, invoice_number as document_number, 0 as debit, total_amount as credit FROM purchase_invoices WHERE supplier_id = ? AND invoice_date BETWEEN ? AND ?
             UNION ALL
-            SELECT payment_date as date, 'Payment Made' as type, 'Payment ID ' || id as document_number, amount as debit, 0 as credit FROM supplier_payments WHERE supplier_id = ? AND payment_date BETWEEN ? AND ?
+            SELECT payment_date as date, 'Payment Made' as type, IFNULL(payment_number, 'Payment ID ' || id) as document_number, amount as debit, 0 as credit FROM supplier_payments WHERE supplier_id = ? AND payment_date BETWEEN ? AND ?
         ) ORDER BY date
         """
         transactions = conn.execute(trans_query, (party_id, start_date, end_date, party_id, start_date, end_date)).fetchall()
@@ -476,29 +901,112 @@ def get_account_statement_data(party_id, party_type, start_date, end_date):
     return opening_balance, transactions
 
 # --- Invoice & Payment Queries ---
-def get_next_invoice_number():
+# doc_type: (table, number column, prefix setting, default prefix)
+DOCUMENT_SEQUENCES = {
+    'SALES_INVOICE': ('sales_invoices', 'invoice_number', 'prefix_sales_invoice', 'INV-'),
+    'QUOTATION': ('quotations', 'quote_number', 'prefix_quotation', 'QTN-'),
+    'JOB_SHEET': ('job_sheets', 'job_number', 'prefix_job_sheet', 'JOB-'),
+    'CUSTOMER_PAYMENT': ('customer_payments', 'payment_number', 'prefix_customer_payment', 'RCPT-'),
+    'SUPPLIER_PAYMENT': ('supplier_payments', 'payment_number', 'prefix_supplier_payment', 'PAY-'),
+    'ASSEMBLY': ('item_serial_numbers', 'serial_number', 'prefix_assembly', 'ASM-'),
+}
+
+def _fiscal_year(cursor, date):
+    """Label such as '2024-25' for the fiscal year containing date; the year starts on financial_year_start's month and day (default 1 April)."""
+    row = cursor.execute("SELECT value FROM settings WHERE key = 'financial_year_start'").fetchone()
+    start = row[0] if row and row[0] else "2000-04-01"
+    date = str(date)[:10]
+    year = int(date[:4]) if date[5:] >= start[5:10] else int(date[:4]) - 1
+    return f"{year}-{(year + 1) % 100:02d}"
+
+def _sequence_key(cursor, doc_type, date):
+    """
+    Returns (prefix, fiscal_year) for a document dated on date. Numbering only
+    restarts each fiscal year when the prefix shows the year via '{fy}', e.g.
+    'INV/{fy}/'; otherwise fiscal_year is '' and one counter runs forever.
     """
-    Generates the next sales invoice number based on the prefix from settings
-    and the last used number for that prefix.
+    _, _, setting_key, default_prefix = DOCUMENT_SEQUENCES[doc_type]
+    row = cursor.execute("SELECT value FROM settings WHERE key = ?", (setting_key,)).fetchone()
+    prefix = row[0] if row and row[0] is not None else default_prefix
+    fiscal_year = _fiscal_year(cursor, date or datetime.date.today().isoformat()) if "{fy}" in prefix else ""
+    return prefix, fiscal_year
+
+def _format_document_number(prefix, fiscal_year, number):
+    return f"{prefix.replace('{fy}', fiscal_year)}{number:04d}"
+
+def _highest_used_number(cursor, doc_type, prefix, fiscal_year):
+    """Largest numeric suffix already stored under this prefix; used once, to seed a new counter."""
+    table, column, _, _ = DOCUMENT_SEQUENCES[doc_type]
+    shown_prefix = prefix.replace('{fy}', fiscal_year)
+    # A range on the column's unique index rather than LIKE, which would read the whole table.
+    rows = cursor.execute(f"SELECT {column} FROM {table} WHERE {column} >= ? AND {column} < ?",
+                          (shown_prefix, shown_prefix + "\U0010ffff")).fetchall()
+    suffixes = [r[0][len(shown_prefix):] for r in rows]
+    return max((int(x) for x in suffixes if x.isdigit()), default=0)
+
+def _peek_sequence(cursor, doc_type, prefix, fiscal_year):
+    row = cursor.execute("SELECT next_number FROM document_sequences WHERE doc_type = ? AND prefix = ? AND fiscal_year = ?",
+                         (doc_type, prefix, fiscal_year)).fetchone()
+    return row[0] if row else _highest_used_number(cursor, doc_type, prefix, fiscal_year) + 1
+
+def _allocate_document_numbers(cursor, doc_type, date=None, count=1):
     """
+    Claims the next count numbers for doc_type inside the caller's transaction.
+    The counter row is written first, so the database write lock is held from
+    here until commit and no other connection can be handed the same numbers.
+    """
+    prefix, fiscal_year = _sequence_key(cursor, doc_type, date)
+    cursor.execute("INSERT OR IGNORE INTO document_sequences (doc_type, prefix, fiscal_year, next_number) VALUES (?, ?, ?, 0)",
+                   (doc_type, prefix, fiscal_year))
+    first = cursor.execute("SELECT next_number FROM document_sequences WHERE doc_type = ? AND prefix = ? AND fiscal_year = ?",
+                           (doc_type, prefix, fiscal_year)).fetchone()[0]
+    if first == 0:
+        first = _highest_used_number(cursor, doc_type, prefix, fiscal_year) + 1
+    cursor.execute("UPDATE document_sequences SET next_number = ? WHERE doc_type = ? AND prefix = ? AND fiscal_year = ?",
+                   (first + count, doc_type, prefix, fiscal_year))
+    return [_format_document_number(prefix, fiscal_year, n) for n in range(first, first + count)]
+
+def _note_document_number(cursor, doc_type, number, date=None):
+    """Moves the counter past a number that was supplied by the caller instead of allocated."""
+    prefix, fiscal_year = _sequence_key(cursor, doc_type, date)
+    shown_prefix = prefix.replace('{fy}', fiscal_year)
+    suffix = number[len(shown_prefix):] if number and number.startswith(shown_prefix) else ""
+    if not suffix.isdigit():
+        return
+    next_number = max(int(suffix) + 1, _peek_sequence(cursor, doc_type, prefix, fiscal_year))
+    cursor.execute("""
+        INSERT INTO document_sequences (doc_type, prefix, fiscal_year, next_number) VALUES (?, ?, ?, ?)
+        ON CONFLICT (doc_type, prefix, fiscal_year) DO UPDATE SET next_number = MAX(next_number, excluded.next_number)
+    """, (doc_type, prefix, fiscal_year, next_number))
+
+def get_next_document_number(doc_type, date=None):
+    """The number the next doc_type document would get. Only a preview: nothing is reserved."""
     conn = get_db_connection()
-    prefix = get_setting("prefix_sales_invoice", "INV-")
-
-    last_invoice = conn.execute(
-        "SELECT invoice_number FROM sales_invoices WHERE invoice_number LIKE ? ORDER BY id DESC LIMIT 1",
-        (f"{prefix}%",)
-    ).fetchone()
+    cursor = conn.cursor()
+    prefix, fiscal_year = _sequence_key(cursor, doc_type, date)
+    number = _format_document_number(prefix, fiscal_year, _peek_sequence(cursor, doc_type, prefix, fiscal_year))
     conn.close()
+    return number
 
-    if last_invoice:
-        try:
-            numeric_part = last_invoice['invoice_number'][len(prefix):]
-            next_number = int(numeric_part) + 1
-            return f"{prefix}{next_number:04d}"
-        except (ValueError, TypeError):
-            return f"{prefix}0001"
-    else:
-        return f"{prefix}0001"
+def get_next_invoice_number():
+    """Preview of the next sales invoice number, from the prefix in settings."""
+    return get_next_document_number('SALES_INVOICE')
+
+def reserve_document_numbers(doc_type, count, date=None):
+    """
+    Pre-claims a block of count numbers, e.g. for a terminal that posts offline.
+    The numbers are passed back explicitly when the documents are posted.
+    Returns the list of numbers, or None on error.
+    """
+    conn = get_db_connection()
+    try:
+        with conn:
+            return _allocate_document_numbers(conn.cursor(), doc_type, date, count)
+    except (sqlite3.Error, ValueError, KeyError) as e:
+        print(f"Error reserving document numbers: {e}")
+        return None
+    finally:
+        conn.close()
 
 def get_available_serial_numbers_for_item(item_id):
     conn = get_db_connection()
@@ -508,78 +1016,630 @@ def get_available_serial_numbers_for_item(item_id):
 
 def get_in_stock_serial_numbers():
     conn = get_db_connection()
-    components = conn.execute("SELECT sn.id as serial_id, sn.serial_number, i.id as item_id, i.name as item_name, i.purchase_price FROM item_serial_numbers sn JOIN items i ON sn.item_id = i.id WHERE sn.status = 'IN_STOCK' AND i.is_assembled_item = FALSE ORDER BY i.name, sn.serial_number").fetchall()
+    components = conn.execute("SELECT sn.id as serial_id, sn.serial_number, i.id as item_id, i.name as item_name, i.purchase_price / 100.0 as purchase_price FROM item_serial_numbers sn JOIN items i ON sn.item_id = i.id WHERE sn.status = 'IN_STOCK' AND i.is_assembled_item = FALSE ORDER BY i.name, sn.serial_number").fetchall()
     conn.close()
     return components
 
 def get_unpaid_sales_invoices(customer_id):
     conn = get_db_connection()
-    invoices = conn.execute("SELECT id, invoice_number, invoice_date, total_amount, amount_paid, status FROM sales_invoices WHERE customer_id = ? AND status != 'PAID' ORDER BY invoice_date", (customer_id,)).fetchall()
+    invoices = conn.execute("SELECT id, invoice_number, invoice_date, total_amount / 100.0 as total_amount, amount_paid / 100.0 as amount_paid, status FROM sales_invoices WHERE customer_id = ? AND status != 'PAID' ORDER BY invoice_date", (customer_id,)).fetchall()
     conn.close()
     return invoices
 
 def get_unpaid_purchase_invoices(supplier_id):
     conn = get_db_connection()
-    invoices = conn.execute("SELECT id, invoice_number, invoice_date, total_amount, amount_paid, status FROM purchase_invoices WHERE supplier_id = ? AND status != 'PAID' ORDER BY invoice_date", (supplier_id,)).fetchall()
+    invoices = conn.execute("SELECT id, invoice_number, invoice_date, total_amount / 100.0 as total_amount, amount_paid / 100.0 as amount_paid, status FROM purchase_invoices WHERE supplier_id = ? AND status != 'PAID' ORDER BY invoice_date", (supplier_id,)).fetchall()
     conn.close()
     return invoices
 
 def get_unreconciled_cash_transactions():
     conn = get_db_connection()
     cash_account_id = conn.execute("SELECT id FROM accounts WHERE name = 'Cash'").fetchone()['id']
-    transactions = conn.execute("SELECT gt.id, gt.date, gt.description, ge.debit, ge.credit FROM gl_transactions gt JOIN gl_entries ge ON gt.id = ge.transaction_id WHERE ge.account_id = ? AND gt.is_reconciled = FALSE ORDER BY gt.date", (cash_account_id,)).fetchall()
+    transactions = conn.execute("SELECT gt.id, gt.date, gt.description, ge.debit / 100.0 as debit, ge.credit / 100.0 as credit FROM gl_transactions gt JOIN gl_entries ge ON gt.id = ge.transaction_id WHERE ge.account_id = ? AND gt.is_reconciled = FALSE ORDER BY gt.date", (cash_account_id,)).fetchall()
     conn.close()
     return transactions
 
 # --- Transactional Operations ---
 def create_gl_transaction(conn, description, date, entries, source_doc_type=None, source_doc_id=None):
-    cursor = conn.cursor()
-    total_debits = sum(e[1] for e in entries if e[1] is not None)
-    total_credits = sum(e[2] for e in entries if e[2] is not None)
-    if round(total_debits, 2) != round(total_credits, 2): raise ValueError("Debits do not equal credits.")
-    cursor.execute("INSERT INTO gl_transactions (date, description, source_doc_type, source_doc_id) VALUES (?, ?, ?, ?)", (date, description, source_doc_type, source_doc_id))
-    transaction_id = cursor.lastrowid
-    for account_id, debit, credit in entries:
-        cursor.execute("INSERT INTO gl_entries (transaction_id, account_id, debit, credit) VALUES (?, ?, ?, ?)", (transaction_id, account_id, debit, credit))
-    return transaction_id
+    voucher = {"description": description, "date": date, "entries": entries,
+               "source_doc_type": source_doc_type, "source_doc_id": source_doc_id}
+    return post_gl_batch([voucher], conn_override=conn)[0]
+
+def post_gl_batch(transactions, conn_override=None):
+    """
+    Posts many GL vouchers at once. Each transaction is a dict with 'description',
+    'date' and 'entries' ((account_id, debit, credit) tuples in rupees), plus optional
+    'source_doc_type' and 'source_doc_id'. Every voucher is validated before
+    anything is written; headers and lines then go in with executemany and a
+    single commit. Returns the new gl_transactions ids in input order.
+    Raises ValueError if any voucher does not balance or falls in a closed period.
+    """
+    if not transactions:
+        return []
+    # Each line is rounded to the paisa once; the vouchers must then balance exactly.
+    transactions = [dict(txn, entries=[(account_id, to_paise(debit), to_paise(credit)) for account_id, debit, credit in txn['entries']])
+                    for txn in transactions]
+    for index, txn in enumerate(transactions):
+        total_debits = sum(e[1] for e in txn['entries'] if e[1] is not None)
+        total_credits = sum(e[2] for e in txn['entries'] if e[2] is not None)
+        if total_debits != total_credits:
+            raise ValueError(f"Debits do not equal credits (voucher {index + 1}: {txn['description']}).")
 
-def create_purchase_invoice_transaction(invoice_data, items_data, conn_override=None):
     conn = conn_override if conn_override else get_db_connection()
 
-    def _execute_transaction(c):
+    def _execute_batch(c):
         cursor = c.cursor()
-        accounts = {name: id for id, name in cursor.execute("SELECT id, name FROM accounts WHERE name IN ('Inventory', 'Accounts Payable', 'GST Payable')").fetchall()}
+        _ensure_period_open(cursor, min(str(txn['date']) for txn in transactions))
+        cursor.executemany(
+            "INSERT INTO gl_transactions (date, description, source_doc_type, source_doc_id) VALUES (?, ?, ?, ?)",
+            [(txn['date'], txn['description'], txn.get('source_doc_type'), txn.get('source_doc_id')) for txn in transactions])
+        # The write lock is held, so rowids are handed out consecutively.
+        last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+        transaction_ids = list(range(last_id - len(transactions) + 1, last_id + 1))
+        cursor.executemany(
+            "INSERT INTO gl_entries (transaction_id, account_id, debit, credit) VALUES (?, ?, ?, ?)",
+            [(transaction_id, account_id, debit, credit)
+             for transaction_id, txn in zip(transaction_ids, transactions)
+             for account_id, debit, credit in txn['entries']])
+        _add_to_daily_balances(cursor, transactions)
+        return transaction_ids
 
+    try:
+        if conn_override:
+            return _execute_batch(conn)
+        with conn:
+            return _execute_batch(conn)
+    finally:
+        if not conn_override:
+            conn.close()
+
+def _ensure_period_open(cursor, date):
+    """Raises ValueError if date falls inside a closed period."""
+    closed_through = cursor.execute("SELECT MAX(period_end) FROM period_closes").fetchone()[0]
+    if closed_through and str(date)[:10] <= closed_through:
+        raise ValueError(f"Cannot post on {date}: the books are closed through {closed_through}.")
+
+def _bump_data_version(cursor, name):
+    """Bumps a data_versions counter from a write path that has no trigger, inside the caller's transaction."""
+    cursor.execute("UPDATE data_versions SET version = version + 1 WHERE name = ?", (name,))
+
+def _add_to_daily_balances(cursor, transactions):
+    """Folds the vouchers' lines into account_daily_balances, inside the caller's transaction."""
+    totals = {}
+    for txn in transactions:
+        for account_id, debit, credit in txn['entries']:
+            key = (account_id, txn['date'])
+            day_debit, day_credit = totals.get(key, (0, 0))
+            totals[key] = (day_debit + (debit or 0), day_credit + (credit or 0))
+    cursor.executemany("""
+        INSERT INTO account_daily_balances (account_id, date, debit, credit) VALUES (?, ?, ?, ?)
+        ON CONFLICT (account_id, date) DO UPDATE SET debit = debit + excluded.debit, credit = credit + excluded.credit
+    """, [(account_id, date, debit, credit) for (account_id, date), (debit, credit) in totals.items()])
+    _bump_data_version(cursor, 'report_ledger')
+
+def rebuild_account_daily_balances():
+    """Recomputes account_daily_balances from gl_entries. Returns the number of (account, day) rows."""
+    conn = get_db_connection()
+    try:
+        with conn:
+            conn.execute("DELETE FROM account_daily_balances")
+            cursor = conn.execute("""
+                INSERT INTO account_daily_balances (account_id, date, debit, credit)
+                SELECT ge.account_id, gt.date, IFNULL(SUM(ge.debit), 0), IFNULL(SUM(ge.credit), 0)
+                FROM gl_entries ge JOIN gl_transactions gt ON ge.transaction_id = gt.id
+                GROUP BY ge.account_id, gt.date
+            """)
+            _bump_data_version(conn, 'report_ledger')
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+def check_account_daily_balances():
+    """
+    Compares account_daily_balances against the raw journal. Returns a list of
+    dicts (amounts in rupees), one per (account, day) where they disagree; empty
+    means consistent.
+    """
+    conn = get_db_connection()
+    query = """
+    SELECT account_id, date,
+           SUM(journal_debit) / 100.0 as journal_debit, SUM(journal_credit) / 100.0 as journal_credit,
+           SUM(rollup_debit) / 100.0 as rollup_debit, SUM(rollup_credit) / 100.0 as rollup_credit
+    FROM (
+        SELECT ge.account_id, gt.date, IFNULL(ge.debit, 0) as journal_debit, IFNULL(ge.credit, 0) as journal_credit,
+               0 as rollup_debit, 0 as rollup_credit
+        FROM gl_entries ge JOIN gl_transactions gt ON ge.transaction_id = gt.id
+        UNION ALL
+        SELECT account_id, date, 0, 0, debit, credit FROM account_daily_balances
+    )
+    GROUP BY account_id, date
+    HAVING SUM(journal_debit) != SUM(rollup_debit) OR SUM(journal_credit) != SUM(rollup_credit)
+    ORDER BY account_id, date
+    """
+    mismatches = conn.execute(query).fetchall()
+    conn.close()
+    return [dict(row) for row in mismatches]
+
+# --- Serial Numbers ---
+# Serials can be keyed in as ranges such as SN0001-SN0500 (both ends share a
+# prefix), which expand at the start's digit width. A batch is checked for
+# repeats in memory and against item_serial_numbers with one IN lookup per
+# SERIAL_LOOKUP_CHUNK serials before the invoice writes anything, so a
+# duplicate is reported by name instead of as an IntegrityError halfway
+# through the serial inserts.
+SERIAL_LOOKUP_CHUNK = 500
+MAX_SERIAL_RANGE = 100000
+_SERIAL_RANGE = re.compile(r'^(.*?)(\d+)-\1(\d+)$')
+
+def expand_serial_numbers(text):
+    """
+    Splits text on commas and newlines and expands any ranges in it. Returns
+    the serials in order. Raises ValueError for a range that runs backwards or
+    spans more than MAX_SERIAL_RANGE numbers.
+    """
+    serials = []
+    for token in re.split(r'[,\n]', text or ''):
+        token = token.strip()
+        match = _SERIAL_RANGE.match(token)
+        if not match:
+            if token:
+                serials.append(token)
+            continue
+        prefix, start, end = match.groups()
+        if int(end) < int(start):
+            raise ValueError(f"Serial range '{token}' runs backwards.")
+        if int(end) - int(start) >= MAX_SERIAL_RANGE:
+            raise ValueError(f"Serial range '{token}' is longer than {MAX_SERIAL_RANGE} numbers.")
+        serials.extend(f"{prefix}{number:0{len(start)}d}" for number in range(int(start), int(end) + 1))
+    return serials
+
+def _serial_conflicts(cursor, serial_numbers):
+    """(serials repeated within serial_numbers, serials already on file), each listed once."""
+    seen, repeated = set(), {}
+    for serial_number in serial_numbers:
+        if serial_number in seen:
+            repeated[serial_number] = None
+        seen.add(serial_number)
+    unique = list(seen)
+    existing = []
+    for start in range(0, len(unique), SERIAL_LOOKUP_CHUNK):
+        chunk = unique[start:start + SERIAL_LOOKUP_CHUNK]
+        existing.extend(row[0] for row in cursor.execute(
+            f"SELECT serial_number FROM item_serial_numbers WHERE serial_number IN ({','.join('?' * len(chunk))})", chunk))
+    return list(repeated), sorted(existing)
+
+def describe_serial_conflicts(repeated, existing):
+    """A one-line message naming the first few conflicting serials, or '' if there are none."""
+    def sample(serials):
+        return ", ".join(serials[:5]) + (f" and {len(serials) - 5} more" if len(serials) > 5 else "")
+    parts = []
+    if repeated:
+        parts.append(f"Repeated serial numbers: {sample(repeated)}.")
+    if existing:
+        parts.append(f"Serial numbers already on file: {sample(existing)}.")
+    return " ".join(parts)
+
+def find_serial_conflicts(serial_numbers):
+    """
+    Checks a batch of new serials before it is posted. Returns (repeated,
+    existing): serials that occur more than once in the batch and serials that
+    are already on file.
+    """
+    conn = get_db_connection()
+    try:
+        return _serial_conflicts(conn.cursor(), serial_numbers)
+    finally:
+        conn.close()
+
+def _check_new_serials(cursor, serial_numbers):
+    """Raises ValueError naming the conflicts if any of serial_numbers repeat or are already on file."""
+    message = describe_serial_conflicts(*_serial_conflicts(cursor, serial_numbers))
+    if message:
+        raise ValueError(message)
+
+# --- Stock Ledger ---
+# Every posting that moves goods appends to stock_movements and folds the same
+# quantities into stock_balances (one row per item and godown), so stock on
+# hand is a keyed read instead of a count over item_serial_numbers.
+# Invoice lines without a godown are taken to be in DEFAULT_GODOWN_ID.
+DEFAULT_GODOWN_ID = 1
+
+# Each movement also carries its value in paise. Receipts open a cost layer
+# per (item, godown); issues are valued by the costing method below and take
+# quantity from the oldest open layers, so the layers left open are always the
+# newest receipts covering the stock on hand. Stock issued beyond what is on
+# hand is valued at the item's purchase price.
+COSTING_METHOD_SETTING = 'inventory_costing_method'
+COSTING_FIFO = 'FIFO'
+COSTING_AVERAGE = 'Moving Average'
+COSTING_METHODS = (COSTING_FIFO, COSTING_AVERAGE)
+# Issue documents whose cost is booked to the GL: the voucher that carries it and the
+# account debited (Inventory is always credited).
+ISSUE_VOUCHERS = {'SALE': ('SALE_COGS', 'Cost of Goods Sold'), 'ASSEMBLY': ('ASSEMBLY', 'Inventory')}
+
+def _costing_method(cursor):
+    row = cursor.execute("SELECT value FROM settings WHERE key = ?", (COSTING_METHOD_SETTING,)).fetchone()
+    return COSTING_AVERAGE if row and row[0] == COSTING_AVERAGE else COSTING_FIFO
+
+def _prorate(value, part, whole):
+    """The share part/whole of value paise, rounded to the paisa."""
+    return _round_paise(decimal.Decimal(value) * decimal.Decimal(str(part)) / decimal.Decimal(str(whole)))
+
+def _standard_cost(cursor, item_id, quantity):
+    price = cursor.execute("SELECT purchase_price FROM items WHERE id = ?", (item_id,)).fetchone()
+    return _prorate(price[0] or 0, quantity, 1) if price else 0
+
+def _insert_movement(cursor, item_id, godown_id, date, quantity, value, source_doc_type, source_doc_id):
+    return cursor.execute(
+        "INSERT INTO stock_movements (item_id, godown_id, date, quantity, value, source_doc_type, source_doc_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (item_id, godown_id, date, quantity, value, source_doc_type, source_doc_id)).lastrowid
+
+def _cost_movement(cursor, method, movement_id, item_id, godown_id, date, quantity, value=None):
+    """
+    Opens or draws down cost layers for one movement. Receipts pass their
+    value and the id of their (already written) movement row; issues are
+    valued here and need no row yet. Returns the movement's signed value in
+    paise; the caller stores it and folds it into stock_balances.
+    """
+    on_hand, on_hand_value = 0, 0
+    if quantity > 0 or method == COSTING_AVERAGE:
+        balance = cursor.execute("SELECT quantity, value FROM stock_balances WHERE item_id = ? AND godown_id = ?", (item_id, godown_id)).fetchone()
+        if balance:
+            on_hand, on_hand_value = balance
+    if quantity > 0:
+        # A receipt first makes up for anything issued while the godown was short.
+        remaining = max(0, quantity + min(on_hand, 0))
         cursor.execute("""
-            INSERT INTO purchase_invoices (supplier_id, invoice_number, invoice_date, total_amount, taxable_amount, cgst_amount, sgst_amount, igst_amount, total_gst_amount, notes, status, amount_paid)
-            VALUES (:supplier_id, :invoice_number, :invoice_date, :total_amount, :taxable_amount, :cgst_amount, :sgst_amount, :igst_amount, :total_gst_amount, :notes, 'UNPAID', 0.0)
-        """, invoice_data)
-        purchase_invoice_id = cursor.lastrowid
-
-        gl_desc = f"Purchase from supp ID {invoice_data['supplier_id']}, Inv #{invoice_data['invoice_number']}"
-        gl_entries = [
-            (accounts['Inventory'], invoice_data.get('taxable_amount', 0), None),
-            (accounts['GST Payable'], invoice_data.get('total_gst_amount', 0), None),
-            (accounts['Accounts Payable'], None, invoice_data.get('total_amount', 0))
-        ]
-        create_gl_transaction(c, gl_desc, invoice_data['invoice_date'], gl_entries, 'PURCHASE', purchase_invoice_id)
-
-        for item in items_data:
-            cursor.execute("""
-                INSERT INTO purchase_invoice_items (purchase_invoice_id, item_id, quantity, purchase_price, taxable_value, cgst_rate, sgst_rate, igst_rate, cgst_amount, sgst_amount, igst_amount, total_gst_amount)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (purchase_invoice_id, item['item_id'], item['quantity'], item['purchase_price'], item.get('taxable_value', 0), item.get('cgst_rate', 0), item.get('sgst_rate', 0), item.get('igst_rate', 0), item.get('cgst_amount', 0), item.get('sgst_amount', 0), item.get('igst_amount', 0), item.get('total_gst_amount', 0)))
-            if item.get('serial_numbers'):
-                for sn in item['serial_numbers']:
-                    cursor.execute("INSERT INTO item_serial_numbers (item_id, serial_number, status, godown_id, purchase_invoice_id) VALUES (?, ?, 'IN_STOCK', ?, ?)", (item['item_id'], sn, item['godown_id'], purchase_invoice_id))
-        return purchase_invoice_id
+            INSERT INTO cost_layers (movement_id, item_id, godown_id, date, quantity, value, remaining, remaining_value)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (movement_id, item_id, godown_id, date, quantity, value, remaining,
+              value if remaining == quantity else _prorate(value, remaining, quantity)))
+    else:
+        needed = -quantity
+        layers_value = 0
+        while needed > 1e-9:
+            layer = cursor.execute("""
+                SELECT id, remaining, remaining_value FROM cost_layers
+                WHERE item_id = ? AND godown_id = ? AND remaining > 0 ORDER BY date, id LIMIT 1
+            """, (item_id, godown_id)).fetchone()
+            if layer is None:
+                break
+            layer_id, remaining, remaining_value = layer
+            if needed >= remaining - 1e-9:
+                taken, taken_value = remaining, remaining_value
+                cursor.execute("UPDATE cost_layers SET remaining = 0, remaining_value = 0 WHERE id = ?", (layer_id,))
+            else:
+                taken, taken_value = needed, _prorate(remaining_value, needed, remaining)
+                cursor.execute("UPDATE cost_layers SET remaining = remaining - ?, remaining_value = remaining_value - ? WHERE id = ?",
+                               (taken, taken_value, layer_id))
+            needed -= taken
+            layers_value += taken_value
+        if method == COSTING_AVERAGE:
+            if on_hand <= 0:
+                value = -_standard_cost(cursor, item_id, -quantity)
+            elif -quantity >= on_hand:
+                value = -(on_hand_value + _standard_cost(cursor, item_id, -quantity - on_hand))
+            else:
+                value = -_prorate(on_hand_value, -quantity, on_hand)
+        else:
+            value = -(layers_value + (_standard_cost(cursor, item_id, needed) if needed > 1e-9 else 0))
+    return value
+
+def _add_to_stock_balances(cursor, movements):
+    """Folds (item_id, godown_id, quantity, value) rows into stock_balances."""
+    cursor.executemany("""
+        INSERT INTO stock_balances (item_id, godown_id, quantity, value) VALUES (?, ?, ?, ?)
+        ON CONFLICT (item_id, godown_id) DO UPDATE SET quantity = quantity + excluded.quantity, value = value + excluded.value
+    """, movements)
+
+def _add_stock_movements(cursor, date, source_doc_type, source_doc_id, movements):
+    """
+    Records (item_id, godown_id, quantity[, value]) movements for one document,
+    inside the caller's transaction. Quantities are signed: receipts are
+    positive and carry their value in paise. Returns the total signed value
+    of the movements in paise, so an issue document gets back minus its cost.
+    """
+    totals = {}
+    for item_id, godown_id, quantity, *value in movements:
+        key = (item_id, godown_id or DEFAULT_GODOWN_ID)
+        total_quantity, total_value = totals.get(key, (0, 0))
+        totals[key] = (total_quantity + quantity, total_value + (value[0] if value else 0))
+    if not totals:
+        return 0
+    # Each (item, godown) appears once, so the balances can all be folded in at the end.
+    method = _costing_method(cursor)
+    valued = []
+    for (item_id, godown_id), (quantity, value) in totals.items():
+        if quantity > 0:
+            movement_id = _insert_movement(cursor, item_id, godown_id, date, quantity, value, source_doc_type, source_doc_id)
+            _cost_movement(cursor, method, movement_id, item_id, godown_id, date, quantity, value)
+        else:
+            value = _cost_movement(cursor, method, None, item_id, godown_id, date, quantity)
+        valued.append((item_id, godown_id, quantity, value))
+    cursor.executemany(
+        "INSERT INTO stock_movements (item_id, godown_id, date, quantity, value, source_doc_type, source_doc_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(item_id, godown_id, date, quantity, value, source_doc_type, source_doc_id)
+         for item_id, godown_id, quantity, value in valued if quantity <= 0])
+    _add_to_stock_balances(cursor, valued)
+    _bump_data_version(cursor, 'report_stock')
+    return sum(value for _, _, _, value in valued)
+
+def rebuild_stock_balances():
+    """Recomputes stock_balances from stock_movements. Returns the number of (item, godown) rows."""
+    conn = get_db_connection()
+    try:
+        with conn:
+            conn.execute("DELETE FROM stock_balances")
+            cursor = conn.execute("""
+                INSERT INTO stock_balances (item_id, godown_id, quantity, value)
+                SELECT item_id, godown_id, SUM(quantity), SUM(value) FROM stock_movements GROUP BY item_id, godown_id
+            """)
+            _bump_data_version(conn, 'report_stock')
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+def check_stock_balances():
+    """
+    Compares stock_balances against the movement ledger. Returns a list of
+    dicts (values in rupees), one per (item, godown) where quantity or value
+    disagree; empty means consistent.
+    """
+    conn = get_db_connection()
+    query = """
+    SELECT item_id, godown_id, SUM(ledger_quantity) as ledger_quantity, SUM(balance_quantity) as balance_quantity,
+           SUM(ledger_value) / 100.0 as ledger_value, SUM(balance_value) / 100.0 as balance_value
+    FROM (
+        SELECT item_id, godown_id, quantity as ledger_quantity, 0 as balance_quantity, value as ledger_value, 0 as balance_value
+        FROM stock_movements
+        UNION ALL
+        SELECT item_id, godown_id, 0, quantity, 0, value FROM stock_balances
+    )
+    GROUP BY item_id, godown_id
+    HAVING ABS(SUM(ledger_quantity) - SUM(balance_quantity)) > 1e-9 OR SUM(ledger_value) != SUM(balance_value)
+    ORDER BY item_id, godown_id
+    """
+    mismatches = conn.execute(query).fetchall()
+    conn.close()
+    return [dict(row) for row in mismatches]
+
+def get_stock_balances(item_id):
+    """Quantity on hand of one item, and its value in rupees, in each godown that has held it."""
+    conn = get_db_connection()
+    balances = conn.execute("""
+        SELECT b.godown_id, g.name as godown_name, b.quantity, b.value / 100.0 as value FROM stock_balances b
+        LEFT JOIN godowns g ON b.godown_id = g.id
+        WHERE b.item_id = ? ORDER BY b.godown_id
+    """, (item_id,)).fetchall()
+    conn.close()
+    return balances
 
+def _post_stock_transfer(conn, item_id, from_godown_id, to_godown_id, quantity, date, serial_ids=None):
+    """Moves stock between godowns on conn without committing. Raises ValueError if there is not enough."""
+    cursor = conn.cursor()
+    if from_godown_id == to_godown_id:
+        raise ValueError("Source and destination godowns are the same.")
+    if serial_ids:
+        placeholders = ','.join('?' * len(serial_ids))
+        moved = cursor.execute(f"""
+            UPDATE item_serial_numbers SET godown_id = ?
+            WHERE id IN ({placeholders}) AND item_id = ? AND godown_id = ? AND status = 'IN_STOCK'
+        """, [to_godown_id, *serial_ids, item_id, from_godown_id]).rowcount
+        if moved != len(serial_ids):
+            raise ValueError(f"Only {moved} of {len(serial_ids)} serials are in stock in godown {from_godown_id}.")
+        quantity = len(serial_ids)
+    if quantity <= 0:
+        raise ValueError("Transfer quantity must be positive.")
+    on_hand = cursor.execute("SELECT quantity FROM stock_balances WHERE item_id = ? AND godown_id = ?", (item_id, from_godown_id)).fetchone()
+    if (on_hand[0] if on_hand else 0) < quantity:
+        raise ValueError(f"Only {on_hand[0] if on_hand else 0} of item {item_id} in godown {from_godown_id}.")
+    # Both halves point at the issue row, so a recost can carry its new value across to the receipt.
+    method = _costing_method(cursor)
+    value = _cost_movement(cursor, method, None, item_id, from_godown_id, date, -quantity)
+    issue_id = _insert_movement(cursor, item_id, from_godown_id, date, -quantity, value, 'TRANSFER', None)
+    cursor.execute("UPDATE stock_movements SET source_doc_id = id WHERE id = ?", (issue_id,))
+    receipt_id = _insert_movement(cursor, item_id, to_godown_id, date, quantity, -value, 'TRANSFER', issue_id)
+    _cost_movement(cursor, method, receipt_id, item_id, to_godown_id, date, quantity, -value)
+    _add_to_stock_balances(cursor, [(item_id, from_godown_id, -quantity, value), (item_id, to_godown_id, quantity, -value)])
+    _bump_data_version(cursor, 'report_stock')
+    return True
+
+def transfer_stock(item_id, from_godown_id, to_godown_id, quantity, date, serial_ids=None):
+    """
+    Moves quantity of an item from one godown to another. For serialized items
+    pass serial_ids instead; the quantity is then the number of serials.
+    Returns True, or None on error.
+    """
+    conn = get_db_connection()
+    try:
+        with conn:
+            return _post_stock_transfer(conn, item_id, from_godown_id, to_godown_id, quantity, date, serial_ids)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error transferring stock: {e}")
+        return None
+    finally:
+        conn.close()
+
+def _restore_cost_layers(cursor, item_id, godown_id, as_of, on_hand):
+    """Reopens one (item, godown)'s layers as they stood before as_of, when on_hand units were in stock."""
+    cursor.execute("UPDATE cost_layers SET remaining = 0, remaining_value = 0 WHERE item_id = ? AND godown_id = ? AND remaining > 0",
+                   (item_id, godown_id))
+    # The newest earlier receipts are the ones still covering that stock; walk back only as far as needed.
+    position = (as_of, 0)
+    while on_hand > 1e-9:
+        layer = cursor.execute("""
+            SELECT id, date, quantity, value FROM cost_layers
+            WHERE item_id = ? AND godown_id = ? AND (date, id) < (?, ?) ORDER BY date DESC, id DESC LIMIT 1
+        """, (item_id, godown_id, *position)).fetchone()
+        if layer is None:
+            break
+        layer_id, date, quantity, value = layer
+        remaining = min(quantity, on_hand)
+        cursor.execute("UPDATE cost_layers SET remaining = ?, remaining_value = ? WHERE id = ?",
+                       (remaining, value if remaining == quantity else _prorate(value, remaining, quantity), layer_id))
+        on_hand -= remaining
+        position = (date, layer_id)
+
+def _rewind_item(cursor, item_id, from_date):
+    """
+    Takes an item's movements on or after from_date back out of its layers and
+    balances. Returns those movements in posting order, ready to be replayed.
+    """
+    movements = []
+    godown_ids = [row[0] for row in cursor.execute("SELECT godown_id FROM stock_balances WHERE item_id = ?", (item_id,)).fetchall()]
+    for godown_id in godown_ids:
+        rows = cursor.execute("""
+            SELECT id, godown_id, date, quantity, value, source_doc_type, source_doc_id FROM stock_movements
+            WHERE item_id = ? AND godown_id = ? AND date >= ?
+        """, (item_id, godown_id, from_date)).fetchall()
+        if not rows:
+            continue
+        cursor.executemany("DELETE FROM cost_layers WHERE movement_id = ?", [(row['id'],) for row in rows if row['quantity'] > 0])
+        cursor.execute("UPDATE stock_balances SET quantity = quantity - ?, value = value - ? WHERE item_id = ? AND godown_id = ?",
+                       (sum(row['quantity'] for row in rows), sum(row['value'] for row in rows), item_id, godown_id))
+        on_hand = cursor.execute("SELECT quantity FROM stock_balances WHERE item_id = ? AND godown_id = ?", (item_id, godown_id)).fetchone()[0]
+        _restore_cost_layers(cursor, item_id, godown_id, from_date, on_hand)
+        movements.extend(rows)
+    return sorted(movements, key=lambda row: (row['date'], row['id']))
+
+def _repost_issue_voucher(cursor, source_doc_type, source_doc_id):
+    """Brings one document's cost voucher in line with the current value of the stock it issued."""
+    voucher_type, debit_account = ISSUE_VOUCHERS[source_doc_type]
+    voucher = cursor.execute("SELECT id, date FROM gl_transactions WHERE source_doc_type = ? AND source_doc_id = ?",
+                             (voucher_type, source_doc_id)).fetchone()
+    if voucher is None:
+        return
+    accounts = {name: id for id, name in cursor.execute("SELECT id, name FROM accounts WHERE name IN (?, 'Inventory')", (debit_account,)).fetchall()}
+    cost = -cursor.execute("SELECT IFNULL(SUM(value), 0) FROM stock_movements WHERE source_doc_type = ? AND source_doc_id = ? AND quantity < 0",
+                           (source_doc_type, source_doc_id)).fetchone()[0]
+    booked = cursor.execute("SELECT IFNULL(SUM(debit), 0) FROM gl_entries WHERE transaction_id = ? AND account_id = ?",
+                            (voucher['id'], accounts[debit_account])).fetchone()[0]
+    if cost == booked:
+        return
+    cursor.execute("UPDATE gl_entries SET debit = ? WHERE transaction_id = ? AND account_id = ? AND debit IS NOT NULL",
+                   (cost, voucher['id'], accounts[debit_account]))
+    cursor.execute("UPDATE gl_entries SET credit = ? WHERE transaction_id = ? AND account_id = ? AND credit IS NOT NULL",
+                   (cost, voucher['id'], accounts['Inventory']))
+    _add_to_daily_balances(cursor, [{'date': voucher['date'],
+                                     'entries': [(accounts[debit_account], cost - booked, None), (accounts['Inventory'], None, cost - booked)]}])
+
+def _carry_assembly_cost(cursor, assembly_id):
+    """
+    Sets an assembly's output to the current cost of its components. Returns
+    the assembled item's id if that changed its value, else None.
+    """
+    cost = -cursor.execute("SELECT IFNULL(SUM(value), 0) FROM stock_movements WHERE source_doc_type = 'ASSEMBLY' AND source_doc_id = ? AND quantity < 0",
+                           (assembly_id,)).fetchone()[0]
+    output = cursor.execute("SELECT id, item_id, godown_id, value FROM stock_movements WHERE source_doc_type = 'ASSEMBLY' AND source_doc_id = ? AND quantity > 0",
+                            (assembly_id,)).fetchone()
+    if output is None or output['value'] == cost:
+        return None
+    # Balance and ledger move together, so the output can be rewound and replayed like any other receipt.
+    cursor.execute("UPDATE stock_movements SET value = ? WHERE id = ?", (cost, output['id']))
+    _add_to_stock_balances(cursor, [(output['item_id'], output['godown_id'], 0, cost - output['value'])])
+    cursor.execute("UPDATE assemblies SET total_cost = ? WHERE id = ?", (cost, assembly_id))
+    return output['item_id']
+
+def recost_from_date(from_date, item_ids=None):
+    """
+    Revalues the stock movements dated on or after from_date with the current
+    costing method, for item_ids (default: every item that moved since then),
+    and corrects the COGS and assembly vouchers of the documents whose cost
+    changed. Only those movements are replayed; earlier layers are reopened
+    from the stock on hand at from_date. Assembled items whose components
+    changed cost are replayed in turn. Use it after back-dated receipts or a
+    change of costing method. Returns the number of movements revalued, or
+    None on error.
+    """
+    conn = get_db_connection()
+    try:
+        with conn:
+            cursor = conn.cursor()
+            _ensure_period_open(cursor, from_date)
+            if item_ids is None:
+                item_ids = sorted({row[0] for row in cursor.execute("SELECT item_id FROM stock_movements WHERE date >= ?", (from_date,)).fetchall()})
+            method = _costing_method(cursor)
+            replayed = 0
+            documents = set()
+            pending = list(item_ids)
+            while pending:
+                item_id = pending.pop(0)
+                values = {}
+                assemblies = set()
+                for movement in _rewind_item(cursor, item_id, from_date):
+                    value = movement['value'] if movement['quantity'] > 0 else None
+                    if movement['source_doc_type'] == 'TRANSFER' and movement['quantity'] > 0 and movement['source_doc_id'] in values:
+                        value = -values[movement['source_doc_id']]
+                    values[movement['id']] = _cost_movement(cursor, method, movement['id'], item_id, movement['godown_id'],
+                                                            movement['date'], movement['quantity'], value)
+                    _add_to_stock_balances(cursor, [(item_id, movement['godown_id'], movement['quantity'], values[movement['id']])])
+                    if values[movement['id']] != movement['value']:
+                        cursor.execute("UPDATE stock_movements SET value = ? WHERE id = ?", (values[movement['id']], movement['id']))
+                    if movement['source_doc_type'] in ISSUE_VOUCHERS and movement['quantity'] < 0:
+                        documents.add((movement['source_doc_type'], movement['source_doc_id']))
+                        if movement['source_doc_type'] == 'ASSEMBLY':
+                            assemblies.add(movement['source_doc_id'])
+                    replayed += 1
+                for assembly_id in sorted(assemblies):
+                    assembled_item_id = _carry_assembly_cost(cursor, assembly_id)
+                    if assembled_item_id is not None and assembled_item_id not in pending:
+                        pending.append(assembled_item_id)
+            for source_doc_type, source_doc_id in sorted(documents):
+                _repost_issue_voucher(cursor, source_doc_type, source_doc_id)
+            _bump_data_version(cursor, 'report_stock')
+        return replayed
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error recosting stock: {e}")
+        return None
+    finally:
+        conn.close()
+
+def _post_purchase_invoice(conn, invoice_data, items_data):
+    """Writes a purchase and its GL posting on conn without committing. Raises on any error."""
+    cursor = conn.cursor()
+    # Checked up front as well: callers sharing conn may swallow an error below and commit the invoice rows.
+    _ensure_period_open(cursor, invoice_data['invoice_date'])
+    accounts = {name: id for id, name in cursor.execute("SELECT id, name FROM accounts WHERE name IN ('Inventory', 'Accounts Payable', 'GST Payable')").fetchall()}
+    _check_new_serials(cursor, [sn for item in items_data for sn in item.get('serial_numbers') or []])
+
+    cursor.execute("""
+        INSERT INTO purchase_invoices (supplier_id, invoice_number, invoice_date, total_amount, taxable_amount, cgst_amount, sgst_amount, igst_amount, total_gst_amount, notes, status, amount_paid)
+        VALUES (:supplier_id, :invoice_number, :invoice_date, :total_amount, :taxable_amount, :cgst_amount, :sgst_amount, :igst_amount, :total_gst_amount, :notes, 'UNPAID', 0)
+    """, _with_paise(invoice_data, INVOICE_MONEY_FIELDS))
+    purchase_invoice_id = cursor.lastrowid
+
+    gl_desc = f"Purchase from supp ID {invoice_data['supplier_id']}, Inv #{invoice_data['invoice_number']}"
+    gl_entries = [
+        (accounts['Inventory'], invoice_data.get('taxable_amount', 0), None),
+        (accounts['GST Payable'], invoice_data.get('total_gst_amount', 0), None),
+        (accounts['Accounts Payable'], None, invoice_data.get('total_amount', 0))
+    ]
+    create_gl_transaction(conn, gl_desc, invoice_data['invoice_date'], gl_entries, 'PURCHASE', purchase_invoice_id)
+
+    for item in items_data:
+        cursor.execute("""
+            INSERT INTO purchase_invoice_items (purchase_invoice_id, item_id, quantity, purchase_price, taxable_value, cgst_rate, sgst_rate, igst_rate, cgst_amount, sgst_amount, igst_amount, total_gst_amount)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (purchase_invoice_id, item['item_id'], item['quantity'], to_paise(item['purchase_price']), to_paise(item.get('taxable_value', 0)), item.get('cgst_rate', 0), item.get('sgst_rate', 0), item.get('igst_rate', 0),
+              to_paise(item.get('cgst_amount', 0)), to_paise(item.get('sgst_amount', 0)), to_paise(item.get('igst_amount', 0)), to_paise(item.get('total_gst_amount', 0))))
+    cursor.executemany("INSERT INTO item_serial_numbers (item_id, serial_number, status, godown_id, purchase_invoice_id) VALUES (?, ?, 'IN_STOCK', ?, ?)",
+                       [(item['item_id'], sn, item.get('godown_id') or DEFAULT_GODOWN_ID, purchase_invoice_id)
+                        for item in items_data for sn in item.get('serial_numbers') or []])
+    # Stock is valued at the line's taxable value, or its price times quantity when there is none.
+    _add_stock_movements(cursor, invoice_data['invoice_date'], 'PURCHASE', purchase_invoice_id,
+                         [(item['item_id'], item.get('godown_id'), item['quantity'],
+                           to_paise(item.get('taxable_value')) or _prorate(to_paise(item['purchase_price']), item['quantity'], 1))
+                          for item in items_data])
+    return purchase_invoice_id
+
+def create_purchase_invoice_transaction(invoice_data, items_data, conn_override=None):
+    conn = conn_override if conn_override else get_db_connection()
     try:
         if conn_override:
-            return _execute_transaction(conn)
+            return _post_purchase_invoice(conn, invoice_data, items_data)
         else:
             with conn:
-                return _execute_transaction(conn)
+                return _post_purchase_invoice(conn, invoice_data, items_data)
     except (sqlite3.Error, ValueError) as e:
         print(f"Error creating purchase invoice: {e}")
         return None
@@ -587,89 +1647,137 @@ def create_purchase_invoice_transaction(invoice_data, items_data, conn_override=
         if not conn_override and conn:
             conn.close()
 
+def _post_sale_invoice(conn, invoice_data, items_data):
+    """Writes a sale and its GL postings on conn without committing. Raises on any error."""
+    cursor = conn.cursor()
+    accounts = {name: id for id, name in cursor.execute("SELECT id, name FROM accounts WHERE name IN ('Accounts Receivable', 'Sales Revenue', 'GST Payable', 'Cost of Goods Sold', 'Inventory')").fetchall()}
+    if invoice_data.get('invoice_number'):
+        _note_document_number(cursor, 'SALES_INVOICE', invoice_data['invoice_number'], invoice_data['invoice_date'])
+    else:
+        invoice_data = dict(invoice_data, invoice_number=_allocate_document_numbers(cursor, 'SALES_INVOICE', invoice_data['invoice_date'])[0])
+
+    cursor.execute("""
+        INSERT INTO sales_invoices (customer_id, invoice_number, invoice_date, total_amount, taxable_amount, cgst_amount, sgst_amount, igst_amount, total_gst_amount, notes, status, amount_paid)
+        VALUES (:customer_id, :invoice_number, :invoice_date, :total_amount, :taxable_amount, :cgst_amount, :sgst_amount, :igst_amount, :total_gst_amount, :notes, 'UNPAID', 0)
+    """, _with_paise(invoice_data, INVOICE_MONEY_FIELDS))
+    sale_invoice_id = cursor.lastrowid
+
+    # One round trip for every item on the invoice, then per-item values computed once.
+    item_ids = sorted({item['item_id'] for item in items_data})
+    item_rows = cursor.execute(
+        f"SELECT id, default_warranty_months FROM items WHERE id IN ({','.join('?' * len(item_ids))})", item_ids
+    ).fetchall() if item_ids else []
+    item_info = {row['id']: row for row in item_rows}
+    missing = [item_id for item_id in item_ids if item_id not in item_info]
+    if missing: raise ValueError(f"Item with ID {missing[0]} not found.")
+
+    warranty_end_dates = {}
+    for item_id in {item['item_id'] for item in items_data if item.get('serial_ids')}:
+        warranty_months = item_info[item_id]['default_warranty_months']
+        warranty_end_date = None
+        if warranty_months:
+            from dateutil.relativedelta import relativedelta  # only sales of warrantied items need it
+            invoice_date = datetime.datetime.fromisoformat(invoice_data['invoice_date']).date()
+            warranty_end_date = (invoice_date + relativedelta(months=+warranty_months)).isoformat()
+        warranty_end_dates[item_id] = warranty_end_date
+
+    cursor.executemany("""
+        INSERT INTO sales_invoice_items (sales_invoice_id, item_id, quantity, selling_price, taxable_value, cgst_rate, sgst_rate, igst_rate, cgst_amount, sgst_amount, igst_amount, total_gst_amount)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(sale_invoice_id, item['item_id'], item['quantity'], to_paise(item['selling_price']), to_paise(item.get('taxable_value', 0)), item.get('cgst_rate', 0), item.get('sgst_rate', 0), item.get('igst_rate', 0),
+           to_paise(item.get('cgst_amount', 0)), to_paise(item.get('sgst_amount', 0)), to_paise(item.get('igst_amount', 0)), to_paise(item.get('total_gst_amount', 0)))
+          for item in items_data])
+    cursor.executemany("UPDATE item_serial_numbers SET status = 'SOLD', sale_invoice_id = ?, warranty_end_date = ? WHERE id = ?",
+                       [(sale_invoice_id, warranty_end_dates[item['item_id']], sn_id)
+                        for item in items_data for sn_id in item.get('serial_ids') or []])
+
+    # Serialized lines leave the godowns their serials were in; other lines leave the line's godown.
+    serial_ids = [sn_id for item in items_data for sn_id in item.get('serial_ids') or []]
+    serial_godowns = {row[0]: row[1] for row in cursor.execute(
+        f"SELECT id, godown_id FROM item_serial_numbers WHERE id IN ({','.join('?' * len(serial_ids))})", serial_ids)} if serial_ids else {}
+    movements = []
+    for item in items_data:
+        if item.get('serial_ids'):
+            movements.extend((item['item_id'], serial_godowns.get(sn_id), -1) for sn_id in item['serial_ids'])
+        else:
+            movements.append((item['item_id'], item.get('godown_id'), -item['quantity']))
+    # The goods leave at their cost under the costing method; that is the COGS.
+    total_cogs = to_rupees(-_add_stock_movements(cursor, invoice_data['invoice_date'], 'SALE', sale_invoice_id, movements))
+
+    rev_entries = [
+        (accounts['Accounts Receivable'], invoice_data.get('total_amount', 0), None),
+        (accounts['Sales Revenue'], None, invoice_data.get('taxable_amount', 0)),
+        (accounts['GST Payable'], None, invoice_data.get('total_gst_amount', 0))
+    ]
+    cogs_entries = [(accounts['Cost of Goods Sold'], total_cogs, None), (accounts['Inventory'], None, total_cogs)]
+    post_gl_batch([
+        {"description": f"Sale to cust ID {invoice_data['customer_id']}, Inv #{invoice_data['invoice_number']}", "date": invoice_data['invoice_date'],
+         "entries": rev_entries, "source_doc_type": 'SALE', "source_doc_id": sale_invoice_id},
+        {"description": f"COGS for Inv #{invoice_data['invoice_number']}", "date": invoice_data['invoice_date'],
+         "entries": cogs_entries, "source_doc_type": 'SALE_COGS', "source_doc_id": sale_invoice_id},
+    ], conn_override=conn)
+    return sale_invoice_id
+
 def create_sale_invoice_transaction(invoice_data, items_data):
     conn = get_db_connection()
     try:
         with conn:
-            cursor = conn.cursor()
-            accounts = {name: id for id, name in cursor.execute("SELECT id, name FROM accounts WHERE name IN ('Accounts Receivable', 'Sales Revenue', 'GST Payable', 'Cost of Goods Sold', 'Inventory')").fetchall()}
-
-            cursor.execute("""
-                INSERT INTO sales_invoices (customer_id, invoice_number, invoice_date, total_amount, taxable_amount, cgst_amount, sgst_amount, igst_amount, total_gst_amount, notes, status, amount_paid)
-                VALUES (:customer_id, :invoice_number, :invoice_date, :total_amount, :taxable_amount, :cgst_amount, :sgst_amount, :igst_amount, :total_gst_amount, :notes, 'UNPAID', 0.0)
-            """, invoice_data)
-            sale_invoice_id = cursor.lastrowid
-
-            total_cogs = 0
-            for item in items_data:
-                item_cost_row = cursor.execute("SELECT purchase_price FROM items WHERE id = ?", (item['item_id'],)).fetchone()
-                if item_cost_row is None: raise ValueError(f"Item with ID {item['item_id']} not found.")
-                item_cost = item_cost_row['purchase_price'] or 0
-                total_cogs += item_cost * item['quantity']
-
-                cursor.execute("""
-                    INSERT INTO sales_invoice_items (sales_invoice_id, item_id, quantity, selling_price, taxable_value, cgst_rate, sgst_rate, igst_rate, cgst_amount, sgst_amount, igst_amount, total_gst_amount)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (sale_invoice_id, item['item_id'], item['quantity'], item['selling_price'], item.get('taxable_value', 0), item.get('cgst_rate', 0), item.get('sgst_rate', 0), item.get('igst_rate', 0), item.get('cgst_amount', 0), item.get('sgst_amount', 0), item.get('igst_amount', 0), item.get('total_gst_amount', 0)))
-
-                if item.get('serial_ids'):
-                    item_info = cursor.execute("SELECT default_warranty_months FROM items WHERE id = ?", (item['item_id'],)).fetchone()
-                    warranty_months = item_info['default_warranty_months'] if item_info else 0
-                    warranty_end_date = None
-                    if warranty_months:
-                        invoice_date = datetime.datetime.fromisoformat(invoice_data['invoice_date']).date()
-                        warranty_end_date = (invoice_date + relativedelta(months=+warranty_months)).isoformat()
-                    for sn_id in item['serial_ids']:
-                        cursor.execute("UPDATE item_serial_numbers SET status = 'SOLD', sale_invoice_id = ?, warranty_end_date = ? WHERE id = ?", (sale_invoice_id, warranty_end_date, sn_id))
-
-            rev_entries = [
-                (accounts['Accounts Receivable'], invoice_data.get('total_amount', 0), None),
-                (accounts['Sales Revenue'], None, invoice_data.get('taxable_amount', 0)),
-                (accounts['GST Payable'], None, invoice_data.get('total_gst_amount', 0))
-            ]
-            create_gl_transaction(conn, f"Sale to cust ID {invoice_data['customer_id']}, Inv #{invoice_data['invoice_number']}", invoice_data['invoice_date'], rev_entries, 'SALE', sale_invoice_id)
-
-            cogs_entries = [(accounts['Cost of Goods Sold'], total_cogs, None), (accounts['Inventory'], None, total_cogs)]
-            create_gl_transaction(conn, f"COGS for Inv #{invoice_data['invoice_number']}", invoice_data['invoice_date'], cogs_entries, 'SALE_COGS', sale_invoice_id)
-
-        return sale_invoice_id
+            return _post_sale_invoice(conn, invoice_data, items_data)
     except (sqlite3.Error, ValueError) as e:
         print(f"Error creating sale invoice: {e}")
         return None
+    finally:
+        conn.close()
+
+def _post_customer_payment(conn, customer_id, payment_date, amount, allocations):
+    """Writes a customer payment, its GL posting and invoice allocations on conn without committing."""
+    cursor = conn.cursor()
+    accounts = {name: id for id, name in cursor.execute("SELECT id, name FROM accounts WHERE name IN ('Cash', 'Accounts Receivable')").fetchall()}
+    payment_number = _allocate_document_numbers(cursor, 'CUSTOMER_PAYMENT', payment_date)[0]
+    cursor.execute("INSERT INTO customer_payments (customer_id, payment_date, amount, notes, payment_number) VALUES (?, ?, ?, ?, ?)", (customer_id, payment_date, to_paise(amount), '', payment_number))
+    payment_id = cursor.lastrowid
+    gl_entries = [(accounts['Cash'], amount, None), (accounts['Accounts Receivable'], None, amount)]
+    create_gl_transaction(conn, f"Payment from customer ID {customer_id}", payment_date, gl_entries, 'CUST_PAYMENT', payment_id)
+    for invoice_id, allocated_amount in allocations:
+        allocated_paise = to_paise(allocated_amount)
+        cursor.execute("INSERT INTO customer_payment_allocations (payment_id, sales_invoice_id, amount) VALUES (?, ?, ?)", (payment_id, invoice_id, allocated_paise))
+        cursor.execute("UPDATE sales_invoices SET amount_paid = amount_paid + ? WHERE id = ?", (allocated_paise, invoice_id))
+        cursor.execute("UPDATE sales_invoices SET status = 'PAID' WHERE id = ? AND amount_paid >= total_amount", (invoice_id,))
+    return payment_id
 
 def record_customer_payment(customer_id, payment_date, amount, allocations):
     conn = get_db_connection()
     try:
         with conn:
-            cursor = conn.cursor()
-            accounts = {name: id for id, name in cursor.execute("SELECT id, name FROM accounts WHERE name IN ('Cash', 'Accounts Receivable')").fetchall()}
-            cursor.execute("INSERT INTO customer_payments (customer_id, payment_date, amount, notes) VALUES (?, ?, ?, ?)", (customer_id, payment_date, amount, ''))
-            payment_id = cursor.lastrowid
-            gl_entries = [(accounts['Cash'], amount, None), (accounts['Accounts Receivable'], None, amount)]
-            create_gl_transaction(conn, f"Payment from customer ID {customer_id}", payment_date, gl_entries, 'CUST_PAYMENT', payment_id)
-            for invoice_id, allocated_amount in allocations:
-                cursor.execute("INSERT INTO customer_payment_allocations (payment_id, sales_invoice_id, amount) VALUES (?, ?, ?)", (payment_id, invoice_id, allocated_amount))
-                cursor.execute("UPDATE sales_invoices SET amount_paid = amount_paid + ? WHERE id = ?", (allocated_amount, invoice_id))
-                cursor.execute("UPDATE sales_invoices SET status = 'PAID' WHERE id = ? AND amount_paid >= total_amount", (invoice_id,))
-        return payment_id
+            return _post_customer_payment(conn, customer_id, payment_date, amount, allocations)
     except (sqlite3.Error, ValueError) as e: print(f"Error: {e}"); return None
+    finally:
+        conn.close()
+
+def _post_supplier_payment(conn, supplier_id, payment_date, amount, allocations):
+    """Writes a supplier payment, its GL posting and invoice allocations on conn without committing."""
+    cursor = conn.cursor()
+    accounts = {name: id for id, name in cursor.execute("SELECT id, name FROM accounts WHERE name IN ('Cash', 'Accounts Payable')").fetchall()}
+    payment_number = _allocate_document_numbers(cursor, 'SUPPLIER_PAYMENT', payment_date)[0]
+    cursor.execute("INSERT INTO supplier_payments (supplier_id, payment_date, amount, notes, payment_number) VALUES (?, ?, ?, ?, ?)", (supplier_id, payment_date, to_paise(amount), '', payment_number))
+    payment_id = cursor.lastrowid
+    gl_entries = [(accounts['Accounts Payable'], amount, None), (accounts['Cash'], None, amount)]
+    create_gl_transaction(conn, f"Payment to supplier ID {supplier_id}", payment_date, gl_entries, 'SUPP_PAYMENT', payment_id)
+    for invoice_id, allocated_amount in allocations:
+        allocated_paise = to_paise(allocated_amount)
+        cursor.execute("INSERT INTO supplier_payment_allocations (payment_id, purchase_invoice_id, amount) VALUES (?, ?, ?)", (payment_id, invoice_id, allocated_paise))
+        cursor.execute("UPDATE purchase_invoices SET amount_paid = amount_paid + ? WHERE id = ?", (allocated_paise, invoice_id))
+        cursor.execute("UPDATE purchase_invoices SET status = 'PAID' WHERE id = ? AND amount_paid >= total_amount", (invoice_id,))
+    return payment_id
 
 def record_supplier_payment(supplier_id, payment_date, amount, allocations):
     conn = get_db_connection()
     try:
         with conn:
-            cursor = conn.cursor()
-            accounts = {name: id for id, name in cursor.execute("SELECT id, name FROM accounts WHERE name IN ('Cash', 'Accounts Payable')").fetchall()}
-            cursor.execute("INSERT INTO supplier_payments (supplier_id, payment_date, amount, notes) VALUES (?, ?, ?, ?)", (supplier_id, payment_date, amount, ''))
-            payment_id = cursor.lastrowid
-            gl_entries = [(accounts['Accounts Payable'], amount, None), (accounts['Cash'], None, amount)]
-            create_gl_transaction(conn, f"Payment to supplier ID {supplier_id}", payment_date, gl_entries, 'SUPP_PAYMENT', payment_id)
-            for invoice_id, allocated_amount in allocations:
-                cursor.execute("INSERT INTO supplier_payment_allocations (payment_id, purchase_invoice_id, amount) VALUES (?, ?, ?)", (payment_id, invoice_id, allocated_amount))
-                cursor.execute("UPDATE purchase_invoices SET amount_paid = amount_paid + ? WHERE id = ?", (allocated_amount, invoice_id))
-                cursor.execute("UPDATE purchase_invoices SET status = 'PAID' WHERE id = ? AND amount_paid >= total_amount", (invoice_id,))
-        return payment_id
+            return _post_supplier_payment(conn, supplier_id, payment_date, amount, allocations)
     except (sqlite3.Error, ValueError) as e: print(f"Error: {e}"); return None
+    finally:
+        conn.close()
 
 def mark_transactions_as_reconciled(transaction_ids, reconciliation_date):
     conn = get_db_connection()
@@ -680,24 +1788,577 @@ def mark_transactions_as_reconciled(transaction_ids, reconciliation_date):
         return True
     except sqlite3.Error as e: print(f"Error: {e}"); return False
 
+# --- Assemblies ---
+# A build consumes component stock and receives one serialized unit of the
+# assembled item at the components' cost under the costing method, as one
+# ASSEMBLY document per unit. Its voucher moves that cost within Inventory,
+# so the journal records the revaluation though the balance does not change.
+# Component serials that went into a build are marked CONSUMED.
+
+def _post_assembly(conn, assembled_item_id, serial_number, components, assembly_date, godown_id):
+    """
+    Books one built unit on conn without committing. components is a list of
+    (item_id, godown_id, quantity, serial_id or None) already taken out of
+    stock by the caller. Returns (assembly_id, voucher), cost in paise.
+    """
+    cursor = conn.cursor()
+    serial_id = cursor.execute("INSERT INTO item_serial_numbers (item_id, serial_number, status, godown_id) VALUES (?, ?, 'IN_STOCK', ?)",
+                               (assembled_item_id, serial_number, godown_id)).lastrowid
+    assembly_id = cursor.execute("INSERT INTO assemblies (assembled_item_id, new_serial_number_id, total_cost, assembly_date) VALUES (?, ?, 0, ?)",
+                                 (assembled_item_id, serial_id, assembly_date)).lastrowid
+    cursor.executemany("INSERT INTO assembly_components (assembly_id, component_item_id, used_serial_number_id) VALUES (?, ?, ?)",
+                       [(assembly_id, item_id, component_serial_id) for item_id, _, _, component_serial_id in components if component_serial_id])
+    cost = -_add_stock_movements(cursor, assembly_date, 'ASSEMBLY', assembly_id,
+                                 [(item_id, component_godown_id, -quantity) for item_id, component_godown_id, quantity, _ in components])
+    _add_stock_movements(cursor, assembly_date, 'ASSEMBLY', assembly_id, [(assembled_item_id, godown_id, 1, cost)])
+    cursor.execute("UPDATE assemblies SET total_cost = ? WHERE id = ?", (cost, assembly_id))
+    accounts = {name: id for id, name in cursor.execute("SELECT id, name FROM accounts WHERE name = 'Inventory'").fetchall()}
+    voucher = {"description": f"Assembly of {serial_number}", "date": assembly_date, "source_doc_type": 'ASSEMBLY', "source_doc_id": assembly_id,
+               "entries": [(accounts['Inventory'], to_rupees(cost), None), (accounts['Inventory'], None, to_rupees(cost))]}
+    return assembly_id, voucher
+
+def _post_assembly_transaction(conn, build_name, component_ids, assembly_date=None, godown_id=None):
+    """Builds one unit from hand-picked component serials on conn without committing. Returns its serial number."""
+    cursor = conn.cursor()
+    assembly_date = assembly_date or datetime.date.today().isoformat()
+    _ensure_period_open(cursor, assembly_date)
+    component_ids = sorted(set(component_ids))
+    if not component_ids:
+        raise ValueError("An assembly needs at least one component.")
+    placeholders = ','.join('?' * len(component_ids))
+    serials = cursor.execute(f"SELECT id, item_id, godown_id FROM item_serial_numbers WHERE id IN ({placeholders}) AND status = 'IN_STOCK'",
+                             component_ids).fetchall()
+    if len(serials) != len(component_ids):
+        raise ValueError(f"Only {len(serials)} of {len(component_ids)} components are in stock.")
+
+    item = cursor.execute("SELECT id, is_assembled_item FROM items WHERE name = ?", (build_name,)).fetchone()
+    if item is None:
+        assembled_item_id = cursor.execute("INSERT INTO items (name, category, is_assembled_item, is_serialized) VALUES (?, 'Assembled', TRUE, TRUE)",
+                                           (build_name,)).lastrowid
+    elif item['is_assembled_item']:
+        assembled_item_id = item['id']
+    else:
+        raise ValueError(f"'{build_name}' is already an item that is not assembled.")
+
+    cursor.execute(f"UPDATE item_serial_numbers SET status = 'CONSUMED' WHERE id IN ({placeholders})", component_ids)
+    serial_number = _allocate_document_numbers(cursor, 'ASSEMBLY', assembly_date)[0]
+    _, voucher = _post_assembly(conn, assembled_item_id, serial_number,
+                                [(row['item_id'], row['godown_id'], 1, row['id']) for row in serials],
+                                assembly_date, godown_id or serials[0]['godown_id'])
+    post_gl_batch([voucher], conn_override=conn)
+    if item is None:
+        # A one-off build is priced at what it cost.
+        cursor.execute("UPDATE items SET purchase_price = (SELECT total_cost FROM assemblies WHERE assembled_item_id = ?) WHERE id = ?",
+                       (assembled_item_id, assembled_item_id))
+    return serial_number
+
+def create_assembly_transaction(build_name, component_ids, assembly_date=None, godown_id=None):
+    """
+    Builds one unit named build_name (created as an assembled item if new)
+    from the given in-stock component serial ids, in one transaction. The unit
+    goes to godown_id, by default the first component's godown. Returns the
+    new unit's serial number, or None on error.
+    """
+    conn = get_db_connection()
+    try:
+        with conn:
+            serial_number = _post_assembly_transaction(conn, build_name, component_ids, assembly_date, godown_id)
+        _touch_reference('items')
+        return serial_number
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error creating assembly: {e}")
+        return None
+    finally:
+        conn.close()
+
+def set_bill_of_materials(assembled_item_id, components):
+    """
+    Replaces the stored bill of materials of an item with components, a list of
+    (component_item_id, quantity per unit). The item becomes a serialized
+    assembled item. Returns True, or False on error.
+    """
+    conn = get_db_connection()
+    try:
+        with conn:
+            serialized = {row[0] for row in conn.execute(
+                f"SELECT id FROM items WHERE is_serialized AND id IN ({','.join('?' * len(components))})",
+                [item_id for item_id, _ in components]).fetchall()} if components else set()
+            for item_id, quantity in components:
+                if quantity <= 0 or (item_id in serialized and quantity != int(quantity)):
+                    raise ValueError(f"Invalid quantity {quantity} for component {item_id}.")
+            conn.execute("DELETE FROM bill_of_materials WHERE assembled_item_id = ?", (assembled_item_id,))
+            conn.executemany("INSERT INTO bill_of_materials (assembled_item_id, component_item_id, quantity) VALUES (?, ?, ?)",
+                             [(assembled_item_id, item_id, quantity) for item_id, quantity in components])
+            conn.execute("UPDATE items SET is_assembled_item = TRUE, is_serialized = TRUE WHERE id = ?", (assembled_item_id,))
+        _touch_reference('items')
+        return True
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error saving bill of materials: {e}")
+        return False
+    finally:
+        conn.close()
+
+def get_bill_of_materials(assembled_item_id):
+    conn = get_db_connection()
+    components = conn.execute("""
+        SELECT b.component_item_id, i.name as component_name, b.quantity, i.is_serialized
+        FROM bill_of_materials b JOIN items i ON b.component_item_id = i.id
+        WHERE b.assembled_item_id = ? ORDER BY i.name
+    """, (assembled_item_id,)).fetchall()
+    conn.close()
+    return components
+
+def _post_assembly_batch(conn, assembled_item_id, count, assembly_date=None, godown_id=None):
+    """Builds count units from the stored bill of materials on conn without committing. Returns their serial numbers."""
+    cursor = conn.cursor()
+    assembly_date = assembly_date or datetime.date.today().isoformat()
+    godown_id = godown_id or DEFAULT_GODOWN_ID
+    _ensure_period_open(cursor, assembly_date)
+    if count < 1:
+        raise ValueError("Build at least one unit.")
+    bom = cursor.execute("""
+        SELECT b.component_item_id, b.quantity, i.is_serialized FROM bill_of_materials b JOIN items i ON b.component_item_id = i.id
+        WHERE b.assembled_item_id = ?
+    """, (assembled_item_id,)).fetchall()
+    if not bom:
+        raise ValueError(f"Item {assembled_item_id} has no bill of materials.")
+
+    # Every serial the batch needs, oldest first per component, in one query.
+    reserved = {}
+    for serial_id, item_id in cursor.execute("""
+        SELECT id, item_id FROM (
+            SELECT sn.id, sn.item_id, b.quantity, ROW_NUMBER() OVER (PARTITION BY sn.item_id ORDER BY sn.id) as position
+            FROM bill_of_materials b JOIN item_serial_numbers sn ON sn.item_id = b.component_item_id
+            WHERE b.assembled_item_id = ? AND sn.status = 'IN_STOCK' AND sn.godown_id = ?
+        ) WHERE position <= quantity * ?
+    """, (assembled_item_id, godown_id, count)).fetchall():
+        reserved.setdefault(item_id, []).append(serial_id)
+    bulk_ids = [row['component_item_id'] for row in bom if not row['is_serialized']]
+    on_hand = {row[0]: row[1] for row in cursor.execute(
+        f"SELECT item_id, quantity FROM stock_balances WHERE godown_id = ? AND item_id IN ({','.join('?' * len(bulk_ids))})",
+        [godown_id, *bulk_ids]).fetchall()} if bulk_ids else {}
+    for row in bom:
+        needed = row['quantity'] * count
+        available = len(reserved.get(row['component_item_id'], [])) if row['is_serialized'] else on_hand.get(row['component_item_id'], 0)
+        if available < needed:
+            raise ValueError(f"Only {available:g} of component {row['component_item_id']} in godown {godown_id}; {needed:g} needed.")
+
+    serial_ids = [serial_id for ids in reserved.values() for serial_id in ids]
+    if serial_ids:
+        cursor.execute(f"UPDATE item_serial_numbers SET status = 'CONSUMED' WHERE id IN ({','.join('?' * len(serial_ids))})", serial_ids)
+    serial_numbers = _allocate_document_numbers(cursor, 'ASSEMBLY', assembly_date, count)
+    vouchers = []
+    for unit, serial_number in enumerate(serial_numbers):
+        components = []
+        for row in bom:
+            if row['is_serialized']:
+                per_unit = int(row['quantity'])
+                components.extend((row['component_item_id'], godown_id, 1, serial_id)
+                                  for serial_id in reserved[row['component_item_id']][unit * per_unit:(unit + 1) * per_unit])
+            else:
+                components.append((row['component_item_id'], godown_id, row['quantity'], None))
+        vouchers.append(_post_assembly(conn, assembled_item_id, serial_number, components, assembly_date, godown_id)[1])
+    post_gl_batch(vouchers, conn_override=conn)
+    return serial_numbers
+
+def build_assemblies(assembled_item_id, count, assembly_date=None, godown_id=None):
+    """
+    Builds count identical units of an item from its stored bill of materials,
+    taking components from (and putting the units in) godown_id, in one
+    transaction. Returns the new serial numbers, or None on error.
+    """
+    conn = get_db_connection()
+    try:
+        with conn:
+            return _post_assembly_batch(conn, assembled_item_id, count, assembly_date, godown_id)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error building assemblies: {e}")
+        return None
+    finally:
+        conn.close()
+
+# --- Period Close ---
+def _latest_period_close(conn, as_of=None, inclusive=True):
+    """
+    Returns (id, period_end) of the latest close ending on (or, if not inclusive,
+    strictly before) as_of. Returns (None, '') when there is none, so callers can
+    filter with date > period_end unconditionally.
+    """
+    if as_of is None:
+        row = conn.execute("SELECT id, period_end FROM period_closes ORDER BY period_end DESC LIMIT 1").fetchone()
+    else:
+        op = "<=" if inclusive else "<"
+        row = conn.execute(f"SELECT id, period_end FROM period_closes WHERE period_end {op} ? ORDER BY period_end DESC LIMIT 1", (as_of,)).fetchone()
+    return (row['id'], row['period_end']) if row else (None, '')
+
+def get_period_closes():
+    conn = get_db_connection()
+    closes = conn.execute("SELECT id, period_end, closed_at FROM period_closes ORDER BY period_end DESC").fetchall()
+    conn.close()
+    return closes
+
+def close_period(period_end):
+    """
+    Closes the books through period_end (YYYY-MM-DD, e.g. the last day of a fiscal
+    month or year). Cumulative balances for every GL account and party are frozen
+    as of that date, and later postings dated on or before it are rejected.
+    Periods must be closed in order. Returns the period close id, or None on error.
+    """
+    conn = get_db_connection()
+    try:
+        with conn:
+            prev_id, prev_end = _latest_period_close(conn)
+            if period_end <= prev_end:
+                raise ValueError(f"The books are already closed through {prev_end}.")
+            close_id = conn.execute("INSERT INTO period_closes (period_end) VALUES (?)", (period_end,)).lastrowid
+            conn.execute("""
+                INSERT INTO account_closing_balances (period_close_id, account_id, debit, credit)
+                SELECT ?, account_id, SUM(debit), SUM(credit) FROM (
+                    SELECT account_id, debit, credit FROM account_closing_balances WHERE period_close_id = ?
+                    UNION ALL
+                    SELECT account_id, debit, credit FROM account_daily_balances WHERE date > ? AND date <= ?
+                ) GROUP BY account_id
+            """, (close_id, prev_id, prev_end, period_end))
+            conn.execute("""
+                INSERT INTO party_closing_balances (period_close_id, party_type, party_id, balance)
+                SELECT ?, 'Customer', party_id, SUM(amount) FROM (
+                    SELECT party_id, balance as amount FROM party_closing_balances WHERE period_close_id = ? AND party_type = 'Customer'
+                    UNION ALL
+                    SELECT customer_id, total_amount FROM sales_invoices WHERE invoice_date > ? AND invoice_date <= ?
+                    UNION ALL
+                    SELECT customer_id, -amount FROM customer_payments WHERE payment_date > ? AND payment_date <= ?
+                ) GROUP BY party_id
+            """, (close_id, prev_id, prev_end, period_end, prev_end, period_end))
+            conn.execute("""
+                INSERT INTO party_closing_balances (period_close_id, party_type, party_id, balance)
+                SELECT ?, 'Supplier', party_id, SUM(amount) FROM (
+                    SELECT party_id, balance as amount FROM party_closing_balances WHERE period_close_id = ? AND party_type = 'Supplier'
+                    UNION ALL
+                    SELECT supplier_id, total_amount FROM purchase_invoices WHERE invoice_date > ? AND invoice_date <= ?
+                    UNION ALL
+                    SELECT supplier_id, -amount FROM supplier_payments WHERE payment_date > ? AND payment_date <= ?
+                ) GROUP BY party_id
+            """, (close_id, prev_id, prev_end, period_end, prev_end, period_end))
+        return close_id
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error closing period: {e}")
+        return None
+    finally:
+        conn.close()
+
+def reopen_latest_period():
+    """Drops the most recent period close and its snapshots. Returns its period_end, or None if nothing is closed."""
+    conn = get_db_connection()
+    try:
+        with conn:
+            close_id, period_end = _latest_period_close(conn)
+            if close_id is None:
+                return None
+            conn.execute("DELETE FROM account_closing_balances WHERE period_close_id = ?", (close_id,))
+            conn.execute("DELETE FROM party_closing_balances WHERE period_close_id = ?", (close_id,))
+            conn.execute("DELETE FROM period_closes WHERE id = ?", (close_id,))
+        return period_end
+    finally:
+        conn.close()
+
+# --- Posting Service ---
+class PostingService:
+    """
+    Funnels postings from many terminals and frames through one writer thread,
+    so concurrent cashiers queue up instead of racing for SQLite's write lock
+    and failing with "database is locked".
+
+    submit() returns a concurrent.futures.Future right away. The writer drains
+    up to max_batch queued commands, runs each inside its own SAVEPOINT so a
+    failing command rolls back alone, and commits the group once. Futures are
+    resolved only after that commit. Readers are unaffected: in WAL mode they
+    keep reading the last committed state while the writer works.
+    """
+    COMMANDS = {
+        'sale': _post_sale_invoice,
+        'purchase': _post_purchase_invoice,
+        'customer_payment': _post_customer_payment,
+        'supplier_payment': _post_supplier_payment,
+        'stock_transfer': _post_stock_transfer,
+        'assembly': _post_assembly_transaction,
+        'assembly_batch': _post_assembly_batch,
+    }
+    # Reference tables a command can write; their cached rows are marked out
+    # of date once the group holding a successful run has committed.
+    REFERENCES = {
+        _post_assembly_transaction: ('items',),  # May create the built item and price it
+    }
+    _STOP = object()
+
+    def __init__(self, max_batch=32):
+        self.max_batch = max_batch
+        self.commits = 0
+        self.commands_run = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="posting-writer", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        """Finishes everything already queued, then stops the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(self._STOP)
+            thread.join()
+
+    def submit(self, command, *args):
+        """Queues command (a key of COMMANDS, e.g. 'sale' or 'purchase') and returns its Future."""
+        if command not in self.COMMANDS:
+            raise ValueError(f"Unknown posting command: {command}")
+        from concurrent.futures import Future  # pulls in logging; not worth paying for at import
+        future = Future()
+        self._queue.put((self.COMMANDS[command], args, future))
+        self.start()
+        return future
+
+    def post_sale(self, invoice_data, items_data):
+        return self.submit('sale', invoice_data, items_data)
+
+    def post_purchase(self, invoice_data, items_data):
+        return self.submit('purchase', invoice_data, items_data)
+
+    def post_customer_payment(self, customer_id, payment_date, amount, allocations):
+        return self.submit('customer_payment', customer_id, payment_date, amount, allocations)
+
+    def post_supplier_payment(self, supplier_id, payment_date, amount, allocations):
+        return self.submit('supplier_payment', supplier_id, payment_date, amount, allocations)
+
+    def post_stock_transfer(self, item_id, from_godown_id, to_godown_id, quantity, date, serial_ids=None):
+        return self.submit('stock_transfer', item_id, from_godown_id, to_godown_id, quantity, date, serial_ids)
+
+    def post_assembly(self, build_name, component_ids, assembly_date=None, godown_id=None):
+        return self.submit('assembly', build_name, component_ids, assembly_date, godown_id)
+
+    def post_assembly_batch(self, assembled_item_id, count, assembly_date=None, godown_id=None):
+        return self.submit('assembly_batch', assembled_item_id, count, assembly_date, godown_id)
+
+    def _run(self):
+        # The writer never waits for a pool lease, so UI tasks holding them cannot hold up a save.
+        _connections.dedicate_thread()
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.max_batch and batch[-1] is not self._STOP:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stopping = batch[-1] is self._STOP
+                commands = [cmd for cmd in batch if cmd is not self._STOP]
+                if commands:
+                    try:
+                        self._run_group(commands)
+                    except Exception as e:
+                        # Whatever went wrong, the group's callers get an answer and the writer keeps going.
+                        self._fail_pending(commands, e)
+                if stopping:
+                    return
+        finally:
+            _connections.release_thread()
+
+    @staticmethod
+    def _fail_pending(commands, error):
+        """Resolves every future in commands that has no outcome yet with error."""
+        for func, args, future in commands:
+            if not future.done() and (future.running() or future.set_running_or_notify_cancel()):
+                future.set_exception(error)
+
+    def _run_group(self, commands):
+        conn = None
+        outcomes = []
+        written = set()  # Reference tables changed by commands that succeeded
+        try:
+            conn = get_db_connection()
+            conn.execute("BEGIN IMMEDIATE")
+            for func, args, future in commands:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT posting_command")
+                try:
+                    result = func(conn, *args)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO posting_command")
+                    outcomes.append((future, None, e))
+                else:
+                    outcomes.append((future, result, None))
+                    written.update(self.REFERENCES.get(func, ()))
+                conn.execute("RELEASE posting_command")
+            conn.commit()
+            self.commits += 1
+            self.commands_run += len(outcomes)
+        except Exception as e:
+            # A failed connect or BEGIN (e.g. "database is locked") reaches here before any future has started.
+            try:
+                if conn is not None and conn.in_transaction:
+                    conn.rollback()
+            finally:
+                self._fail_pending(commands, e)
+            return
+        finally:
+            if conn is not None:
+                conn.close()
+        # Before resolving, so a caller woken by its future reads fresh reference rows.
+        _touch_reference(*written)
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+_posting_service = None
+
+def start_posting_service():
+    """Returns the shared PostingService, starting it if needed."""
+    global _posting_service
+    if _posting_service is None:
+        _posting_service = PostingService()
+    return _posting_service.start()
+
+def submit_posting(command, *args):
+    """Posts through the shared service without waiting. Returns the command's Future; the UI hands it to TaskRunner.watch."""
+    return start_posting_service().submit(command, *args)
+
+def post_and_wait(command, *args):
+    """Posts through the shared service and waits for the commit. Returns the result, or None if the command failed."""
+    try:
+        return start_posting_service().submit(command, *args).result()
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error posting {command}: {e}")
+        return None
+
+def stop_posting_service():
+    global _posting_service
+    if _posting_service is not None:
+        _posting_service.stop()
+        _posting_service = None
+
+atexit.register(stop_posting_service)  # registered after close_all_connections, so it runs first
+
+# --- Report Cache ---
+# Reports are cached on (report, arguments, data version). Each report reads
+# one data_versions counter, which triggers bump whenever a table the report
+# reads changes (REPORT_VERSION_SOURCES in db/database_setup.py). Running a
+# report again over unchanged data costs a single primary-key lookup.
+REPORT_CACHE_MAX_ENTRIES = 64
+REPORT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+def _approximate_size(value):
+    """Rough memory footprint of a report result: nested lists and dicts of rows."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        return size + sum(_approximate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple, sqlite3.Row)):
+        return size + sum(_approximate_size(v) for v in value)
+    return size
+
+class ReportCache:
+    """
+    Least-recently-used report results, bounded by entry count and by an
+    approximate byte total. Results are shared between callers and must not
+    be modified.
+    """
+    def __init__(self, max_entries=REPORT_CACHE_MAX_ENTRIES, max_bytes=REPORT_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (result, size), least recently used first
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Returns (True, result) on a hit and (False, None) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key, result):
+        size = _approximate_size(result)
+        if size > self.max_bytes:
+            return  # Too big to keep; it would only push everything else out
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'entries': len(self._entries), 'bytes': self._bytes}
+
+_report_cache = ReportCache()
+
+def _cached_report(version_name, dated=False):
+    """
+    Serves repeat calls of a report from _report_cache until data_versions[version_name]
+    moves. Reports whose window is relative to today are also keyed on the date.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # The version is read before running, so a write that lands during
+            # the run files the result under the old version, not the new one.
+            key = (DATABASE_PATH, func.__name__, args, tuple(sorted(kwargs.items())), get_data_version(version_name))
+            if dated:
+                key += (datetime.date.today(),)
+            hit, result = _report_cache.get(key)
+            if not hit:
+                result = func(*args, **kwargs)
+                _report_cache.put(key, result)
+            return result
+        return wrapper
+    return decorate
+
+def get_report_cache_stats():
+    """Hit, miss and eviction counts and the current size of the report cache."""
+    return _report_cache.stats()
+
 # --- Reporting Functions ---
+@_cached_report('report_gst')
 def get_gstr1_report_data(start_date, end_date):
     """
     Fetches and processes data for GSTR-1 report, separating B2B and B2C sales.
     """
-    conn = get_db_connection()
-
     # B2B sales are those to customers WITH a GSTIN.
     b2b_query = """
     SELECT
         c.gstin as customer_gstin,
         si.invoice_number,
         si.invoice_date,
-        si.total_amount,
-        si.taxable_amount,
-        si.cgst_amount,
-        si.sgst_amount,
-        si.igst_amount,
+        si.total_amount / 100.0 as total_amount,
+        si.taxable_amount / 100.0 as taxable_amount,
+        si.cgst_amount / 100.0 as cgst_amount,
+        si.sgst_amount / 100.0 as sgst_amount,
+        si.igst_amount / 100.0 as igst_amount,
         c.state as place_of_supply
     FROM sales_invoices si
     JOIN customers c ON si.customer_id = c.id
@@ -712,10 +2373,10 @@ def get_gstr1_report_data(start_date, end_date):
     SELECT
         c.state as place_of_supply,
         sii.cgst_rate + sii.sgst_rate + sii.igst_rate as total_rate,
-        SUM(sii.taxable_value) as total_taxable_value,
-        SUM(sii.cgst_amount) as total_cgst,
-        SUM(sii.sgst_amount) as total_sgst,
-        SUM(sii.igst_amount) as total_igst
+        SUM(sii.taxable_value) / 100.0 as total_taxable_value,
+        SUM(sii.cgst_amount) / 100.0 as total_cgst,
+        SUM(sii.sgst_amount) / 100.0 as total_sgst,
+        SUM(sii.igst_amount) / 100.0 as total_igst
     FROM sales_invoices si
     JOIN sales_invoice_items sii ON si.id = sii.sales_invoice_id
     JOIN customers c ON si.customer_id = c.id
@@ -725,16 +2386,12 @@ def get_gstr1_report_data(start_date, end_date):
     ORDER BY c.state;
     """
 
-    b2b_invoices = conn.execute(b2b_query, (start_date, end_date)).fetchall()
-    b2c_summary = conn.execute(b2c_summary_query, (start_date, end_date)).fetchall()
-
-    conn.close()
-
     return {
-        "b2b": [dict(row) for row in b2b_invoices],
-        "b2c_summary": [dict(row) for row in b2c_summary]
+        "b2b": _fetch_records(b2b_query, (start_date, end_date)),
+        "b2c_summary": _fetch_records(b2c_summary_query, (start_date, end_date))
     }
 
+@_cached_report('report_gst')
 def get_gstr3b_report_data(start_date, end_date):
     """
     Fetches and processes summarized data for GSTR-3B report.
@@ -744,10 +2401,10 @@ def get_gstr3b_report_data(start_date, end_date):
     # 3.1: Outward Supplies (Sales)
     outward_supplies_query = """
     SELECT
-        SUM(taxable_amount) as total_taxable,
-        SUM(igst_amount) as total_igst,
-        SUM(cgst_amount) as total_cgst,
-        SUM(sgst_amount) as total_sgst
+        SUM(taxable_amount) / 100.0 as total_taxable,
+        SUM(igst_amount) / 100.0 as total_igst,
+        SUM(cgst_amount) / 100.0 as total_cgst,
+        SUM(sgst_amount) / 100.0 as total_sgst
     FROM sales_invoices
     WHERE invoice_date BETWEEN ? AND ?;
     """
@@ -755,10 +2412,10 @@ def get_gstr3b_report_data(start_date, end_date):
     # 4: Eligible ITC (Purchases)
     itc_query = """
     SELECT
-        SUM(taxable_amount) as total_taxable,
-        SUM(igst_amount) as total_igst,
-        SUM(cgst_amount) as total_cgst,
-        SUM(sgst_amount) as total_sgst
+        SUM(taxable_amount) / 100.0 as total_taxable,
+        SUM(igst_amount) / 100.0 as total_igst,
+        SUM(cgst_amount) / 100.0 as total_cgst,
+        SUM(sgst_amount) / 100.0 as total_sgst
     FROM purchase_invoices
     WHERE invoice_date BETWEEN ? AND ?;
     """
@@ -773,20 +2430,35 @@ def get_gstr3b_report_data(start_date, end_date):
         "itc_details": dict(itc_data) if itc_data else {}
     }
 
+@_cached_report('report_ledger')
 def get_profit_and_loss_data(start_date, end_date):
     conn = get_db_connection()
-    query = "SELECT a.type, a.name, IFNULL(SUM(ge.debit), 0) as total_debits, IFNULL(SUM(ge.credit), 0) as total_credits FROM gl_entries ge JOIN gl_transactions gt ON ge.transaction_id = gt.id JOIN accounts a ON ge.account_id = a.id WHERE a.type IN ('Revenue', 'Expense') AND gt.date BETWEEN ? AND ? GROUP BY a.id"
+    query = "SELECT a.type, a.name, IFNULL(SUM(b.debit), 0) / 100.0 as total_debits, IFNULL(SUM(b.credit), 0) / 100.0 as total_credits FROM accounts a JOIN account_daily_balances b ON b.account_id = a.id WHERE a.type IN ('Revenue', 'Expense') AND b.date BETWEEN ? AND ? GROUP BY a.id"
     results = conn.execute(query, (start_date, end_date)).fetchall()
     conn.close()
     return results
 
+@_cached_report('report_ledger')
 def get_balance_sheet_data(as_of_date):
+    """Balances as of a date: the latest closing snapshot on or before it, plus the open days since."""
     conn = get_db_connection()
-    query = "SELECT a.type, a.name, IFNULL(SUM(ge.debit), 0) as total_debits, IFNULL(SUM(ge.credit), 0) as total_credits FROM gl_entries ge JOIN gl_transactions gt ON ge.transaction_id = gt.id JOIN accounts a ON ge.account_id = a.id WHERE a.type IN ('Asset', 'Liability', 'Equity') AND gt.date <= ? GROUP BY a.id"
-    results = conn.execute(query, (as_of_date,)).fetchall()
+    close_id, closed_through = _latest_period_close(conn, as_of_date)
+    query = """
+    SELECT type, name, IFNULL(SUM(debit), 0) / 100.0 as total_debits, IFNULL(SUM(credit), 0) / 100.0 as total_credits FROM (
+        SELECT a.id, a.type, a.name, c.debit, c.credit FROM accounts a
+        JOIN account_closing_balances c ON c.period_close_id = ? AND c.account_id = a.id
+        WHERE a.type IN ('Asset', 'Liability', 'Equity')
+        UNION ALL
+        SELECT a.id, a.type, a.name, b.debit, b.credit FROM accounts a
+        JOIN account_daily_balances b ON b.account_id = a.id
+        WHERE a.type IN ('Asset', 'Liability', 'Equity') AND b.date > ? AND b.date <= ?
+    ) GROUP BY id
+    """
+    results = conn.execute(query, (close_id, closed_through, as_of_date)).fetchall()
     conn.close()
     return results
 
+@_cached_report('report_warranty', dated=True)
 def get_expiring_warranties(days_ahead=30):
     conn = get_db_connection()
     today = datetime.date.today()
@@ -796,16 +2468,45 @@ def get_expiring_warranties(days_ahead=30):
     conn.close()
     return results
 
+# Stock reports read stock_balances, so they cost one pass over items rather than over every serial.
+@_cached_report('report_stock')
 def get_low_stock_report():
     conn = get_db_connection()
-    query = "SELECT i.name, i.minimum_stock_level, COUNT(sn.id) as current_stock FROM items i LEFT JOIN item_serial_numbers sn ON i.id = sn.item_id AND sn.status = 'IN_STOCK' WHERE i.is_serialized = TRUE GROUP BY i.id HAVING COUNT(sn.id) < i.minimum_stock_level"
+    query = """
+    SELECT i.id, i.name, i.minimum_stock_level, IFNULL(SUM(b.quantity), 0) as current_stock
+    FROM items i LEFT JOIN stock_balances b ON b.item_id = i.id
+    WHERE i.minimum_stock_level > 0
+    GROUP BY i.id HAVING IFNULL(SUM(b.quantity), 0) < i.minimum_stock_level
+    ORDER BY i.name
+    """
     results = conn.execute(query).fetchall()
     conn.close()
     return results
 
+@_cached_report('report_stock')
 def get_category_stock_report():
     conn = get_db_connection()
-    query = "SELECT i.category, COUNT(sn.id) as stock_count FROM items i JOIN item_serial_numbers sn ON i.id = sn.item_id WHERE sn.status = 'IN_STOCK' GROUP BY i.category"
+    query = """
+    SELECT i.category, COUNT(DISTINCT i.id) as item_count, SUM(b.quantity) as stock_count
+    FROM items i JOIN stock_balances b ON b.item_id = i.id
+    WHERE b.quantity > 0
+    GROUP BY i.category
+    """
+    results = conn.execute(query).fetchall()
+    conn.close()
+    return results
+
+@_cached_report('report_stock')
+def get_stock_valuation_report():
+    """Quantity on hand and its value under the costing method, one row per item in stock."""
+    conn = get_db_connection()
+    query = """
+    SELECT i.id, i.name, i.category, SUM(b.quantity) as quantity,
+           ROUND(SUM(b.value) / SUM(b.quantity)) / 100.0 as unit_cost, SUM(b.value) / 100.0 as value
+    FROM items i JOIN stock_balances b ON b.item_id = i.id
+    GROUP BY i.id HAVING SUM(b.quantity) != 0
+    ORDER BY i.name
+    """
     results = conn.execute(query).fetchall()
     conn.close()
     return results
@@ -813,13 +2514,13 @@ def get_category_stock_report():
 # --- Service & Job Sheet Functions ---
 def add_amc(customer_id, start_date, end_date, value):
     conn = get_db_connection()
-    try: conn.execute("INSERT INTO amcs (customer_id, start_date, end_date, value) VALUES (?, ?, ?, ?)", (customer_id, start_date, end_date, value)); conn.commit(); return True
+    try: conn.execute("INSERT INTO amcs (customer_id, start_date, end_date, value) VALUES (?, ?, ?, ?)", (customer_id, start_date, end_date, to_paise(value))); conn.commit(); return True
     except: return False
     finally: conn.close()
 
 def get_all_amcs():
     conn = get_db_connection()
-    amcs = conn.execute("SELECT a.*, c.name as customer_name FROM amcs a JOIN customers c ON a.customer_id = c.id ORDER BY a.end_date").fetchall()
+    amcs = conn.execute("SELECT a.id, a.customer_id, a.start_date, a.end_date, a.value / 100.0 as value, c.name as customer_name FROM amcs a JOIN customers c ON a.customer_id = c.id ORDER BY a.end_date").fetchall()
     conn.close()
     return amcs
 
@@ -839,7 +2540,7 @@ def get_expiring_amcs(days_ahead=30):
     conn = get_db_connection()
     today = datetime.date.today()
     future_date = today + datetime.timedelta(days=days_ahead)
-    query = "SELECT a.*, c.name as customer_name FROM amcs a JOIN customers c ON a.customer_id = c.id WHERE a.end_date BETWEEN ? AND ? ORDER BY a.end_date"
+    query = "SELECT a.id, a.customer_id, a.start_date, a.end_date, a.value / 100.0 as value, c.name as customer_name FROM amcs a JOIN customers c ON a.customer_id = c.id WHERE a.end_date BETWEEN ? AND ? ORDER BY a.end_date"
     results = conn.execute(query, (today.isoformat(), future_date.isoformat())).fetchall()
     conn.close()
     return results
@@ -849,7 +2550,14 @@ def add_job_sheet(data, accessories):
     try:
         with conn:
             cursor = conn.cursor()
-            cursor.execute("INSERT INTO job_sheets (customer_id, received_date, product_name, product_serial, reported_problem, status, estimated_cost, estimated_timeline, assigned_to) VALUES (:customer_id, :received_date, :product_name, :product_serial, :reported_problem, 'Received', :estimated_cost, :estimated_timeline, :assigned_to)", data)
+            data = dict(data, estimated_cost=to_paise(data.get('estimated_cost')),
+                        job_number=_allocate_document_numbers(cursor, 'JOB_SHEET', data['received_date'])[0])
+            # A serial we sold or built is linked by id; anything else stays free text.
+            cursor.execute("""
+                INSERT INTO job_sheets (customer_id, received_date, product_name, product_serial, serial_number_id, reported_problem, status, estimated_cost, estimated_timeline, assigned_to, job_number)
+                VALUES (:customer_id, :received_date, :product_name, :product_serial, (SELECT id FROM item_serial_numbers WHERE serial_number = :product_serial),
+                        :reported_problem, 'Received', :estimated_cost, :estimated_timeline, :assigned_to, :job_number)
+            """, data)
             job_sheet_id = cursor.lastrowid
             if accessories:
                 acc_data = [(job_sheet_id, name) for name in accessories]
@@ -859,13 +2567,13 @@ def add_job_sheet(data, accessories):
 
 def get_all_job_sheets():
     conn = get_db_connection()
-    sheets = conn.execute("SELECT js.*, c.name as customer_name FROM job_sheets js JOIN customers c ON js.customer_id = c.id ORDER BY js.received_date DESC").fetchall()
+    sheets = conn.execute("SELECT js.id, js.customer_id, js.received_date, js.product_name, js.product_serial, js.serial_number_id, js.reported_problem, js.status, js.estimated_cost / 100.0 as estimated_cost, js.estimated_timeline, js.assigned_to, js.job_number, c.name as customer_name FROM job_sheets js JOIN customers c ON js.customer_id = c.id ORDER BY js.received_date DESC").fetchall()
     conn.close()
     return sheets
 
 def get_job_sheet_details(job_sheet_id):
     conn = get_db_connection()
-    sheet = conn.execute("SELECT js.*, c.name as customer_name FROM job_sheets js JOIN customers c ON js.customer_id = c.id WHERE js.id = ?", (job_sheet_id,)).fetchone()
+    sheet = conn.execute("SELECT js.id, js.customer_id, js.received_date, js.product_name, js.product_serial, js.serial_number_id, js.reported_problem, js.status, js.estimated_cost / 100.0 as estimated_cost, js.estimated_timeline, js.assigned_to, js.job_number, c.name as customer_name FROM job_sheets js JOIN customers c ON js.customer_id = c.id WHERE js.id = ?", (job_sheet_id,)).fetchone()
     accessories = conn.execute("SELECT name FROM job_sheet_accessories WHERE job_sheet_id = ?", (job_sheet_id,)).fetchall()
     conn.close()
     return sheet, accessories
@@ -876,31 +2584,89 @@ def update_job_sheet_status(job_sheet_id, status):
     except: return False
     finally: conn.close()
 
+# Serial lineage follows two edge tables: assembly_components links a component
+# serial to the assembly it went into, and assemblies links that assembly to
+# the serial it produced. Both directions are indexed, so tracing costs one
+# keyed step per level of nesting.
+MAX_TRACE_DEPTH = 32
+
+def get_serial_traceability(serial_number):
+    """
+    The lineage and service history of a serial. Returns (lineage,
+    service_history). Lineage has one row per serial with depth 0 for the
+    serial itself, 1, 2, ... for the assemblies it went into, and -1, -2, ...
+    for the components it was built from. Each row carries its purchase,
+    supplier, sale, customer and warranty. Service history lists the job
+    sheets for every serial in the lineage. Both are empty for an unknown serial.
+    """
+    conn = get_db_connection()
+    lineage = conn.execute("""
+        WITH RECURSIVE
+        start(serial_id) AS (SELECT id FROM item_serial_numbers WHERE serial_number = ?),
+        built_into(serial_id, depth, assembly_id) AS (
+            SELECT serial_id, 0, NULL FROM start
+            UNION ALL
+            SELECT a.new_serial_number_id, b.depth + 1, a.id
+            FROM built_into b JOIN assembly_components ac ON ac.used_serial_number_id = b.serial_id
+            JOIN assemblies a ON a.id = ac.assembly_id
+            WHERE b.depth < ?
+        ),
+        built_from(serial_id, depth, assembly_id) AS (
+            SELECT serial_id, 0, NULL FROM start
+            UNION ALL
+            SELECT ac.used_serial_number_id, b.depth - 1, a.id
+            FROM built_from b JOIN assemblies a ON a.new_serial_number_id = b.serial_id
+            JOIN assembly_components ac ON ac.assembly_id = a.id
+            WHERE b.depth > -?
+        ),
+        lineage AS (SELECT * FROM built_into UNION ALL SELECT * FROM built_from WHERE depth < 0)
+        SELECT l.depth, sn.id as serial_id, sn.serial_number, i.name as item_name, sn.status, sn.warranty_end_date,
+               l.assembly_id, asm.assembly_date,
+               pi.invoice_number as purchase_invoice_number, pi.invoice_date as purchase_date, s.name as supplier_name,
+               si.invoice_number as sales_invoice_number, si.invoice_date as sale_date, c.name as customer_name
+        FROM lineage l JOIN item_serial_numbers sn ON sn.id = l.serial_id JOIN items i ON sn.item_id = i.id
+        LEFT JOIN assemblies asm ON asm.id = l.assembly_id
+        LEFT JOIN purchase_invoices pi ON pi.id = sn.purchase_invoice_id LEFT JOIN suppliers s ON s.id = pi.supplier_id
+        LEFT JOIN sales_invoices si ON si.id = sn.sale_invoice_id LEFT JOIN customers c ON c.id = si.customer_id
+        ORDER BY l.depth DESC, sn.serial_number
+    """, (serial_number, MAX_TRACE_DEPTH, MAX_TRACE_DEPTH)).fetchall()
+    serial_ids = [row['serial_id'] for row in lineage]
+    service_history = conn.execute(f"""
+        SELECT js.id, js.job_number, js.received_date, js.status, js.reported_problem, js.serial_number_id, sn.serial_number, c.name as customer_name
+        FROM job_sheets js JOIN item_serial_numbers sn ON sn.id = js.serial_number_id JOIN customers c ON js.customer_id = c.id
+        WHERE js.serial_number_id IN ({','.join('?' * len(serial_ids))})
+        ORDER BY js.received_date, js.id
+    """, serial_ids).fetchall() if serial_ids else []
+    conn.close()
+    return lineage, service_history
+
 def create_quotation(data, items):
     conn = get_db_connection()
     try:
         with conn:
             cursor = conn.cursor()
-            cursor.execute("INSERT INTO quotations (customer_id, quote_date, expiry_date, total_amount, status) VALUES (:customer_id, :quote_date, :expiry_date, :total_amount, 'DRAFT')", data)
+            data = dict(data, total_amount=to_paise(data['total_amount']),
+                        quote_number=_allocate_document_numbers(cursor, 'QUOTATION', data['quote_date'])[0])
+            cursor.execute("INSERT INTO quotations (customer_id, quote_date, expiry_date, total_amount, status, quote_number) VALUES (:customer_id, :quote_date, :expiry_date, :total_amount, 'DRAFT', :quote_number)", data)
             quote_id = cursor.lastrowid
             for item in items:
-                cursor.execute("INSERT INTO quotation_items (quotation_id, item_id, quantity, selling_price) VALUES (?, ?, ?, ?)", (quote_id, item['item_id'], item['quantity'], item['selling_price']))
+                cursor.execute("INSERT INTO quotation_items (quotation_id, item_id, quantity, selling_price) VALUES (?, ?, ?, ?)", (quote_id, item['item_id'], item['quantity'], to_paise(item['selling_price'])))
         return quote_id
     except (sqlite3.Error, ValueError) as e:
         print(f"Error: {e}"); return None
 
 def get_all_quotations():
     conn = get_db_connection()
-    quotes = conn.execute("SELECT q.*, c.name as customer_name FROM quotations q JOIN customers c ON q.customer_id = c.id ORDER BY q.quote_date DESC").fetchall()
+    quotes = conn.execute("SELECT q.id, q.customer_id, q.quote_date, q.expiry_date, q.total_amount / 100.0 as total_amount, q.status, q.quote_number, c.name as customer_name FROM quotations q JOIN customers c ON q.customer_id = c.id ORDER BY q.quote_date DESC").fetchall()
     conn.close()
     return quotes
 
 def get_quotation_details(quotation_id):
     conn = get_db_connection()
-    quote = conn.execute("SELECT q.*, c.name as customer_name FROM quotations q JOIN customers c ON q.customer_id = c.id WHERE q.id = ?", (quotation_id,)).fetchone()
+    quote = conn.execute("SELECT q.id, q.customer_id, q.quote_date, q.expiry_date, q.total_amount / 100.0 as total_amount, q.status, q.quote_number, c.name as customer_name FROM quotations q JOIN customers c ON q.customer_id = c.id WHERE q.id = ?", (quotation_id,)).fetchone()
     # Also fetch gst_rate for conversion logic
     items_query = """
-    SELECT qi.*, i.name as item_name, g.rate as gst_rate
+    SELECT qi.id, qi.quotation_id, qi.item_id, qi.quantity, qi.selling_price / 100.0 as selling_price, i.name as item_name, g.rate as gst_rate
     FROM quotation_items qi
     JOIN items i ON qi.item_id = i.id
     LEFT JOIN gst_slabs g ON i.gst_slab_id = g.id
@@ -937,6 +2703,7 @@ def import_customers_from_data(customers_data):
                                  (cust_dict['name'], cust_dict.get('gstin', ''), cust_dict.get('address', ''),
                                   cust_dict.get('phone', ''), cust_dict.get('email', ''), cust_dict.get('state', '')))
                     inserted_count += 1
+        _touch_reference('customers')
         return True, inserted_count, updated_count, None
     except sqlite3.Error as e:
         return False, 0, 0, str(e)
@@ -969,9 +2736,9 @@ def import_purchases_from_data(invoices_data):
 
                     price = float(item_data['purchase_price'])
                     qty = float(item_data['quantity'])
-                    taxable_value = price * qty
-                    gst_rate = item_info.get('gst_rate', 0) # Assumes gst_rate is on the item for simplicity
-                    gst_amount = taxable_value * (gst_rate / 100.0)
+                    taxable_value = to_rupees(to_paise(price * qty))
+                    gst_rate = item_info.get('gst_rate') or 0 # Assumes gst_rate is on the item for simplicity
+                    gst_amount = calculate_gst(taxable_value, gst_rate, interstate=True)['igst_amount']
 
                     items_data_for_creation.append({
                         "item_id": item_info['id'], "quantity": qty, "purchase_price": price,
@@ -979,15 +2746,15 @@ def import_purchases_from_data(invoices_data):
                         "total_gst_amount": gst_amount,
                         "serial_numbers": item_data.get('serial_numbers', []), "godown_id": 1
                     })
-                    total_taxable_value += taxable_value
-                    total_gst += gst_amount
+                    total_taxable_value += to_paise(taxable_value)
+                    total_gst += to_paise(gst_amount)
 
                 invoice_data = {
                     "supplier_id": all_suppliers[header['supplier_name']],
                     "invoice_number": header['invoice_number'], "invoice_date": header['invoice_date'],
-                    "notes": header.get('notes', ''), "taxable_amount": total_taxable_value,
-                    "igst_amount": total_gst, "cgst_amount": 0, "sgst_amount": 0,
-                    "total_gst_amount": total_gst, "total_amount": total_taxable_value + total_gst
+                    "notes": header.get('notes', ''), "taxable_amount": to_rupees(total_taxable_value),
+                    "igst_amount": to_rupees(total_gst), "cgst_amount": 0, "sgst_amount": 0,
+                    "total_gst_amount": to_rupees(total_gst), "total_amount": to_rupees(total_taxable_value + total_gst)
                 }
 
                 create_purchase_invoice_transaction(invoice_data, items_data_for_creation, conn_override=conn)
@@ -1016,6 +2783,7 @@ def import_suppliers_from_data(suppliers_data):
                                  (supp_dict['name'], supp_dict.get('gstin', ''), supp_dict.get('address', ''),
                                   supp_dict.get('phone', ''), supp_dict.get('email', '')))
                     inserted_count += 1
+        _touch_reference('suppliers')
         return True, inserted_count, updated_count, None
     except sqlite3.Error as e:
         return False, 0, 0, str(e)
@@ -1036,7 +2804,7 @@ def import_items_from_data(items_data):
 
                 # Prepare data tuple for insertion/update
                 data_tuple = (
-                    item_dict.get('purchase_price', 0), item_dict.get('selling_price', 0),
+                    to_paise(item_dict.get('purchase_price', 0)), to_paise(item_dict.get('selling_price', 0)),
                     item_dict.get('default_warranty_months', 0), item_dict.get('minimum_stock_level', 0),
                     item_dict.get('category', ''), item_dict.get('unit_id'),
                     item_dict.get('hsn_code_id'), item_dict.get('gst_slab_id'),
@@ -1061,72 +2829,75 @@ def import_items_from_data(items_data):
                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """, (item_dict['name'],) + data_tuple)
                     inserted_count += 1
+        _touch_reference('items')
         return True, inserted_count, updated_count, None
     except sqlite3.Error as e:
         print(f"Database error during bulk import: {e}")
         return False, 0, 0, str(e)
 
 # --- Export Functions ---
+# Each export has a list form for the PDF writer and a streaming iter_* form,
+# which the CSV export writes out without holding every row in memory.
 def get_items_for_export():
     """Gets all items with their related names for CSV/PDF export."""
-    conn = get_db_connection()
+    return list(iter_items_for_export())
+
+def iter_items_for_export():
     query = """
     SELECT
-        i.id, i.name, h.hsn_code, u.name as unit, i.category, i.purchase_price,
-        i.selling_price, g.rate as gst_rate, i.default_warranty_months, i.minimum_stock_level
+        i.id, i.name, h.hsn_code, u.name as unit, i.category, i.purchase_price / 100.0 as purchase_price,
+        i.selling_price / 100.0 as selling_price, g.rate as gst_rate, i.default_warranty_months, i.minimum_stock_level
     FROM items i
     LEFT JOIN units u ON i.unit_id = u.id
     LEFT JOIN hsn_codes h ON i.hsn_code_id = h.id
     LEFT JOIN gst_slabs g ON i.gst_slab_id = g.id
     ORDER BY i.id
     """
-    items = conn.execute(query).fetchall()
-    conn.close()
-    return [dict(row) for row in items]
+    return _iter_records(query)
 
 def get_customers_for_export():
     """Gets all customers for CSV/PDF export."""
-    conn = get_db_connection()
-    customers = conn.execute("SELECT id, name, gstin, address, phone, email, state FROM customers ORDER BY id").fetchall()
-    conn.close()
-    return [dict(row) for row in customers]
+    return list(iter_customers_for_export())
+
+def iter_customers_for_export():
+    return _iter_records("SELECT id, name, gstin, address, phone, email, state FROM customers ORDER BY id")
 
 def get_suppliers_for_export():
     """Gets all suppliers for CSV/PDF export."""
-    conn = get_db_connection()
-    suppliers = conn.execute("SELECT id, name, gstin, address, phone, email FROM suppliers ORDER BY id").fetchall()
-    conn.close()
-    return [dict(row) for row in suppliers]
+    return list(iter_suppliers_for_export())
+
+def iter_suppliers_for_export():
+    return _iter_records("SELECT id, name, gstin, address, phone, email FROM suppliers ORDER BY id")
 
 def get_sales_invoices_for_export():
     """Gets all sales invoices with customer names for CSV/PDF export."""
-    conn = get_db_connection()
+    return list(iter_sales_invoices_for_export())
+
+def iter_sales_invoices_for_export():
     query = """
     SELECT
         si.id, si.invoice_number, si.invoice_date, c.name as customer_name,
-        si.total_amount, si.gst_amount, si.status, si.amount_paid
+        si.total_amount / 100.0 as total_amount, si.total_gst_amount / 100.0 as gst_amount, si.status, si.amount_paid / 100.0 as amount_paid
     FROM sales_invoices si
     JOIN customers c ON si.customer_id = c.id
     ORDER BY si.id
     """
-    invoices = conn.execute(query).fetchall()
-    conn.close()
-    return [dict(row) for row in invoices]
+    return _iter_records(query)
 
 def get_purchase_invoices_for_export():
     """Gets all purchase invoices with supplier names for CSV/PDF export."""
-    conn = get_db_connection()
+    return list(iter_purchase_invoices_for_export())
+
+def iter_purchase_invoices_for_export():
     query = """
     SELECT
         pi.id, pi.invoice_number, pi.invoice_date, s.name as supplier_name,
-        pi.total_amount, pi.gst_amount, pi.status, pi.amount_paid
+        pi.total_amount / 100.0 as total_amount, pi.total_gst_amount / 100.0 as gst_amount, pi.status, pi.amount_paid / 100.0 as amount_paid
     FROM purchase_invoices pi
     JOIN suppliers s ON pi.supplier_id = s.id
     ORDER BY pi.id
     """
-    invoices = conn.execute(query).fetchall()
-    conn.close()
-    return [dict(row) for row in invoices]
+    return _iter_records(query)
 
 
 # --- Transaction Viewer Functions ---
@@ -1134,7 +2905,14 @@ def get_sales_invoice_details(invoice_id):
     """Fetches full details for a single sales invoice, including line items."""
     conn = get_db_connection()
 
-    invoice_query = "SELECT si.*, c.name as customer_name FROM sales_invoices si JOIN customers c ON si.customer_id = c.id WHERE si.id = ?"
+    invoice_query = """
+    SELECT si.id, si.customer_id, si.invoice_number, si.invoice_date,
+           si.total_amount / 100.0 as total_amount, si.taxable_amount / 100.0 as taxable_amount,
+           si.cgst_amount / 100.0 as cgst_amount, si.sgst_amount / 100.0 as sgst_amount, si.igst_amount / 100.0 as igst_amount,
+           si.total_gst_amount / 100.0 as total_gst_amount, si.notes, si.status, si.amount_paid / 100.0 as amount_paid,
+           c.name as customer_name
+    FROM sales_invoices si JOIN customers c ON si.customer_id = c.id WHERE si.id = ?
+    """
     invoice = conn.execute(invoice_query, (invoice_id,)).fetchone()
 
     if not invoice:
@@ -1142,9 +2920,13 @@ def get_sales_invoice_details(invoice_id):
         return None, []
 
     items_query = """
-    SELECT sii.*, i.name as item_name, i.hsn_code
+    SELECT sii.id, sii.sales_invoice_id, sii.item_id, sii.quantity, sii.selling_price / 100.0 as selling_price,
+           sii.taxable_value / 100.0 as taxable_value, sii.cgst_rate, sii.sgst_rate, sii.igst_rate,
+           sii.cgst_amount / 100.0 as cgst_amount, sii.sgst_amount / 100.0 as sgst_amount, sii.igst_amount / 100.0 as igst_amount,
+           sii.total_gst_amount / 100.0 as total_gst_amount, i.name as item_name, h.hsn_code
     FROM sales_invoice_items sii
     JOIN items i ON sii.item_id = i.id
+    LEFT JOIN hsn_codes h ON i.hsn_code_id = h.id
     WHERE sii.sales_invoice_id = ?
     """
     items = conn.execute(items_query, (invoice_id,)).fetchall()
@@ -1152,109 +2934,220 @@ def get_sales_invoice_details(invoice_id):
     conn.close()
     return dict(invoice), [dict(item) for item in items]
 
-def get_all_transactions(filters={}):
-    """
-    Fetches a unified list of all transactions based on a set of filters.
-    """
-    conn = get_db_connection()
-
-    # Each subquery must select the same set of columns, aliased to be consistent
-    sales_q = "SELECT si.id, si.invoice_date as date, 'Sales Invoice' as type, c.name as party_name, si.invoice_number as doc_number, si.total_amount, 'Customer' as party_type, si.customer_id as party_id FROM sales_invoices si JOIN customers c ON si.customer_id = c.id"
-    purch_q = "SELECT pi.id, pi.invoice_date as date, 'Purchase Invoice' as type, s.name as party_name, pi.invoice_number as doc_number, pi.total_amount, 'Supplier' as party_type, pi.supplier_id as party_id FROM purchase_invoices pi JOIN suppliers s ON pi.supplier_id = s.id"
-    cust_pay_q = "SELECT cp.id, cp.payment_date as date, 'Payment Received' as type, c.name as party_name, 'Payment #' || cp.id as doc_number, cp.amount as total_amount, 'Customer' as party_type, cp.customer_id as party_id FROM customer_payments cp JOIN customers c ON cp.customer_id = c.id"
-    supp_pay_q = "SELECT sp.id, sp.payment_date as date, 'Payment Made' as type, s.name as party_name, 'Payment #' || sp.id as doc_number, sp.amount as total_amount, 'Supplier' as party_type, sp.supplier_id as party_id FROM supplier_payments sp JOIN suppliers s ON sp.supplier_id = s.id"
-
-    queries = []
+TRANSACTION_PAGE_SIZE = 100
+
+# The tables behind the All Transactions list. kind orders rows that tie on the sort column.
+TRANSACTION_SOURCES = [
+    {'kind': 1, 'type': 'Sales Invoice', 'filter': 'Sales Invoices', 'table': 'sales_invoices si',
+     'party_join': 'JOIN customers p ON si.customer_id = p.id', 'alias': 'si', 'date': 'invoice_date',
+     'amount': 'total_amount', 'party_id': 'customer_id', 'party_type': 'Customer', 'doc_number': 'si.invoice_number'},
+    {'kind': 2, 'type': 'Purchase Invoice', 'filter': 'Purchase Invoices', 'table': 'purchase_invoices pi',
+     'party_join': 'JOIN suppliers p ON pi.supplier_id = p.id', 'alias': 'pi', 'date': 'invoice_date',
+     'amount': 'total_amount', 'party_id': 'supplier_id', 'party_type': 'Supplier', 'doc_number': 'pi.invoice_number'},
+    {'kind': 3, 'type': 'Payment Received', 'filter': 'Payments Received', 'table': 'customer_payments cp',
+     'party_join': 'JOIN customers p ON cp.customer_id = p.id', 'alias': 'cp', 'date': 'payment_date',
+     'amount': 'amount', 'party_id': 'customer_id', 'party_type': 'Customer', 'doc_number': "IFNULL(cp.payment_number, 'Payment #' || cp.id)"},
+    {'kind': 4, 'type': 'Payment Made', 'filter': 'Payments Made', 'table': 'supplier_payments sp',
+     'party_join': 'JOIN suppliers p ON sp.supplier_id = p.id', 'alias': 'sp', 'date': 'payment_date',
+     'amount': 'amount', 'party_id': 'supplier_id', 'party_type': 'Supplier', 'doc_number': "IFNULL(sp.payment_number, 'Payment #' || sp.id)"},
+]
+# Sort keys for get_transactions_page -> the result column they order by.
+# Each key is also a TRANSACTION_SOURCES field naming the table column behind it.
+TRANSACTION_SORTS = {'date': 'date', 'amount': 'total_amount'}
+
+def _transaction_sources(filters):
+    """The sources a set of filters can match: narrowed by transaction type and party type."""
     trans_type = filters.get('transaction_type')
-    if not trans_type or trans_type == 'All Transactions':
-        queries.extend([sales_q, purch_q, cust_pay_q, supp_pay_q])
-    elif trans_type == 'Sales Invoices': queries.append(sales_q)
-    elif trans_type == 'Purchase Invoices': queries.append(purch_q)
-    elif trans_type == 'Payments Received': queries.append(cust_pay_q)
-    elif trans_type == 'Payments Made': queries.append(supp_pay_q)
-
-    if not queries: return [] # Return empty if no valid type is selected
-
-    base_query = " UNION ALL ".join(queries)
-
-    where_clauses = []
-    params = {}
-
-    if filters.get('start_date'):
-        where_clauses.append("date >= :start_date")
-        params['start_date'] = filters['start_date']
-    if filters.get('end_date'):
-        where_clauses.append("date <= :end_date")
-        params['end_date'] = filters['end_date']
+    sources = TRANSACTION_SOURCES
+    if trans_type and trans_type != 'All Transactions':
+        sources = [src for src in sources if src['filter'] == trans_type]
     if filters.get('party_id') and filters.get('party_type'):
-        where_clauses.append("party_id = :party_id AND party_type = :party_type")
-        params['party_id'] = filters['party_id']
-        params['party_type'] = filters['party_type']
-    if filters.get('amount_min'):
-        where_clauses.append("total_amount >= :amount_min")
-        params['amount_min'] = filters['amount_min']
-    if filters.get('amount_max'):
-        where_clauses.append("total_amount <= :amount_max")
-        params['amount_max'] = filters['amount_max']
-
-    if where_clauses:
-        final_query = f"SELECT * FROM ({base_query}) WHERE {' AND '.join(where_clauses)} ORDER BY date DESC"
-    else:
-        final_query = f"SELECT * FROM ({base_query}) ORDER BY date DESC"
+        sources = [src for src in sources if src['party_type'] == filters['party_type']]
+    return sources
+
+def _transaction_conditions(src, filters):
+    """WHERE terms for one source, written against its own columns so they can use its indexes."""
+    a = src['alias']
+    conditions = []
+    if filters.get('start_date'): conditions.append(f"{a}.{src['date']} >= :start_date")
+    if filters.get('end_date'): conditions.append(f"{a}.{src['date']} <= :end_date")
+    if filters.get('party_id') and filters.get('party_type'): conditions.append(f"{a}.{src['party_id']} = :party_id")
+    if filters.get('amount_min'): conditions.append(f"{a}.{src['amount']} >= :amount_min")
+    if filters.get('amount_max'): conditions.append(f"{a}.{src['amount']} <= :amount_max")
+    # The search box matches every column the list shows. A term inside the type label matches the whole source.
+    if filters.get('text') and filters['text'].lower() not in src['type'].lower():
+        amount = f"{a}.{src['amount']}"
+        shown_amount = f"printf('%,d.%02d', {amount} / 100, abs({amount}) % 100)"  # As displayed: 1,234.50
+        conditions.append(f"(lower(p.name) LIKE :text OR lower({src['doc_number']}) LIKE :text OR {a}.{src['date']} LIKE :text"
+                          f" OR {shown_amount} LIKE :text OR replace({shown_amount}, ',', '') LIKE :text)")
+    return conditions
+
+def _transaction_params(filters):
+    params = {key: filters.get(key) for key in ('start_date', 'end_date', 'party_id')}
+    params.update({key: to_paise(filters.get(key)) for key in ('amount_min', 'amount_max')})
+    if filters.get('text'):
+        params['text'] = f"%{filters['text'].lower()}%"
+    return params
+
+def _encode_transaction_cursor(sort, row):
+    return json.dumps([sort, row[TRANSACTION_SORTS[sort.lstrip('-')]], row['kind'], row['id']])
+
+def _query_transactions(filters, sort, cursor, limit, offset=0, keys_only=False):
+    """
+    Runs the All Transactions union. keys_only returns just the sort value,
+    kind and id of each row: branches then read their index entries alone,
+    joining parties only when the text filter needs the name.
+    """
+    descending = sort.startswith('-')
+    sort_key = sort.lstrip('-')
+    if sort_key not in TRANSACTION_SORTS:
+        raise ValueError(f"Unknown sort key: {sort}")
+    direction, before = ("DESC", "<") if descending else ("ASC", ">")
+    params = _transaction_params(filters)
+    if cursor:
+        cursor_sort, params['cursor_value'], cursor_kind, params['cursor_id'] = json.loads(cursor)
+        if cursor_sort != sort:
+            raise ValueError(f"Cursor was issued for sort '{cursor_sort}', not '{sort}'")
+        if sort_key == 'amount':
+            params['cursor_value'] = to_paise(params['cursor_value'])  # Rows carry rupees; the columns hold paise
+    if limit is not None:
+        params['branch_limit'] = limit + offset
+
+    branches = []
+    for src in _transaction_sources(filters):
+        a = src['alias']
+        sort_column = f"{a}.{src[sort_key]}"
+        conditions = _transaction_conditions(src, filters)
+        if cursor:
+            # (sort value, kind, id) past the cursor, with this branch's kind fixed.
+            if src['kind'] == cursor_kind:
+                conditions.append(f"({sort_column}, {a}.id) {before} (:cursor_value, :cursor_id)")
+            elif (src['kind'] < cursor_kind) == descending:
+                conditions.append(f"{sort_column} {before}= :cursor_value")
+            else:
+                conditions.append(f"{sort_column} {before} :cursor_value")
+        if keys_only:
+            join = src['party_join'] if filters.get('text') else ""
+            sort_value = f"{sort_column} / 100.0" if sort_key == 'amount' else sort_column
+            branch = (f"SELECT {a}.id, {sort_value} AS {TRANSACTION_SORTS[sort_key]}, {src['kind']} AS kind "
+                      f"FROM {src['table']} {join}")
+        else:
+            branch = (f"SELECT {a}.id, {a}.{src['date']} AS date, '{src['type']}' AS type, p.name AS party_name, "
+                      f"{src['doc_number']} AS doc_number, {a}.{src['amount']} / 100.0 AS total_amount, '{src['party_type']}' AS party_type, "
+                      f"{a}.{src['party_id']} AS party_id, {src['kind']} AS kind "
+                      f"FROM {src['table']} {src['party_join']}")
+        if conditions:
+            branch += " WHERE " + " AND ".join(conditions)
+        if limit is not None:
+            branch += f" ORDER BY {sort_column} {direction}, {a}.id {direction} LIMIT :branch_limit"
+        branches.append(f"SELECT * FROM ({branch})")
+    if not branches:
+        return []
 
-    transactions = conn.execute(final_query, params).fetchall()
+    query = " UNION ALL ".join(branches) + f" ORDER BY {TRANSACTION_SORTS[sort_key]} {direction}, kind {direction}, id {direction}"
+    if limit is not None:
+        query += " LIMIT :limit OFFSET :offset"
+        params.update(limit=limit, offset=offset)
+    conn = get_db_connection()
+    rows = conn.execute(query, params).fetchall()
     conn.close()
-    return transactions
+    return rows
 
+def get_transactions_page(filters, cursor=None, limit=TRANSACTION_PAGE_SIZE, skip=0, sort='-date'):
+    """
+    One page of the All Transactions list. sort is 'date' or 'amount', with a
+    leading '-' for descending; the opposite sort reads the same list from the
+    other end. cursor is the continuation token returned with the previous
+    page (None for the first page); skip jumps that many rows further.
+    limit=None returns everything. Returns (rows, next_cursor), where
+    next_cursor is None once the list is exhausted.
+
+    Every filter, the cursor and the limit go into each branch of the union,
+    so each table is read through its own indexes. A skip is first resolved
+    to a cursor on the sort keys alone, so jumping far costs an index walk
+    rather than building and discarding every skipped row.
+    """
+    if skip and limit is not None:
+        keys = _query_transactions(filters, sort, cursor, 1, skip - 1, keys_only=True)
+        if not keys:
+            return [], None
+        cursor = _encode_transaction_cursor(sort, keys[0])
+    rows = _query_transactions(filters, sort, cursor, limit)
+    next_cursor = _encode_transaction_cursor(sort, rows[-1]) if limit is not None and len(rows) == limit else None
+    return rows, next_cursor
+
+def get_transactions_count(filters):
+    """Number of rows get_transactions_page would page through for these filters."""
+    branches = []
+    for src in _transaction_sources(filters):
+        conditions = _transaction_conditions(src, filters)
+        # Only the text filter needs the party's name.
+        join = src['party_join'] if filters.get('text') else ""
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        branches.append(f"SELECT COUNT(*) AS n FROM {src['table']} {join}{where}")
+    if not branches:
+        return 0
+    conn = get_db_connection()
+    count = conn.execute(f"SELECT SUM(n) FROM ({' UNION ALL '.join(branches)})", _transaction_params(filters)).fetchone()[0]
+    conn.close()
+    return count
 
-def universal_search(search_term):
-    if not search_term:
+def get_all_transactions(filters={}):
+    """
+    Fetches a unified list of all transactions based on a set of filters.
+    """
+    rows, _ = get_transactions_page(filters, limit=None)
+    return rows
+
+
+# search_index rowids are id * SEARCH_KIND_MULTIPLIER + kind (see SEARCH_SOURCES in db/database_setup.py).
+# Kinds are numbered in the order result types are listed when relevance ties.
+SEARCH_KINDS = {
+    1: ("Customer", "SELECT id, name, phone, email FROM customers WHERE id IN ({ids})",
+        lambda r: (r['name'], f"Phone: {r['phone']}, Email: {r['email']}")),
+    2: ("Supplier", "SELECT id, name, phone, email FROM suppliers WHERE id IN ({ids})",
+        lambda r: (r['name'], f"Phone: {r['phone']}, Email: {r['email']}")),
+    3: ("Item", "SELECT i.id, i.name, h.hsn_code FROM items i LEFT JOIN hsn_codes h ON i.hsn_code_id = h.id WHERE i.id IN ({ids})",
+        lambda r: (r['name'], f"HSN: {r['hsn_code']}")),
+    4: ("Serial Number", "SELECT sn.id, sn.serial_number, i.name AS item_name FROM item_serial_numbers sn JOIN items i ON sn.item_id = i.id WHERE sn.id IN ({ids})",
+        lambda r: (r['serial_number'], f"Item: {r['item_name']}")),
+    5: ("Sales Invoice", "SELECT si.id, si.invoice_number, c.name AS customer_name FROM sales_invoices si JOIN customers c ON si.customer_id = c.id WHERE si.id IN ({ids})",
+        lambda r: (r['invoice_number'], f"Customer: {r['customer_name']}")),
+    6: ("Purchase Invoice", "SELECT pi.id, pi.invoice_number, s.name AS supplier_name FROM purchase_invoices pi JOIN suppliers s ON pi.supplier_id = s.id WHERE pi.id IN ({ids})",
+        lambda r: (r['invoice_number'], f"Supplier: {r['supplier_name']}")),
+    7: ("Job Sheet", "SELECT js.id, js.product_name, js.product_serial, c.name AS customer_name FROM job_sheets js JOIN customers c ON js.customer_id = c.id WHERE js.id IN ({ids})",
+        lambda r: (f"Job for {r['product_name']} (S/N: {r['product_serial']})", f"Customer: {r['customer_name']}")),
+}
+SEARCH_PAGE_SIZE = 50
+
+def universal_search(search_term, limit=SEARCH_PAGE_SIZE, offset=0):
+    """
+    Substring search across parties, items, serial numbers, invoices and job
+    sheets. Returns one page of results, best matches first.
+    """
+    term = search_term.strip() if search_term else ""
+    if not term:
         return []
     conn = get_db_connection()
-    term = f"%{search_term.lower()}%"
     all_results = []
 
     try:
-        # Customers by name, phone, email, gstin
-        customers = conn.execute("SELECT id, name, phone, email, gstin FROM customers WHERE lower(name) LIKE ? OR lower(phone) LIKE ? OR lower(email) LIKE ? OR lower(gstin) LIKE ?", (term, term, term, term)).fetchall()
-        for row in customers:
-            all_results.append({'type': 'Customer', 'summary': f"{row['name']}", 'details': f"Phone: {row['phone']}, Email: {row['email']}", 'id': row['id']})
-
-        # Suppliers by name, phone, email, gstin
-        suppliers = conn.execute("SELECT id, name, phone, email, gstin FROM suppliers WHERE lower(name) LIKE ? OR lower(phone) LIKE ? OR lower(email) LIKE ? OR lower(gstin) LIKE ?", (term, term, term, term)).fetchall()
-        for row in suppliers:
-            all_results.append({'type': 'Supplier', 'summary': f"{row['name']}", 'details': f"Phone: {row['phone']}, Email: {row['email']}", 'id': row['id']})
-
-        # Items by name, hsn_code
-        items_query = """
-        SELECT i.id, i.name, h.hsn_code
-        FROM items i
-        LEFT JOIN hsn_codes h ON i.hsn_code_id = h.id
-        WHERE lower(i.name) LIKE ? OR lower(h.hsn_code) LIKE ?
-        """
-        items = conn.execute(items_query, (term, term)).fetchall()
-        for row in items:
-            all_results.append({'type': 'Item', 'summary': f"{row['name']}", 'details': f"HSN: {row['hsn_code']}", 'id': row['id']})
-
-        # Serial Numbers
-        serials = conn.execute("SELECT sn.id, sn.serial_number, i.name as item_name FROM item_serial_numbers sn JOIN items i ON sn.item_id = i.id WHERE lower(sn.serial_number) LIKE ?", (term,)).fetchall()
-        for row in serials:
-            all_results.append({'type': 'Serial Number', 'summary': f"{row['serial_number']}", 'details': f"Item: {row['item_name']}", 'id': row['id']})
-
-        # Sales Invoices by invoice number
-        sales_invoices = conn.execute("SELECT si.id, si.invoice_number, c.name as customer_name FROM sales_invoices si JOIN customers c ON si.customer_id = c.id WHERE lower(si.invoice_number) LIKE ?", (term,)).fetchall()
-        for row in sales_invoices:
-            all_results.append({'type': 'Sales Invoice', 'summary': f"{row['invoice_number']}", 'details': f"Customer: {row['customer_name']}", 'id': row['id']})
-
-        # Purchase Invoices by invoice number
-        purchase_invoices = conn.execute("SELECT pi.id, pi.invoice_number, s.name as supplier_name FROM purchase_invoices pi JOIN suppliers s ON pi.supplier_id = s.id WHERE lower(pi.invoice_number) LIKE ?", (term,)).fetchall()
-        for row in purchase_invoices:
-            all_results.append({'type': 'Purchase Invoice', 'summary': f"{row['invoice_number']}", 'details': f"Supplier: {row['supplier_name']}", 'id': row['id']})
-
-        # Job Sheets by product name or serial
-        job_sheets = conn.execute("SELECT js.id, js.product_name, js.product_serial, c.name as customer_name FROM job_sheets js JOIN customers c ON js.customer_id = c.id WHERE lower(js.product_name) LIKE ? OR lower(js.product_serial) LIKE ?", (term, term)).fetchall()
-        for row in job_sheets:
-            all_results.append({'type': 'Job Sheet', 'summary': f"Job for {row['product_name']} (S/N: {row['product_serial']})", 'details': f"Customer: {row['customer_name']}", 'id': row['id']})
+        if len(term) >= 3:
+            # A quoted phrase of trigrams matches the term anywhere in a field; title hits weigh more.
+            phrase = '"' + term.replace('"', '""') + '"'
+            hits = conn.execute(f"""
+                SELECT rowid FROM search_index WHERE search_index MATCH ?
+                ORDER BY bm25(search_index, 10.0, 1.0), rowid % {SEARCH_KIND_MULTIPLIER}, rowid
+                LIMIT ? OFFSET ?""", (phrase, limit, offset)).fetchall()
+        else:
+            # Too short for a trigram lookup; scan the index, which is still much smaller than the source tables.
+            like = f"%{term}%"
+            hits = conn.execute(f"""
+                SELECT rowid FROM search_index WHERE title LIKE ? OR extra LIKE ?
+                ORDER BY rowid % {SEARCH_KIND_MULTIPLIER}, rowid
+                LIMIT ? OFFSET ?""", (like, like, limit, offset)).fetchall()
+
+        all_results = _describe_search_hits(conn, [row[0] for row in hits])
 
     except sqlite3.Error as e:
         print(f"Database search error: {e}")
@@ -1264,6 +3157,101 @@ def universal_search(search_term):
 
     return all_results
 
+def _describe_search_hits(conn, rowids):
+    """Turns search_index rowids into result dicts, in the same order."""
+    hits = [divmod(rowid, SEARCH_KIND_MULTIPLIER) for rowid in rowids]
+    ids_by_kind = {}
+    for entity_id, kind in hits:
+        ids_by_kind.setdefault(kind, []).append(entity_id)
+    found = {}
+    for kind, ids in ids_by_kind.items():
+        type_name, query, describe = SEARCH_KINDS[kind]
+        for row in conn.execute(query.format(ids=", ".join("?" * len(ids))), ids):
+            summary, details = describe(row)
+            found[(row['id'], kind)] = {'type': type_name, 'summary': summary, 'details': details, 'id': row['id']}
+    return [found[hit] for hit in hits if hit in found]
+
+def get_data_version(name):
+    """Current value of a data_versions counter; triggers bump it whenever the tables behind it change."""
+    conn = get_db_connection()
+    row = conn.execute("SELECT version FROM data_versions WHERE name = ?", (name,)).fetchone()
+    conn.close()
+    return row['version'] if row else 0
+
+class SearchPrefixIndex:
+    """
+    Sorted in-memory keys over the titles in search_index (party and item
+    names, serials, invoice numbers), for search-as-you-type. Every word of a
+    title starts a key, so "cli" finds "Alpha Client". The index is built on
+    first use and rebuilt only after data_versions['search'] moves; a lookup
+    that extends the previous prefix only searches the previous match range.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []
+        self._rowids = []
+        self._built_for = None  # (database path, search version)
+        self._last = None  # (prefix, lo, hi) of the previous lookup
+
+    def invalidate(self):
+        with self._lock:
+            self._built_for = None
+
+    def _ensure_current(self, conn):
+        row = conn.execute("SELECT version FROM data_versions WHERE name = 'search'").fetchone()
+        state = (DATABASE_PATH, row['version'] if row else 0)
+        if state == self._built_for:
+            return
+        entries = []
+        for rowid, title in conn.execute("SELECT rowid, title FROM search_index"):
+            words = title.lower().split()
+            for start in range(len(words)):
+                entries.append((" ".join(words[start:]), rowid))
+        entries.sort()
+        self._keys = [key for key, _ in entries]
+        self._rowids = [rowid for _, rowid in entries]
+        self._built_for = state
+        self._last = None
+
+    def lookup(self, conn, prefix, limit):
+        """search_index rowids of up to limit entries with a word starting with prefix."""
+        prefix = " ".join(prefix.lower().split())
+        with self._lock:
+            self._ensure_current(conn)
+            lo, hi = 0, len(self._keys)
+            if self._last and prefix.startswith(self._last[0]):
+                _, lo, hi = self._last
+            lo = bisect.bisect_left(self._keys, prefix, lo, hi)
+            hi = bisect.bisect_left(self._keys, prefix + "\U0010ffff", lo, hi)
+            self._last = (prefix, lo, hi)
+            rowids = []
+            seen = set()
+            for index in range(lo, hi):
+                rowid = self._rowids[index]
+                if rowid not in seen:
+                    seen.add(rowid)
+                    rowids.append(rowid)
+                    if len(rowids) == limit:
+                        break
+            return rowids
+
+_search_prefixes = SearchPrefixIndex()
+SUGGESTION_LIMIT = 20
+
+def search_suggestions(prefix, limit=SUGGESTION_LIMIT):
+    """Entities with a name, serial or document number word starting with prefix, for search-as-you-type."""
+    prefix = prefix.strip() if prefix else ""
+    if not prefix:
+        return []
+    conn = get_db_connection()
+    try:
+        return _describe_search_hits(conn, _search_prefixes.lookup(conn, prefix, limit))
+    except sqlite3.Error as e:
+        print(f"Database search error: {e}")
+        return []
+    finally:
+        conn.close()
+
 # --- Dashboard Functions ---
 def get_monthly_sales_summary():
     """Gets monthly sales summary for the current month."""
@@ -1280,9 +3268,9 @@ def get_monthly_sales_summary():
         query = """
         SELECT
             COUNT(*) as count,
-            IFNULL(SUM(total_amount), 0) as total,
-            IFNULL(SUM(taxable_amount), 0) as taxable_total,
-            IFNULL(SUM(total_gst_amount), 0) as gst_total
+            IFNULL(SUM(total_amount), 0) / 100.0 as total,
+            IFNULL(SUM(taxable_amount), 0) / 100.0 as taxable_total,
+            IFNULL(SUM(total_gst_amount), 0) / 100.0 as gst_total
         FROM sales_invoices
         WHERE invoice_date BETWEEN ? AND ?
         """
@@ -1309,9 +3297,9 @@ def get_monthly_purchase_summary():
         query = """
         SELECT
             COUNT(*) as count,
-            IFNULL(SUM(total_amount), 0) as total,
-            IFNULL(SUM(taxable_amount), 0) as taxable_total,
-            IFNULL(SUM(total_gst_amount), 0) as gst_total
+            IFNULL(SUM(total_amount), 0) / 100.0 as total,
+            IFNULL(SUM(taxable_amount), 0) / 100.0 as taxable_total,
+            IFNULL(SUM(total_gst_amount), 0) / 100.0 as gst_total
         FROM purchase_invoices
         WHERE invoice_date BETWEEN ? AND ?
         """
@@ -1330,7 +3318,7 @@ def get_overdue_receivables_summary():
         query = """
         SELECT
             COUNT(*) as count,
-            IFNULL(SUM(total_amount - amount_paid), 0) as total
+            IFNULL(SUM(total_amount - amount_paid), 0) / 100.0 as total
         FROM sales_invoices
         WHERE status != 'PAID' AND (total_amount - amount_paid) > 0
         """
@@ -1366,14 +3354,14 @@ def get_recent_activities(limit=10):
             SELECT
                 payment_date as date,
                 'payment' as type,
-                'Received payment ₹' || CAST(amount as TEXT) || ' from customer' as description,
+                'Received payment ₹' || printf('%.2f', amount / 100.0) || ' from customer' as description,
                 id
             FROM customer_payments
             UNION ALL
             SELECT
                 payment_date as date,
                 'payment' as type,
-                'Made payment ₹' || CAST(amount as TEXT) || ' to supplier' as description,
+                'Made payment ₹' || printf('%.2f', amount / 100.0) || ' to supplier' as description,
                 id
             FROM supplier_payments
         )
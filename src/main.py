@@ -1,36 +1,15 @@
+import time
+STARTED_AT = time.perf_counter()
+import importlib
 import customtkinter as ctk
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from db import database_setup
 
-# Import frames
-from ui_dashboard_frame import DashboardFrame
-from ui_godown_frame import GodownFrame
-from ui_item_frame import ItemFrame
-from ui_assembly_frame import AssemblyFrame
-from ui_supplier_frame import SupplierFrame
-from ui_purchase_frame import PurchaseFrame
-from ui_customer_frame import CustomerFrame
-from ui_sales_frame import SalesFrame
-from ui_chart_of_accounts_frame import ChartOfAccountsFrame
-from ui_customer_payment_frame import CustomerPaymentFrame
-from ui_supplier_payment_frame import SupplierPaymentFrame
-from ui_bank_reconciliation_frame import BankReconciliationFrame
-from ui_warranty_report_frame import WarrantyReportFrame
-from ui_amc_frame import AMCFrame
-from ui_job_sheet_frame import JobSheetFrame
-from ui_financial_reports_frame import FinancialReportsFrame
-from ui_inventory_reports_frame import InventoryReportsFrame
-from ui_search_frame import SearchFrame
-from ui_settings_frame import SettingsFrame
-from ui_unit_frame import UnitFrame
-from ui_export_frame import ExportFrame
-from ui_import_frame import ImportFrame
-from ui_party_master_frame import PartyMasterFrame
-from ui_all_transactions_frame import AllTransactionsFrame
-from ui_hsn_frame import HSNFrame
 import db_manager
+import task_runner
+IMPORTED_AT = time.perf_counter()
 
 # Xero-inspired color scheme
 XERO_BLUE = "#13B5EA"
@@ -44,6 +23,40 @@ XERO_GREEN = "#10B981"
 XERO_RED = "#EF4444"
 XERO_ORANGE = "#F59E0B"
 
+# Frame class -> module. Modules are imported when their frame is first shown,
+# so launch only pays for the screens it actually opens.
+FRAME_MODULES = {
+    "DashboardFrame": "ui_dashboard_frame",
+    "GodownFrame": "ui_godown_frame",
+    "ItemFrame": "ui_item_frame",
+    "HSNFrame": "ui_hsn_frame",
+    "AssemblyFrame": "ui_assembly_frame",
+    "SupplierFrame": "ui_supplier_frame",
+    "PurchaseFrame": "ui_purchase_frame",
+    "CustomerFrame": "ui_customer_frame",
+    "SalesFrame": "ui_sales_frame",
+    "ChartOfAccountsFrame": "ui_chart_of_accounts_frame",
+    "CustomerPaymentFrame": "ui_customer_payment_frame",
+    "SupplierPaymentFrame": "ui_supplier_payment_frame",
+    "BankReconciliationFrame": "ui_bank_reconciliation_frame",
+    "WarrantyReportFrame": "ui_warranty_report_frame",
+    "AMCFrame": "ui_amc_frame",
+    "JobSheetFrame": "ui_job_sheet_frame",
+    "FinancialReportsFrame": "ui_financial_reports_frame",
+    "SearchFrame": "ui_search_frame",
+    "SettingsFrame": "ui_settings_frame",
+    "UnitFrame": "ui_unit_frame",
+    "ExportFrame": "ui_export_frame",
+    "ImportFrame": "ui_import_frame",
+    "PartyMasterFrame": "ui_party_master_frame",
+    "AllTransactionsFrame": "ui_all_transactions_frame",
+    "InventoryReportsFrame": "ui_inventory_reports_frame",
+}
+
+# Frames worth building in idle time after the first screen is up, in order.
+PREWARM_FRAMES = ("DashboardFrame", "SalesFrame", "PurchaseFrame", "SearchFrame")
+PREWARM_DELAY_MS = 500
+
 class App(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -70,6 +83,7 @@ class App(ctk.CTk):
         
         # Set default screen
         self.set_default_screen()
+        self.after(PREWARM_DELAY_MS, lambda: self.after_idle(self.prewarm_frames))
 
     def create_header(self):
         """Create Xero-style header with logo and user info"""
@@ -206,23 +220,29 @@ class App(ctk.CTk):
         self.main_container.grid_columnconfigure(0, weight=1)
 
     def initialize_frames(self):
-        """Initialize all application frames"""
+        """Frames are built the first time they are shown; see get_frame"""
         self.frames = {}
-        
-        frames_to_load = (
-            DashboardFrame, GodownFrame, ItemFrame, HSNFrame, AssemblyFrame, 
-            SupplierFrame, PurchaseFrame, CustomerFrame, SalesFrame, 
-            ChartOfAccountsFrame, CustomerPaymentFrame, SupplierPaymentFrame, 
-            BankReconciliationFrame, WarrantyReportFrame, AMCFrame, JobSheetFrame, 
-            FinancialReportsFrame, SearchFrame, SettingsFrame, UnitFrame, 
-            ExportFrame, ImportFrame, PartyMasterFrame, AllTransactionsFrame, 
-            InventoryReportsFrame
-        )
-        
-        for F in frames_to_load:
-            frame = F(self.main_container)
-            self.frames[F.__name__] = frame
+        self.frame_factories = FRAME_MODULES
+
+    def get_frame(self, frame_name):
+        """Return the named frame, importing its module and building it on first use"""
+        frame = self.frames.get(frame_name)
+        if frame is None:
+            frame_class = getattr(importlib.import_module(FRAME_MODULES[frame_name]), frame_name)
+            frame = frame_class(self.main_container)
+            self.frames[frame_name] = frame
             frame.grid(row=0, column=0, sticky="nsew")
+            # New widgets stack on top; keep whatever is showing in front until asked otherwise.
+            frame.lower()
+        return frame
+
+    def prewarm_frames(self, pending=None):
+        """Build likely screens one per idle slot so the UI stays responsive"""
+        if pending is None:
+            pending = [name for name in PREWARM_FRAMES if name not in self.frames]
+        if pending:
+            self.get_frame(pending.pop(0))
+            self.after(50, lambda: self.after_idle(self.prewarm_frames, pending))
 
     def set_default_screen(self):
         """Set the default startup screen"""
@@ -238,85 +258,101 @@ class App(ctk.CTk):
 
     # Navigation event handlers
     def show_frame(self, frame_name): 
-        self.frames[frame_name].tkraise()
+        self.get_frame(frame_name).tkraise()
         
     def dashboard_button_event(self): 
-        self.frames["DashboardFrame"].load_data(); self.show_frame("DashboardFrame")
+        self.get_frame("DashboardFrame").load_data(); self.show_frame("DashboardFrame")
         
     def search_button_event(self): 
-        self.frames["SearchFrame"].load_data(); self.show_frame("SearchFrame")
+        self.get_frame("SearchFrame").load_data(); self.show_frame("SearchFrame")
         
     def hsn_button_event(self): 
-        self.frames["HSNFrame"].load_data(); self.show_frame("HSNFrame")
+        self.get_frame("HSNFrame").load_data(); self.show_frame("HSNFrame")
         
     def godowns_button_event(self): 
-        self.frames["GodownFrame"].load_godowns(); self.show_frame("GodownFrame")
+        self.get_frame("GodownFrame").load_godowns(); self.show_frame("GodownFrame")
         
     def items_button_event(self): 
-        self.frames["ItemFrame"].load_data(); self.show_frame("ItemFrame")
+        self.get_frame("ItemFrame").load_data(); self.show_frame("ItemFrame")
         
     def assembly_button_event(self): 
-        self.frames["AssemblyFrame"].load_data(); self.show_frame("AssemblyFrame")
+        self.get_frame("AssemblyFrame").load_data(); self.show_frame("AssemblyFrame")
         
     def suppliers_button_event(self): 
-        self.frames["SupplierFrame"].load_data(); self.show_frame("SupplierFrame")
+        self.get_frame("SupplierFrame").load_data(); self.show_frame("SupplierFrame")
         
     def purchases_button_event(self): 
-        self.frames["PurchaseFrame"].load_data(); self.show_frame("PurchaseFrame")
+        self.get_frame("PurchaseFrame").load_data(); self.show_frame("PurchaseFrame")
         
     def customers_button_event(self): 
-        self.frames["CustomerFrame"].load_data(); self.show_frame("CustomerFrame")
+        self.get_frame("CustomerFrame").load_data(); self.show_frame("CustomerFrame")
         
     def sales_button_event(self): 
-        self.frames["SalesFrame"].load_data(); self.show_frame("SalesFrame")
+        self.get_frame("SalesFrame").load_data(); self.show_frame("SalesFrame")
         
     def coa_button_event(self): 
-        self.frames["ChartOfAccountsFrame"].load_data(); self.show_frame("ChartOfAccountsFrame")
+        self.get_frame("ChartOfAccountsFrame").load_data(); self.show_frame("ChartOfAccountsFrame")
         
     def receive_payment_event(self): 
-        self.frames["CustomerPaymentFrame"].load_data(); self.show_frame("CustomerPaymentFrame")
+        self.get_frame("CustomerPaymentFrame").load_data(); self.show_frame("CustomerPaymentFrame")
         
     def make_payment_event(self): 
-        self.frames["SupplierPaymentFrame"].load_data(); self.show_frame("SupplierPaymentFrame")
+        self.get_frame("SupplierPaymentFrame").load_data(); self.show_frame("SupplierPaymentFrame")
         
     def bank_recon_event(self): 
-        self.frames["BankReconciliationFrame"].load_data(); self.show_frame("BankReconciliationFrame")
+        self.get_frame("BankReconciliationFrame").load_data(); self.show_frame("BankReconciliationFrame")
         
     def warranty_report_event(self): 
-        self.frames["WarrantyReportFrame"].load_data(); self.show_frame("WarrantyReportFrame")
+        self.get_frame("WarrantyReportFrame").load_data(); self.show_frame("WarrantyReportFrame")
         
     def amc_event(self): 
-        self.frames["AMCFrame"].load_data(); self.show_frame("AMCFrame")
+        self.get_frame("AMCFrame").load_data(); self.show_frame("AMCFrame")
         
     def job_sheet_event(self): 
-        self.frames["JobSheetFrame"].load_data(); self.show_frame("JobSheetFrame")
+        self.get_frame("JobSheetFrame").load_data(); self.show_frame("JobSheetFrame")
         
     def financial_reports_event(self): 
-        self.frames["FinancialReportsFrame"].load_data(); self.show_frame("FinancialReportsFrame")
+        self.get_frame("FinancialReportsFrame").load_data(); self.show_frame("FinancialReportsFrame")
         
     def inventory_reports_event(self): 
-        self.frames["InventoryReportsFrame"].load_data(); self.show_frame("InventoryReportsFrame")
+        self.get_frame("InventoryReportsFrame").load_data(); self.show_frame("InventoryReportsFrame")
         
     def units_button_event(self): 
-        self.frames["UnitFrame"].load_data(); self.show_frame("UnitFrame")
+        self.get_frame("UnitFrame").load_data(); self.show_frame("UnitFrame")
         
     def settings_button_event(self): 
-        self.frames["SettingsFrame"].load_data(); self.show_frame("SettingsFrame")
+        self.get_frame("SettingsFrame").load_data(); self.show_frame("SettingsFrame")
         
     def export_button_event(self): 
-        self.frames["ExportFrame"].load_data(); self.show_frame("ExportFrame")
+        self.get_frame("ExportFrame").load_data(); self.show_frame("ExportFrame")
         
     def import_button_event(self): 
-        self.frames["ImportFrame"].load_data(); self.show_frame("ImportFrame")
+        self.get_frame("ImportFrame").load_data(); self.show_frame("ImportFrame")
         
     def party_master_button_event(self): 
-        self.frames["PartyMasterFrame"].load_data(); self.show_frame("PartyMasterFrame")
+        self.get_frame("PartyMasterFrame").load_data(); self.show_frame("PartyMasterFrame")
         
     def all_transactions_button_event(self): 
-        self.frames["AllTransactionsFrame"].load_data(); self.show_frame("AllTransactionsFrame")
+        self.get_frame("AllTransactionsFrame").load_data(); self.show_frame("AllTransactionsFrame")
+
+def report_startup_timing(app):
+    """Print how long launch took up to the first fully drawn window, then close it"""
+    built_at = time.perf_counter()
+    app.update()
+    painted_at = time.perf_counter()
+    print(f"imports: {(IMPORTED_AT - STARTED_AT) * 1000:.0f} ms")
+    print(f"window built: {(built_at - STARTED_AT) * 1000:.0f} ms")
+    print(f"first paint: {(painted_at - STARTED_AT) * 1000:.0f} ms")
+    print(f"frames built: {len(app.frames)} of {len(app.frame_factories)}")
+    app.destroy()
 
 if __name__ == "__main__":
     database_setup.setup_database()
-    db_manager.initialize_chart_of_accounts()
     app = App()
-    app.mainloop()
+    if "--startup-timing" in sys.argv:
+        report_startup_timing(app)
+    else:
+        app.mainloop()
+    task_runner.shutdown()
+    db_manager.stop_posting_service()
+    db_manager.close_all_connections()
@@ -0,0 +1,105 @@
+"""
+Command-line maintenance tasks for the accounting database.
+
+Run from the project root, e.g.:
+    python src/maintenance.py check-balances
+    python src/maintenance.py rebuild-balances
+    python src/maintenance.py check-stock
+    python src/maintenance.py recost 2024-04-01
+    python src/maintenance.py close-period 2024-03-31
+"""
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db import database_setup
+import db_manager
+
+def rebuild_balances(args):
+    rows = db_manager.rebuild_account_daily_balances()
+    print(f"Rebuilt account_daily_balances: {rows} account-day rows.")
+    return 0
+
+def check_balances(args):
+    mismatches = db_manager.check_account_daily_balances()
+    if not mismatches:
+        print("account_daily_balances matches gl_entries.")
+        return 0
+    print(f"{len(mismatches)} account-day rows disagree with gl_entries:")
+    for m in mismatches:
+        print(f"  account {m['account_id']} on {m['date']}: "
+              f"journal {m['journal_debit']:.2f} Dr / {m['journal_credit']:.2f} Cr, "
+              f"rollup {m['rollup_debit']:.2f} Dr / {m['rollup_credit']:.2f} Cr")
+    print("Run 'rebuild-balances' to recompute the rollup.")
+    return 1
+
+def rebuild_stock(args):
+    rows = db_manager.rebuild_stock_balances()
+    print(f"Rebuilt stock_balances: {rows} item-godown rows.")
+    return 0
+
+def check_stock(args):
+    mismatches = db_manager.check_stock_balances()
+    if not mismatches:
+        print("stock_balances matches stock_movements.")
+        return 0
+    print(f"{len(mismatches)} item-godown rows disagree with stock_movements:")
+    for m in mismatches:
+        print(f"  item {m['item_id']} in godown {m['godown_id']}: "
+              f"ledger {m['ledger_quantity']:g} worth {m['ledger_value']:.2f}, "
+              f"balance {m['balance_quantity']:g} worth {m['balance_value']:.2f}")
+    print("Run 'rebuild-stock' to recompute the balances.")
+    return 1
+
+def recost(args):
+    movements = db_manager.recost_from_date(args.from_date, args.item)
+    if movements is None:
+        return 1
+    print(f"Revalued {movements} stock movements from {args.from_date}.")
+    return 0
+
+def close_period(args):
+    close_id = db_manager.close_period(args.period_end)
+    if close_id is None:
+        return 1
+    print(f"Books closed through {args.period_end}.")
+    return 0
+
+def reopen_period(args):
+    period_end = db_manager.reopen_latest_period()
+    if period_end is None:
+        print("No closed period to reopen.")
+        return 1
+    print(f"Reopened the period ending {period_end}.")
+    return 0
+
+COMMANDS = {
+    "rebuild-balances": (rebuild_balances, "Recompute account_daily_balances from gl_entries."),
+    "check-balances": (check_balances, "Compare account_daily_balances against gl_entries."),
+    "rebuild-stock": (rebuild_stock, "Recompute stock_balances from stock_movements."),
+    "check-stock": (check_stock, "Compare stock_balances against stock_movements."),
+    "recost": (recost, "Revalue stock movements from a date (YYYY-MM-DD) with the current costing method."),
+    "close-period": (close_period, "Close the books through a date (YYYY-MM-DD)."),
+    "reopen-period": (reopen_period, "Reopen the most recently closed period."),
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Database maintenance tasks.")
+    parser.add_argument("--db", default=db_manager.DATABASE_PATH, help="Path to the database file.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (func, help_text) in COMMANDS.items():
+        subparsers.add_parser(name, help=help_text).set_defaults(func=func)
+    subparsers.choices["close-period"].add_argument("period_end", help="Last day of the period, e.g. 2024-03-31.")
+    subparsers.choices["recost"].add_argument("from_date", help="First day to revalue, e.g. 2024-04-01.")
+    subparsers.choices["recost"].add_argument("--item", type=int, action="append", help="Only this item id (repeatable).")
+    args = parser.parse_args(argv)
+
+    db_manager.DATABASE_PATH = args.db
+    database_setup.setup_database(db_path=args.db)
+    try:
+        return args.func(args)
+    finally:
+        db_manager.close_all_connections()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Runs slow database calls off the Tk main thread.
+
+Frames create one TaskRunner and submit work under a key ("report",
+"search", ...). The call runs on a shared thread pool; its result is
+handed back on the main thread by polling with widget.after(), since Tk
+must only be touched from the thread that owns it. Submitting again under
+the same key makes the earlier request stale: it is cancelled if it has
+not started, and its result is dropped if it has.
+"""
+import queue
+import threading
+
+if __package__:
+    from . import db_manager
+else:
+    import db_manager
+
+# One worker per pooled connection, so a task never waits for a lease once it
+# has started. Postings do not compete for these: the writer has its own.
+MAX_WORKERS = db_manager.WORKER_POOL_SIZE
+POLL_INTERVAL_MS = 25
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _shared_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Imported here: concurrent.futures brings in logging, which launch does not need.
+            from concurrent.futures import ThreadPoolExecutor
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="ui-task")
+        return _executor
+
+def shutdown():
+    """Stops the shared pool; queued calls that have not started are dropped."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+class TaskRunner:
+    def __init__(self, widget, poll_ms=POLL_INTERVAL_MS):
+        self.widget = widget
+        self.poll_ms = poll_ms
+        self._generations = {}
+        self._pending = {}  # key -> (future, on_busy)
+        self._finished = queue.Queue()
+        self._polling = False
+
+    def submit(self, key, func, *args, on_result, on_error=None, on_busy=None):
+        """
+        Runs func(*args) in the background. On the main thread, on_busy(True)
+        is called now and on_busy(False) when the latest request for key
+        settles, followed by on_result(value) or, if the call or on_result
+        raised, on_error(exception).
+        """
+        self.cancel(key)
+        if on_busy:
+            on_busy(True)
+        return self._track(key, _shared_executor().submit(func, *args), True, on_result, on_error, on_busy)
+
+    def watch(self, key, future, on_result, on_error=None, on_busy=None):
+        """
+        Like submit, for a Future that is already running elsewhere, such as a
+        PostingService command. If the request goes stale only its result is
+        dropped; the Future itself is never cancelled.
+        """
+        self.cancel(key)
+        if on_busy:
+            on_busy(True)
+        return self._track(key, future, False, on_result, on_error, on_busy)
+
+    def _track(self, key, future, cancellable, on_result, on_error, on_busy):
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+        self._pending[key] = (future, cancellable, on_busy)
+        future.add_done_callback(lambda f: self._finished.put((key, generation, f, on_result, on_error)))
+        self._schedule_poll()
+        return future
+
+    def cancel(self, key):
+        """Makes any outstanding request for key stale."""
+        self._generations[key] = self._generations.get(key, 0) + 1
+        pending = self._pending.pop(key, None)
+        if pending:
+            future, cancellable, on_busy = pending
+            if cancellable:
+                future.cancel()
+            if on_busy:
+                on_busy(False)
+
+    def is_busy(self, key):
+        return key in self._pending
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        while True:
+            try:
+                key, generation, future, on_result, on_error = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._generations.get(key) or future.cancelled():
+                continue
+            _, _, on_busy = self._pending.pop(key)
+            if on_busy:
+                on_busy(False)
+            error = future.exception()
+            if error is None:
+                try:
+                    on_result(future.result())
+                except Exception as e:
+                    error = e
+            if error is not None:
+                if on_error:
+                    on_error(error)
+                else:
+                    print(f"Background task '{key}' failed: {error}")
+        if self._pending:
+            self._schedule_poll()
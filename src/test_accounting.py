@@ -22,7 +22,7 @@ class TestAccounting(unittest.TestCase):
         self.conn.row_factory = sqlite3.Row
         cursor = self.conn.cursor()
         tables = [
-            "gl_entries", "gl_transactions", "customer_payment_allocations",
+            "account_daily_balances", "gl_entries", "gl_transactions", "customer_payment_allocations",
             "supplier_payment_allocations", "customer_payments", "supplier_payments",
             "sales_invoice_items", "purchase_invoice_items", "sales_invoices",
             "purchase_invoices", "item_serial_numbers", "items", "customers",
@@ -47,7 +47,7 @@ class TestAccounting(unittest.TestCase):
         conn = db_manager.get_db_connection()
         acc_id = self.accounts[account_name]
         cursor = conn.cursor()
-        cursor.execute("SELECT SUM(debit), SUM(credit) FROM gl_entries WHERE account_id = ?", (acc_id,))
+        cursor.execute("SELECT SUM(debit) / 100.0, SUM(credit) / 100.0 FROM gl_entries WHERE account_id = ?", (acc_id,))
         result = cursor.fetchone()
         conn.close()
         debits = result[0] or 0
@@ -0,0 +1,202 @@
+import unittest
+import os
+import sqlite3
+from . import db_manager
+from db import database_setup
+from db.database_setup import setup_database
+
+class TestAssembly(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up a clean database with one godown, a supplier and a customer."""
+        cls.db_path = 'db/test_assembly.db'
+        db_manager.DATABASE_PATH = cls.db_path
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+        setup_database(db_path=cls.db_path)
+        db_manager.add_godown("Workshop", "")
+        db_manager.add_supplier("Parts Supplier", "", "", "", "", "State")
+        db_manager.add_customer("Build Customer", "", "", "", "", "State", "", "", 0)
+        cls.supplier_id = db_manager.find_reference_row("suppliers", "Parts Supplier")['id']
+        cls.customer_id = db_manager.find_reference_row("customers", "Build Customer")['id']
+        cls.purchases = 0
+
+    def setUp(self):
+        db_manager.DATABASE_PATH = self.db_path
+
+    def tearDown(self):
+        self.assertEqual(db_manager.check_stock_balances(), [])
+        self.assertEqual(db_manager.check_account_daily_balances(), [])
+
+    def _item(self, name, is_serialized=True):
+        db_manager.add_item(name, 0, 0, 0, 0, "Parts", None, None, None, is_serialized)
+        return db_manager.find_reference_row("items", name)['id']
+
+    def _purchase(self, item_id, quantity, price, date="2024-04-01", serial_numbers=None):
+        TestAssembly.purchases += 1
+        amount = quantity * price
+        invoice = {"supplier_id": self.supplier_id, "invoice_number": f"PA-{self.purchases}", "invoice_date": date, "total_amount": amount,
+                   "taxable_amount": amount, "total_gst_amount": 0, "igst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "notes": ""}
+        db_manager.create_purchase_invoice_transaction(invoice, [{"item_id": item_id, "quantity": quantity, "purchase_price": price,
+                                                                  "taxable_value": amount, "godown_id": 1, "serial_numbers": serial_numbers}])
+
+    def _query(self, sql, params=()):
+        conn = db_manager.get_db_connection()
+        rows = conn.execute(sql, params).fetchall()
+        conn.close()
+        return [tuple(row) for row in rows]
+
+    def _serial_ids(self, *serial_numbers):
+        return [self._query("SELECT id FROM item_serial_numbers WHERE serial_number = ?", (sn,))[0][0] for sn in serial_numbers]
+
+    def test_single_build_consumes_components_and_creates_the_unit(self):
+        cpu, board = self._item("Build CPU"), self._item("Build Board")
+        self._purchase(cpu, 1, 100, serial_numbers=["BC-1"])
+        self._purchase(board, 1, 250, serial_numbers=["BB-1"])
+
+        serial_number = db_manager.create_assembly_transaction("Office PC", self._serial_ids("BC-1", "BB-1"), "2024-04-02")
+        self.assertTrue(serial_number.startswith("ASM-"))
+        self.assertEqual(self._query("SELECT status FROM item_serial_numbers WHERE serial_number IN ('BC-1', 'BB-1')"), [('CONSUMED',), ('CONSUMED',)])
+        office_pc = db_manager.find_reference_row("items", "Office PC")
+        self.assertTrue(office_pc['is_assembled_item'])
+        self.assertEqual(office_pc['purchase_price'], 350)
+        self.assertEqual([(b['quantity'], b['value']) for b in db_manager.get_stock_balances(office_pc['id'])], [(1, 350)])
+        self.assertEqual(self._query("""
+            SELECT a.total_cost, COUNT(ac.id) FROM assemblies a JOIN item_serial_numbers sn ON a.new_serial_number_id = sn.id
+            JOIN assembly_components ac ON ac.assembly_id = a.id WHERE sn.serial_number = ? GROUP BY a.id
+        """, (serial_number,)), [(35000, 2)])
+        self.assertEqual(self._query("""
+            SELECT SUM(ge.debit), SUM(ge.credit) FROM gl_entries ge JOIN gl_transactions gt ON ge.transaction_id = gt.id
+            WHERE gt.source_doc_type = 'ASSEMBLY' AND gt.description = ?
+        """, (f"Assembly of {serial_number}",)), [(35000, 35000)])
+
+    def test_build_rejects_components_not_in_stock(self):
+        part = self._item("Used Part")
+        self._purchase(part, 1, 10, serial_numbers=["UP-1"])
+        serial_ids = self._serial_ids("UP-1")
+        self.assertIsNotNone(db_manager.create_assembly_transaction("First Build", serial_ids, "2024-04-02"))
+        self.assertIsNone(db_manager.create_assembly_transaction("Second Build", serial_ids, "2024-04-02"))
+        self.assertIsNone(db_manager.find_reference_row("items", "Second Build"))
+
+    def test_build_through_posting_service_refreshes_cached_items(self):
+        part = self._item("Queued Part")
+        self._purchase(part, 1, 40, serial_numbers=["QP-1"])
+        self.assertNotIn("Queued PC", [row['name'] for row in db_manager.get_reference_rows('items')])
+        service = db_manager.PostingService()
+        service.start()
+        try:
+            future = service.submit('assembly', "Queued PC", self._serial_ids("QP-1"), "2024-04-02")
+            self.assertTrue(future.result(timeout=10).startswith("ASM-"))
+        finally:
+            service.stop()
+        queued_pc = [row for row in db_manager.get_reference_rows('items') if row['name'] == "Queued PC"]
+        self.assertEqual([(row['is_assembled_item'], row['purchase_price']) for row in queued_pc], [(1, 40)])
+
+    def test_batch_build_from_bill_of_materials(self):
+        cpu, ram, screws = self._item("Batch CPU"), self._item("Batch RAM"), self._item("Batch Screws", is_serialized=False)
+        desktop = self._item("Batch Desktop", is_serialized=False)
+        self._purchase(cpu, 3, 100, serial_numbers=["BCPU-1", "BCPU-2", "BCPU-3"])
+        self._purchase(ram, 6, 30, serial_numbers=[f"BRAM-{n}" for n in range(1, 7)])
+        self._purchase(screws, 20, 0.5)
+        self.assertTrue(db_manager.set_bill_of_materials(desktop, [(cpu, 1), (ram, 2), (screws, 4)]))
+        self.assertEqual([(c['component_name'], c['quantity']) for c in db_manager.get_bill_of_materials(desktop)],
+                         [("Batch CPU", 1), ("Batch RAM", 2), ("Batch Screws", 4)])
+
+        # Asking for more than is in stock touches nothing.
+        self.assertIsNone(db_manager.build_assemblies(desktop, 4, "2024-04-03"))
+        self.assertEqual(self._query("SELECT COUNT(*) FROM item_serial_numbers WHERE item_id IN (?, ?) AND status = 'IN_STOCK'", (cpu, ram)), [(9,)])
+
+        serial_numbers = db_manager.build_assemblies(desktop, 3, "2024-04-03")
+        self.assertEqual(len(serial_numbers), 3)
+        units = self._query("""
+            SELECT a.total_cost, COUNT(DISTINCT ac.used_serial_number_id) FROM assemblies a JOIN assembly_components ac ON ac.assembly_id = a.id
+            WHERE a.assembled_item_id = ? GROUP BY a.id
+        """, (desktop,))
+        self.assertEqual(units, [(100 * 100 + 2 * 3000 + 4 * 50, 3)] * 3)
+        self.assertEqual(self._query("SELECT COUNT(DISTINCT used_serial_number_id) FROM assembly_components ac JOIN assemblies a ON ac.assembly_id = a.id WHERE a.assembled_item_id = ?", (desktop,)), [(9,)])
+        self.assertEqual([b['quantity'] for b in db_manager.get_stock_balances(screws)], [8])
+        self.assertEqual([(b['quantity'], b['value']) for b in db_manager.get_stock_balances(desktop)], [(3, 3 * 162)])
+
+    def test_fractional_serialized_component_is_rejected(self):
+        part, kit = self._item("Whole Part"), self._item("Part Kit")
+        self.assertFalse(db_manager.set_bill_of_materials(kit, [(part, 1.5)]))
+
+    def test_recost_carries_component_cost_into_the_assembled_unit(self):
+        gpu = self._item("Recost GPU")
+        self._purchase(gpu, 1, 100, "2024-05-05", ["RG-1"])
+        serial_number = db_manager.create_assembly_transaction("Gaming PC", self._serial_ids("RG-1"), "2024-05-06")
+        gaming_pc = db_manager.find_reference_row("items", "Gaming PC")['id']
+        sale_id = db_manager.create_sale_invoice_transaction(
+            {"customer_id": self.customer_id, "invoice_date": "2024-05-07", "total_amount": 0, "taxable_amount": 0,
+             "total_gst_amount": 0, "igst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "notes": ""},
+            [{"item_id": gaming_pc, "quantity": 1, "selling_price": 0, "serial_ids": self._serial_ids(serial_number)}])
+        # A cheaper unit bought earlier is now the one FIFO says went into the build.
+        self._purchase(gpu, 1, 80, "2024-05-01", ["RG-0"])
+
+        self.assertEqual(db_manager.recost_from_date("2024-05-01", [gpu]), 5)
+        self.assertEqual(self._query("SELECT total_cost FROM assemblies WHERE assembled_item_id = ?", (gaming_pc,)), [(8000,)])
+        self.assertEqual(self._query("""
+            SELECT ge.debit FROM gl_entries ge JOIN gl_transactions gt ON ge.transaction_id = gt.id
+            WHERE gt.source_doc_type = 'SALE_COGS' AND gt.source_doc_id = ? AND ge.debit IS NOT NULL
+        """, (sale_id,)), [(8000,)])
+        self.assertEqual([b['value'] for b in db_manager.get_stock_balances(gpu)], [100])
+
+    def test_traceability_follows_nested_builds(self):
+        drive = self._item("Trace Drive")
+        self._purchase(drive, 1, 60, "2024-06-01", ["TD-1"])
+        module = db_manager.create_assembly_transaction("Storage Module", self._serial_ids("TD-1"), "2024-06-02")
+        server = db_manager.create_assembly_transaction("Rack Server", self._serial_ids(module), "2024-06-03")
+        sale_id = db_manager.create_sale_invoice_transaction(
+            {"customer_id": self.customer_id, "invoice_date": "2024-06-04", "total_amount": 0, "taxable_amount": 0,
+             "total_gst_amount": 0, "igst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "notes": ""},
+            [{"item_id": db_manager.find_reference_row("items", "Rack Server")['id'], "quantity": 1, "selling_price": 0,
+              "serial_ids": self._serial_ids(server)}])
+        job = {"customer_id": self.customer_id, "received_date": "2024-07-01", "product_name": "Rack Server", "product_serial": server,
+               "reported_problem": "No boot", "estimated_cost": 0, "estimated_timeline": "", "assigned_to": ""}
+        db_manager.add_job_sheet(job, [])
+        db_manager.add_job_sheet(dict(job, product_serial="NOT-OURS"), [])
+
+        lineage, service_history = db_manager.get_serial_traceability("TD-1")
+        self.assertEqual([(row['depth'], row['serial_number']) for row in lineage], [(2, server), (1, module), (0, "TD-1")])
+        self.assertEqual((lineage[2]['supplier_name'], lineage[2]['status']), ("Parts Supplier", "CONSUMED"))
+        self.assertEqual((lineage[0]['customer_name'], lineage[0]['status']), ("Build Customer", "SOLD"))
+        self.assertEqual([(job['serial_number'], job['reported_problem']) for job in service_history], [(server, "No boot")])
+
+        lineage, _ = db_manager.get_serial_traceability(server)
+        self.assertEqual([(row['depth'], row['serial_number']) for row in lineage], [(0, server), (-1, module), (-2, "TD-1")])
+        self.assertEqual(lineage[0]['sales_invoice_number'], self._query("SELECT invoice_number FROM sales_invoices WHERE id = ?", (sale_id,))[0][0])
+        self.assertEqual(db_manager.get_serial_traceability("NOT-OURS"), ([], []))
+
+class TestJobSheetSerialMigration(unittest.TestCase):
+
+    def setUp(self):
+        self.db_path = 'db/test_job_sheet_serials.db'
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+    def tearDown(self):
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+    def test_existing_job_sheets_are_linked(self):
+        conn = sqlite3.connect(self.db_path)
+        for version, step in database_setup.MIGRATIONS:
+            if version <= 12:
+                step(conn)
+        conn.execute("PRAGMA user_version = 12")
+        conn.execute("INSERT INTO item_serial_numbers (id, item_id, serial_number, status, godown_id) VALUES (7, 1, 'OLD-7', 'SOLD', 1)")
+        conn.execute("""INSERT INTO job_sheets (customer_id, received_date, product_serial, status) VALUES
+                        (1, '2024-01-01', 'OLD-7', 'Received'), (1, '2024-01-02', 'ELSEWHERE', 'Received')""")
+        conn.commit()
+        conn.close()
+
+        setup_database(db_path=self.db_path)
+
+        conn = sqlite3.connect(self.db_path)
+        links = conn.execute("SELECT product_serial, serial_number_id FROM job_sheets ORDER BY id").fetchall()
+        conn.close()
+        self.assertEqual(links, [('OLD-7', 7), ('ELSEWHERE', None)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import sqlite3
+import threading
+from . import db_manager
+from db.database_setup import setup_database
+
+class TestConnections(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up a clean database for connection manager tests."""
+        cls.db_path = 'db/test_connections.db'
+        db_manager.DATABASE_PATH = cls.db_path
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+        setup_database(db_path=cls.db_path)
+        db_manager.initialize_chart_of_accounts()
+
+    def setUp(self):
+        self.manager = db_manager._connections
+
+    def test_main_thread_reuses_one_connection(self):
+        db_manager.get_setting("company_state")
+        connects_before = self.manager.connects
+        for _ in range(50):
+            db_manager.get_setting("company_state")
+            db_manager.get_next_invoice_number()
+        self.assertEqual(self.manager.connects, connects_before)
+
+    def test_pragmas_applied(self):
+        conn = db_manager.get_db_connection()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+        conn.close()
+
+    def test_nested_calls_share_transaction(self):
+        conn = db_manager.get_db_connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('nested_key', 'inner')")
+            # get_setting runs on the same connection, so it sees the uncommitted write
+            self.assertEqual(db_manager.get_setting("nested_key"), "inner")
+            self.assertTrue(conn.in_transaction)
+        conn.close()
+
+    def test_close_rolls_back_abandoned_writes(self):
+        conn = db_manager.get_db_connection()
+        conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('abandoned', 'x')")
+        conn.close()
+        self.assertIsNone(db_manager.get_setting("abandoned"))
+
+    def test_worker_threads_bounded_by_pool(self):
+        db_manager.close_all_connections()
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(20):
+                    db_manager.get_all_settings()
+            except sqlite3.Error as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(12)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(self.manager._open), self.manager.pool_size)
+
+    def test_backup_includes_wal_pages(self):
+        db_manager.set_setting("backup_marker", "present")
+        backup_path = 'db/test_connections_backup.db'
+        if os.path.exists(backup_path):
+            os.remove(backup_path)
+        self.assertTrue(db_manager.backup_database(backup_path))
+        conn = sqlite3.connect(backup_path)
+        row = conn.execute("SELECT value FROM settings WHERE key = 'backup_marker'").fetchone()
+        conn.close()
+        os.remove(backup_path)
+        self.assertEqual(row[0], "present")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import unittest
+import os
+import sqlite3
+from . import db_manager
+from db import database_setup
+from db.database_setup import setup_database
+
+class TestCosting(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up a clean database with two godowns, a supplier and a customer."""
+        cls.db_path = 'db/test_costing.db'
+        db_manager.DATABASE_PATH = cls.db_path
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+        setup_database(db_path=cls.db_path)
+        db_manager.add_godown("Main", "Front")
+        db_manager.add_godown("Branch", "Market Road")
+        db_manager.add_supplier("Cost Supplier", "", "", "", "", "State")
+        db_manager.add_customer("Cost Customer", "", "", "", "", "State", "", "", 0)
+        cls.supplier_id = db_manager.find_reference_row("suppliers", "Cost Supplier")['id']
+        cls.customer_id = db_manager.find_reference_row("customers", "Cost Customer")['id']
+        godowns = {g['name']: g['id'] for g in db_manager.get_all_godowns()}
+        cls.main, cls.branch = godowns["Main"], godowns["Branch"]
+        cls.purchases = 0
+
+    def setUp(self):
+        db_manager.DATABASE_PATH = self.db_path
+        db_manager.set_setting(db_manager.COSTING_METHOD_SETTING, db_manager.COSTING_FIFO)
+
+    def tearDown(self):
+        self.assertEqual(db_manager.check_stock_balances(), [])
+        self.assertEqual(db_manager.check_account_daily_balances(), [])
+
+    def _item(self, name, purchase_price=50):
+        db_manager.add_item(name, purchase_price, purchase_price * 2, 0, 0, "Misc", None, None, None)
+        return db_manager.find_reference_row("items", name)['id']
+
+    def _purchase(self, item_id, quantity, price, date, godown_id=None):
+        TestCosting.purchases += 1
+        amount = quantity * price
+        invoice = {"supplier_id": self.supplier_id, "invoice_number": f"PC-{self.purchases}", "invoice_date": date, "total_amount": amount,
+                   "taxable_amount": amount, "total_gst_amount": 0, "igst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "notes": ""}
+        db_manager.create_purchase_invoice_transaction(
+            invoice, [{"item_id": item_id, "quantity": quantity, "purchase_price": price, "taxable_value": amount, "godown_id": godown_id or self.main}])
+
+    def _sale(self, item_id, quantity, date, godown_id=None):
+        invoice = {"customer_id": self.customer_id, "invoice_date": date, "total_amount": 0,
+                   "taxable_amount": 0, "total_gst_amount": 0, "igst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "notes": ""}
+        return db_manager.create_sale_invoice_transaction(
+            invoice, [{"item_id": item_id, "quantity": quantity, "selling_price": 0, "godown_id": godown_id or self.main}])
+
+    def _cogs(self, sale_id):
+        conn = db_manager.get_db_connection()
+        cogs = conn.execute("""
+            SELECT ge.debit / 100.0 FROM gl_entries ge JOIN gl_transactions gt ON ge.transaction_id = gt.id
+            JOIN accounts a ON ge.account_id = a.id
+            WHERE gt.source_doc_type = 'SALE_COGS' AND gt.source_doc_id = ? AND a.name = 'Cost of Goods Sold'
+        """, (sale_id,)).fetchone()[0]
+        conn.close()
+        return cogs
+
+    def _value(self, item_id, godown_id=None):
+        return {row['godown_id']: row['value'] for row in db_manager.get_stock_balances(item_id)}[godown_id or self.main]
+
+    def test_fifo_sells_the_oldest_layers_first(self):
+        item_id = self._item("FIFO Widget")
+        self._purchase(item_id, 10, 100, "2024-04-01")
+        self._purchase(item_id, 10, 120, "2024-04-02")
+        sale_id = self._sale(item_id, 15, "2024-04-05")
+        self.assertEqual(self._cogs(sale_id), 10 * 100 + 5 * 120)
+        self.assertEqual(self._value(item_id), 5 * 120)
+
+    def test_moving_average_blends_receipts(self):
+        db_manager.set_setting(db_manager.COSTING_METHOD_SETTING, db_manager.COSTING_AVERAGE)
+        item_id = self._item("Average Widget")
+        self._purchase(item_id, 10, 100, "2024-04-01")
+        self._purchase(item_id, 10, 120, "2024-04-02")
+        self.assertEqual(self._cogs(self._sale(item_id, 5, "2024-04-05")), 5 * 110)
+        # Selling out takes exactly what is left, so no paisa is stranded by rounding.
+        self.assertEqual(self._cogs(self._sale(item_id, 15, "2024-04-06")), 15 * 110)
+        self.assertEqual(self._value(item_id), 0)
+
+    def test_shortfall_is_costed_at_purchase_price(self):
+        item_id = self._item("Short Widget", purchase_price=40)
+        self._purchase(item_id, 2, 30, "2024-04-01")
+        self.assertEqual(self._cogs(self._sale(item_id, 3, "2024-04-02")), 2 * 30 + 40)
+        # The next receipt first covers the unit sold short.
+        self._purchase(item_id, 4, 35, "2024-04-03")
+        self.assertEqual(self._cogs(self._sale(item_id, 3, "2024-04-04")), 3 * 35)
+
+    def test_transfer_carries_cost_to_the_other_godown(self):
+        item_id = self._item("Moved Widget")
+        self._purchase(item_id, 2, 90, "2024-04-01")
+        self._purchase(item_id, 2, 110, "2024-04-02")
+        self.assertTrue(db_manager.transfer_stock(item_id, self.main, self.branch, 3, "2024-04-03"))
+        # The transfer arrives as one layer at the cost it left with.
+        self.assertEqual(self._value(item_id, self.branch), 2 * 90 + 110)
+        self.assertEqual(self._value(item_id), 110)
+        self.assertEqual(self._cogs(self._sale(item_id, 3, "2024-04-04", self.branch)), 2 * 90 + 110)
+
+    def test_recost_after_a_back_dated_purchase(self):
+        item_id = self._item("Late Widget")
+        self._purchase(item_id, 5, 100, "2024-05-05")
+        sale_id = self._sale(item_id, 5, "2024-05-10")
+        self.assertEqual(self._cogs(sale_id), 500)
+        self._purchase(item_id, 5, 80, "2024-05-01")
+
+        replayed = db_manager.recost_from_date("2024-05-01", [item_id])
+        self.assertEqual(replayed, 3)
+        self.assertEqual(self._cogs(sale_id), 400)
+        self.assertEqual(self._value(item_id), 500)
+        pnl = {r['name']: r['total_debits'] for r in db_manager.get_profit_and_loss_data("2024-05-01", "2024-05-31")}
+        self.assertEqual(pnl['Cost of Goods Sold'], 400)
+
+    def test_recost_replays_only_later_movements(self):
+        item_id = self._item("Switched Widget")
+        self._purchase(item_id, 10, 100, "2024-06-01")
+        early_sale = self._sale(item_id, 2, "2024-06-02")
+        self._purchase(item_id, 10, 130, "2024-06-10")
+        late_sale = self._sale(item_id, 10, "2024-06-12")
+        self.assertEqual(self._cogs(late_sale), 8 * 100 + 2 * 130)
+
+        db_manager.set_setting(db_manager.COSTING_METHOD_SETTING, db_manager.COSTING_AVERAGE)
+        self.assertEqual(db_manager.recost_from_date("2024-06-10", [item_id]), 2)
+        # 8 left at 100 meet 10 at 130: 2100 over 18 units.
+        self.assertEqual(self._cogs(early_sale), 200)
+        self.assertEqual(self._cogs(late_sale), 1166.67)
+
+        db_manager.set_setting(db_manager.COSTING_METHOD_SETTING, db_manager.COSTING_FIFO)
+        db_manager.recost_from_date("2024-06-10", [item_id])
+        self.assertEqual(self._cogs(late_sale), 8 * 100 + 2 * 130)
+        self.assertEqual(self._value(item_id), 8 * 130)
+
+    def test_recost_refuses_a_closed_period(self):
+        item_id = self._item("Closed Widget")
+        self._purchase(item_id, 1, 10, "2023-01-10")
+        db_manager.close_period("2023-01-31")
+        try:
+            self.assertIsNone(db_manager.recost_from_date("2023-01-01", [item_id]))
+        finally:
+            db_manager.reopen_latest_period()
+
+class TestCostLayerMigration(unittest.TestCase):
+
+    def setUp(self):
+        self.db_path = 'db/test_costing_migration.db'
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+    def tearDown(self):
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+    def test_stock_on_hand_keeps_the_newest_layers(self):
+        conn = sqlite3.connect(self.db_path)
+        for version, step in database_setup.MIGRATIONS:
+            if version <= 10:
+                step(conn)
+        conn.execute("PRAGMA user_version = 10")
+        conn.execute("INSERT INTO godowns (id, name) VALUES (1, 'Main')")
+        conn.execute("INSERT INTO items (id, name, purchase_price) VALUES (1, 'Old Stock', 9000)")
+        conn.execute("""INSERT INTO stock_movements (item_id, godown_id, date, quantity, source_doc_type, source_doc_id) VALUES
+                        (1, 1, '2024-01-01', 4, 'PURCHASE', 1), (1, 1, '2024-01-05', 4, 'PURCHASE', 2), (1, 1, '2024-01-09', -5, 'SALE', 1)""")
+        conn.execute("INSERT INTO stock_balances (item_id, godown_id, quantity) VALUES (1, 1, 3)")
+        conn.execute("""INSERT INTO purchase_invoice_items (purchase_invoice_id, item_id, quantity, purchase_price, taxable_value) VALUES
+                        (1, 1, 4, 8000, 32000), (2, 1, 4, 10000, 40000)""")
+        conn.commit()
+        conn.close()
+
+        setup_database(db_path=self.db_path)
+
+        conn = sqlite3.connect(self.db_path)
+        layers = conn.execute("SELECT quantity, remaining, remaining_value FROM cost_layers ORDER BY date").fetchall()
+        balance = conn.execute("SELECT quantity, value FROM stock_balances").fetchone()
+        conn.close()
+        self.assertEqual(layers, [(4, 0, 0), (4, 3, 30000)])
+        # The past sale stays at the purchase price its COGS was booked at.
+        self.assertEqual(balance, (3, 32000 + 40000 - 5 * 9000))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+from . import db_manager
+from db.database_setup import setup_database
+
+class TestDailyBalances(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up a clean database for rollup tests."""
+        cls.db_path = 'db/test_daily_balances.db'
+        db_manager.DATABASE_PATH = cls.db_path
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+        setup_database(db_path=cls.db_path)
+
+    def setUp(self):
+        conn = db_manager.get_db_connection()
+        with conn:
+            for table in ("account_daily_balances", "gl_entries", "gl_transactions"):
+                conn.execute(f"DELETE FROM {table}")
+        conn.close()
+        accounts = {a['name']: a['id'] for a in db_manager.get_all_accounts()}
+        self.cash = accounts['Cash']
+        self.sales = accounts['Sales Revenue']
+        self.capital = accounts["Owner's Equity"]
+
+    def _post(self, date, entries):
+        conn = db_manager.get_db_connection()
+        with conn:
+            db_manager.create_gl_transaction(conn, "Test", date, entries)
+        conn.close()
+
+    def _rollup(self):
+        conn = db_manager.get_db_connection()
+        rows = conn.execute("SELECT account_id, date, debit / 100.0, credit / 100.0 FROM account_daily_balances ORDER BY account_id, date").fetchall()
+        conn.close()
+        return [tuple(r) for r in rows]
+
+    def test_postings_on_same_day_accumulate(self):
+        self._post("2024-04-01", [(self.cash, 100, 0), (self.sales, 0, 100)])
+        self._post("2024-04-01", [(self.cash, 50, 0), (self.sales, 0, 50)])
+        self._post("2024-04-02", [(self.cash, 25, 0), (self.cash, 0, 5), (self.sales, 0, 20)])
+        self.assertIn((self.cash, "2024-04-01", 150, 0), self._rollup())
+        self.assertIn((self.cash, "2024-04-02", 25, 5), self._rollup())
+        self.assertEqual(db_manager.check_account_daily_balances(), [])
+
+    def test_reports_read_rollup(self):
+        self._post("2024-04-01", [(self.cash, 1000, 0), (self.capital, 0, 1000)])
+        self._post("2024-04-10", [(self.cash, 300, 0), (self.sales, 0, 300)])
+        self._post("2024-05-10", [(self.cash, 200, 0), (self.sales, 0, 200)])
+
+        pnl = {r['name']: r['total_credits'] for r in db_manager.get_profit_and_loss_data("2024-04-01", "2024-04-30")}
+        self.assertEqual(pnl['Sales Revenue'], 300)
+        balances = {r['name']: r['total_debits'] - r['total_credits'] for r in db_manager.get_balance_sheet_data("2024-04-30")}
+        self.assertEqual(balances['Cash'], 1300)
+
+    def test_failed_posting_leaves_rollup_untouched(self):
+        conn = db_manager.get_db_connection()
+        with self.assertRaises(ValueError):
+            with conn:
+                db_manager.create_gl_transaction(conn, "Good", "2024-04-01", [(self.cash, 10, 0), (self.sales, 0, 10)])
+                db_manager.create_gl_transaction(conn, "Unbalanced", "2024-04-01", [(self.cash, 10, 0)])
+        conn.close()
+        self.assertEqual(self._rollup(), [])
+
+    def test_checker_reports_drift_and_rebuild_fixes_it(self):
+        self._post("2024-04-01", [(self.cash, 100, 0), (self.sales, 0, 100)])
+        conn = db_manager.get_db_connection()
+        with conn:
+            conn.execute("UPDATE account_daily_balances SET debit = 9000 WHERE account_id = ?", (self.cash,))
+            conn.execute("INSERT INTO account_daily_balances (account_id, date, debit, credit) VALUES (?, '2024-04-03', 700, 0)", (self.cash,))
+        conn.close()
+
+        mismatches = db_manager.check_account_daily_balances()
+        self.assertEqual([(m['date'], m['journal_debit'], m['rollup_debit']) for m in mismatches],
+                         [("2024-04-01", 100, 90), ("2024-04-03", 0, 7)])
+
+        self.assertEqual(db_manager.rebuild_account_daily_balances(), 2)
+        self.assertEqual(db_manager.check_account_daily_balances(), [])
+
+if __name__ == '__main__':
+    unittest.main()
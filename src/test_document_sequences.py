@@ -0,0 +1,92 @@
+import unittest
+import os
+import threading
+from . import db_manager
+from db.database_setup import setup_database
+
+class TestDocumentSequences(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up a clean database for document numbering tests."""
+        cls.db_path = 'db/test_document_sequences.db'
+        db_manager.DATABASE_PATH = cls.db_path
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+        setup_database(db_path=cls.db_path)
+
+    def setUp(self):
+        conn = db_manager.get_db_connection()
+        with conn:
+            for table in ("document_sequences", "account_daily_balances", "gl_entries", "gl_transactions",
+                          "customer_payments", "sales_invoices", "quotation_items", "quotations",
+                          "job_sheet_accessories", "job_sheets", "customers"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.execute("DELETE FROM settings WHERE key LIKE 'prefix_%' OR key = 'financial_year_start'")
+        conn.close()
+        self.customer_id = db_manager.add_customer("Numbered", "", "", "", "", "State", "", "", 0.0)
+
+    def _sale(self, date="2024-04-10", number=None):
+        invoice = {"customer_id": self.customer_id, "invoice_number": number, "invoice_date": date, "total_amount": 10,
+                   "taxable_amount": 10, "total_gst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "igst_amount": 0, "notes": ""}
+        sale_id = db_manager.create_sale_invoice_transaction(invoice, [])
+        return db_manager.get_sales_invoice_details(sale_id)[0]['invoice_number']
+
+    def test_sales_are_numbered_in_the_posting_transaction(self):
+        self.assertEqual(db_manager.get_next_invoice_number(), "INV-0001")
+        self.assertEqual([self._sale(), self._sale()], ["INV-0001", "INV-0002"])
+        self.assertEqual(db_manager.get_next_invoice_number(), "INV-0003")
+
+    def test_counter_seeds_from_and_skips_explicit_numbers(self):
+        conn = db_manager.get_db_connection()
+        with conn:
+            conn.execute("INSERT INTO sales_invoices (customer_id, invoice_number, invoice_date, total_amount) VALUES (?, 'INV-0041', '2024-01-01', 1)", (self.customer_id,))
+        conn.close()
+        self.assertEqual(self._sale(), "INV-0042")
+        self.assertEqual(self._sale(number="INV-0100"), "INV-0100")
+        self.assertEqual(self._sale(), "INV-0101")
+
+    def test_fiscal_year_prefix_restarts_numbering(self):
+        db_manager.set_setting("prefix_sales_invoice", "INV/{fy}/")
+        self.assertEqual(self._sale("2024-03-31"), "INV/2023-24/0001")
+        self.assertEqual(self._sale("2024-04-01"), "INV/2024-25/0001")
+        self.assertEqual(self._sale("2024-03-15"), "INV/2023-24/0002")
+        db_manager.set_setting("financial_year_start", "2024-01-01")
+        self.assertEqual(db_manager.get_next_document_number('SALES_INVOICE', "2025-02-01"), "INV/2025-26/0001")
+
+    def test_block_reservation(self):
+        self.assertEqual(db_manager.reserve_document_numbers('SALES_INVOICE', 3), ["INV-0001", "INV-0002", "INV-0003"])
+        self.assertEqual(self._sale(), "INV-0004")
+        self.assertEqual(self._sale(number="INV-0002"), "INV-0002")
+        self.assertEqual(self._sale(), "INV-0005")
+
+    def test_concurrent_allocation_never_repeats(self):
+        claimed = []
+        lock = threading.Lock()
+
+        def terminal():
+            for _ in range(25):
+                numbers = db_manager.reserve_document_numbers('SALES_INVOICE', 2)
+                with lock:
+                    claimed.extend(numbers)
+
+        threads = [threading.Thread(target=terminal) for _ in range(6)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(len(claimed), 300)
+        self.assertEqual(len(set(claimed)), 300)
+
+    def test_other_documents_use_sequences(self):
+        quote_id = db_manager.create_quotation({"customer_id": self.customer_id, "quote_date": "2024-04-10", "expiry_date": "2024-05-10", "total_amount": 0}, [])
+        job_id = db_manager.add_job_sheet({"customer_id": self.customer_id, "received_date": "2024-04-10", "product_name": "Laptop", "product_serial": "",
+                                           "reported_problem": "", "estimated_cost": 0, "estimated_timeline": "", "assigned_to": ""}, [])
+        db_manager.record_customer_payment(self.customer_id, "2024-04-10", 5, [])
+        db_manager.record_customer_payment(self.customer_id, "2024-04-11", 5, [])
+
+        self.assertEqual(db_manager.get_quotation_details(quote_id)[0]['quote_number'], "QTN-0001")
+        self.assertEqual(db_manager.get_job_sheet_details(job_id)[0]['job_number'], "JOB-0001")
+        _, statement = db_manager.get_account_statement_data(self.customer_id, 'Customer', "2024-04-01", "2024-04-30")
+        self.assertEqual([row['document_number'] for row in statement], ["RCPT-0001", "RCPT-0002"])
+
+if __name__ == '__main__':
+    unittest.main()
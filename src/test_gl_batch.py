@@ -0,0 +1,74 @@
+import unittest
+import os
+from . import db_manager
+from db.database_setup import setup_database
+
+class TestGLBatch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up a clean database for batch posting tests."""
+        cls.db_path = 'db/test_gl_batch.db'
+        db_manager.DATABASE_PATH = cls.db_path
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+        setup_database(db_path=cls.db_path)
+
+    def setUp(self):
+        conn = db_manager.get_db_connection()
+        with conn:
+            for table in ("account_closing_balances", "party_closing_balances", "period_closes",
+                          "account_daily_balances", "gl_entries", "gl_transactions"):
+                conn.execute(f"DELETE FROM {table}")
+        conn.close()
+        accounts = {a['name']: a['id'] for a in db_manager.get_all_accounts()}
+        self.cash = accounts['Cash']
+        self.sales = accounts['Sales Revenue']
+        self.gst = accounts['GST Payable']
+
+    def _voucher(self, n, date="2024-04-01"):
+        return {"description": f"Voucher {n}", "date": date, "source_doc_type": "IMPORT", "source_doc_id": n,
+                "entries": [(self.cash, 118, None), (self.sales, None, 100), (self.gst, None, 18)]}
+
+    def _count(self, table):
+        conn = db_manager.get_db_connection()
+        count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        conn.close()
+        return count
+
+    def test_batch_returns_ids_in_order(self):
+        ids = db_manager.post_gl_batch([self._voucher(n) for n in range(1, 501)])
+        self.assertEqual(len(ids), 500)
+        conn = db_manager.get_db_connection()
+        rows = conn.execute("SELECT id, source_doc_id FROM gl_transactions ORDER BY id").fetchall()
+        lines = conn.execute("SELECT transaction_id, COUNT(*) FROM gl_entries GROUP BY transaction_id").fetchall()
+        conn.close()
+        self.assertEqual([(r['id'], r['source_doc_id']) for r in rows], list(zip(ids, range(1, 501))))
+        self.assertEqual({r[1] for r in lines}, {3})
+        self.assertEqual(db_manager.check_account_daily_balances(), [])
+
+    def test_unbalanced_voucher_rejects_whole_batch(self):
+        batch = [self._voucher(n) for n in range(1, 11)]
+        batch[7]["entries"] = [(self.cash, 100, None), (self.sales, None, 90)]
+        with self.assertRaises(ValueError):
+            db_manager.post_gl_batch(batch)
+        self.assertEqual(self._count("gl_transactions"), 0)
+        self.assertEqual(self._count("account_daily_balances"), 0)
+
+    def test_batch_into_closed_period_is_rejected(self):
+        db_manager.close_period("2024-03-31")
+        with self.assertRaises(ValueError):
+            db_manager.post_gl_batch([self._voucher(1, "2024-04-02"), self._voucher(2, "2024-03-31")])
+        self.assertEqual(self._count("gl_entries"), 0)
+
+    def test_batch_joins_callers_transaction(self):
+        conn = db_manager.get_db_connection()
+        with self.assertRaises(RuntimeError):
+            with conn:
+                db_manager.post_gl_batch([self._voucher(1)], conn_override=conn)
+                raise RuntimeError("caller failed after posting")
+        conn.close()
+        self.assertEqual(self._count("gl_transactions"), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import compileall
+import os
+import re
+import subprocess
+import sys
+import importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start budget for the database layer, taken as the best of a few runs.
+# It imports in roughly 15 ms today; the margin absorbs slow machines, not new dependencies.
+DB_MANAGER_BUDGET_MS = 40
+RUNS = 3
+
+# Nothing on the startup path may pull these in; they load when first used.
+DEFERRED_MODULES = ("reportlab", "dateutil", "pdf_generator", "csv_generator", "csv_validator")
+# The database layer also leaves these to the posting service, task pool and restore.
+DB_LAYER_DEFERRED_MODULES = DEFERRED_MODULES + ("concurrent", "shutil")
+
+def import_times(statement):
+    """Runs statement in a fresh interpreter under -X importtime; returns {module: cumulative ms}."""
+    code = f"import sys; sys.path[:0] = ['src', '.']; {statement}"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise AssertionError(result.stderr)
+    times = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)", line)
+        if match:
+            times[match.group(3)] = int(match.group(1)) / 1000
+    return times
+
+class TestImportTime(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Measure a normal start, with bytecode already on disk rather than compiled on the fly.
+        compileall.compile_dir(os.path.join(ROOT, "src"), maxlevels=0, quiet=1)
+        compileall.compile_dir(os.path.join(ROOT, "db"), maxlevels=0, quiet=1)
+
+    def assert_nothing_deferred(self, times, deferred=DEFERRED_MODULES):
+        loaded = [name for name in times if name.split(".")[0] in deferred]
+        self.assertEqual(loaded, [], "Import these where they are used, not at module level")
+
+    def test_db_manager_cold_import(self):
+        runs = [import_times("import db_manager, task_runner") for _ in range(RUNS)]
+        self.assert_nothing_deferred(runs[0], DB_LAYER_DEFERRED_MODULES)
+        best = min(run["db_manager"] for run in runs)
+        self.assertLess(best, DB_MANAGER_BUDGET_MS, f"db_manager took {best:.1f} ms to import")
+
+    @unittest.skipUnless(importlib.util.find_spec("customtkinter"), "customtkinter is not installed")
+    def test_startup_imports_no_screens(self):
+        times = import_times("import main")
+        self.assert_nothing_deferred(times)
+        self.assertEqual([name for name in times if name.startswith("ui_")], [], "Screens are imported when first shown")
+
+    @unittest.skipUnless(importlib.util.find_spec("customtkinter"), "customtkinter is not installed")
+    def test_screens_defer_pdf_and_csv(self):
+        screens = [name[:-3] for name in os.listdir(os.path.join(ROOT, "src")) if name.startswith("ui_") and name.endswith(".py")]
+        self.assert_nothing_deferred(import_times("import " + ", ".join(screens)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import os
+import sqlite3
+from db import database_setup
+from db.database_setup import setup_database
+
+class TestMigrations(unittest.TestCase):
+
+    def setUp(self):
+        """Start every test from a missing database file."""
+        self.db_path = 'db/test_migrations.db'
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+    def tearDown(self):
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+    def test_fresh_database_reaches_current_version(self):
+        setup_database(db_path=self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(database_setup.get_schema_version(conn), database_setup.SCHEMA_VERSION)
+        accounts = conn.execute("SELECT COUNT(*) FROM accounts WHERE is_predefined").fetchone()[0]
+        conn.close()
+        self.assertEqual(accounts, len(database_setup.DEFAULT_ACCOUNTS))
+
+    def test_current_schema_is_a_single_version_read(self):
+        setup_database(db_path=self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        statements = []
+        conn.set_trace_callback(statements.append)
+        database_setup.migrate(conn)
+        conn.close()
+        self.assertEqual(statements, ["PRAGMA user_version"])
+
+    def test_rerun_keeps_existing_data(self):
+        setup_database(db_path=self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("INSERT INTO customers (name) VALUES ('Kept Customer')")
+        conn.execute("INSERT INTO sales_invoices (customer_id, invoice_number, invoice_date, total_amount) VALUES (1, 'INV-0001', '2024-01-01', 100)")
+        conn.commit()
+        conn.close()
+
+        setup_database(db_path=self.db_path)
+
+        conn = sqlite3.connect(self.db_path)
+        count = conn.execute("SELECT COUNT(*) FROM sales_invoices").fetchone()[0]
+        conn.close()
+        self.assertEqual(count, 1)
+
+    def test_unversioned_database_is_upgraded(self):
+        # A database from before versioning: user_version 0 and missing later columns.
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, purchase_price REAL)")
+        conn.execute("CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, state TEXT)")
+        conn.execute("INSERT INTO items (name, purchase_price) VALUES ('Old Item', 10)")
+        conn.commit()
+        conn.close()
+
+        setup_database(db_path=self.db_path)
+
+        conn = sqlite3.connect(self.db_path)
+        item_columns = {row[1] for row in conn.execute("PRAGMA table_info(items)")}
+        customer_columns = {row[1] for row in conn.execute("PRAGMA table_info(customers)")}
+        item_name = conn.execute("SELECT name FROM items").fetchone()[0]
+        conn.close()
+        self.assertTrue({'category', 'unit_id', 'hsn_code_id'} <= item_columns)
+        self.assertTrue({'billing_address', 'shipping_address', 'credit_limit'} <= customer_columns)
+        self.assertEqual(item_name, 'Old Item')
+
+    def test_failed_step_rolls_back(self):
+        def broken_step(conn):
+            conn.execute("CREATE TABLE half_done (id INTEGER)")
+            raise sqlite3.OperationalError("boom")
+
+        original = database_setup.MIGRATIONS
+        database_setup.MIGRATIONS = original + [(database_setup.SCHEMA_VERSION + 1, broken_step)]
+        database_setup.SCHEMA_VERSION += 1
+        try:
+            with self.assertRaises(sqlite3.OperationalError):
+                setup_database(db_path=self.db_path)
+        finally:
+            database_setup.MIGRATIONS = original
+            database_setup.SCHEMA_VERSION = original[-1][0]
+
+        conn = sqlite3.connect(self.db_path)
+        version = database_setup.get_schema_version(conn)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        conn.close()
+        self.assertEqual(version, 0)
+        self.assertNotIn('half_done', tables)
+
+if __name__ == '__main__':
+    unittest.main()
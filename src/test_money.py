@@ -0,0 +1,106 @@
+import unittest
+import os
+import sqlite3
+from . import db_manager
+from db import database_setup
+from db.database_setup import setup_database
+
+class TestMoney(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up a clean database with one customer and the default accounts."""
+        cls.db_path = 'db/test_money.db'
+        db_manager.DATABASE_PATH = cls.db_path
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+        setup_database(db_path=cls.db_path)
+        db_manager.add_customer("Paisa Traders", "", "", "", "", "State", "", "", 1234.56)
+
+    def setUp(self):
+        db_manager.DATABASE_PATH = self.db_path
+
+    def test_to_paise_rounds_half_up_as_written(self):
+        self.assertEqual(db_manager.to_paise(1.005), 101)
+        self.assertEqual(db_manager.to_paise("19.99"), 1999)
+        self.assertEqual(db_manager.to_paise(-2.345), -235)
+        self.assertEqual(db_manager.to_paise(7), 700)
+        self.assertIsNone(db_manager.to_paise(None))
+        self.assertEqual(db_manager.to_rupees(1999), 19.99)
+
+    def test_gst_halves_add_up_to_the_total(self):
+        taxes = db_manager.calculate_gst(999.99, 18)
+        self.assertEqual(taxes['cgst_amount'], taxes['sgst_amount'])
+        self.assertEqual(db_manager.to_paise(taxes['cgst_amount']) + db_manager.to_paise(taxes['sgst_amount']),
+                         db_manager.to_paise(taxes['total_gst_amount']))
+        self.assertEqual(taxes['cgst_amount'], 90.0)
+        self.assertEqual(db_manager.calculate_gst(999.99, 18, interstate=True)['igst_amount'], 180.0)
+
+    def test_amounts_are_stored_as_integer_paise(self):
+        conn = db_manager.get_db_connection()
+        stored = conn.execute("SELECT credit_limit, typeof(credit_limit) FROM customers WHERE name = 'Paisa Traders'").fetchone()
+        conn.close()
+        self.assertEqual(tuple(stored), (123456, 'integer'))
+        customer = db_manager.find_reference_row("customers", "Paisa Traders")
+        self.assertEqual(customer['credit_limit'], 1234.56)
+
+    def test_part_payments_settle_an_invoice_exactly(self):
+        # 0.7 + 0.1 is 0.7999999999999999 in floating point, which never reached 0.8.
+        customer_id = db_manager.find_reference_row("customers", "Paisa Traders")['id']
+        sale_id = db_manager.create_sale_invoice_transaction(
+            {"customer_id": customer_id, "invoice_number": "INV-P1", "invoice_date": "2024-06-01", "total_amount": 0.8,
+             "taxable_amount": 0.8, "total_gst_amount": 0, "igst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "notes": ""}, [])
+        db_manager.record_customer_payment(customer_id, "2024-06-02", 0.7, [(sale_id, 0.7)])
+        db_manager.record_customer_payment(customer_id, "2024-06-03", 0.1, [(sale_id, 0.1)])
+        self.assertEqual(db_manager.get_unpaid_sales_invoices(customer_id), [])
+
+    def test_ledger_sums_are_exact(self):
+        accounts = {a['name']: a['id'] for a in db_manager.get_all_accounts()}
+        db_manager.post_gl_batch([{"description": "Cash sale", "date": "2024-07-01",
+                                   "entries": [(accounts['Cash'], 0.1, None), (accounts['Sales Revenue'], None, 0.1)]}] * 10)
+        pnl = {r['name']: r['total_credits'] for r in db_manager.get_profit_and_loss_data("2024-07-01", "2024-07-31")}
+        self.assertEqual(pnl['Sales Revenue'], 1.0)
+        with self.assertRaises(ValueError):
+            db_manager.post_gl_batch([{"description": "Off by a paisa", "date": "2024-07-02",
+                                       "entries": [(accounts['Cash'], 10.01, None), (accounts['Sales Revenue'], None, 10.0)]}])
+
+class TestMoneyMigration(unittest.TestCase):
+
+    def setUp(self):
+        self.db_path = 'db/test_money_migration.db'
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+    def tearDown(self):
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+    def test_real_amounts_are_converted_to_paise(self):
+        # A database at schema version 8 still holds rupees in REAL columns.
+        conn = sqlite3.connect(self.db_path)
+        for version, step in database_setup.MIGRATIONS:
+            if version <= 8:
+                step(conn)
+        conn.execute("PRAGMA user_version = 8")
+        conn.execute("INSERT INTO customers (name) VALUES ('Old Customer')")
+        conn.execute("INSERT INTO items (name, purchase_price, selling_price) VALUES ('Old Item', 19.99, 0.1)")
+        conn.execute("INSERT INTO sales_invoices (customer_id, invoice_number, invoice_date, total_amount, amount_paid) VALUES (1, 'INV-1', '2024-01-01', 1180.5, 0.0)")
+        conn.commit()
+        conn.close()
+
+        setup_database(db_path=self.db_path)
+
+        conn = sqlite3.connect(self.db_path)
+        item = conn.execute("SELECT purchase_price, selling_price, typeof(purchase_price) FROM items").fetchone()
+        invoice = conn.execute("SELECT total_amount, amount_paid FROM sales_invoices").fetchone()
+        # Indexes and triggers on rebuilt tables come back with them.
+        indexed = conn.execute("SELECT COUNT(*) FROM search_index WHERE search_index MATCH 'Old Item'").fetchone()[0]
+        conn.execute("INSERT INTO items (name) VALUES ('New Item')")
+        new_indexed = conn.execute("SELECT COUNT(*) FROM search_index WHERE search_index MATCH 'New Item'").fetchone()[0]
+        conn.close()
+        self.assertEqual(item, (1999, 10, 'integer'))
+        self.assertEqual(invoice, (118050, 0))
+        self.assertEqual((indexed, new_indexed), (1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import os
+from . import db_manager
+from db.database_setup import setup_database
+
+class TestPeriodClose(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up a clean database for period close tests."""
+        cls.db_path = 'db/test_period_close.db'
+        db_manager.DATABASE_PATH = cls.db_path
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+        setup_database(db_path=cls.db_path)
+
+    def setUp(self):
+        conn = db_manager.get_db_connection()
+        with conn:
+            for table in ("account_closing_balances", "party_closing_balances", "period_closes",
+                          "account_daily_balances", "gl_entries", "gl_transactions",
+                          "customer_payments", "supplier_payments", "sales_invoices", "purchase_invoices",
+                          "customers", "suppliers"):
+                conn.execute(f"DELETE FROM {table}")
+        conn.close()
+        self.customer_id = db_manager.add_customer("Closer", "", "", "", "", "State", "", "", 0.0)
+        self.supplier_id = db_manager.add_supplier("Vendor", "", "", "", "", "State")
+
+    def _sale(self, number, date, amount):
+        return db_manager.create_sale_invoice_transaction(
+            {"customer_id": self.customer_id, "invoice_number": number, "invoice_date": date, "total_amount": amount,
+             "taxable_amount": amount, "total_gst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "igst_amount": 0, "notes": ""}, [])
+
+    def _purchase(self, number, date, amount):
+        return db_manager.create_purchase_invoice_transaction(
+            {"supplier_id": self.supplier_id, "invoice_number": number, "invoice_date": date, "total_amount": amount,
+             "taxable_amount": amount, "total_gst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "igst_amount": 0, "notes": ""}, [])
+
+    def _balances(self, as_of):
+        return {r['name']: r['total_debits'] - r['total_credits'] for r in db_manager.get_balance_sheet_data(as_of)}
+
+    def test_closed_period_rejects_postings(self):
+        self._sale("INV-1", "2024-03-15", 100)
+        self.assertIsNotNone(db_manager.close_period("2024-03-31"))
+
+        self.assertIsNone(self._sale("INV-2", "2024-03-31", 50))
+        self.assertIsNone(self._purchase("P-2", "2024-02-01", 50))
+        self.assertIsNone(db_manager.record_customer_payment(self.customer_id, "2024-03-20", 10, []))
+        self.assertIsNotNone(self._sale("INV-3", "2024-04-01", 50))
+
+        conn = db_manager.get_db_connection()
+        invoices = conn.execute("SELECT invoice_number FROM sales_invoices ORDER BY id").fetchall()
+        purchases = conn.execute("SELECT COUNT(*) FROM purchase_invoices").fetchone()[0]
+        conn.close()
+        self.assertEqual([r[0] for r in invoices], ["INV-1", "INV-3"])
+        self.assertEqual(purchases, 0)
+
+    def test_periods_close_in_order(self):
+        self.assertIsNotNone(db_manager.close_period("2024-03-31"))
+        self.assertIsNone(db_manager.close_period("2024-02-29"))
+        self.assertIsNone(db_manager.close_period("2024-03-31"))
+        self.assertEqual(db_manager.reopen_latest_period(), "2024-03-31")
+        self.assertIsNotNone(self._sale("INV-1", "2024-03-15", 100))
+
+    def test_balance_sheet_matches_with_and_without_snapshots(self):
+        self._sale("INV-1", "2024-03-15", 100)
+        self._purchase("P-1", "2024-03-20", 70)
+        db_manager.record_customer_payment(self.customer_id, "2024-04-05", 60, [])
+        self._sale("INV-2", "2024-05-02", 40)
+        expected = {d: self._balances(d) for d in ("2024-03-31", "2024-04-30", "2024-05-31")}
+
+        db_manager.close_period("2024-03-31")
+        db_manager.close_period("2024-04-30")
+        for as_of, balances in expected.items():
+            self.assertEqual(self._balances(as_of), balances, as_of)
+        self.assertEqual(expected["2024-05-31"]["Accounts Receivable"], 80)
+
+    def test_statement_opening_balance_uses_snapshot(self):
+        self._sale("INV-1", "2024-03-15", 100)
+        self._purchase("P-1", "2024-03-20", 70)
+        db_manager.record_customer_payment(self.customer_id, "2024-03-25", 30, [])
+        db_manager.record_supplier_payment(self.supplier_id, "2024-04-03", 20, [])
+        self._sale("INV-2", "2024-04-10", 40)
+        before_customer = db_manager.get_account_statement_data(self.customer_id, 'Customer', "2024-04-15", "2024-04-30")
+        before_supplier = db_manager.get_account_statement_data(self.supplier_id, 'Supplier', "2024-04-15", "2024-04-30")
+
+        db_manager.close_period("2024-03-31")
+        conn = db_manager.get_db_connection()
+        snapshot = conn.execute("SELECT balance / 100.0 FROM party_closing_balances WHERE party_type = 'Customer' AND party_id = ?", (self.customer_id,)).fetchone()
+        conn.close()
+        self.assertEqual(snapshot[0], 70)
+
+        self.assertEqual(db_manager.get_account_statement_data(self.customer_id, 'Customer', "2024-04-15", "2024-04-30")[0], before_customer[0])
+        self.assertEqual(db_manager.get_account_statement_data(self.supplier_id, 'Supplier', "2024-04-15", "2024-04-30")[0], before_supplier[0])
+        self.assertEqual(before_customer[0], 110)
+        self.assertEqual(before_supplier[0], 50)
+        # A statement starting the day after the close opens exactly at the snapshot.
+        self.assertEqual(db_manager.get_account_statement_data(self.customer_id, 'Customer', "2024-04-01", "2024-04-30")[0], 70)
+
+if __name__ == '__main__':
+    unittest.main()
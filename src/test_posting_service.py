@@ -0,0 +1,145 @@
+import unittest
+import os
+import sqlite3
+import threading
+from . import db_manager
+from . import task_runner
+from db.database_setup import setup_database
+
+class TestPostingService(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up a clean database for posting service tests."""
+        cls.db_path = 'db/test_posting_service.db'
+        db_manager.DATABASE_PATH = cls.db_path
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+        setup_database(db_path=cls.db_path)
+        db_manager.add_customer("Counter Customer", "", "", "", "", "State", "", "", 0.0)
+
+    def setUp(self):
+        self.service = db_manager.PostingService(max_batch=16)
+
+    def tearDown(self):
+        self.service.stop()
+
+    def _invoice(self, amount=100):
+        return {"customer_id": 1, "invoice_number": None, "invoice_date": "2024-04-01", "total_amount": amount,
+                "taxable_amount": amount, "total_gst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "igst_amount": 0, "notes": ""}
+
+    def test_concurrent_terminals_all_post(self):
+        futures = []
+        lock = threading.Lock()
+
+        def cashier():
+            for _ in range(25):
+                future = self.service.post_sale(self._invoice(), [])
+                with lock:
+                    futures.append(future)
+
+        threads = [threading.Thread(target=cashier) for _ in range(8)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        sale_ids = [f.result(timeout=10) for f in futures]
+
+        self.assertEqual(len(set(sale_ids)), 200)
+        self.assertEqual(self.service.commands_run, 200)
+        self.assertLessEqual(self.service.commits, 200)
+        numbers = {db_manager.get_sales_invoice_details(i)[0]['invoice_number'] for i in sale_ids}
+        self.assertEqual(len(numbers), 200)
+        self.assertEqual(db_manager.check_account_daily_balances(), [])
+
+    def test_failing_command_does_not_affect_its_group(self):
+        good = self.service.post_sale(self._invoice(10), [])
+        bad = self.service.post_sale(self._invoice(20), [{"item_id": 999, "quantity": 1, "selling_price": 20}])
+        payment = self.service.post_customer_payment(1, "2024-04-02", 5, [])
+        self.assertIsNotNone(good.result(timeout=10))
+        self.assertIsInstance(bad.exception(timeout=10), ValueError)
+        self.assertIsNotNone(payment.result(timeout=10))
+
+        conn = db_manager.get_db_connection()
+        orphaned = conn.execute("SELECT COUNT(*) FROM sales_invoices WHERE total_amount = 20").fetchone()[0]
+        conn.close()
+        self.assertEqual(orphaned, 0)
+        self.assertEqual(db_manager.check_account_daily_balances(), [])
+
+    def test_readers_are_not_blocked_by_the_writer(self):
+        release = threading.Event()
+
+        def slow_command(conn):
+            conn.execute("INSERT INTO settings (key, value) VALUES ('held', 'x')")
+            release.wait(5)
+            return 'done'
+
+        self.service.COMMANDS = dict(self.service.COMMANDS, slow=slow_command)
+        future = self.service.submit('slow')
+        try:
+            # The writer holds the write lock until release is set; reads still return.
+            self.assertEqual(len(db_manager.get_all_customers()), 1)
+            self.assertIsNone(db_manager.get_setting('held'))
+        finally:
+            release.set()
+        self.assertEqual(future.result(timeout=10), 'done')
+        self.assertEqual(db_manager.get_setting('held'), 'x')
+
+    def test_locked_database_fails_the_group_instead_of_hanging(self):
+        timeout = db_manager.BUSY_TIMEOUT_SECONDS
+        db_manager.BUSY_TIMEOUT_SECONDS = 0.2
+        db_manager.close_all_connections()  # so the writer's connection picks up the short timeout
+        blocker = sqlite3.connect(self.db_path)
+        try:
+            blocker.execute("BEGIN IMMEDIATE")
+            future = self.service.post_sale(self._invoice(), [])
+            self.assertIsInstance(future.exception(timeout=10), sqlite3.OperationalError)
+        finally:
+            blocker.rollback()
+            blocker.close()
+            db_manager.BUSY_TIMEOUT_SECONDS = timeout
+            db_manager.close_all_connections()
+        # The writer survives and posts the next group once the lock is gone.
+        self.assertIsNotNone(self.service.post_sale(self._invoice(), []).result(timeout=10))
+
+    def test_connect_failure_does_not_kill_the_writer(self):
+        def refuse():
+            raise sqlite3.OperationalError("database is locked")
+
+        connect = db_manager.get_db_connection
+        db_manager.get_db_connection = refuse
+        try:
+            future = self.service.post_sale(self._invoice(), [])
+            self.assertIsInstance(future.exception(timeout=10), sqlite3.OperationalError)
+        finally:
+            db_manager.get_db_connection = connect
+        self.assertIsNotNone(self.service.post_sale(self._invoice(), []).result(timeout=10))
+
+    def test_writer_commits_while_every_ui_worker_holds_a_lease(self):
+        self.assertEqual(task_runner.MAX_WORKERS, db_manager.WORKER_POOL_SIZE)
+        leased = threading.Barrier(task_runner.MAX_WORKERS + 1)
+        done = threading.Event()
+
+        def long_report():
+            conn = db_manager.get_db_connection()
+            try:
+                conn.execute("SELECT COUNT(*) FROM sales_invoices").fetchone()
+                leased.wait(timeout=10)
+                done.wait(timeout=20)
+            finally:
+                conn.close()
+
+        pool = task_runner._shared_executor()
+        reports = [pool.submit(long_report) for _ in range(task_runner.MAX_WORKERS)]
+        try:
+            leased.wait(timeout=10)  # Every pool slot is now taken
+            self.assertIsNotNone(self.service.post_sale(self._invoice(), []).result(timeout=5))
+        finally:
+            done.set()
+            for report in reports:
+                report.result(timeout=10)
+
+    def test_unknown_command_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.service.submit('refund')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+import unittest
+import os
+import re
+import datetime
+from . import db_manager
+from db.database_setup import setup_database
+
+# Tables that grow with transaction volume. A plain "SCAN" of one of these
+# (no index) makes a query O(history) instead of O(result).
+LARGE_TABLES = {
+    "gl_entries", "gl_transactions", "sales_invoices", "purchase_invoices",
+    "sales_invoice_items", "purchase_invoice_items", "item_serial_numbers",
+    "customer_payments", "supplier_payments", "customer_payment_allocations",
+    "supplier_payment_allocations", "job_sheets", "amc_service_calls", "quotation_items",
+    "account_daily_balances", "account_closing_balances", "party_closing_balances",
+    "stock_movements", "cost_layers",
+}
+
+# (function, table) pairs where reading the whole table is the point of the query.
+EXPECTED_SCANS = {
+    ("get_all_transactions", "sales_invoices"): "unfiltered listing returns every row",
+    ("get_all_transactions", "purchase_invoices"): "unfiltered listing returns every row",
+    ("get_all_transactions", "customer_payments"): "unfiltered listing returns every row",
+    ("get_all_transactions", "supplier_payments"): "unfiltered listing returns every row",
+    ("get_sales_invoices_for_export", "sales_invoices"): "export returns every row",
+    ("get_purchase_invoices_for_export", "purchase_invoices"): "export returns every row",
+}
+
+TODAY = datetime.date.today().isoformat()
+
+# Every query function in db_manager, with arguments that reach its SQL.
+QUERY_CALLS = [
+    ("get_setting", ("company_state",)),
+    ("get_all_settings", ()),
+    ("get_all_gst_slabs", ()),
+    ("get_all_hsn_codes_with_details", ()),
+    ("get_all_units", ()),
+    ("get_all_compound_units_display", ()),
+    ("get_units_for_item", (1,)),
+    ("get_all_accounts", ()),
+    ("get_all_godowns", ()),
+    ("get_all_items", ()),
+    ("get_all_suppliers", ()),
+    ("get_all_customers", ()),
+    ("get_transactions_for_customer", (1,)),
+    ("get_transactions_for_supplier", (1,)),
+    ("get_account_statement_data", (1, 'Customer', '2023-01-01', '2023-12-31')),
+    ("get_account_statement_data", (1, 'Supplier', '2023-01-01', '2023-12-31')),
+    ("get_next_invoice_number", ()),
+    ("get_next_document_number", ('QUOTATION',)),
+    ("get_next_document_number", ('JOB_SHEET', TODAY)),
+    ("get_available_serial_numbers_for_item", (1,)),
+    ("get_in_stock_serial_numbers", ()),
+    ("get_unpaid_sales_invoices", (1,)),
+    ("get_unpaid_purchase_invoices", (1,)),
+    ("get_unreconciled_cash_transactions", ()),
+    ("get_gstr1_report_data", ('2023-01-01', '2023-12-31')),
+    ("get_gstr3b_report_data", ('2023-01-01', '2023-12-31')),
+    ("get_profit_and_loss_data", ('2023-01-01', '2023-12-31')),
+    ("get_balance_sheet_data", ('2023-12-31',)),
+    ("get_period_closes", ()),
+    ("get_expiring_warranties", (30,)),
+    ("get_low_stock_report", ()),
+    ("get_category_stock_report", ()),
+    ("get_stock_valuation_report", ()),
+    ("get_stock_balances", (1,)),
+    ("get_bill_of_materials", (1,)),
+    ("get_all_amcs", ()),
+    ("get_service_calls_for_amc", (1,)),
+    ("get_expiring_amcs", (30,)),
+    ("get_all_job_sheets", ()),
+    ("get_job_sheet_details", (1,)),
+    ("get_serial_traceability", ("SN-1",)),
+    ("get_all_quotations", ()),
+    ("get_quotation_details", (1,)),
+    ("get_items_for_export", ()),
+    ("get_customers_for_export", ()),
+    ("get_suppliers_for_export", ()),
+    ("get_sales_invoices_for_export", ()),
+    ("get_purchase_invoices_for_export", ()),
+    ("get_sales_invoice_details", (1,)),
+    ("get_all_transactions", ({},)),
+    ("get_all_transactions", ({'start_date': '2023-01-01', 'end_date': '2023-12-31', 'party_id': 1, 'party_type': 'Customer'},)),
+    ("get_transactions_page", ({},)),
+    ("get_transactions_page", ({'start_date': '2023-01-01', 'party_id': 1, 'party_type': 'Customer'}, f'["-date", "{TODAY}", 1, 1]')),
+    ("get_transactions_page", ({}, f'["-date", "{TODAY}", 2, 1]', 100, 200)),
+    ("get_transactions_page", ({'end_date': TODAY}, None, 100, 0, 'amount')),
+    ("get_transactions_count", ({},)),
+    ("get_transactions_count", ({'start_date': '2023-01-01', 'end_date': '2023-12-31', 'party_id': 1, 'party_type': 'Customer'},)),
+    ("universal_search", ("sn",)),
+    ("universal_search", ("SN-1",)),
+    ("get_data_version", ("search",)),
+    ("get_reference_rows", ("items",)),
+    ("get_reference_row", ("customers", 1)),
+    ("get_report_cache_stats", ()),
+    ("get_monthly_sales_summary", ()),
+    ("get_monthly_purchase_summary", ()),
+    ("get_overdue_receivables_summary", ()),
+    ("get_recent_activities", (10,)),
+]
+
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_SQL_KEYWORDS = {"on", "where", "join", "left", "inner", "group", "order", "set", "union", "limit", "values"}
+
+def _aliases(sql):
+    """Maps every alias (and bare table name) in a statement to its table."""
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases[table] = table
+        if alias and alias.lower() not in _SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+class TestQueryPlans(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up a database with at least one row on every query path."""
+        cls.db_path = 'db/test_query_plans.db'
+        db_manager.DATABASE_PATH = cls.db_path
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+        setup_database(db_path=cls.db_path)
+        cls.statements = []
+        cls.current_call = "setup"
+        conn = db_manager.get_db_connection()
+        conn.set_trace_callback(lambda sql: cls.statements.append((cls.current_call, sql)))
+        conn.close()
+        cls._populate()
+
+    @classmethod
+    def tearDownClass(cls):
+        conn = db_manager.get_db_connection()
+        conn.set_trace_callback(None)
+        conn.close()
+
+    @classmethod
+    def _populate(cls):
+        db_manager.add_godown("Main", "HQ")
+        db_manager.add_supplier("Supplier", "", "", "", "", "State")
+        db_manager.add_customer("Customer", "GSTIN", "", "", "", "State", "", "", 0.0)
+        db_manager.add_item("Widget", 100, 150, 12, 5, "Parts", 1, None, 4, is_serialized=True)
+        db_manager.create_purchase_invoice_transaction(
+            {"supplier_id": 1, "invoice_number": "P-1", "invoice_date": "2023-01-01", "total_amount": 236,
+             "taxable_amount": 200, "total_gst_amount": 36, "cgst_amount": 0, "sgst_amount": 0, "igst_amount": 36, "notes": ""},
+            [{"item_id": 1, "quantity": 2, "purchase_price": 100, "serial_numbers": ["SN-1", "SN-2"], "godown_id": 1}])
+        sale_id = db_manager.create_sale_invoice_transaction(
+            {"customer_id": 1, "invoice_number": "INV-0001", "invoice_date": TODAY, "total_amount": 177,
+             "taxable_amount": 150, "total_gst_amount": 27, "cgst_amount": 0, "sgst_amount": 0, "igst_amount": 27, "notes": ""},
+            [{"item_id": 1, "quantity": 1, "selling_price": 150, "serial_ids": [1]}])
+        db_manager.record_customer_payment(1, TODAY, 100, [(sale_id, 100)])
+        db_manager.record_supplier_payment(1, "2023-02-01", 100, [(1, 100)])
+        db_manager.add_amc(1, "2023-01-01", TODAY, 500)
+        db_manager.add_amc_service_call(1, TODAY, "Check", "Done")
+        db_manager.add_job_sheet({"customer_id": 1, "received_date": TODAY, "product_name": "Laptop", "product_serial": "SN-1",
+                                  "reported_problem": "", "estimated_cost": 0, "estimated_timeline": "", "assigned_to": ""}, ["Charger"])
+        db_manager.create_quotation({"customer_id": 1, "quote_date": TODAY, "expiry_date": TODAY, "total_amount": 150},
+                                    [{"item_id": 1, "quantity": 1, "selling_price": 150}])
+        db_manager.close_period("2023-06-30")
+
+    def _run_query_calls(self):
+        for name, args in QUERY_CALLS:
+            type(self).current_call = name
+            getattr(db_manager, name)(*args)
+        type(self).current_call = "done"
+
+    def test_every_query_function_is_covered(self):
+        covered = {name for name, _ in QUERY_CALLS}
+        query_functions = {name for name in dir(db_manager)
+                           if (name.startswith("get_") or name == "universal_search")
+                           and callable(getattr(db_manager, name)) and name != "get_db_connection"}
+        self.assertEqual(query_functions - covered, set(), "Add new query functions to QUERY_CALLS")
+
+    def test_no_unexpected_full_scans(self):
+        self._run_query_calls()
+        conn = db_manager.get_db_connection()
+        conn.set_trace_callback(None)
+        problems = []
+        try:
+            for call, sql in self.statements:
+                if not re.match(r"\s*(SELECT|WITH|UPDATE|DELETE)\b", sql, re.IGNORECASE):
+                    continue
+                aliases = _aliases(sql)
+                for row in conn.execute("EXPLAIN QUERY PLAN " + sql):
+                    detail = row[3]
+                    match = re.match(r"(SCAN|SEARCH) (\w+)", detail)
+                    if not match:
+                        continue
+                    table = aliases.get(match.group(2), match.group(2))
+                    if table not in LARGE_TABLES:
+                        continue
+                    unindexed = match.group(1) == "SCAN" and "USING" not in detail
+                    if (unindexed or "AUTOMATIC" in detail) and (call, table) not in EXPECTED_SCANS:
+                        problems.append(f"{call}: {detail}\n    {' '.join(sql.split())[:200]}")
+        finally:
+            conn.set_trace_callback(lambda sql: self.statements.append((type(self).current_call, sql)))
+            conn.close()
+        self.assertEqual(problems, [], "Unexpected full table scans:\n" + "\n".join(problems))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import csv
+import os
+from . import db_manager
+from . import csv_generator
+from db.database_setup import setup_database
+
+class TestRecords(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up a database with a few customers and items."""
+        cls.db_path = 'db/test_records.db'
+        db_manager.DATABASE_PATH = cls.db_path
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+        setup_database(db_path=cls.db_path)
+        for n in range(5):
+            db_manager.add_customer(f"Customer {n}", "", f"{n} Road", "", "", "State", "", "", 0.0)
+        db_manager.add_unit("Box")
+        unit = db_manager.find_reference_row("units", "Box")
+        slab = db_manager.find_reference_row("gst_slabs", 18)
+        db_manager.add_item("Cable", 10, 15, 0, 0, "Wires", unit['id'], None, slab['id'])
+
+    def setUp(self):
+        db_manager.DATABASE_PATH = self.db_path
+
+    def test_record_access(self):
+        item = db_manager.get_all_items()[0]
+        self.assertIsInstance(item, db_manager.Record)
+        self.assertEqual(item['name'], "Cable")
+        self.assertEqual(item.name, "Cable")
+        self.assertEqual(item[1], "Cable")
+        self.assertEqual(item['unit_name'], "Box")
+        self.assertEqual(item['gst_rate'], 18)
+        self.assertIsNone(item.get('missing'))
+        self.assertEqual(dict(item)['category'], "Wires")
+        self.assertEqual(list(item.keys())[:2], ['id', 'name'])
+        with self.assertRaises(KeyError):
+            item['missing']
+
+    def test_records_share_one_class_per_column_list(self):
+        first, second = db_manager.get_customers_for_export()[:2]
+        self.assertIs(type(first), type(second))
+        self.assertFalse(hasattr(first, '__dict__'))
+
+    def test_iter_matches_the_list_form(self):
+        self.assertEqual(list(db_manager.iter_customers_for_export()), db_manager.get_customers_for_export())
+        self.assertEqual(len(db_manager.get_customers_for_export()), 5)
+
+    def test_closing_a_stream_releases_the_connection(self):
+        rows = db_manager.iter_customers_for_export()
+        next(rows)
+        rows.close()
+        self.assertIsNone(getattr(db_manager._connections._local, 'conn', None))
+
+    def test_csv_export_streams_records(self):
+        path = 'db/test_records_export.csv'
+        try:
+            success, error = csv_generator.export_to_csv(db_manager.iter_customers_for_export(), path)
+            self.assertTrue(success, error)
+            with open(path, newline='', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(len(rows), 5)
+            self.assertEqual(rows[2]['address'], "2 Road")
+            self.assertEqual(rows[0]['gstin'], "")
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+        self.assertEqual(csv_generator.export_to_csv(iter(()), path), (False, "No data to export."))
+
+if __name__ == '__main__':
+    unittest.main()
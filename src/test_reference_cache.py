@@ -0,0 +1,78 @@
+import unittest
+import os
+from . import db_manager
+from db.database_setup import setup_database
+
+class TestReferenceCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up a database with a few parties, units and items."""
+        cls.db_path = 'db/test_reference_cache.db'
+        db_manager.DATABASE_PATH = cls.db_path
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+        setup_database(db_path=cls.db_path)
+        db_manager.add_customer("Zenith", "", "", "", "", "State", "", "", 0.0)
+        db_manager.add_customer("Acme", "", "", "", "", "State", "", "", 0.0)
+        db_manager.add_supplier("Parts Co", "", "", "", "", "State")
+        db_manager.add_unit("Box")
+        db_manager.add_item("Cable", 10, 15, 0, 0, "", None, None, None)
+
+    def setUp(self):
+        db_manager.DATABASE_PATH = self.db_path
+        db_manager._reference_cache.invalidate()
+
+    def test_rows_match_the_uncached_query(self):
+        for entity, (loader, _) in db_manager.REFERENCE_LOADERS.items():
+            self.assertEqual([dict(row) for row in db_manager.get_reference_rows(entity)],
+                             [dict(row) for row in loader()], entity)
+
+    def test_lookups_by_id_and_name(self):
+        acme = db_manager.find_reference_row("customers", "Acme")
+        self.assertEqual(acme['name'], "Acme")
+        self.assertIs(db_manager.get_reference_row("customers", acme['id']), acme)
+        self.assertIsNone(db_manager.get_reference_row("customers", 999))
+        self.assertIsNone(db_manager.find_reference_row("suppliers", "Acme"))
+
+    def test_repeated_reads_do_not_query(self):
+        db_manager.get_reference_rows("customers")
+        loads = db_manager._reference_cache.loads
+        conn = db_manager.get_db_connection()
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            for _ in range(3):
+                db_manager.get_reference_rows("customers")
+                db_manager.find_reference_row("customers", "Zenith")
+        finally:
+            conn.set_trace_callback(None)
+            conn.close()
+        self.assertEqual(statements, [])
+        self.assertEqual(db_manager._reference_cache.loads, loads)
+
+    def test_writes_invalidate_their_entity(self):
+        suppliers = db_manager.get_reference_rows("suppliers")
+        db_manager.get_reference_rows("customers")
+        db_manager.add_customer("Beta", "", "", "", "", "State", "", "", 0.0)
+        self.assertIsNotNone(db_manager.find_reference_row("customers", "Beta"))
+        self.assertIs(db_manager.get_reference_rows("suppliers"), suppliers)
+
+        beta = db_manager.find_reference_row("customers", "Beta")
+        db_manager.update_customer(beta['id'], "Beta Traders", "", "", "", "", "State", "", "", 0.0)
+        self.assertIsNone(db_manager.find_reference_row("customers", "Beta"))
+        self.assertEqual(db_manager.get_reference_row("customers", beta['id'])['name'], "Beta Traders")
+
+    def test_unit_changes_reload_items(self):
+        items = db_manager.get_reference_rows("items")
+        db_manager.add_unit("Roll")
+        self.assertIsNot(db_manager.get_reference_rows("items"), items)
+        self.assertIsNotNone(db_manager.find_reference_row("units", "Roll"))
+
+    def test_imports_invalidate(self):
+        db_manager.get_reference_rows("suppliers")
+        db_manager.import_suppliers_from_data([{'name': "Imported Supplies"}])
+        self.assertIsNotNone(db_manager.find_reference_row("suppliers", "Imported Supplies"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import os
+from . import db_manager
+from db.database_setup import setup_database
+
+class TestReportCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up a database with one customer and a couple of sales."""
+        cls.db_path = 'db/test_report_cache.db'
+        db_manager.DATABASE_PATH = cls.db_path
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+        setup_database(db_path=cls.db_path)
+        db_manager.add_customer("Acme", "", "", "", "", "State", "", "", 0.0)
+        conn = db_manager.get_db_connection()
+        with conn:
+            for day in (1, 2):
+                conn.execute("INSERT INTO sales_invoices (customer_id, invoice_number, invoice_date, total_amount, taxable_amount, igst_amount) VALUES (1, ?, ?, 11800, 10000, 1800)",
+                             (f"INV-{day}", f"2024-01-0{day}"))
+        conn.close()
+
+    def setUp(self):
+        db_manager.DATABASE_PATH = self.db_path
+        db_manager._report_cache.invalidate()
+
+    def _run_statements(self, func, *args):
+        conn = db_manager.get_db_connection()
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            result = func(*args)
+        finally:
+            conn.set_trace_callback(None)
+            conn.close()
+        return result, statements
+
+    def test_repeat_call_is_served_from_cache(self):
+        before = db_manager.get_report_cache_stats()
+        first = db_manager.get_gstr3b_report_data("2024-01-01", "2024-01-31")
+        second, statements = self._run_statements(db_manager.get_gstr3b_report_data, "2024-01-01", "2024-01-31")
+        self.assertIs(second, first)
+        self.assertEqual(len(statements), 1)  # Only the version lookup
+        self.assertIn("data_versions", statements[0])
+        stats = db_manager.get_report_cache_stats()
+        self.assertEqual(stats['misses'] - before['misses'], 1)
+        self.assertEqual(stats['hits'] - before['hits'], 1)
+
+    def test_parameters_are_part_of_the_key(self):
+        january = db_manager.get_gstr3b_report_data("2024-01-01", "2024-01-31")
+        first_day = db_manager.get_gstr3b_report_data("2024-01-01", "2024-01-01")
+        self.assertEqual(january['outward_supplies']['total_taxable'], 200)
+        self.assertEqual(first_day['outward_supplies']['total_taxable'], 100)
+
+    def test_writes_to_a_source_table_invalidate(self):
+        before = db_manager.get_gstr3b_report_data("2024-02-01", "2024-02-29")
+        conn = db_manager.get_db_connection()
+        with conn:
+            conn.execute("INSERT INTO sales_invoices (customer_id, invoice_number, invoice_date, total_amount, taxable_amount) VALUES (1, 'INV-F', '2024-02-10', 5900, 5000)")
+        conn.close()
+        after = db_manager.get_gstr3b_report_data("2024-02-01", "2024-02-29")
+        self.assertIsNone(before['outward_supplies']['total_taxable'])
+        self.assertEqual(after['outward_supplies']['total_taxable'], 50)
+
+    def test_unrelated_writes_keep_the_entry(self):
+        first = db_manager.get_gstr3b_report_data("2024-01-01", "2024-01-31")
+        db_manager.add_unit("Box")
+        db_manager.add_supplier("Parts Co", "", "", "", "", "State")
+        self.assertIs(db_manager.get_gstr3b_report_data("2024-01-01", "2024-01-31"), first)
+
+    def test_ledger_write_paths_bump_the_version(self):
+        before = db_manager.get_data_version('report_ledger')
+        db_manager.rebuild_account_daily_balances()
+        self.assertGreater(db_manager.get_data_version('report_ledger'), before)
+
+    def test_lru_eviction_by_count_and_size(self):
+        cache = db_manager.ReportCache(max_entries=2, max_bytes=10_000)
+        cache.put("a", [1])
+        cache.put("b", [2])
+        cache.get("a")
+        cache.put("c", [3])
+        self.assertEqual(cache.get("b"), (False, None))
+        self.assertEqual(cache.get("a"), (True, [1]))
+        self.assertEqual(cache.evictions, 1)
+
+        cache.put("big", ["x" * 20_000])
+        self.assertEqual(cache.get("big"), (False, None))
+        cache.put("d", ["x" * 6_000])
+        self.assertLessEqual(cache.stats()['bytes'], 10_000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -24,7 +24,7 @@ class TestReports(unittest.TestCase):
         self.conn.row_factory = sqlite3.Row
         cursor = self.conn.cursor()
         tables = [
-            "gl_entries", "gl_transactions", "customer_payment_allocations",
+            "account_daily_balances", "gl_entries", "gl_transactions", "customer_payment_allocations",
             "supplier_payment_allocations", "customer_payments", "supplier_payments",
             "sales_invoice_items", "purchase_invoice_items", "sales_invoices",
             "purchase_invoices", "item_serial_numbers", "items", "customers",
@@ -26,7 +26,8 @@ class TestSales(unittest.TestCase):
             "assembly_components", "assemblies", "item_serial_numbers",
             "sales_invoice_items", "sales_invoices", "purchase_invoice_items",
             "purchase_invoices", "suppliers", "customers", "item_batches",
-            "items", "godowns", "units", "hsn_codes", "gst_slabs"
+            "items", "godowns", "units", "hsn_codes", "gst_slabs",
+            "account_daily_balances", "gl_entries", "gl_transactions", "document_sequences"
         ]
         for table in tables:
             cursor.execute(f"DELETE FROM {table};")
@@ -104,8 +105,52 @@ class TestSales(unittest.TestCase):
 
         sale_record = cursor.execute("SELECT * FROM sales_invoices WHERE id = ?", (sale_id,)).fetchone()
         self.assertEqual(sale_record['invoice_number'], invoice_number)
-        self.assertEqual(sale_record['total_amount'], total_amount)
+        self.assertEqual(sale_record['total_amount'], db_manager.to_paise(total_amount))
         conn.close()
 
+    def test_multi_line_sale_with_serials(self):
+        self._simulate_purchase()
+        db_manager.add_item("Test Cable", 20, 50, 0, 2, "Cable", 1, 1, 1, is_serialized=False)
+        db_manager.create_purchase_invoice_transaction(
+            {"supplier_id": 1, "invoice_number": "PUR-002", "invoice_date": "2023-01-02", "total_amount": 200,
+             "taxable_amount": 200, "total_gst_amount": 0, "igst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "notes": ""},
+            [{"item_id": 1, "quantity": 2, "purchase_price": 500, "serial_numbers": ["GPU-SN-03", "GPU-SN-04"], "godown_id": 1}])
+        db_manager.add_customer("Test Customer", "CUSTGST", "Cust Address", "222", "cust@email.com", "Test State", "", "", 0.0)
+        serial_ids = [s['id'] for s in db_manager.get_available_serial_numbers_for_item(item_id=1)]
+
+        sale_items_data = [
+            {"item_id": 1, "quantity": 2, "selling_price": 800, "serial_ids": serial_ids[:2]},
+            {"item_id": 2, "quantity": 5, "selling_price": 50},
+            {"item_id": 1, "quantity": 1, "selling_price": 750, "serial_ids": serial_ids[2:3]},
+        ]
+        sale_id = db_manager.create_sale_invoice_transaction(
+            {"customer_id": 1, "invoice_number": None, "invoice_date": "2024-01-31", "total_amount": 2600,
+             "taxable_amount": 2600, "total_gst_amount": 0, "igst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "notes": ""},
+            sale_items_data)
+        self.assertIsNotNone(sale_id)
+
+        conn = db_manager.get_db_connection()
+        sold = conn.execute("SELECT id, warranty_end_date FROM item_serial_numbers WHERE sale_invoice_id = ? ORDER BY id", (sale_id,)).fetchall()
+        lines = conn.execute("SELECT COUNT(*) FROM sales_invoice_items WHERE sales_invoice_id = ?", (sale_id,)).fetchone()[0]
+        cogs = conn.execute("SELECT debit FROM gl_entries ge JOIN accounts a ON ge.account_id = a.id JOIN gl_transactions gt ON ge.transaction_id = gt.id WHERE a.name = 'Cost of Goods Sold' AND gt.source_doc_id = ?", (sale_id,)).fetchone()[0]
+        conn.close()
+        self.assertEqual([r['id'] for r in sold], serial_ids[:3])
+        # 24-month warranty counted from the invoice date, clamped to month end.
+        self.assertEqual({r['warranty_end_date'] for r in sold}, {"2026-01-31"})
+        self.assertEqual(lines, 3)
+        self.assertEqual(cogs, (3 * 500 + 5 * 20) * 100)  # Stored in paise
+
+    def test_sale_with_unknown_item_is_rolled_back(self):
+        self._simulate_purchase()
+        db_manager.add_customer("Test Customer", "CUSTGST", "Cust Address", "222", "cust@email.com", "Test State", "", "", 0.0)
+        serial_id = db_manager.get_available_serial_numbers_for_item(item_id=1)[0]['id']
+        sale_id = db_manager.create_sale_invoice_transaction(
+            {"customer_id": 1, "invoice_number": "INV-9000", "invoice_date": "2024-01-31", "total_amount": 900,
+             "taxable_amount": 900, "total_gst_amount": 0, "igst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "notes": ""},
+            [{"item_id": 1, "quantity": 1, "selling_price": 800, "serial_ids": [serial_id]},
+             {"item_id": 999, "quantity": 1, "selling_price": 100}])
+        self.assertIsNone(sale_id)
+        self.assertEqual(len(db_manager.get_available_serial_numbers_for_item(item_id=1)), 2)
+
 if __name__ == '__main__':
     unittest.main()
@@ -113,5 +113,70 @@ class TestSearch(unittest.TestCase):
         results = db_manager.universal_search("")
         self.assertEqual(len(results), 0)
 
+    def test_index_follows_edits_and_deletes(self):
+        db_manager.update_customer(1, "Zeta Traders", "ACGST123", "Alpha Address", "11111", "alpha@test.com", "State A", "", "", 0.0)
+        self.assertEqual([r['summary'] for r in db_manager.universal_search("zeta")], ["Zeta Traders"])
+        # The email still matches, and the invoice details pick up the new name.
+        results = {r['type']: r for r in db_manager.universal_search("alpha")}
+        self.assertEqual(results['Customer']['summary'], "Zeta Traders")
+        self.assertEqual(results['Sales Invoice']['details'], "Customer: Zeta Traders")
+
+        db_manager.update_hsn_code(1, "OMEGA-HSN", "Gamma HSN", 1)
+        self.assertEqual([r['summary'] for r in db_manager.universal_search("omega")], ["Gamma Product"])
+
+        conn = db_manager.get_db_connection()
+        with conn:
+            conn.execute("DELETE FROM job_sheet_accessories")
+            conn.execute("DELETE FROM job_sheets")
+        conn.close()
+        self.assertEqual(db_manager.universal_search("epsilon"), [])
+
+    def test_title_matches_rank_first(self):
+        # "11111" is Alpha Client's phone; a customer named after it should outrank that.
+        db_manager.add_customer("11111 Stores", "", "", "", "", "State A", "", "", 0.0)
+        results = db_manager.universal_search("11111")
+        self.assertEqual([r['summary'] for r in results], ["11111 Stores", "Alpha Client"])
+
+    def test_results_are_paged(self):
+        for n in range(5):
+            db_manager.add_customer(f"Kappa {n}", "", "", "", "", "State A", "", "", 0.0)
+        first = db_manager.universal_search("kappa", limit=3)
+        second = db_manager.universal_search("kappa", limit=3, offset=3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertEqual(len({r['id'] for r in first + second}), 5)
+
+    def test_suggestions_match_word_prefixes(self):
+        self.assertEqual([r['summary'] for r in db_manager.search_suggestions("alp")], ["Alpha Client"])
+        self.assertEqual([r['summary'] for r in db_manager.search_suggestions("cli")], ["Alpha Client"])
+        self.assertEqual([r['type'] for r in db_manager.search_suggestions("inv-")], ["Sales Invoice"])
+        self.assertEqual(db_manager.search_suggestions("lient"), [])
+
+    def test_suggestions_narrow_as_the_prefix_grows(self):
+        for name in ("Kappa One", "Kappa Two", "Kilo"):
+            db_manager.add_customer(name, "", "", "", "", "State A", "", "", 0.0)
+        self.assertEqual(len(db_manager.search_suggestions("k")), 3)
+        self.assertEqual(len(db_manager.search_suggestions("ka")), 2)
+        self.assertEqual([r['summary'] for r in db_manager.search_suggestions("kappa t")], ["Kappa Two"])
+        # Backspacing to a shorter prefix widens the range again.
+        self.assertEqual(len(db_manager.search_suggestions("k")), 3)
+
+    def test_suggestion_index_rebuilds_only_on_change(self):
+        db_manager.search_suggestions("alp")
+        built_for = db_manager._search_prefixes._built_for
+        conn = db_manager.get_db_connection()
+        with conn:
+            conn.execute("UPDATE item_serial_numbers SET status = 'IN_STOCK'")
+        conn.close()
+        db_manager.search_suggestions("alp")
+        self.assertEqual(db_manager._search_prefixes._built_for, built_for)
+
+        db_manager.add_customer("Alpine Goods", "", "", "", "", "State A", "", "", 0.0)
+        self.assertEqual([r['summary'] for r in db_manager.search_suggestions("alp")], ["Alpha Client", "Alpine Goods"])
+
+    def test_short_terms_still_match(self):
+        results = db_manager.universal_search("-0")
+        self.assertEqual([r['type'] for r in results], ['Sales Invoice', 'Purchase Invoice', 'Job Sheet'])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import os
+import time
+from . import db_manager
+from db.database_setup import setup_database
+
+class TestSerialIntake(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up a clean database with a supplier and one serialized item."""
+        cls.db_path = 'db/test_serial_intake.db'
+        db_manager.DATABASE_PATH = cls.db_path
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+        setup_database(db_path=cls.db_path)
+        db_manager.add_godown("Main", "")
+        db_manager.add_supplier("Serial Supplier", "", "", "", "", "State")
+        db_manager.add_item("Scanner", 10, 20, 0, 0, "Misc", None, None, None, True)
+        cls.supplier_id = db_manager.find_reference_row("suppliers", "Serial Supplier")['id']
+        cls.item_id = db_manager.find_reference_row("items", "Scanner")['id']
+        cls.purchases = 0
+
+    def setUp(self):
+        db_manager.DATABASE_PATH = self.db_path
+
+    def _purchase(self, serial_numbers):
+        TestSerialIntake.purchases += 1
+        invoice = {"supplier_id": self.supplier_id, "invoice_number": f"PS-{self.purchases}", "invoice_date": "2024-04-01", "total_amount": 0,
+                   "taxable_amount": 0, "total_gst_amount": 0, "igst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "notes": ""}
+        return db_manager.create_purchase_invoice_transaction(
+            invoice, [{"item_id": self.item_id, "quantity": len(serial_numbers), "purchase_price": 10, "godown_id": 1, "serial_numbers": serial_numbers}])
+
+    def _count(self, like):
+        conn = db_manager.get_db_connection()
+        count = conn.execute("SELECT COUNT(*) FROM item_serial_numbers WHERE serial_number LIKE ?", (like,)).fetchone()[0]
+        conn.close()
+        return count
+
+    def test_expand_serial_numbers(self):
+        self.assertEqual(db_manager.expand_serial_numbers("SN0008-SN0011, X-1\nAB12"), ["SN0008", "SN0009", "SN0010", "SN0011", "X-1", "AB12"])
+        # Only ends with the same prefix make a range.
+        self.assertEqual(db_manager.expand_serial_numbers("PC-01-PC-03"), ["PC-01", "PC-02", "PC-03"])
+        self.assertEqual(db_manager.expand_serial_numbers("AB-1234"), ["AB-1234"])
+        with self.assertRaises(ValueError):
+            db_manager.expand_serial_numbers("SN0500-SN0001")
+
+    def test_container_intake(self):
+        serials = db_manager.expand_serial_numbers("CT00001-CT10000")
+        started = time.perf_counter()
+        self.assertIsNotNone(self._purchase(serials))
+        self.assertLess(time.perf_counter() - started, 10)
+        self.assertEqual(self._count("CT%"), 10000)
+        self.assertGreaterEqual(db_manager.get_stock_balances(self.item_id)[0]['quantity'], 10000)
+
+    def test_duplicates_are_found_before_anything_is_written(self):
+        self.assertIsNotNone(self._purchase(["DUP-1", "DUP-2"]))
+        self.assertEqual(db_manager.find_serial_conflicts(["DUP-2", "DUP-3", "DUP-3"]), (["DUP-3"], ["DUP-2"]))
+        self.assertIsNone(self._purchase(["DUP-3", "DUP-2"]))
+        self.assertIsNone(self._purchase(["DUP-4", "DUP-4"]))
+        self.assertEqual(self._count("DUP-%"), 2)
+        conn = db_manager.get_db_connection()
+        invoices = conn.execute("SELECT COUNT(*) FROM purchase_invoices WHERE supplier_id = ?", (self.supplier_id,)).fetchone()[0]
+        conn.close()
+        self.assertEqual(invoices, self.purchases - 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+import os
+import sqlite3
+from . import db_manager
+from db import database_setup
+from db.database_setup import setup_database
+
+class TestStockLedger(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up a clean database with two godowns, a supplier and a customer."""
+        cls.db_path = 'db/test_stock_ledger.db'
+        db_manager.DATABASE_PATH = cls.db_path
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+        setup_database(db_path=cls.db_path)
+        db_manager.add_godown("Main", "Front")
+        db_manager.add_godown("Back Room", "Rear")
+        db_manager.add_supplier("Stock Supplier", "", "", "", "", "State")
+        db_manager.add_customer("Stock Customer", "", "", "", "", "State", "", "", 0)
+        cls.supplier_id = db_manager.find_reference_row("suppliers", "Stock Supplier")['id']
+        cls.customer_id = db_manager.find_reference_row("customers", "Stock Customer")['id']
+        godowns = {g['name']: g['id'] for g in db_manager.get_all_godowns()}
+        cls.main, cls.back = godowns["Main"], godowns["Back Room"]
+
+    def setUp(self):
+        db_manager.DATABASE_PATH = self.db_path
+
+    def _item(self, name, purchase_price=10, min_stock=0, category="Misc", is_serialized=False):
+        db_manager.add_item(name, purchase_price, purchase_price * 2, 0, min_stock, category, None, None, None, is_serialized)
+        return db_manager.find_reference_row("items", name)['id']
+
+    def _purchase(self, number, lines, date="2024-04-01"):
+        invoice = {"supplier_id": self.supplier_id, "invoice_number": number, "invoice_date": date, "total_amount": 0,
+                   "taxable_amount": 0, "total_gst_amount": 0, "igst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "notes": ""}
+        return db_manager.create_purchase_invoice_transaction(invoice, lines)
+
+    def _sale(self, lines, date="2024-04-10"):
+        invoice = {"customer_id": self.customer_id, "invoice_date": date, "total_amount": 0,
+                   "taxable_amount": 0, "total_gst_amount": 0, "igst_amount": 0, "cgst_amount": 0, "sgst_amount": 0, "notes": ""}
+        return db_manager.create_sale_invoice_transaction(invoice, lines)
+
+    def _serial(self, serial_number):
+        conn = db_manager.get_db_connection()
+        row = conn.execute("SELECT id, godown_id FROM item_serial_numbers WHERE serial_number = ?", (serial_number,)).fetchone()
+        conn.close()
+        return row
+
+    def _on_hand(self, item_id):
+        return {row['godown_id']: row['quantity'] for row in db_manager.get_stock_balances(item_id)}
+
+    def test_purchase_and_sale_move_the_balance(self):
+        item_id = self._item("Cable")
+        self._purchase("PB-1", [{"item_id": item_id, "quantity": 25, "purchase_price": 10, "godown_id": self.back}])
+        self._sale([{"item_id": item_id, "quantity": 7, "selling_price": 20, "godown_id": self.back}])
+        self.assertEqual(self._on_hand(item_id), {self.back: 18})
+
+    def test_serialized_sale_leaves_the_serials_godown(self):
+        item_id = self._item("Router", is_serialized=True)
+        self._purchase("PB-2", [{"item_id": item_id, "quantity": 2, "purchase_price": 10, "godown_id": self.back,
+                                 "serial_numbers": ["RT-1", "RT-2"]}])
+        serial_id = self._serial("RT-1")['id']
+        self._sale([{"item_id": item_id, "quantity": 1, "selling_price": 20, "serial_ids": [serial_id]}])
+        self.assertEqual(self._on_hand(item_id), {self.back: 1})
+
+    def test_transfer_moves_quantity_and_serials(self):
+        item_id = self._item("Switch", is_serialized=True)
+        self._purchase("PB-3", [{"item_id": item_id, "quantity": 2, "purchase_price": 10, "godown_id": self.main,
+                                 "serial_numbers": ["SW-1", "SW-2"]}])
+        serial_id = self._serial("SW-2")['id']
+        self.assertTrue(db_manager.transfer_stock(item_id, self.main, self.back, None, "2024-04-02", serial_ids=[serial_id]))
+        self.assertEqual(self._on_hand(item_id), {self.main: 1, self.back: 1})
+        self.assertEqual(self._serial("SW-2")['godown_id'], self.back)
+        # The serial is no longer in the main godown, and there is not that much stock left there.
+        self.assertIsNone(db_manager.transfer_stock(item_id, self.main, self.back, None, "2024-04-03", serial_ids=[serial_id]))
+        self.assertIsNone(db_manager.transfer_stock(item_id, self.main, self.back, 5, "2024-04-03"))
+        self.assertEqual(self._on_hand(item_id), {self.main: 1, self.back: 1})
+
+    def test_stock_reports(self):
+        low = self._item("Toner", purchase_price=12.5, min_stock=10, category="Consumables")
+        self._purchase("PB-4", [{"item_id": low, "quantity": 4, "purchase_price": 12.5, "godown_id": self.main}])
+        self.assertIn(("Toner", 4), [(r['name'], r['current_stock']) for r in db_manager.get_low_stock_report()])
+        categories = {r['category']: (r['item_count'], r['stock_count']) for r in db_manager.get_category_stock_report()}
+        self.assertEqual(categories["Consumables"], (1, 4))
+        valuation = {r['name']: r for r in db_manager.get_stock_valuation_report()}
+        self.assertEqual((valuation["Toner"]['quantity'], valuation["Toner"]['value']), (4, 50.0))
+
+    def test_check_and_rebuild_stock_balances(self):
+        item_id = self._item("Mouse")
+        self._purchase("PB-5", [{"item_id": item_id, "quantity": 3, "purchase_price": 10, "godown_id": self.main}])
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("UPDATE stock_balances SET quantity = 99 WHERE item_id = ?", (item_id,))
+        conn.commit()
+        conn.close()
+        mismatches = db_manager.check_stock_balances()
+        self.assertEqual([(m['item_id'], m['ledger_quantity'], m['balance_quantity']) for m in mismatches], [(item_id, 3, 99)])
+        db_manager.rebuild_stock_balances()
+        self.assertEqual(db_manager.check_stock_balances(), [])
+        self.assertEqual(self._on_hand(item_id), {self.main: 3})
+
+class TestStockLedgerMigration(unittest.TestCase):
+
+    def setUp(self):
+        self.db_path = 'db/test_stock_ledger_migration.db'
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+    def tearDown(self):
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+    def test_existing_invoices_are_backfilled(self):
+        conn = sqlite3.connect(self.db_path)
+        for version, step in database_setup.MIGRATIONS:
+            if version <= 9:
+                step(conn)
+        conn.execute("PRAGMA user_version = 9")
+        conn.execute("INSERT INTO godowns (id, name) VALUES (1, 'Main'), (2, 'Annex')")
+        conn.execute("INSERT INTO items (id, name, is_serialized) VALUES (1, 'Bulk', 0), (2, 'Tracked', 1)")
+        conn.execute("INSERT INTO purchase_invoices (id, supplier_id, invoice_number, invoice_date, total_amount) VALUES (1, 1, 'P1', '2024-01-01', 0)")
+        conn.execute("INSERT INTO purchase_invoice_items (purchase_invoice_id, item_id, quantity, purchase_price) VALUES (1, 1, 10, 0), (1, 2, 1, 0)")
+        conn.execute("INSERT INTO item_serial_numbers (item_id, serial_number, status, godown_id, purchase_invoice_id) VALUES (2, 'T-1', 'IN_STOCK', 2, 1)")
+        conn.execute("INSERT INTO sales_invoices (id, customer_id, invoice_number, invoice_date, total_amount) VALUES (1, 1, 'S1', '2024-01-05', 0)")
+        conn.execute("INSERT INTO sales_invoice_items (sales_invoice_id, item_id, quantity, selling_price) VALUES (1, 1, 4, 0)")
+        conn.commit()
+        conn.close()
+
+        setup_database(db_path=self.db_path)
+
+        conn = sqlite3.connect(self.db_path)
+        balances = conn.execute("SELECT item_id, godown_id, quantity FROM stock_balances ORDER BY item_id").fetchall()
+        movements = conn.execute("SELECT COUNT(*) FROM stock_movements").fetchone()[0]
+        conn.close()
+        self.assertEqual(balances, [(1, 1, 6), (2, 2, 1)])
+        self.assertEqual(movements, 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import threading
+import time
+from . import task_runner
+from .task_runner import TaskRunner
+
+class FakeWidget:
+    """Stands in for a Tk widget: after() callbacks run when the test pumps them."""
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, func):
+        self.callbacks.append(func)
+
+    def pump(self, timeout=5):
+        deadline = time.monotonic() + timeout
+        while self.callbacks and time.monotonic() < deadline:
+            func = self.callbacks.pop(0)
+            func()
+            time.sleep(0.001)
+
+class TestTaskRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.widget = FakeWidget()
+        self.tasks = TaskRunner(self.widget)
+
+    def test_result_is_delivered_on_the_polling_thread(self):
+        results, busy = [], []
+        self.tasks.submit("sum", sum, [1, 2, 3], on_result=results.append, on_busy=busy.append)
+        self.assertTrue(self.tasks.is_busy("sum"))
+        self.widget.pump()
+        self.assertEqual(results, [6])
+        self.assertEqual(busy, [True, False])
+        self.assertFalse(self.tasks.is_busy("sum"))
+
+    def test_resubmitting_drops_the_stale_result(self):
+        release = threading.Event()
+        def slow(value):
+            release.wait(5)
+            return value
+
+        results = []
+        self.tasks.submit("search", slow, "old", on_result=results.append)
+        self.tasks.submit("search", slow, "new", on_result=results.append)
+        release.set()
+        self.widget.pump()
+        self.assertEqual(results, ["new"])
+
+    def test_errors_go_to_on_error(self):
+        errors = []
+        def fail():
+            raise ValueError("boom")
+        self.tasks.submit("report", fail, on_result=lambda r: None, on_error=errors.append)
+        self.widget.pump()
+        self.assertEqual([str(e) for e in errors], ["boom"])
+
+        errors.clear()
+        def bad_render(result):
+            raise KeyError("missing")
+        self.tasks.submit("report", int, "4", on_result=bad_render, on_error=errors.append)
+        self.widget.pump()
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], KeyError)
+
+    def test_cancel_ends_busy_state_without_result(self):
+        release = threading.Event()
+        results, busy = [], []
+        self.tasks.submit("load", release.wait, 5, on_result=results.append, on_busy=busy.append)
+        self.tasks.cancel("load")
+        release.set()
+        self.widget.pump()
+        self.assertEqual(results, [])
+        self.assertEqual(busy, [True, False])
+
+    def test_watch_delivers_an_outside_future_without_cancelling_it(self):
+        from concurrent.futures import Future
+        results, busy = [], []
+        posting = Future()
+        self.tasks.watch("save", posting, on_result=results.append, on_busy=busy.append)
+        self.assertTrue(self.tasks.is_busy("save"))
+        posting.set_result(42)
+        self.widget.pump()
+        self.assertEqual((results, busy), ([42], [True, False]))
+
+        posting = Future()
+        self.tasks.watch("save", posting, on_result=results.append)
+        self.tasks.cancel("save")
+        self.assertFalse(posting.cancelled())
+
+    @classmethod
+    def tearDownClass(cls):
+        task_runner.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
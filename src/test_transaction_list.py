@@ -0,0 +1,117 @@
+import unittest
+import os
+from . import db_manager
+from db.database_setup import setup_database
+
+class TestTransactionList(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up a database with invoices and payments sharing dates and ids."""
+        cls.db_path = 'db/test_transaction_list.db'
+        db_manager.DATABASE_PATH = cls.db_path
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+        setup_database(db_path=cls.db_path)
+        db_manager.add_customer("Acme", "", "", "", "", "State", "", "", 0.0)
+        db_manager.add_customer("Zenith", "", "", "", "", "State", "", "", 0.0)
+        db_manager.add_supplier("Parts Co", "", "", "", "", "State")
+        conn = db_manager.get_db_connection()
+        with conn:
+            # Three rows a day for ten days, so pages break in the middle of a date.
+            for day in range(1, 11):
+                date = f"2024-01-{day:02d}"
+                conn.execute("INSERT INTO sales_invoices (customer_id, invoice_number, invoice_date, total_amount) VALUES (?, ?, ?, ?)",
+                             (1 + day % 2, f"INV-{day:02d}", date, day * 100))
+                conn.execute("INSERT INTO purchase_invoices (supplier_id, invoice_number, invoice_date, total_amount) VALUES (1, ?, ?, ?)",
+                             (f"P-{day:02d}", date, day * 50))
+                conn.execute("INSERT INTO customer_payments (customer_id, payment_date, amount) VALUES (?, ?, ?)",
+                             (1 + day % 2, date, day * 10))
+        conn.close()
+
+    def _all_pages(self, filters, limit):
+        rows, cursor = db_manager.get_transactions_page(filters, limit=limit)
+        pages = [rows]
+        while cursor:
+            rows, cursor = db_manager.get_transactions_page(filters, cursor, limit=limit)
+            pages.append(rows)
+        return pages
+
+    def test_pages_cover_the_full_list_in_order(self):
+        expected = [(r['kind'], r['id']) for r in db_manager.get_all_transactions({})]
+        self.assertEqual(len(expected), 30)
+        pages = self._all_pages({}, limit=7)
+        self.assertEqual([len(p) for p in pages], [7, 7, 7, 7, 2])
+        self.assertEqual([(r['kind'], r['id']) for p in pages for r in p], expected)
+        dates = [r['date'] for p in pages for r in p]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+    def test_skip_jumps_ahead_from_a_cursor(self):
+        full = [(r['kind'], r['id']) for r in db_manager.get_all_transactions({})]
+        first, cursor = db_manager.get_transactions_page({}, limit=5)
+        jumped, _ = db_manager.get_transactions_page({}, cursor, limit=5, skip=10)
+        self.assertEqual([(r['kind'], r['id']) for r in jumped], full[15:20])
+
+    def test_opposite_sort_reads_back_from_the_end(self):
+        full = [(r['kind'], r['id']) for r in db_manager.get_all_transactions({})]
+        last, cursor = db_manager.get_transactions_page({}, limit=5, sort='date')
+        self.assertEqual([(r['kind'], r['id']) for r in last], full[:-6:-1])
+        before, _ = db_manager.get_transactions_page({}, cursor, limit=5, skip=3, sort='date')
+        self.assertEqual([(r['kind'], r['id']) for r in before], full[-9:-14:-1])
+
+    def test_count_and_pages_respect_filters(self):
+        filters = {'transaction_type': 'All Transactions', 'start_date': '2024-01-03', 'end_date': '2024-01-06',
+                   'party_type': 'Customer', 'party_id': 1}
+        self.assertEqual(db_manager.get_transactions_count(filters), 4)
+        rows = [r for p in self._all_pages(filters, limit=3) for r in p]
+        self.assertEqual([r['doc_number'] for r in rows], ['Payment #6', 'INV-06', 'Payment #4', 'INV-04'])
+
+    def test_text_filter_matches_party_or_number(self):
+        self.assertEqual(db_manager.get_transactions_count({'text': 'parts'}), 10)
+        rows, cursor = db_manager.get_transactions_page({'text': 'inv-1'})
+        self.assertEqual([r['doc_number'] for r in rows], ['INV-10'])
+        self.assertIsNone(cursor)
+
+    def test_text_filter_matches_every_shown_column(self):
+        self.assertEqual(db_manager.get_transactions_count({'text': '2024-01-03'}), 3)
+        self.assertEqual(db_manager.get_transactions_count({'text': 'payment'}), 10)
+        self.assertEqual(db_manager.get_transactions_count({'text': 'Received'}), 10)
+        rows, _ = db_manager.get_transactions_page({'text': '2.50'})
+        self.assertEqual([r['doc_number'] for r in rows], ['P-05'])
+        conn = db_manager.get_db_connection()
+        with conn:
+            sale_id = conn.execute("INSERT INTO sales_invoices (customer_id, invoice_number, invoice_date, total_amount) VALUES (2, 'BIG', '2023-12-31', 123456750)").lastrowid
+        try:
+            # Amounts match as the list shows them, with or without the thousands separators.
+            for text in ('1,234,567.50', '1234567.5'):
+                rows, _ = db_manager.get_transactions_page({'text': text})
+                self.assertEqual([r['doc_number'] for r in rows], ['BIG'])
+        finally:
+            with conn:
+                conn.execute("DELETE FROM sales_invoices WHERE id = ?", (sale_id,))
+            conn.close()
+
+    def test_amount_sort_pages_in_order(self):
+        rows = [r for p in self._all_pages_sorted('amount', limit=4) for r in p]
+        amounts = [r['total_amount'] for r in rows]
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(amounts, sorted(amounts))
+
+        _, cursor = db_manager.get_transactions_page({}, limit=4, sort='amount')
+        with self.assertRaises(ValueError):
+            db_manager.get_transactions_page({}, cursor, sort='-date')
+
+    def _all_pages_sorted(self, sort, limit):
+        rows, cursor = db_manager.get_transactions_page({}, limit=limit, sort=sort)
+        pages = [rows]
+        while cursor:
+            rows, cursor = db_manager.get_transactions_page({}, cursor, limit=limit, sort=sort)
+            pages.append(rows)
+        return pages
+
+    def test_unknown_type_is_empty(self):
+        self.assertEqual(db_manager.get_transactions_count({'transaction_type': 'Credit Notes'}), 0)
+        self.assertEqual(db_manager.get_transactions_page({'transaction_type': 'Credit Notes'}), ([], None))
+
+if __name__ == '__main__':
+    unittest.main()
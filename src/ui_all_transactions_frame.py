@@ -2,6 +2,10 @@ import customtkinter as ctk
 from tkinter import ttk, messagebox
 import db_manager
 from ui_invoice_detail_dialog import SalesInvoiceDetailDialog
+from task_runner import TaskRunner
+from ui_virtual_treeview import VirtualTreeview
+
+SEARCH_DELAY_MS = 300
 
 class AllTransactionsFrame(ctk.CTkFrame):
     def __init__(self, master):
@@ -9,8 +13,9 @@ class AllTransactionsFrame(ctk.CTkFrame):
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
 
-        self.all_tree_items = []
-        self.transaction_map = {}
+        self.filters = {}
+        self._search_after_id = None
+        self.tasks = TaskRunner(self)
         self.create_filter_widgets()
         self.create_treeview()
         self.load_data()
@@ -48,19 +53,15 @@ class AllTransactionsFrame(ctk.CTkFrame):
         tree_container = ctk.CTkFrame(self)
         tree_container.grid(row=1, column=0, padx=10, pady=(0, 10), sticky="nsew")
         tree_container.grid_columnconfigure(0, weight=1)
-        tree_container.grid_rowconfigure(0, weight=1)
+        tree_container.grid_rowconfigure(1, weight=1)
 
+        # Only the visible rows are ever loaded; pages are fetched as the list scrolls.
         columns = ("date", "type", "doc_number", "party", "amount")
-        self.tree = ttk.Treeview(tree_container, columns=columns, show="headings")
-        for col in columns: self.tree.heading(col, text=col.replace("_", " ").title())
-        self.tree.grid(row=1, column=0, sticky="nsew")
+        self.list_view = VirtualTreeview(tree_container, columns, self._fetch_page, self._format_row, self.tasks)
+        self.list_view.grid(row=1, column=0, sticky="nsew")
+        self.tree = self.list_view.tree
         self.tree.bind("<Double-1>", self.on_drill_down)
 
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(tree_container, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        scrollbar.grid(row=1, column=1, sticky="ns")
-
         # Search bar
         search_frame = ctk.CTkFrame(tree_container, fg_color="transparent")
         search_frame.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
@@ -69,74 +70,81 @@ class AllTransactionsFrame(ctk.CTkFrame):
         self.search_entry = ctk.CTkEntry(search_frame, textvariable=self.search_var)
         self.search_entry.pack(side="left", padx=5, fill="x", expand=True)
         self.search_var.trace_add("write", self.search_transactions)
+        self.count_label = ctk.CTkLabel(search_frame, text="")
+        self.count_label.pack(side="right", padx=10)
 
     def search_transactions(self, *args):
-        search_term = self.search_var.get().lower()
-
-        # We need to re-insert all items to clear previous search, then detach the non-matching ones
-        for iid in self.all_tree_items:
-            self.tree.reattach(iid, '', 'end')
-
-        if not search_term:
-            return
-
-        for iid in self.all_tree_items:
-            item = self.tree.item(iid)
-            values = [str(v).lower() for v in item['values']]
-            if not any(search_term in v for v in values):
-                self.tree.detach(iid)
+        # The search term is a server-side filter; wait for typing to pause before querying.
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+        self._search_after_id = self.after(SEARCH_DELAY_MS, self.apply_filters)
 
     def load_data(self):
-        # Load parties for the dropdown
-        customers = [f"C: {c['name']}" for c in db_manager.get_all_customers()]
-        suppliers = [f"S: {s['name']}" for s in db_manager.get_all_suppliers()]
-        self.party_menu.configure(values=["All"] + customers + suppliers)
-        self.party_menu.set("All")
-
+        self.tasks.submit("parties", self._fetch_parties, on_result=self._show_parties)
         # Load initial transactions
         self.apply_filters()
 
-    def apply_filters(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+    @staticmethod
+    def _fetch_parties():
+        customers = [f"C: {c['name']}" for c in db_manager.get_reference_rows("customers")]
+        suppliers = [f"S: {s['name']}" for s in db_manager.get_reference_rows("suppliers")]
+        return customers + suppliers
+
+    def _show_parties(self, parties):
+        self.party_menu.configure(values=["All"] + parties)
+        self.party_menu.set("All")
 
+    def apply_filters(self):
+        self._search_after_id = None
         filters = {
             "transaction_type": self.type_var.get(),
             "start_date": self.start_date_entry.get() or None,
             "end_date": self.end_date_entry.get() or None,
+            "text": self.search_var.get().strip() or None,
         }
-
-        party_selection = self.party_var.get()
+        # Re-applying while a query is running replaces it; only the latest filters are shown.
+        self.tasks.submit("transactions", self._fetch_transactions, filters, self.party_var.get(),
+                          on_result=self._show_transactions, on_busy=self._set_busy,
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to load transactions: {e}", parent=self))
+
+    @staticmethod
+    def _fetch_transactions(filters, party_selection):
+        """Runs on a worker thread: resolves the party filter, counts, and fetches the first page."""
         if party_selection != "All":
             party_type_char, party_name = party_selection.split(": ", 1)
             if party_type_char == "C":
                 filters['party_type'] = "Customer"
-                party = next((p for p in db_manager.get_all_customers() if p['name'] == party_name), None)
+                party = db_manager.find_reference_row("customers", party_name)
                 if party: filters['party_id'] = party['id']
             elif party_type_char == "S":
                 filters['party_type'] = "Supplier"
-                party = next((p for p in db_manager.get_all_suppliers() if p['name'] == party_name), None)
+                party = db_manager.find_reference_row("suppliers", party_name)
                 if party: filters['party_id'] = party['id']
+        first_page = db_manager.get_transactions_page(filters)
+        return filters, db_manager.get_transactions_count(filters), first_page
+
+    def _set_busy(self, busy):
+        self.apply_button.configure(text="Loading..." if busy else "Apply Filters")
 
-        transactions = db_manager.get_all_transactions(filters)
+    def _show_transactions(self, result):
+        self.filters, total, first_page = result
+        self.count_label.configure(text=f"{total:,} transactions")
+        self.list_view.reset(total, first_page)
 
-        self.all_tree_items.clear()
-        self.transaction_map.clear()
-        for trans in transactions:
-            iid = self.tree.insert("", "end", values=(trans['date'], trans['type'], trans['doc_number'], trans['party_name'], f"{trans['total_amount']:,.2f}"))
-            self.all_tree_items.append(iid)
-            self.transaction_map[iid] = trans
+    def _fetch_page(self, cursor, limit, skip, reverse):
+        """Runs on a worker thread. Reading from the end is the same list in the opposite sort."""
+        return db_manager.get_transactions_page(self.filters, cursor, limit, skip, 'date' if reverse else '-date')
 
-        # After populating, run the search to apply any existing search term
-        self.search_transactions()
+    @staticmethod
+    def _format_row(trans):
+        return (trans['date'], trans['type'], trans['doc_number'], trans['party_name'], f"{trans['total_amount']:,.2f}")
 
     def on_drill_down(self, event):
         item_id = self.tree.focus()
         if not item_id:
             return
 
-        # The iid is the key in our transaction map
-        transaction = self.transaction_map.get(item_id)
+        transaction = self.list_view.selected_row()
         if not transaction:
             return
 
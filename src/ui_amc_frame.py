@@ -357,8 +357,7 @@ class AMCFrame(ctk.CTkFrame):
                 
                 # Create new AMC (renewal)
                 customer_id = None  # We need to get customer ID from customer name
-                customers = db_manager.get_all_customers()
-                customer = next((c for c in customers if c['name'] == amc[1]), None)
+                customer = db_manager.find_reference_row("customers", amc[1])
                 if customer:
                     customer_id = customer['id']
                 
@@ -402,7 +401,7 @@ class AMCFrame(ctk.CTkFrame):
 
     def load_table_data(self):
         """Load data for table view"""
-        self.customers = db_manager.get_all_customers()
+        self.customers = db_manager.get_reference_rows("customers")
         self.customer_combo.configure(values=[c['name'] for c in self.customers])
         self.load_amcs()
         self.clear_service_calls()
@@ -443,7 +442,7 @@ class AMCFrame(ctk.CTkFrame):
 
     def add_amc(self):
         cust_name = self.customer_combo.get()
-        customer = next((c for c in self.customers if c['name'] == cust_name), None)
+        customer = db_manager.find_reference_row("customers", cust_name)
         if not customer: return messagebox.showerror("Error", "Invalid customer.")
         try:
             value = float(self.value_entry.get())
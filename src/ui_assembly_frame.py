@@ -56,6 +56,18 @@ class AssemblyFrame(ctk.CTkFrame):
         self.create_build_button = ctk.CTkButton(right_frame, text="Create Assembly", command=self.create_assembly)
         self.create_build_button.pack(pady=10, padx=5, side="bottom", fill="x")
 
+        # --- Bottom Panel: Batch Build from a stored bill of materials ---
+        batch_frame = ctk.CTkFrame(self)
+        batch_frame.grid(row=2, column=0, columnspan=3, padx=10, pady=(0, 10), sticky="ew")
+        ctk.CTkLabel(batch_frame, text="Batch Build:").pack(side="left", padx=5)
+        self.batch_item_var = ctk.StringVar(value="")
+        self.batch_item_menu = ctk.CTkOptionMenu(batch_frame, variable=self.batch_item_var, values=[""])
+        self.batch_item_menu.pack(side="left", padx=5)
+        ctk.CTkLabel(batch_frame, text="Units:").pack(side="left", padx=5)
+        self.batch_count_entry = ctk.CTkEntry(batch_frame, width=60)
+        self.batch_count_entry.pack(side="left", padx=5)
+        ctk.CTkButton(batch_frame, text="Build", width=80, command=self.build_batch).pack(side="left", padx=5)
+
     def create_treeview(self, parent, columns):
         tree = ttk.Treeview(parent, columns=columns, show="headings")
         for col in columns:
@@ -69,6 +81,8 @@ class AssemblyFrame(ctk.CTkFrame):
     def load_available_components(self):
         self.available_components = db_manager.get_in_stock_serial_numbers()
         self.filter_components()
+        self.assembled_items = {i['name']: i['id'] for i in db_manager.get_reference_rows("items") if i['is_assembled_item']}
+        self.batch_item_menu.configure(values=list(self.assembled_items) or [""])
 
     def filter_components(self, event=None):
         search_term = self.search_entry.get().lower()
@@ -140,6 +154,26 @@ class AssemblyFrame(ctk.CTkFrame):
         else:
             messagebox.showerror("Error", "Failed to create assembly. Check logs for details.")
 
+    def build_batch(self):
+        item_id = self.assembled_items.get(self.batch_item_var.get())
+        if item_id is None:
+            messagebox.showerror("Error", "Please select an assembled item to build.")
+            return
+        try:
+            count = int(self.batch_count_entry.get())
+        except ValueError:
+            messagebox.showerror("Error", "Please enter the number of units to build.")
+            return
+
+        serial_numbers = db_manager.build_assemblies(item_id, count)
+
+        if serial_numbers:
+            messagebox.showinfo("Success", f"Built {len(serial_numbers)} units: {serial_numbers[0]} to {serial_numbers[-1]}")
+            self.batch_count_entry.delete(0, "end")
+            self.load_available_components()
+        else:
+            messagebox.showerror("Error", "Failed to build. Check that the item has a bill of materials and enough components in stock.")
+
     def load_data(self):
         """Public method to be called when switching to this frame."""
         self.load_available_components()
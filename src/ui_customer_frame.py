@@ -194,7 +194,7 @@ class CustomerFrame(ctk.CTkFrame):
         self.customer_cards = []
         
         # Get customers from database
-        customers = db_manager.get_all_customers()
+        customers = db_manager.get_reference_rows("customers")
         
         # Filter customers if search term provided
         if search_term:
@@ -303,7 +303,7 @@ class CustomerFrame(ctk.CTkFrame):
         """Load customers into the table view"""
         for item in self.tree.get_children(): 
             self.tree.delete(item)
-        customers = db_manager.get_all_customers()
+        customers = db_manager.get_reference_rows("customers")
         for customer in customers: 
             self.tree.insert("", "end", values=tuple(customer))
 
@@ -326,7 +326,7 @@ class CustomerFrame(ctk.CTkFrame):
 
     def load_customers(self):
         for item in self.tree.get_children(): self.tree.delete(item)
-        customers = db_manager.get_all_customers()
+        customers = db_manager.get_reference_rows("customers")
         for customer in customers: self.tree.insert("", "end", values=tuple(customer))
         self.clear_form()
         
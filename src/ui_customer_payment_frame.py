@@ -1,6 +1,7 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
 import db_manager
+from task_runner import TaskRunner
 from ui_payment_allocation_dialog import PaymentAllocationDialog
 import datetime
 
@@ -18,6 +19,7 @@ XERO_ORANGE = "#F59E0B"
 class CustomerPaymentFrame(ctk.CTkFrame):
     def __init__(self, master):
         super().__init__(master, corner_radius=0, fg_color=XERO_LIGHT_GRAY)
+        self.tasks = TaskRunner(self)
         self.create_widgets()
 
     def create_widgets(self):
@@ -235,7 +237,7 @@ class CustomerPaymentFrame(ctk.CTkFrame):
 
     def load_data(self):
         """Called when the frame is shown"""
-        self.customers = db_manager.get_all_customers()
+        self.customers = db_manager.get_reference_rows("customers")
         self.customer_combo.configure(values=[c['name'] for c in self.customers])
         if self.customers:
             self.customer_combo.set(self.customers[0]['name'])
@@ -253,7 +255,7 @@ class CustomerPaymentFrame(ctk.CTkFrame):
 
     def customer_selected(self, customer_name):
         """Handle customer selection"""
-        customer = next((c for c in self.customers if c['name'] == customer_name), None)
+        customer = db_manager.find_reference_row("customers", customer_name)
         if customer:
             self.clear_invoice_tree()
             invoices = db_manager.get_unpaid_sales_invoices(customer['id'])
@@ -292,6 +294,8 @@ class CustomerPaymentFrame(ctk.CTkFrame):
 
     def save_payment(self):
         """Save the customer payment"""
+        if self.tasks.is_busy("save"):
+            return
         customer_name = self.customer_combo.get()
         amount_str = self.amount_entry.get()
         payment_date = self.date_entry.get()
@@ -307,7 +311,7 @@ class CustomerPaymentFrame(ctk.CTkFrame):
         except ValueError:
             return messagebox.showerror("Validation Error", "Payment amount must be a positive number.")
 
-        customer = next((c for c in self.customers if c['name'] == customer_name), None)
+        customer = db_manager.find_reference_row("customers", customer_name)
         if not customer:
             return messagebox.showerror("Error", "Invalid customer selected.")
 
@@ -322,11 +326,17 @@ class CustomerPaymentFrame(ctk.CTkFrame):
         if not allocations:
             return  # User cancelled or allocated nothing
 
-        # Save payment with allocations
-        payment_id = db_manager.record_customer_payment(customer['id'], payment_date, payment_amount, allocations)
+        # Save payment with allocations; the result comes back through the posting queue
+        self.tasks.watch("save", db_manager.submit_posting('customer_payment', customer['id'], payment_date, payment_amount, allocations),
+                         on_result=self._payment_saved, on_error=self._save_failed, on_busy=self._set_saving)
 
-        if payment_id:
-            messagebox.showinfo("Payment Recorded", f"Payment successfully recorded with ID: {payment_id}")
-            self.load_data()  # Refresh the form
-        else:
-            messagebox.showerror("Error", "Failed to record payment. Please check the logs for details.")
+    def _payment_saved(self, payment_id):
+        messagebox.showinfo("Payment Recorded", f"Payment successfully recorded with ID: {payment_id}")
+        self.load_data()  # Refresh the form
+
+    def _save_failed(self, error):
+        print(f"Error posting customer_payment: {error}")
+        messagebox.showerror("Error", "Failed to record payment. Please check the logs for details.")
+
+    def _set_saving(self, busy):
+        self.save_button.configure(state="disabled" if busy else "normal", text="Saving..." if busy else "💰 Allocate & Save Payment")
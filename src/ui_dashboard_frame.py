@@ -1,5 +1,6 @@
 import customtkinter as ctk
 import db_manager
+from task_runner import TaskRunner
 
 # Xero-inspired color scheme
 XERO_BLUE = "#13B5EA"
@@ -16,6 +17,7 @@ XERO_ORANGE = "#F59E0B"
 class DashboardFrame(ctk.CTkFrame):
     def __init__(self, master):
         super().__init__(master, corner_radius=0, fg_color=XERO_LIGHT_GRAY)
+        self.tasks = TaskRunner(self)
         self.create_widgets()
         self.load_data()
 
@@ -243,31 +245,42 @@ class DashboardFrame(ctk.CTkFrame):
 
     def load_data(self):
         """Load and display dashboard data"""
-        try:
-            # Load financial metrics
-            self.load_financial_metrics()
-            
-            # Load top customers
-            self.load_top_customers()
-            
-            # Load top suppliers
-            self.load_top_suppliers()
-            
-            # Load recent activity
-            self.load_recent_activity()
-            
-        except Exception as e:
-            print(f"Error loading dashboard data: {e}")
-            self.load_default_data()
+        # The summary queries run in the background; the cards fill in when they return.
+        self.tasks.submit("summary", self.fetch_summary, on_result=self.show_summary,
+                          on_error=self._summary_failed, on_busy=self._set_busy)
 
-    def load_financial_metrics(self):
-        """Load financial metrics from database"""
+        # Load top customers
+        self.load_top_customers()
+
+        # Load top suppliers
+        self.load_top_suppliers()
+
+    @staticmethod
+    def fetch_summary():
+        """Runs on a worker thread."""
+        return {
+            "sales": db_manager.get_monthly_sales_summary(),
+            "purchases": db_manager.get_monthly_purchase_summary(),
+            "receivables": db_manager.get_overdue_receivables_summary(),
+            "activities": db_manager.get_recent_activities(limit=10),
+        }
+
+    def show_summary(self, summary):
+        self.load_financial_metrics(summary["sales"], summary["purchases"], summary["receivables"])
+        self.load_recent_activity(summary["activities"])
+
+    def _summary_failed(self, error):
+        print(f"Error loading dashboard data: {error}")
+        self.load_default_data()
+
+    def _set_busy(self, busy):
+        if busy:
+            for card in (self.revenue_card, self.expenses_card, self.profit_card, self.outstanding_card):
+                card["value_label"].configure(text="...")
+
+    def load_financial_metrics(self, sales_data, purchase_data, receivables_data):
+        """Fill the metric cards from the monthly summaries"""
         try:
-            # Get current month data
-            sales_data = db_manager.get_monthly_sales_summary()
-            purchase_data = db_manager.get_monthly_purchase_summary()
-            receivables_data = db_manager.get_overdue_receivables_summary()
-            
             # Update revenue card
             revenue = sales_data.get('total', 0) if sales_data else 0
             self.revenue_card["value_label"].configure(text=f"₹{revenue:,.0f}")
@@ -351,15 +364,13 @@ class DashboardFrame(ctk.CTkFrame):
         except Exception as e:
             print(f"Error loading top suppliers: {e}")
 
-    def load_recent_activity(self):
-        """Load recent activity feed"""
+    def load_recent_activity(self, activities):
+        """Show the recent activity feed"""
         try:
             # Clear existing activity
             for widget in self.activity_list.winfo_children():
                 widget.destroy()
             
-            # Get recent activities
-            activities = db_manager.get_recent_activities(limit=10) if hasattr(db_manager, 'get_recent_activities') else []
             
             if not activities:
                 # Sample activities
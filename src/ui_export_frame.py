@@ -1,14 +1,15 @@
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 import db_manager
-import csv_generator
-import pdf_generator
+from task_runner import TaskRunner
 import datetime
+import itertools
 
 class ExportFrame(ctk.CTkFrame):
     def __init__(self, master):
         super().__init__(master, corner_radius=0)
         self.grid_columnconfigure(0, weight=1)
+        self.tasks = TaskRunner(self)
 
         ctk.CTkLabel(self, text="Export Data", font=ctk.CTkFont(size=16, weight="bold")).pack(anchor="w", padx=10, pady=10)
 
@@ -30,6 +31,8 @@ class ExportFrame(ctk.CTkFrame):
         self.export_button.grid(row=2, column=1, padx=10, pady=20, sticky="e")
 
     def export_data(self):
+        if self.tasks.is_busy("export"):
+            return  # The file from the running export is still being written
         data_type = self.data_type_var.get()
         export_format = self.format_var.get().lower()
 
@@ -46,46 +49,55 @@ class ExportFrame(ctk.CTkFrame):
         if not file_path:
             return
 
+        # Streaming fetches: CSV rows are written as they are read, so large exports stay small in memory.
         fetch_functions = {
-            "Items": db_manager.get_items_for_export,
-            "Customers": db_manager.get_customers_for_export,
-            "Suppliers": db_manager.get_suppliers_for_export,
-            "Sales Invoices": db_manager.get_sales_invoices_for_export,
-            "Purchase Invoices": db_manager.get_purchase_invoices_for_export,
+            "Items": db_manager.iter_items_for_export,
+            "Customers": db_manager.iter_customers_for_export,
+            "Suppliers": db_manager.iter_suppliers_for_export,
+            "Sales Invoices": db_manager.iter_sales_invoices_for_export,
+            "Purchase Invoices": db_manager.iter_purchase_invoices_for_export,
         }
 
         fetch_function = fetch_functions.get(data_type)
         if not fetch_function:
             messagebox.showerror("Error", f"No export function defined for '{data_type}'.", parent=self)
             return
+        if export_format not in ("csv", "pdf"):
+            messagebox.showerror("Error", f"Unsupported format: {export_format}", parent=self)
+            return
 
-        try:
-            data_to_export = fetch_function()
-            if not data_to_export:
-                messagebox.showinfo("No Data", f"There is no data for '{data_type}' to export.", parent=self)
-                return
-
-            if export_format == "csv":
-                success, error_msg = csv_generator.export_to_csv(data_to_export, file_path)
-                if success:
-                    messagebox.showinfo("Success", f"{data_type} exported to CSV successfully.", parent=self)
-                else:
-                    messagebox.showerror("Export Error", f"Failed to export to CSV: {error_msg}", parent=self)
-
-            elif export_format == "pdf":
-                title = f"{data_type} Report - {timestamp}"
-                success, error_msg = pdf_generator.export_to_pdf(data_to_export, file_path, title)
-                if success:
-                    messagebox.showinfo("Success", f"{data_type} exported to PDF successfully.", parent=self)
-                else:
-                    messagebox.showerror("Export Error", f"Failed to export to PDF: {error_msg}", parent=self)
-
-            else:
-                messagebox.showerror("Error", f"Unsupported format: {export_format}", parent=self)
-
-        except Exception as e:
-            messagebox.showerror("Error", f"An unexpected error occurred during export: {e}", parent=self)
-
+        title = f"{data_type} Report - {timestamp}"
+        self.tasks.submit("export", self._write_export, fetch_function, export_format, file_path, title,
+                          on_result=lambda result: self._show_export_result(data_type, export_format, result),
+                          on_error=lambda e: messagebox.showerror("Error", f"An unexpected error occurred during export: {e}", parent=self),
+                          on_busy=self._set_busy)
+
+    @staticmethod
+    def _write_export(fetch_function, export_format, file_path, title):
+        """Runs on a worker thread. Returns None if there is nothing to export, else (success, error_msg)."""
+        rows = fetch_function()
+        first_row = next(rows, None)
+        if first_row is None:
+            return None
+        data_to_export = itertools.chain((first_row,), rows)
+        if export_format == "csv":
+            import csv_generator
+            return csv_generator.export_to_csv(data_to_export, file_path)
+        import pdf_generator  # reportlab loads only when a PDF is actually produced
+        return pdf_generator.export_to_pdf(list(data_to_export), file_path, title)
+
+    def _show_export_result(self, data_type, export_format, result):
+        if result is None:
+            messagebox.showinfo("No Data", f"There is no data for '{data_type}' to export.", parent=self)
+            return
+        success, error_msg = result
+        if success:
+            messagebox.showinfo("Success", f"{data_type} exported to {export_format.upper()} successfully.", parent=self)
+        else:
+            messagebox.showerror("Export Error", f"Failed to export to {export_format.upper()}: {error_msg}", parent=self)
+
+    def _set_busy(self, busy):
+        self.export_button.configure(state="disabled" if busy else "normal", text="Exporting..." if busy else "Export Data")
 
     def load_data(self):
         # This frame doesn't need to load any data from the DB to be displayed
@@ -1,11 +1,13 @@
 import customtkinter as ctk
+import datetime
 from tkinter import ttk, messagebox
 import db_manager
-import pdf_generator
+from task_runner import TaskRunner
 
 class FinancialReportsFrame(ctk.CTkFrame):
     def __init__(self, master):
         super().__init__(master, corner_radius=0)
+        self.tasks = TaskRunner(self)
         self.create_widgets()
 
     def create_widgets(self):
@@ -27,6 +29,9 @@ class FinancialReportsFrame(ctk.CTkFrame):
         self.end_date_entry = ctk.CTkEntry(controls_frame, placeholder_text="YYYY-MM-DD")
         self.end_date_entry.pack(side="left", padx=5)
 
+        self.status_label = ctk.CTkLabel(controls_frame, text="")
+        self.status_label.pack(side="left", padx=5)
+
         ctk.CTkButton(controls_frame, text="Generate P&L", command=self.generate_pl).pack(side="left", padx=10)
         ctk.CTkButton(controls_frame, text="Generate Balance Sheet", command=self.generate_bs).pack(side="left", padx=10)
         ctk.CTkButton(controls_frame, text="Generate GSTR-1", command=self.generate_gstr1).pack(side="left", padx=10)
@@ -46,11 +51,26 @@ class FinancialReportsFrame(ctk.CTkFrame):
         self.end_date_entry.insert(0, today.isoformat())
         self.report_textbox.delete("1.0", "end")
 
+    def _run_report(self, query, args, render, label):
+        """Runs a report query in the background; a newer report request replaces an older one."""
+        def on_error(error):
+            messagebox.showerror("Error", f"Failed to generate {label} report: {error}", parent=self)
+        self.tasks.submit("report", query, *args, on_result=render, on_error=on_error, on_busy=self._set_busy)
+
+    def _set_busy(self, busy):
+        self.status_label.configure(text="Loading..." if busy else "")
+
+    def _show_report(self, report):
+        self.report_textbox.delete("1.0", "end")
+        self.report_textbox.insert("1.0", report)
+
     def generate_pl(self):
         start_date = self.start_date_entry.get()
         end_date = self.end_date_entry.get()
-        data = db_manager.get_profit_and_loss_data(start_date, end_date)
+        self._run_report(db_manager.get_profit_and_loss_data, (start_date, end_date),
+                         lambda data: self.render_pl(start_date, end_date, data), "P&L")
 
+    def render_pl(self, start_date, end_date, data):
         report = f"Profit & Loss Statement\nFrom {start_date} to {end_date}\n"
         report += "="*40 + "\n\n"
 
@@ -77,83 +97,78 @@ class FinancialReportsFrame(ctk.CTkFrame):
         report += f"{'Net Profit':<25} {net_profit:10.2f}\n"
         report += "="*40 + "\n"
 
-        self.report_textbox.delete("1.0", "end")
-        self.report_textbox.insert("1.0", report)
+        self._show_report(report)
 
     def generate_gstr1(self):
         start_date = self.start_date_entry.get()
         end_date = self.end_date_entry.get()
-        try:
-            data = db_manager.get_gstr1_report_data(start_date, end_date)
-
-            report = f"GSTR-1 Summary Report\nFrom {start_date} to {end_date}\n"
-            report += "="*80 + "\n\n"
-
-            # B2B Invoices
-            report += "B2B Invoices (Registered Customers):\n"
-            report += f"{'GSTIN':<16} {'Inv No.':<15} {'Date':<11} {'Value':>12} {'Taxable':>12}\n"
-            report += "-"*80 + "\n"
-            if data['b2b']:
-                for inv in data['b2b']:
-                    report += f"{inv['customer_gstin']:<16} {inv['invoice_number']:<15} {inv['invoice_date']:<11} {inv['total_amount']:12.2f} {inv['taxable_amount']:12.2f}\n"
-            else:
-                report += "No B2B invoices in this period.\n"
-            report += "\n" + "="*80 + "\n\n"
-
-            # B2C Summary
-            report += "B2C Summary (Unregistered Customers):\n"
-            report += f"{'Place of Supply':<20} {'Rate (%)':<10} {'Taxable Value':>18} {'IGST':>12} {'CGST':>12} {'SGST':>12}\n"
-            report += "-"*80 + "\n"
-            if data['b2c_summary']:
-                for summary in data['b2c_summary']:
-                    report += f"{summary['place_of_supply']:<20} {summary['total_rate']:<10.2f} {summary['total_taxable_value']:18.2f} {summary['total_igst']:12.2f} {summary['total_cgst']:12.2f} {summary['total_sgst']:12.2f}\n"
-            else:
-                report += "No B2C sales in this period.\n"
-
-            self.report_textbox.delete("1.0", "end")
-            self.report_textbox.insert("1.0", report)
-
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate GSTR-1 report: {e}", parent=self)
+        self._run_report(db_manager.get_gstr1_report_data, (start_date, end_date),
+                         lambda data: self.render_gstr1(start_date, end_date, data), "GSTR-1")
+
+    def render_gstr1(self, start_date, end_date, data):
+        report = f"GSTR-1 Summary Report\nFrom {start_date} to {end_date}\n"
+        report += "="*80 + "\n\n"
+
+        # B2B Invoices
+        report += "B2B Invoices (Registered Customers):\n"
+        report += f"{'GSTIN':<16} {'Inv No.':<15} {'Date':<11} {'Value':>12} {'Taxable':>12}\n"
+        report += "-"*80 + "\n"
+        if data['b2b']:
+            for inv in data['b2b']:
+                report += f"{inv['customer_gstin']:<16} {inv['invoice_number']:<15} {inv['invoice_date']:<11} {inv['total_amount']:12.2f} {inv['taxable_amount']:12.2f}\n"
+        else:
+            report += "No B2B invoices in this period.\n"
+        report += "\n" + "="*80 + "\n\n"
+
+        # B2C Summary
+        report += "B2C Summary (Unregistered Customers):\n"
+        report += f"{'Place of Supply':<20} {'Rate (%)':<10} {'Taxable Value':>18} {'IGST':>12} {'CGST':>12} {'SGST':>12}\n"
+        report += "-"*80 + "\n"
+        if data['b2c_summary']:
+            for summary in data['b2c_summary']:
+                report += f"{summary['place_of_supply']:<20} {summary['total_rate']:<10.2f} {summary['total_taxable_value']:18.2f} {summary['total_igst']:12.2f} {summary['total_cgst']:12.2f} {summary['total_sgst']:12.2f}\n"
+        else:
+            report += "No B2C sales in this period.\n"
+
+        self._show_report(report)
 
     def generate_gstr3b(self):
         start_date = self.start_date_entry.get()
         end_date = self.end_date_entry.get()
-        try:
-            data = db_manager.get_gstr3b_report_data(start_date, end_date)
-            outward = data.get('outward_supplies', {})
-            itc = data.get('itc_details', {})
+        self._run_report(db_manager.get_gstr3b_report_data, (start_date, end_date),
+                         lambda data: self.render_gstr3b(start_date, end_date, data), "GSTR-3B")
 
-            report = f"GSTR-3B Summary Report\nFrom {start_date} to {end_date}\n"
-            report += "="*60 + "\n\n"
+    def render_gstr3b(self, start_date, end_date, data):
+        outward = data.get('outward_supplies', {})
+        itc = data.get('itc_details', {})
 
-            report += "3.1 Details of Outward Supplies and inward supplies liable to reverse charge\n"
-            report += "-"*60 + "\n"
-            report += f"{'Description':<25} {'Taxable Value':>15} {'IGST':>10} {'CGST':>10} {'SGST':>10}\n"
-            report += "-"*60 + "\n"
-            report += f"{'(a) Outward taxable supplies':<25} {outward.get('total_taxable', 0):15.2f} {outward.get('total_igst', 0):10.2f} {outward.get('total_cgst', 0):10.2f} {outward.get('total_sgst', 0):10.2f}\n"
-            report += "\n" + "="*60 + "\n\n"
+        report = f"GSTR-3B Summary Report\nFrom {start_date} to {end_date}\n"
+        report += "="*60 + "\n\n"
 
-            report += "4. Eligible ITC\n"
-            report += "-"*60 + "\n"
-            report += f"{'Description':<25} {'Taxable Value':>15} {'IGST':>10} {'CGST':>10} {'SGST':>10}\n"
-            report += "-"*60 + "\n"
-            report += f"{'(A) All other ITC':<25} {itc.get('total_taxable', 0):15.2f} {itc.get('total_igst', 0):10.2f} {itc.get('total_cgst', 0):10.2f} {itc.get('total_sgst', 0):10.2f}\n"
+        report += "3.1 Details of Outward Supplies and inward supplies liable to reverse charge\n"
+        report += "-"*60 + "\n"
+        report += f"{'Description':<25} {'Taxable Value':>15} {'IGST':>10} {'CGST':>10} {'SGST':>10}\n"
+        report += "-"*60 + "\n"
+        report += f"{'(a) Outward taxable supplies':<25} {outward.get('total_taxable', 0):15.2f} {outward.get('total_igst', 0):10.2f} {outward.get('total_cgst', 0):10.2f} {outward.get('total_sgst', 0):10.2f}\n"
+        report += "\n" + "="*60 + "\n\n"
 
-            self.report_textbox.delete("1.0", "end")
-            self.report_textbox.insert("1.0", report)
+        report += "4. Eligible ITC\n"
+        report += "-"*60 + "\n"
+        report += f"{'Description':<25} {'Taxable Value':>15} {'IGST':>10} {'CGST':>10} {'SGST':>10}\n"
+        report += "-"*60 + "\n"
+        report += f"{'(A) All other ITC':<25} {itc.get('total_taxable', 0):15.2f} {itc.get('total_igst', 0):10.2f} {itc.get('total_cgst', 0):10.2f} {itc.get('total_sgst', 0):10.2f}\n"
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate GSTR-3B report: {e}", parent=self)
+        self._show_report(report)
 
     def generate_bs(self):
         as_of_date = self.end_date_entry.get()
-        data = db_manager.get_balance_sheet_data(as_of_date)
+        self._run_report(db_manager.get_balance_sheet_data, (as_of_date,),
+                         lambda data: self.render_bs(as_of_date, data), "Balance Sheet")
 
+    def render_bs(self, as_of_date, data):
         # ... (similar logic to generate balance sheet text) ...
         report = f"Balance Sheet\nAs of {as_of_date}\n"
         report += "="*40 + "\n"
         report += "Assets, Liabilities, and Equity calculation not fully implemented in this placeholder."
 
-        self.report_textbox.delete("1.0", "end")
-        self.report_textbox.insert("1.0", report)
+        self._show_report(report)
@@ -89,7 +89,7 @@ class HSNFrame(ctk.CTkFrame):
     def load_gst_slabs(self):
         """Loads GST slabs and populates the option menu."""
         try:
-            self.gst_slabs = db_manager.get_all_gst_slabs()
+            self.gst_slabs = db_manager.get_reference_rows("gst_slabs")
             self.gst_slab_map = {f"{slab['rate']}% - {slab['description']}": slab['id'] for slab in self.gst_slabs}
             self.gst_slab_id_map = {slab['id']: f"{slab['rate']}% - {slab['description']}" for slab in self.gst_slabs}
 
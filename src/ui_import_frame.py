@@ -1,8 +1,6 @@
 import customtkinter as ctk
 from tkinter import ttk, filedialog, messagebox
 import db_manager
-import csv_generator
-import csv_validator
 import os
 
 class ImportFrame(ctk.CTkFrame):
@@ -58,6 +56,7 @@ class ImportFrame(ctk.CTkFrame):
         self.commit_button.pack(side="left", padx=10)
 
     def download_template(self):
+        import csv_generator
         data_type = self.data_type_var.get()
 
         template_functions = {
@@ -85,6 +84,7 @@ class ImportFrame(ctk.CTkFrame):
 
         self.upload_path_label.configure(text=os.path.basename(file_path))
         data_type = self.data_type_var.get()
+        import csv_validator
 
         validation_functions = {
             "Items": csv_validator.validate_items_csv,
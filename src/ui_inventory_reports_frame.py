@@ -1,10 +1,18 @@
 import customtkinter as ctk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 import db_manager
+from task_runner import TaskRunner
 
 class InventoryReportsFrame(ctk.CTkFrame):
+    REPORT_QUERIES = {
+        "Low Stock": db_manager.get_low_stock_report,
+        "Stock by Category": db_manager.get_category_stock_report,
+        "Stock Valuation": db_manager.get_stock_valuation_report,
+    }
+
     def __init__(self, master):
         super().__init__(master, corner_radius=0)
+        self.tasks = TaskRunner(self)
         self.create_widgets()
 
     def create_widgets(self):
@@ -18,9 +26,11 @@ class InventoryReportsFrame(ctk.CTkFrame):
         report_frame = ctk.CTkFrame(self)
         report_frame.grid(row=0, column=0, padx=10, pady=10, sticky="e")
 
-        reports = ["Low Stock", "Stock by Category"]
+        reports = ["Low Stock", "Stock by Category", "Stock Valuation"]
         self.report_combo = ctk.CTkComboBox(report_frame, values=reports, command=self.load_report_data)
-        self.report_combo.pack()
+        self.status_label = ctk.CTkLabel(report_frame, text="")
+        self.status_label.pack(side="left", padx=10)
+        self.report_combo.pack(side="left")
         self.report_combo.set("Low Stock")
 
         # --- Treeview for report ---
@@ -34,21 +44,34 @@ class InventoryReportsFrame(ctk.CTkFrame):
     def load_report_data(self, report_type=None):
         if report_type is None:
             report_type = self.report_combo.get()
+        # Choosing another report while one is loading replaces it.
+        self.tasks.submit("report", self.REPORT_QUERIES[report_type],
+                          on_result=lambda data: self._show_report(report_type, data),
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to load {report_type} report: {e}", parent=self),
+                          on_busy=self._set_busy)
+
+    def _set_busy(self, busy):
+        self.status_label.configure(text="Loading..." if busy else "")
 
+    def _show_report(self, report_type, data):
         for item in self.tree.get_children():
             self.tree.delete(item)
 
         if report_type == "Low Stock":
             self.tree["columns"] = ("id", "name", "min_stock", "current_stock")
             for col in self.tree["columns"]: self.tree.heading(col, text=col.title())
-            data = db_manager.get_low_stock_report()
             for row in data:
-                # The current_stock is not calculated yet in the placeholder function
-                self.tree.insert("", "end", values=(row['id'], row['name'], row['minimum_stock_level'], 'N/A'))
+                self.tree.insert("", "end", values=(row['id'], row['name'], row['minimum_stock_level'], f"{row['current_stock']:g}"))
 
         elif report_type == "Stock by Category":
-            self.tree["columns"] = ("category", "item_count")
+            self.tree["columns"] = ("category", "item_count", "stock_count")
             for col in self.tree["columns"]: self.tree.heading(col, text=col.title())
-            data = db_manager.get_category_stock_report()
             for row in data:
-                self.tree.insert("", "end", values=(row['category'], row['item_count']))
+                self.tree.insert("", "end", values=(row['category'], row['item_count'], f"{row['stock_count']:g}"))
+
+        elif report_type == "Stock Valuation":
+            self.tree["columns"] = ("name", "category", "quantity", "unit_cost", "value")
+            for col in self.tree["columns"]: self.tree.heading(col, text=col.replace("_", " ").title())
+            for row in data:
+                self.tree.insert("", "end", values=(row['name'], row['category'], f"{row['quantity']:g}",
+                                                    f"{row['unit_cost'] or 0:,.2f}", f"{row['value']:,.2f}"))
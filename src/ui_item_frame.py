@@ -191,7 +191,7 @@ class ItemFrame(ctk.CTkFrame):
         self.item_cards = []
         
         # Get items from database
-        items = db_manager.get_all_items()
+        items = db_manager.get_reference_rows("items")
         
         # Filter items if search term provided
         if search_term:
@@ -301,7 +301,7 @@ class ItemFrame(ctk.CTkFrame):
         """Load items into the table view"""
         for item in self.tree.get_children():
             self.tree.delete(item)
-        items = db_manager.get_all_items()
+        items = db_manager.get_reference_rows("items")
         for item in items:
             gst_display = f"{item['gst_rate']:.2f}" if item['gst_rate'] is not None else "N/A"
             tree_values = (item['id'], item['name'], item['category'], item['unit_name'], item['hsn_code'], gst_display, f"{item['purchase_price']:.2f}", f"{item['selling_price']:.2f}", item['default_warranty_months'], item['minimum_stock_level'])
@@ -310,7 +310,7 @@ class ItemFrame(ctk.CTkFrame):
     def load_data(self):
         """Load all necessary data from DB and populate the form and treeview."""
         # Load units
-        all_units = db_manager.get_all_units()
+        all_units = db_manager.get_reference_rows("units")
         self.unit_map = {unit['name']: unit['id'] for unit in all_units}
         self.unit_id_map = {unit['id']: unit['name'] for unit in all_units}
         self.unit_option_menu.configure(values=list(self.unit_map.keys()))
@@ -322,7 +322,7 @@ class ItemFrame(ctk.CTkFrame):
         self.hsn_option_menu.configure(values=[""] + list(self.hsn_map.keys()))
 
         # Load GST slabs
-        all_slabs = db_manager.get_all_gst_slabs()
+        all_slabs = db_manager.get_reference_rows("gst_slabs")
         self.gst_slab_map = {f"{s['rate']}%": s['id'] for s in all_slabs}
         self.gst_slab_id_map = {s['id']: f"{s['rate']}%" for s in all_slabs}
         self.gst_option_menu.configure(values=list(self.gst_slab_map.keys()))
@@ -330,7 +330,7 @@ class ItemFrame(ctk.CTkFrame):
         # Load items into treeview
         for item in self.tree.get_children():
             self.tree.delete(item)
-        items = db_manager.get_all_items()
+        items = db_manager.get_reference_rows("items")
         for item in items:
             gst_display = f"{item['gst_rate']:.2f}" if item['gst_rate'] is not None else "N/A"
             tree_values = (item['id'], item['name'], item['category'], item['unit_name'], item['hsn_code'], gst_display, f"{item['purchase_price']:.2f}", f"{item['selling_price']:.2f}", item['default_warranty_months'], item['minimum_stock_level'])
@@ -427,8 +427,7 @@ class ItemFrame(ctk.CTkFrame):
         selected_item_id = self.tree.focus()
         if not selected_item_id: return
 
-        item_data = db_manager.get_all_items() # Inefficient, but simple. Better to get one item by ID.
-        selected_item = next((item for item in item_data if item['id'] == int(self.tree.item(selected_item_id, "values")[0])), None)
+        selected_item = db_manager.get_reference_row("items", int(self.tree.item(selected_item_id, "values")[0]))
 
         if selected_item:
             self.clear_form()
@@ -1,8 +1,6 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox, simpledialog
 import db_manager
-import pdf_generator
-from pdf_generator import generate_job_sheet_pdf
 import os
 import datetime
 
@@ -244,8 +242,40 @@ Accessories: {', '.join([a['name'] for a in accessories]) if accessories else 'N
         
         ctk.CTkButton(button_frame, text="Update Status", command=lambda: self.update_job_status_dialog(sheet)).pack(side="left", padx=5)
         ctk.CTkButton(button_frame, text="Print Slip", command=lambda: self.print_job_sheet_slip(sheet)).pack(side="left", padx=5)
+        if sheet_details['serial_number_id']:
+            ctk.CTkButton(button_frame, text="Trace Serial", command=lambda: self.show_serial_trace(sheet_details['product_serial'])).pack(side="left", padx=5)
         ctk.CTkButton(button_frame, text="Close", command=details_window.destroy).pack(side="right", padx=5)
 
+    def show_serial_trace(self, serial_number):
+        """Show where a serial came from, what it was built into and its service history"""
+        lineage, service_history = db_manager.get_serial_traceability(serial_number)
+
+        trace_window = ctk.CTkToplevel(self)
+        trace_window.title(f"Trace: {serial_number}")
+        trace_window.geometry("600x450")
+        trace_window.transient(self)
+        trace_window.grab_set()
+
+        lines = []
+        for row in lineage:
+            relation = "This unit" if row['depth'] == 0 else ("Built into" if row['depth'] > 0 else "Built from")
+            lines.append(f"{'    ' * abs(row['depth'])}{relation}: {row['item_name']} (SN: {row['serial_number']}) - {row['status']}")
+            if row['purchase_invoice_number']:
+                lines.append(f"{'    ' * abs(row['depth'])}    Purchased {row['purchase_date']} from {row['supplier_name']}, Inv #{row['purchase_invoice_number']}")
+            if row['assembly_date'] and row['depth'] > 0:
+                lines.append(f"{'    ' * abs(row['depth'])}    Assembled {row['assembly_date']}")
+            if row['sales_invoice_number']:
+                lines.append(f"{'    ' * abs(row['depth'])}    Sold {row['sale_date']} to {row['customer_name']}, Inv #{row['sales_invoice_number']}, warranty until {row['warranty_end_date'] or 'N/A'}")
+        lines.append("")
+        lines.append("Service History:")
+        lines.extend(f"    {job['received_date']} {job['job_number'] or job['id']} ({job['serial_number']}): {job['reported_problem']} - {job['status']}"
+                     for job in service_history)
+
+        trace_frame = ctk.CTkScrollableFrame(trace_window)
+        trace_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        ctk.CTkLabel(trace_frame, text="\n".join(lines), justify="left", font=ctk.CTkFont(size=12)).pack(anchor="w")
+        ctk.CTkButton(trace_window, text="Close", command=trace_window.destroy).pack(pady=10)
+
     def update_job_status_dialog(self, sheet):
         """Show dialog to update job sheet status"""
         new_status = simpledialog.askstring("Update Status", 
@@ -276,6 +306,7 @@ Accessories: {', '.join([a['name'] for a in accessories]) if accessories else 'N
             os.makedirs("job_slips")
 
         filename = f"job_slips/Job_Sheet_{sheet['id']}.pdf"
+        from pdf_generator import generate_job_sheet_pdf  # reportlab loads on the first slip, not at startup
         generate_job_sheet_pdf(filename, pdf_data)
         messagebox.showinfo("Success", f"PDF slip generated: {filename}")
 
@@ -355,6 +386,7 @@ Est. Cost: {sheet['estimated_cost']:.2f} | Est. Timeline: {sheet['estimated_time
             os.makedirs("job_slips")
 
         filename = f"job_slips/Job_Sheet_{sheet_id}.pdf"
+        from pdf_generator import generate_job_sheet_pdf
         generate_job_sheet_pdf(filename, pdf_data)
         messagebox.showinfo("Success", f"PDF slip generated: {filename}")
 
@@ -417,13 +449,13 @@ class NewJobSheetWindow(ctk.CTkToplevel):
         ctk.CTkButton(button_frame, text="Cancel", command=self.destroy).pack(side="left", padx=5)
 
     def load_customers(self):
-        self.customers = db_manager.get_all_customers()
+        self.customers = db_manager.get_reference_rows("customers")
         self.customer_combo.configure(values=[c['name'] for c in self.customers])
 
     def save(self):
         # Get all data from form
         cust_name = self.customer_combo.get()
-        customer = next((c for c in self.customers if c['name'] == cust_name), None)
+        customer = db_manager.find_reference_row("customers", cust_name)
         if not customer: 
             return messagebox.showerror("Error", "Please select a valid customer.")
 
@@ -75,11 +75,11 @@ class PartyMasterFrame(ctk.CTkFrame):
         for item in self.party_tree.get_children():
             self.party_tree.delete(item)
 
-        customers = db_manager.get_all_customers()
+        customers = db_manager.get_reference_rows("customers")
         for cust in customers:
             self.party_tree.insert("", "end", values=(cust['id'], cust['name'], "Customer"), tags=("Customer",))
 
-        suppliers = db_manager.get_all_suppliers()
+        suppliers = db_manager.get_reference_rows("suppliers")
         for supp in suppliers:
             self.party_tree.insert("", "end", values=(supp['id'], supp['name'], "Supplier"), tags=("Supplier",))
 
@@ -103,11 +103,9 @@ class PartyMasterFrame(ctk.CTkFrame):
 
         # Fetch full details
         if party_type == "Customer":
-            # In a real scenario, we'd have a get_customer_by_id function.
-            # For now, we'll filter the full list.
-            party = next((c for c in db_manager.get_all_customers() if c['id'] == int(party_id)), None)
+            party = db_manager.get_reference_row("customers", int(party_id))
         else: # Supplier
-            party = next((s for s in db_manager.get_all_suppliers() if s['id'] == int(party_id)), None)
+            party = db_manager.get_reference_row("suppliers", int(party_id))
 
         if not party:
             ctk.CTkLabel(self.tab_view.tab("Profile"), text="Could not load party details.").pack(pady=20)
@@ -167,8 +165,7 @@ class PartyMasterFrame(ctk.CTkFrame):
     def generate_statement(self, party_id, party_type, start_date, end_date):
         import pdf_generator # Import here to avoid circular dependency issues at startup
 
-        party_details = db_manager.get_all_customers() if party_type == "Customer" else db_manager.get_all_suppliers()
-        party = next((p for p in party_details if p['id'] == party_id), None)
+        party = db_manager.get_reference_row("customers" if party_type == "Customer" else "suppliers", party_id)
 
         if not party: return messagebox.showerror("Error", "Could not find party details.", parent=self)
 
@@ -1,5 +1,6 @@
 import customtkinter as ctk
 from tkinter import messagebox
+import db_manager
 
 class PaymentAllocationDialog(ctk.CTkToplevel):
     def __init__(self, parent, invoices, payment_amount):
@@ -49,13 +50,14 @@ class PaymentAllocationDialog(ctk.CTkToplevel):
         total_allocated = 0
         for inv_id, entry in self.entries.items():
             try:
-                total_allocated += float(entry.get() or 0)
+                total_allocated += db_manager.to_paise(float(entry.get() or 0))
             except ValueError:
                 pass
-        unallocated = self.payment_amount - total_allocated
+        unallocated = db_manager.to_rupees(db_manager.to_paise(self.payment_amount) - total_allocated)
         self.unallocated_label.configure(text=f"Unallocated: {unallocated:.2f}")
 
     def on_ok(self):
+        # Compared in paise, as stored, so paying exactly the amount due is never off by a rounding error.
         total_allocated = 0
         temp_allocations = []
         for inv_id, entry in self.entries.items():
@@ -63,18 +65,18 @@ class PaymentAllocationDialog(ctk.CTkToplevel):
                 amount = float(entry.get() or 0)
                 if amount > 0:
                     invoice = next(inv for inv in self.invoices if inv['id'] == inv_id)
-                    due = invoice['total_amount'] - invoice['amount_paid']
-                    if amount > due + 0.001: # Add tolerance for float issues
-                        messagebox.showerror("Error", f"Cannot apply {amount:.2f} to Invoice #{invoice['invoice_number']}. Amount due is {due:.2f}.", parent=self)
+                    due = db_manager.to_paise(invoice['total_amount']) - db_manager.to_paise(invoice['amount_paid'])
+                    if db_manager.to_paise(amount) > due:
+                        messagebox.showerror("Error", f"Cannot apply {amount:.2f} to Invoice #{invoice['invoice_number']}. Amount due is {db_manager.to_rupees(due):.2f}.", parent=self)
                         return
-                    total_allocated += amount
+                    total_allocated += db_manager.to_paise(amount)
                     temp_allocations.append((inv_id, amount))
             except ValueError:
                 messagebox.showerror("Error", "Please enter valid numbers for allocation.", parent=self)
                 return
 
-        if total_allocated > self.payment_amount + 0.001:
-            messagebox.showerror("Error", f"Total allocated amount ({total_allocated:.2f}) cannot exceed the payment amount ({self.payment_amount:.2f}).", parent=self)
+        if total_allocated > db_manager.to_paise(self.payment_amount):
+            messagebox.showerror("Error", f"Total allocated amount ({db_manager.to_rupees(total_allocated):.2f}) cannot exceed the payment amount ({self.payment_amount:.2f}).", parent=self)
             return
 
         self._allocations = temp_allocations
@@ -1,6 +1,7 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
 import db_manager
+from task_runner import TaskRunner
 from ui_serial_dialog import SerialEntryDialog
 import datetime
 
@@ -18,6 +19,7 @@ XERO_ORANGE = "#F59E0B"
 class PurchaseFrame(ctk.CTkFrame):
     def __init__(self, master):
         super().__init__(master, corner_radius=0, fg_color=XERO_LIGHT_GRAY)
+        self.tasks = TaskRunner(self)
         self.invoice_items = []
         self.current_item_units = []
         self.create_widgets()
@@ -424,8 +426,8 @@ class PurchaseFrame(ctk.CTkFrame):
     def load_data(self):
         """Load data for the purchase form"""
         # Load suppliers and items
-        self.suppliers = db_manager.get_all_suppliers()
-        self.items = db_manager.get_all_items()
+        self.suppliers = db_manager.get_reference_rows("suppliers")
+        self.items = db_manager.get_reference_rows("items")
         
         if hasattr(self, 'supplier_combo'):
             self.supplier_combo.configure(values=[s['name'] for s in self.suppliers])
@@ -515,7 +517,8 @@ class PurchaseFrame(ctk.CTkFrame):
             if len(serials) != int(base_quantity):
                 return  # User cancelled or did not enter all serials
 
-        gst_amount = (qty * price) * (item['gst_rate'] / 100)
+        taxable_value = db_manager.to_rupees(db_manager.to_paise(qty * price))
+        taxes = db_manager.calculate_gst(taxable_value, item['gst_rate'])
         self.invoice_items.append({
             "item_id": item['id'], "item_name": selected_item_name,
             "quantity": base_quantity,  # Store quantity in base unit
@@ -523,7 +526,9 @@ class PurchaseFrame(ctk.CTkFrame):
             "display_unit": selected_unit_name,  # For display
             "purchase_price": price / conversion_factor,  # Store price per base unit
             "display_price": price,  # For display
-            "gst_rate": item['gst_rate'], "gst_amount": gst_amount,
+            "gst_rate": item['gst_rate'], "gst_amount": taxes['total_gst_amount'],
+            "taxable_value": taxable_value, "cgst_rate": (item['gst_rate'] or 0) / 2, "sgst_rate": (item['gst_rate'] or 0) / 2,
+            **taxes,
             "serial_numbers": serials, "godown_id": 1  # Hardcoded godown for now
         })
         
@@ -538,7 +543,7 @@ class PurchaseFrame(ctk.CTkFrame):
         
         for item in self.invoice_items:
             serials_str = ", ".join(item['serial_numbers']) if item['serial_numbers'] else "N/A"
-            total = (item['display_quantity'] * item['display_price']) + item['gst_amount']
+            total = item['taxable_value'] + item['gst_amount']
             self.items_tree.insert("", "end", values=(
                 item['item_name'], 
                 item['display_quantity'], 
@@ -551,7 +556,7 @@ class PurchaseFrame(ctk.CTkFrame):
 
     def update_total(self):
         """Update the total amount display"""
-        total = sum((i['display_quantity'] * i['display_price']) + i['gst_amount'] for i in self.invoice_items)
+        total = db_manager.to_rupees(sum(db_manager.to_paise(i['taxable_value']) + db_manager.to_paise(i['gst_amount']) for i in self.invoice_items))
         self.total_label.configure(text=f"Total: ₹{total:,.2f}")
 
     def clear_invoice(self):
@@ -564,6 +569,8 @@ class PurchaseFrame(ctk.CTkFrame):
 
     def save_invoice(self):
         """Save the purchase invoice"""
+        if self.tasks.is_busy("save"):
+            return
         supplier_name = self.supplier_combo.get()
         invoice_no = self.invoice_no_entry.get().strip()
         invoice_date = self.invoice_date_entry.get().strip()
@@ -574,30 +581,42 @@ class PurchaseFrame(ctk.CTkFrame):
         if not self.invoice_items:
             return messagebox.showerror("Error", "Please add at least one item to the invoice.", parent=self)
 
-        supplier = next((s for s in self.suppliers if s['name'] == supplier_name), None)
+        supplier = db_manager.find_reference_row("suppliers", supplier_name)
         if not supplier:
             return messagebox.showerror("Error", "Invalid supplier selected.", parent=self)
 
-        total_amount = sum((i['display_quantity'] * i['display_price']) + i['gst_amount'] for i in self.invoice_items)
-        total_gst = sum(i['gst_amount'] for i in self.invoice_items)
+        # Header totals are summed in paise so they equal the lines exactly.
+        totals = {field: sum(db_manager.to_paise(i[field]) for i in self.invoice_items)
+                  for field in ('taxable_value', 'cgst_amount', 'sgst_amount', 'igst_amount', 'total_gst_amount')}
 
         invoice_data = {
             "supplier_id": supplier['id'], 
             "invoice_number": invoice_no, 
             "invoice_date": invoice_date,
-            "total_amount": total_amount, 
-            "gst_amount": total_gst,
+            "total_amount": db_manager.to_rupees(totals['taxable_value'] + totals['total_gst_amount']),
+            "taxable_amount": db_manager.to_rupees(totals['taxable_value']),
+            "cgst_amount": db_manager.to_rupees(totals['cgst_amount']),
+            "sgst_amount": db_manager.to_rupees(totals['sgst_amount']),
+            "igst_amount": db_manager.to_rupees(totals['igst_amount']),
+            "total_gst_amount": db_manager.to_rupees(totals['total_gst_amount']),
             "notes": self.notes_entry.get().strip()
         }
 
-        # The backend expects quantity and price per base unit
-        invoice_id = db_manager.create_purchase_invoice_transaction(invoice_data, self.invoice_items)
+        # The backend expects quantity and price per base unit. The writer may be busy
+        # with other terminals, so the result is picked up off the Tk thread.
+        self.tasks.watch("save", db_manager.submit_posting('purchase', invoice_data, list(self.invoice_items)),
+                         on_result=self._invoice_saved, on_error=self._save_failed, on_busy=self._set_saving)
 
-        if invoice_id:
-            messagebox.showinfo("Success", f"Purchase Invoice #{invoice_id} saved successfully.", parent=self)
-            self.load_data()
-        else:
-            messagebox.showerror("Error", "Failed to save invoice. Check logs for details.", parent=self)
+    def _invoice_saved(self, invoice_id):
+        messagebox.showinfo("Success", f"Purchase Invoice #{invoice_id} saved successfully.", parent=self)
+        self.load_data()
+
+    def _save_failed(self, error):
+        print(f"Error posting purchase: {error}")
+        messagebox.showerror("Error", "Failed to save invoice. Check logs for details.", parent=self)
+
+    def _set_saving(self, busy):
+        self.save_button.configure(state="disabled" if busy else "normal", text="Saving..." if busy else "Save Purchase Invoice")
 
     def load_data_public(self):
         """Public method to be called when switching to this frame"""
@@ -444,12 +444,15 @@ class SalesFrame(ctk.CTkFrame):
                 return
             
             # Add item to invoice (simplified)
+            taxable = db_manager.to_rupees(db_manager.to_paise(price * qty))
+            tax = db_manager.calculate_gst(taxable, 18)['total_gst_amount']  # 18% GST
             item_data = {
                 "name": item_name,
                 "qty": qty,
                 "price": price,
-                "tax": price * qty * 0.18,  # 18% GST
-                "total": price * qty * 1.18
+                "taxable": taxable,
+                "tax": tax,
+                "total": db_manager.to_rupees(db_manager.to_paise(taxable) + db_manager.to_paise(tax))
             }
             
             self.invoice_items.append(item_data)
@@ -500,9 +503,12 @@ class SalesFrame(ctk.CTkFrame):
 
     def update_totals(self):
         """Update invoice totals"""
-        subtotal = sum(item["price"] * item["qty"] for item in self.invoice_items)
-        tax_total = sum(item["tax"] for item in self.invoice_items)
-        total = subtotal + tax_total
+        # Summed in paise so the totals match the lines exactly.
+        subtotal_paise = sum(db_manager.to_paise(item["taxable"]) for item in self.invoice_items)
+        tax_paise = sum(db_manager.to_paise(item["tax"]) for item in self.invoice_items)
+        subtotal = db_manager.to_rupees(subtotal_paise)
+        tax_total = db_manager.to_rupees(tax_paise)
+        total = db_manager.to_rupees(subtotal_paise + tax_paise)
         
         self.subtotal_label.configure(text=f"₹{subtotal:,.2f}")
         self.tax_total_label.configure(text=f"₹{tax_total:,.2f}")
@@ -550,11 +556,11 @@ class SalesFrame(ctk.CTkFrame):
     def load_data(self):
         """Load data for the sales frame"""
         # Load customers
-        self.customers = db_manager.get_all_customers()
+        self.customers = db_manager.get_reference_rows("customers")
         self.customer_combo.configure(values=[c['name'] for c in self.customers])
         
         # Load items for item selection
-        self.items = db_manager.get_all_items()
+        self.items = db_manager.get_reference_rows("items")
         
         # Set invoice number
         self.invoice_no_label.configure(text=db_manager.get_next_invoice_number())
@@ -1,10 +1,15 @@
 import customtkinter as ctk
 from tkinter import ttk
 import db_manager
+from task_runner import TaskRunner
+
+# Wait this long after the last keystroke before looking up suggestions.
+DEBOUNCE_MS = 150
 
 class SearchFrame(ctk.CTkFrame):
     def __init__(self, master):
         super().__init__(master)
+        self.tasks = TaskRunner(self)
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
 
@@ -18,10 +23,17 @@ class SearchFrame(ctk.CTkFrame):
         self.search_entry = ctk.CTkEntry(self.search_entry_frame, textvariable=self.search_var)
         self.search_entry.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
         self.search_entry.bind("<Return>", self.perform_search)
+        self.search_var.trace_add("write", self._on_type)
+        self._debounce_id = None
 
         self.search_button = ctk.CTkButton(self.search_entry_frame, text="Search", command=self.perform_search)
         self.search_button.grid(row=0, column=2, padx=10, pady=10)
 
+        self.more_button = ctk.CTkButton(self.search_entry_frame, text="More Results", command=self.load_more, state="disabled")
+        self.more_button.grid(row=0, column=3, padx=10, pady=10)
+        self.current_term = ""
+        self.loaded_count = 0
+
         # --- Results Treeview ---
         self.tree_frame = ctk.CTkFrame(self)
         self.tree_frame.grid(row=1, column=0, padx=10, pady=(0, 10), sticky="nsew")
@@ -48,22 +60,69 @@ class SearchFrame(ctk.CTkFrame):
         self.tree.configure(xscrollcommand=xscroll.set)
 
 
+    def _on_type(self, *args):
+        if self._debounce_id is not None:
+            self.after_cancel(self._debounce_id)
+        self._debounce_id = self.after(DEBOUNCE_MS, self.suggest)
+
+    def suggest(self):
+        """Shows prefix matches for what has been typed so far; Return runs the full search."""
+        self._debounce_id = None
+        prefix = self.search_var.get()
+        if not prefix.strip():
+            self.tasks.cancel("search")
+            self._show_results([])
+            return
+        self.current_term = ""
+        self.tasks.submit("search", db_manager.search_suggestions, prefix, on_result=self._show_suggestions)
+
+    def _show_suggestions(self, results):
+        self._show_results(results)
+        self.more_button.configure(state="disabled")
+
     def perform_search(self, event=None):
+        if self._debounce_id is not None:
+            self.after_cancel(self._debounce_id)
+            self._debounce_id = None
         search_term = self.search_var.get()
         if not search_term:
             return
+        self.current_term = search_term
+        # A new search replaces one that is still running.
+        self.tasks.submit("search", db_manager.universal_search, search_term, db_manager.SEARCH_PAGE_SIZE, 0,
+                          on_result=self._show_results, on_busy=self._set_busy)
+
+    def load_more(self):
+        """Appends the next page of results for the current search term."""
+        if not self.current_term:
+            return
+        self.tasks.submit("search", db_manager.universal_search, self.current_term,
+                          db_manager.SEARCH_PAGE_SIZE, self.loaded_count,
+                          on_result=self._append_results, on_busy=self._set_busy)
+
+    def _set_busy(self, busy):
+        self.search_button.configure(text="Searching..." if busy else "Search")
 
+    def _show_results(self, results):
         # Clear previous results
         for item in self.tree.get_children():
             self.tree.delete(item)
+        self.loaded_count = 0
+        self._append_results(results)
 
-        # Fetch new results
-        results = db_manager.universal_search(search_term)
+    def _append_results(self, results):
         for res in results:
             self.tree.insert("", "end", values=(res['type'], res['summary'], res['details']))
+        self.loaded_count += len(results)
+        # A full page means there may be more.
+        self.more_button.configure(state="normal" if len(results) == db_manager.SEARCH_PAGE_SIZE else "disabled")
 
     def load_data(self):
         # This can be used to clear the search when the frame is shown
+        self.tasks.cancel("search")
         self.search_var.set("")
+        self.current_term = ""
+        self.loaded_count = 0
+        self.more_button.configure(state="disabled")
         for item in self.tree.get_children():
             self.tree.delete(item)
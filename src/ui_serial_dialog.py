@@ -1,5 +1,6 @@
 import customtkinter as ctk
 from tkinter import messagebox
+import db_manager
 
 class SerialEntryDialog(ctk.CTkToplevel):
     def __init__(self, parent, quantity):
@@ -8,7 +9,6 @@ class SerialEntryDialog(ctk.CTkToplevel):
         self.title("Enter Serial Numbers")
         self.quantity = quantity
         self._serials = []
-        self.entries = []
 
         # Center the dialog on the parent window
         parent_geo = parent.winfo_geometry()
@@ -20,17 +20,12 @@ class SerialEntryDialog(ctk.CTkToplevel):
         self.geometry(f"{dialog_width}x{dialog_height}+{x}+{y}")
 
 
-        self.label = ctk.CTkLabel(self, text=f"Please enter {quantity} unique serial numbers:")
+        self.label = ctk.CTkLabel(self, text=f"Please enter {quantity} unique serial numbers,\none per line or comma-separated. Ranges like SN0001-SN0500 are expanded.")
         self.label.pack(padx=20, pady=(20, 10))
 
-        # Frame for scrollable entries
-        self.scrollable_frame = ctk.CTkScrollableFrame(self, height=200)
-        self.scrollable_frame.pack(padx=15, pady=5, fill="x", expand=True)
-
-        for i in range(quantity):
-            entry = ctk.CTkEntry(self.scrollable_frame, width=350)
-            entry.pack(padx=10, pady=4)
-            self.entries.append(entry)
+        # One text box rather than an entry per unit, so a whole container can be pasted or given as a range.
+        self.serials_text = ctk.CTkTextbox(self, height=150)
+        self.serials_text.pack(padx=15, pady=5, fill="both", expand=True)
 
         button_frame = ctk.CTkFrame(self)
         button_frame.pack(pady=(10, 20), fill="x")
@@ -44,19 +39,24 @@ class SerialEntryDialog(ctk.CTkToplevel):
         self.grab_set() # Make the dialog modal
         self.protocol("WM_DELETE_WINDOW", self.on_cancel)
 
-        self.after(250, lambda: self.entries[0].focus()) # Set focus to the first entry
+        self.after(250, lambda: self.serials_text.focus()) # Set focus to the text box
         self.wait_window() # Wait until the dialog is closed
 
     def on_ok(self):
-        serials = [entry.get().strip() for entry in self.entries]
+        try:
+            serials = db_manager.expand_serial_numbers(self.serials_text.get("1.0", "end"))
+        except ValueError as e:
+            messagebox.showerror("Error", str(e), parent=self)
+            return
 
         # Validation
-        if any(not sn for sn in serials):
-            messagebox.showerror("Error", "All serial number fields must be filled.", parent=self)
+        if len(serials) != self.quantity:
+            messagebox.showerror("Error", f"Expected {self.quantity} serial numbers, got {len(serials)}.", parent=self)
             return
 
-        if len(set(serials)) != len(serials):
-            messagebox.showerror("Error", "All serial numbers must be unique within this entry.", parent=self)
+        conflicts = db_manager.describe_serial_conflicts(*db_manager.find_serial_conflicts(serials))
+        if conflicts:
+            messagebox.showerror("Error", conflicts, parent=self)
             return
 
         self._serials = serials
@@ -109,15 +109,19 @@ class SettingsFrame(ctk.CTkFrame):
         self._create_setting_entry(tab, "prefix_sales_invoice", "Sales Invoice Prefix:", 1)
         self._create_setting_entry(tab, "prefix_quotation", "Quotation Prefix:", 2)
         self._create_setting_entry(tab, "prefix_purchase_invoice", "Purchase Invoice Prefix:", 3)
+        self._create_setting_entry(tab, "prefix_job_sheet", "Job Sheet Prefix:", 4)
+        self._create_setting_entry(tab, "prefix_customer_payment", "Receipt Prefix:", 5)
+        self._create_setting_entry(tab, "prefix_supplier_payment", "Payment Prefix:", 6)
+        self._create_setting_entry(tab, "prefix_assembly", "Assembly Serial Prefix:", 7)
 
-        ctk.CTkLabel(tab, text="Bank Details for Invoices", font=ctk.CTkFont(weight="bold")).grid(row=4, column=0, columnspan=2, pady=(20,5), sticky="w")
-        self._create_setting_entry(tab, "bank_account_name", "Account Name:", 5)
-        self._create_setting_entry(tab, "bank_account_number", "Account Number:", 6)
-        self._create_setting_entry(tab, "bank_ifsc_code", "IFSC Code:", 7)
+        ctk.CTkLabel(tab, text="Bank Details for Invoices", font=ctk.CTkFont(weight="bold")).grid(row=8, column=0, columnspan=2, pady=(20,5), sticky="w")
+        self._create_setting_entry(tab, "bank_account_name", "Account Name:", 9)
+        self._create_setting_entry(tab, "bank_account_number", "Account Number:", 10)
+        self._create_setting_entry(tab, "bank_ifsc_code", "IFSC Code:", 11)
 
-        ctk.CTkLabel(tab, text="Terms & Conditions", font=ctk.CTkFont(weight="bold")).grid(row=8, column=0, columnspan=2, pady=(20,5), sticky="w")
+        ctk.CTkLabel(tab, text="Terms & Conditions", font=ctk.CTkFont(weight="bold")).grid(row=12, column=0, columnspan=2, pady=(20,5), sticky="w")
         self.terms_textbox = ctk.CTkTextbox(tab, height=150)
-        self.terms_textbox.grid(row=9, column=0, columnspan=3, padx=10, pady=5, sticky="nsew")
+        self.terms_textbox.grid(row=13, column=0, columnspan=3, padx=10, pady=5, sticky="nsew")
         # Note: CTkTextbox doesn't have a simple textvariable, so we handle it separately.
 
     def create_data_tab(self, tab):
@@ -160,6 +164,12 @@ class SettingsFrame(ctk.CTkFrame):
         ctk.CTkOptionMenu(tab, variable=self.setting_vars['default_startup_screen'], values=startup_screens).grid(row=4, column=1, padx=10, pady=5, sticky="w")
         ctk.CTkLabel(tab, text="Default Startup Screen:").grid(row=4, column=0, padx=10, pady=5, sticky="w")
 
+        ctk.CTkLabel(tab, text="Inventory", font=ctk.CTkFont(weight="bold")).grid(row=5, column=0, columnspan=2, pady=(20,5), sticky="w")
+        # Applies to postings from now on; 'maintenance.py recost' revalues earlier ones.
+        self.setting_vars[db_manager.COSTING_METHOD_SETTING] = ctk.StringVar()
+        ctk.CTkOptionMenu(tab, variable=self.setting_vars[db_manager.COSTING_METHOD_SETTING], values=list(db_manager.COSTING_METHODS)).grid(row=6, column=1, padx=10, pady=5, sticky="w")
+        ctk.CTkLabel(tab, text="Costing Method:").grid(row=6, column=0, padx=10, pady=5, sticky="w")
+
     def browse_file(self, entry_widget):
         path = filedialog.askopenfilename(title="Select Logo File", filetypes=(("Image Files", "*.png *.jpg *.jpeg *.gif"), ("All files", "*.*")))
         if path:
@@ -171,6 +181,8 @@ class SettingsFrame(ctk.CTkFrame):
         all_settings = db_manager.get_all_settings()
         for key, var in self.setting_vars.items():
             var.set(all_settings.get(key, ""))
+        if self.setting_vars[db_manager.COSTING_METHOD_SETTING].get() not in db_manager.COSTING_METHODS:
+            self.setting_vars[db_manager.COSTING_METHOD_SETTING].set(db_manager.COSTING_FIFO)
 
         self.terms_textbox.delete("1.0", "end")
         self.terms_textbox.insert("1.0", all_settings.get("doc_terms_conditions", ""))
@@ -198,7 +210,7 @@ class SettingsFrame(ctk.CTkFrame):
 
         try:
             # This function will be created in db_manager.py
-            slabs = db_manager.get_all_gst_slabs()
+            slabs = db_manager.get_reference_rows("gst_slabs")
 
             # Header
             ctk.CTkLabel(self.slabs_list_frame, text="Rate (%)", font=ctk.CTkFont(weight="bold")).grid(row=0, column=0, padx=10, pady=2, sticky="w")
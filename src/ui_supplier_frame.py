@@ -405,7 +405,7 @@ class SupplierFrame(ctk.CTkFrame):
         self.supplier_cards = []
         
         # Get suppliers from database
-        suppliers = db_manager.get_all_suppliers()
+        suppliers = db_manager.get_reference_rows("suppliers")
         
         # Filter suppliers if search term provided
         if search_term:
@@ -559,7 +559,7 @@ class SupplierFrame(ctk.CTkFrame):
         for item in self.tree.get_children():
             self.tree.delete(item)
         
-        suppliers = db_manager.get_all_suppliers()
+        suppliers = db_manager.get_reference_rows("suppliers")
         
         # Filter suppliers if search term provided
         if search_term:
@@ -1,6 +1,7 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
 import db_manager
+from task_runner import TaskRunner
 from ui_payment_allocation_dialog import PaymentAllocationDialog
 import datetime
 
@@ -18,6 +19,7 @@ XERO_ORANGE = "#F59E0B"
 class SupplierPaymentFrame(ctk.CTkFrame):
     def __init__(self, master):
         super().__init__(master, corner_radius=0, fg_color=XERO_LIGHT_GRAY)
+        self.tasks = TaskRunner(self)
         self.create_widgets()
 
     def create_widgets(self):
@@ -244,7 +246,7 @@ class SupplierPaymentFrame(ctk.CTkFrame):
 
     def load_data(self):
         """Called when the frame is shown"""
-        self.suppliers = db_manager.get_all_suppliers()
+        self.suppliers = db_manager.get_reference_rows("suppliers")
         self.supplier_combo.configure(values=[s['name'] for s in self.suppliers])
         if self.suppliers:
             self.supplier_combo.set(self.suppliers[0]['name'])
@@ -263,7 +265,7 @@ class SupplierPaymentFrame(ctk.CTkFrame):
 
     def supplier_selected(self, supplier_name):
         """Handle supplier selection"""
-        supplier = next((s for s in self.suppliers if s['name'] == supplier_name), None)
+        supplier = db_manager.find_reference_row("suppliers", supplier_name)
         if supplier:
             self.clear_invoice_tree()
             invoices = db_manager.get_unpaid_purchase_invoices(supplier['id'])
@@ -303,6 +305,8 @@ class SupplierPaymentFrame(ctk.CTkFrame):
 
     def save_payment(self):
         """Save the supplier payment"""
+        if self.tasks.is_busy("save"):
+            return
         supplier_name = self.supplier_combo.get()
         amount_str = self.amount_entry.get()
         payment_date = self.date_entry.get()
@@ -319,7 +323,7 @@ class SupplierPaymentFrame(ctk.CTkFrame):
         except ValueError:
             return messagebox.showerror("Validation Error", "Payment amount must be a positive number.")
 
-        supplier = next((s for s in self.suppliers if s['name'] == supplier_name), None)
+        supplier = db_manager.find_reference_row("suppliers", supplier_name)
         if not supplier:
             return messagebox.showerror("Error", "Invalid supplier selected.")
 
@@ -334,11 +338,17 @@ class SupplierPaymentFrame(ctk.CTkFrame):
         if not allocations:
             return  # User cancelled or allocated nothing
 
-        # Save payment with allocations
-        payment_id = db_manager.record_supplier_payment(supplier['id'], payment_date, payment_amount, allocations)
+        # Save payment with allocations; the result comes back through the posting queue
+        self.tasks.watch("save", db_manager.submit_posting('supplier_payment', supplier['id'], payment_date, payment_amount, allocations),
+                         on_result=self._payment_saved, on_error=self._save_failed, on_busy=self._set_saving)
 
-        if payment_id:
-            messagebox.showinfo("Payment Recorded", f"Supplier payment successfully recorded with ID: {payment_id}")
-            self.load_data()  # Refresh the form
-        else:
-            messagebox.showerror("Error", "Failed to record payment. Please check the logs for details.")
+    def _payment_saved(self, payment_id):
+        messagebox.showinfo("Payment Recorded", f"Supplier payment successfully recorded with ID: {payment_id}")
+        self.load_data()  # Refresh the form
+
+    def _save_failed(self, error):
+        print(f"Error posting supplier_payment: {error}")
+        messagebox.showerror("Error", "Failed to record payment. Please check the logs for details.")
+
+    def _set_saving(self, busy):
+        self.save_button.configure(state="disabled" if busy else "normal", text="Saving..." if busy else "💳 Allocate & Save Payment")
@@ -85,7 +85,7 @@ class UnitFrame(ctk.CTkFrame):
         # Load simple units
         for item in self.simple_units_tree.get_children():
             self.simple_units_tree.delete(item)
-        self.all_units = db_manager.get_all_units()
+        self.all_units = db_manager.get_reference_rows("units")
         unit_names = []
         self.unit_map = {}
         for unit in self.all_units:
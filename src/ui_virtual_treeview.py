@@ -0,0 +1,200 @@
+import customtkinter as ctk
+from tkinter import ttk
+from collections import OrderedDict
+
+DEFAULT_ROW_HEIGHT = 20
+WHEEL_ROWS = 3
+
+class VirtualTreeview(ctk.CTkFrame):
+    """
+    A Treeview that shows a window onto a long result set without loading it.
+
+    fetch_page(cursor, limit, skip, reverse) returns (rows, next_cursor): the
+    rows after cursor (None means from the start, or from the end when
+    reverse is set, in which case rows come last-first), skipping `skip` of
+    them, and the cursor that continues after the last row (None when
+    exhausted). format_row(row) gives the column values for one row.
+
+    Only one screen of items ever exists in the Treeview. Missing pages are
+    fetched through tasks (a TaskRunner) while placeholder rows are shown,
+    each from whichever end of the list, or already-fetched page boundary, is
+    nearest. The most recent few pages are cached for scrolling back.
+    """
+    def __init__(self, master, columns, fetch_page, format_row, tasks, page_size=100, cached_pages=8, **kwargs):
+        super().__init__(master, fg_color="transparent", **kwargs)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self.fetch_page = fetch_page
+        self.format_row = format_row
+        self.tasks = tasks
+        self.placeholder = ("Loading...",) + ("",) * (len(columns) - 1)
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="browse")
+        for col in columns: self.tree.heading(col, text=col.replace("_", " ").title())
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_to(self.top - WHEEL_ROWS * (1 if e.delta > 0 else -1)))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_to(self.top - WHEEL_ROWS))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_to(self.top + WHEEL_ROWS))
+        self.tree.bind("<Up>", lambda e: self._move_focus(-1))
+        self.tree.bind("<Down>", lambda e: self._move_focus(1))
+        self.tree.bind("<Prior>", lambda e: self.scroll_to(self.top - self.visible_rows) or "break")
+        self.tree.bind("<Next>", lambda e: self.scroll_to(self.top + self.visible_rows) or "break")
+        self.tree.bind("<Home>", lambda e: self.scroll_to(0) or "break")
+        self.tree.bind("<End>", lambda e: self.scroll_to(self.total) or "break")
+
+        self.total = 0
+        self.top = 0
+        self.visible_rows = 20
+        self._pages = OrderedDict()  # page number -> rows, least recently used first
+        self._cursors = {0: None}  # row index -> cursor that reads forward from it
+        self._back_cursors = {0: None}  # row index -> cursor that reads backward from just before it
+        self._loading = set()  # page numbers being fetched
+        self._generation = 0  # bumped by reset(), so pages of an old result set are dropped
+        self._shown = {}  # item id -> row
+
+    def reset(self, total, first_page=None):
+        """Start over on a new result set of `total` rows, optionally with its first page already fetched."""
+        self.total = total
+        self.top = 0
+        self._generation += 1
+        for number in self._loading:
+            self.tasks.cancel(f"page-{number}")
+        self._loading.clear()
+        self._pages.clear()
+        self._cursors = {0: None}
+        self._back_cursors = {total: None}
+        if first_page is not None:
+            rows, next_cursor = first_page
+            self._store_page(0, rows)
+            if next_cursor is not None:
+                self._cursors[len(rows)] = next_cursor
+        self._render()
+
+    def selected_row(self):
+        """The row behind the focused item, or None."""
+        return self._shown.get(self.tree.focus())
+
+    def scroll_to(self, top):
+        top = max(0, min(top, self.total - self.visible_rows))
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def _store_page(self, number, rows):
+        self._pages[number] = rows
+        while len(self._pages) > self.cached_pages:
+            self._pages.popitem(last=False)
+
+    def _request_page(self, number):
+        """Starts fetching a page in the background, from whichever known position is closest."""
+        start = number * self.page_size
+        end = min(start + self.page_size, self.total)
+        ahead = max(i for i in self._cursors if i <= start)
+        behind = min((i for i in self._back_cursors if i >= end), default=None)
+        if behind is not None and behind - end < start - ahead:
+            args = (self._back_cursors[behind], end - start, behind - end, True)
+        else:
+            args = (self._cursors[ahead], self.page_size, start - ahead, False)
+        self._loading.add(number)
+        generation = self._generation
+        self.tasks.submit(f"page-{number}", self.fetch_page, *args,
+                          on_result=lambda result: self._page_loaded(generation, number, args[3], result),
+                          on_error=lambda e: self._page_failed(generation, number, e))
+
+    def _page_loaded(self, generation, number, reverse, result):
+        if generation != self._generation:
+            return
+        self._loading.discard(number)
+        rows, next_cursor = result
+        start = number * self.page_size
+        if reverse:
+            rows = rows[::-1]
+            if next_cursor is not None:
+                self._back_cursors[start] = next_cursor
+        elif next_cursor is not None:
+            self._cursors[start + len(rows)] = next_cursor
+        self._store_page(number, rows)
+        self._render()
+
+    def _page_failed(self, generation, number, error):
+        if generation == self._generation:
+            self._loading.discard(number)
+            print(f"Failed to load page {number}: {error}")
+
+    def _render(self):
+        visible = []
+        needed = set()
+        for index in range(self.top, min(self.top + self.visible_rows, self.total)):
+            number = index // self.page_size
+            page = self._pages.get(number)
+            if page is None:
+                needed.add(number)
+                visible.append(None)
+                continue
+            self._pages.move_to_end(number)
+            if index % self.page_size >= len(page):
+                break  # The data shrank since it was counted
+            visible.append(page[index % self.page_size])
+        # Pages scrolled past before they arrived are no longer worth fetching.
+        for number in self._loading - needed:
+            self.tasks.cancel(f"page-{number}")
+        self._loading &= needed
+        for number in needed - self._loading:
+            self._request_page(number)
+
+        # Reuse the same item ids so the Treeview never holds more than one screen.
+        children = self.tree.get_children()
+        for position, row in enumerate(visible):
+            iid = f"row{position}"
+            values = self.placeholder if row is None else self.format_row(row)
+            if position < len(children):
+                self.tree.item(iid, values=values)
+            else:
+                self.tree.insert("", "end", iid=iid, values=values)
+        if len(children) > len(visible):
+            self.tree.delete(*children[len(visible):])
+        self._shown = {f"row{position}": row for position, row in enumerate(visible) if row is not None}
+
+        if self.total:
+            self.scrollbar.set(self.top / self.total, (self.top + len(visible)) / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.total))
+        elif unit == "pages":
+            self.scroll_to(self.top + int(amount) * self.visible_rows)
+        else:
+            self.scroll_to(self.top + int(amount))
+
+    def _on_resize(self, event):
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT)
+        # One row's worth of height goes to the headings.
+        visible_rows = max(1, event.height // row_height - 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.top = max(0, min(self.top, self.total - self.visible_rows))
+            self._render()
+
+    def _move_focus(self, step):
+        """Arrow keys scroll the window when they would leave it."""
+        items = self.tree.get_children()
+        if not items:
+            return "break"
+        focus = self.tree.focus()
+        position = items.index(focus) if focus in items else 0
+        if 0 <= position + step < len(items):
+            return None  # Normal Treeview handling
+        self.scroll_to(self.top + step)
+        edge = items[-1] if step > 0 else items[0]
+        self.tree.focus(edge)
+        self.tree.selection_set(edge)
+        return "break"
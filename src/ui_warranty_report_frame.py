@@ -1,10 +1,12 @@
 import customtkinter as ctk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 import db_manager
+from task_runner import TaskRunner
 
 class WarrantyReportFrame(ctk.CTkFrame):
     def __init__(self, master):
         super().__init__(master, corner_radius=0)
+        self.tasks = TaskRunner(self)
         self.create_widgets()
 
     def create_widgets(self):
@@ -19,6 +21,8 @@ class WarrantyReportFrame(ctk.CTkFrame):
         options_frame.grid(row=0, column=0, padx=10, pady=10, sticky="e")
 
         self.days_ahead_var = ctk.StringVar(value="30")
+        self.status_label = ctk.CTkLabel(options_frame, text="")
+        self.status_label.pack(side="right", padx=10)
 
         rb30 = ctk.CTkRadioButton(options_frame, text="Next 30 Days", variable=self.days_ahead_var, value="30", command=self.load_data)
         rb30.pack(side="left", padx=10)
@@ -40,11 +44,17 @@ class WarrantyReportFrame(ctk.CTkFrame):
 
     def load_data(self):
         """Public method to be called when switching to this frame."""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
         days = int(self.days_ahead_var.get())
-        expiring_items = db_manager.get_expiring_warranties(days_ahead=days)
+        # Picking another range while one is loading replaces it.
+        self.tasks.submit("report", db_manager.get_expiring_warranties, days, on_result=self._show_warranties,
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to load warranty report: {e}", parent=self),
+                          on_busy=self._set_busy)
 
+    def _set_busy(self, busy):
+        self.status_label.configure(text="Loading..." if busy else "")
+
+    def _show_warranties(self, expiring_items):
+        for item in self.tree.get_children():
+            self.tree.delete(item)
         for item in expiring_items:
             self.tree.insert("", "end", values=tuple(item))